@@ -15,6 +15,7 @@ from application.rest_api.vcf_files.controllers import (
 )
 from application.infrastructure.sql.sqlalchemy import SQLAlchemyEngineWrapper
 from application.rest_api.rest_plus import api
+from application.vcf_files.compression import BlockCompressor
 
 
 def vcf_handler_api(name: str) -> Flask:
@@ -36,6 +37,9 @@ def vcf_handler_api(name: str) -> Flask:
     # from the rest of the application when needed by using its get_instance method.
     SQLAlchemyEngineWrapper(uri=configuration.postgresql_connection_uri)
 
+    # Initialize the BlockCompressor shared by the rewrites of the compressed VCF files of the process.
+    BlockCompressor.initialize(level=configuration.compression_level, threads=configuration.compression_threads)
+
     # Initialize the Flask application.
     flask_application = Flask(name)
 
@@ -0,0 +1,13 @@
+from application.infrastructure.configurations.models import Configuration
+
+# The gunicorn settings of the API, loaded with: gunicorn --config python:application.gunicorn_config.
+_configuration: Configuration = Configuration.initialize()
+
+# Each worker process serves api_threads requests at once, so the cheap requests are not queued behind the
+# requests that scan VCF files, whose scans run on the scan executor of the process.
+worker_class = 'gthread'
+workers = _configuration.api_workers
+threads = _configuration.api_threads
+
+# The application is loaded once, before the workers are forked, so they share its pages.
+preload_app = True
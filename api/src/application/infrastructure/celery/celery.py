@@ -2,6 +2,8 @@ import os
 
 from celery import Celery
 
+from application.infrastructure.celery.routing import FilePathRouter
+
 
 """
 Celery app singleton. Mostly used to decorate tasks.
@@ -10,3 +12,10 @@ celery_app = Celery('VCF Handler API')
 celery_app.conf.broker_url = os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379")
 celery_app.conf.result_backend = os.environ.get("CELERY_RESULT_BACKEND", "redis://localhost:6379")
 
+# Report the STARTED state of the tasks, the status of the jobs tells the started jobs from the pending ones.
+celery_app.conf.task_track_started = True
+
+# The tasks on VCF files are partitioned in that many queues by their file path, 0 leaves them to the default queue.
+celery_queue_partitions = int(os.environ.get("CELERY_QUEUE_PARTITIONS", "0"))
+if celery_queue_partitions:
+    celery_app.conf.task_routes = (FilePathRouter(partitions=celery_queue_partitions),)
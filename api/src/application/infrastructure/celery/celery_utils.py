@@ -12,3 +12,5 @@ def init_celery(celery: Celery, app: Flask):
                 return TaskBase.__call__(self, *args, **kwargs)
 
     celery.Task = ContextTast
+
+    return celery
@@ -0,0 +1,122 @@
+import bisect
+import hashlib
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from application.infrastructure.error.errors import InvalidArgumentError
+
+# The names of the partitioned queues of the tasks on VCF files, followed by the partition number.
+PARTITION_QUEUE_PREFIX = 'vcf-files.'
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class ConsistentHashRing:
+    """
+    Maps keys to nodes with consistent hashing: every node is placed on a hash ring many times (its replicas),
+    and a key belongs to the first node after it on the ring.
+
+    Adding or removing a node only moves the keys of that node, about 1/N of them, the rest of the keys keep
+    their node.
+    """
+
+    def __init__(
+            self,
+            nodes: List[str],
+            replicas: int = 100,
+    ):
+        if not nodes:
+            raise InvalidArgumentError('At least one node is required.')
+        if replicas <= 0:
+            raise InvalidArgumentError('At least one replica is required.')
+
+        self.nodes = list(nodes)
+        points: List[Tuple[int, str]] = sorted(
+            (_hash('{}#{}'.format(node, replica)), node) for node in nodes for replica in range(replicas)
+        )
+        self._hashes: List[int] = [point for point, _ in points]
+        self._nodes: List[str] = [node for _, node in points]
+
+    def node_for(self, key: str) -> str:
+        """
+        :param key: The key.
+
+        :return: The node the key belongs to.
+        """
+        index: int = bisect.bisect(self._hashes, _hash(key))
+
+        return self._nodes[index % len(self._nodes)]
+
+
+def partition_queues(partitions: int) -> List[str]:
+    """
+    :param partitions: The number of partitions.
+
+    :return: The names of the partitioned queues.
+    """
+    return ['{}{}'.format(PARTITION_QUEUE_PREFIX, partition) for partition in range(partitions)]
+
+
+class FilePathRouter:
+    """
+    Celery router of the tasks on VCF files: routes every task with a VCF file path to one of the partitioned
+    queues, by a consistent hash of the path.
+
+    Every queue is consumed by a single worker process (see worker_queues), so the tasks on the same file run
+    one after the other, in the order they were sent, while the tasks on files of different queues run in
+    parallel. The rest of the tasks are left to the default queue.
+    """
+
+    def __init__(self, partitions: int):
+        if partitions <= 0:
+            raise InvalidArgumentError('At least one partition is required.')
+
+        self.ring = ConsistentHashRing(partition_queues(partitions))
+
+    def queue_for(self, vcf_file_path: str) -> str:
+        """
+        :param vcf_file_path: The VCF file path.
+
+        :return: The partitioned queue of the tasks on the file.
+        """
+        # The same file is spelled the same way, e.g. ./a/test.vcf and a/test.vcf.
+        return self.ring.node_for(os.path.normpath(vcf_file_path))
+
+    def __call__(
+            self,
+            name: str,
+            args: tuple,
+            kwargs: Optional[Dict[str, Any]],
+            options: Dict[str, Any],
+            task: Any = None,
+            **kw: Any,
+    ) -> Optional[Dict[str, str]]:
+        vcf_file_path: Optional[str] = (kwargs or {}).get('vcf_file_path')
+        if not vcf_file_path:
+            return None
+
+        return {'queue': self.queue_for(vcf_file_path)}
+
+
+def worker_queues(worker_index: int, worker_count: int, partitions: int) -> List[str]:
+    """
+    Assigns the partitioned queues to the workers by consistent hashing, so that every queue is consumed by
+    exactly one worker. When the number of workers changes, only about 1/N of the queues move to another worker.
+
+    :param worker_index: The index of the worker, from 0 to the worker count.
+    :param worker_count: The number of workers.
+    :param partitions: The number of partitions.
+
+    :return: The names of the partitioned queues the worker consumes.
+
+    :raise InvalidArgumentError: If the worker index is not one of the workers.
+    """
+    if not 0 <= worker_index < worker_count:
+        raise InvalidArgumentError('The worker index must be between 0 and {}.'.format(worker_count - 1))
+
+    ring = ConsistentHashRing(['worker-{}'.format(index) for index in range(worker_count)])
+    worker: str = 'worker-{}'.format(worker_index)
+
+    return [queue for queue in partition_queues(partitions) if ring.node_for(queue) == worker]
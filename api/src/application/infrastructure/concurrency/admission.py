@@ -0,0 +1,119 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, ContextManager, Iterator, Optional, TypeVar
+
+from application.infrastructure.error.errors import InvalidArgumentError, OverloadError
+
+T = TypeVar('T')
+
+
+class AdmissionController:
+    """
+    Caps the total estimated cost, in bytes read, of the expensive requests that run at once in a process.
+
+    A request is admitted as soon as its cost fits in what is left of max_bytes. Otherwise it waits up to
+    max_wait seconds for the running requests to release their cost, and is then rejected with an OverloadError,
+    which tells the client to retry after max_wait seconds. A request costing more than max_bytes on its own
+    is admitted once nothing else runs, and the requests costing nothing are always admitted.
+    """
+
+    def __init__(
+            self,
+            max_bytes: int = 2 * 1024 * 1024 * 1024,
+            max_wait: float = 1.0,
+    ):
+        if max_bytes is None or max_bytes <= 0:
+            raise InvalidArgumentError('A max bytes above 0 is required.')
+        if max_wait is None or max_wait < 0:
+            raise InvalidArgumentError('A max wait of at least 0 is required.')
+
+        self.max_bytes = max_bytes
+        self.max_wait = max_wait
+        self.retry_after: int = max(1, math.ceil(max_wait))
+
+        self._condition = threading.Condition()
+        self._in_flight_bytes = 0
+
+    @contextmanager
+    def admit(self, cost: int) -> Iterator[None]:
+        """
+        Holds the cost of a request while it runs.
+
+        :param cost: The estimated bytes the request reads.
+
+        :raise OverloadError: If the request could not be admitted within max_wait seconds.
+        """
+        cost = max(cost or 0, 0)
+        deadline: float = time.monotonic() + self.max_wait
+        with self._condition:
+            while self._in_flight_bytes and self._in_flight_bytes + cost > self.max_bytes:
+                remaining: float = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise OverloadError(
+                        'The server is busy with other file scans, please retry in {} seconds.'.format(
+                            self.retry_after
+                        ),
+                        retry_after=self.retry_after,
+                    )
+                self._condition.wait(remaining)
+            self._in_flight_bytes += cost
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight_bytes -= cost
+                self._condition.notify_all()
+
+    def admit_iterator(self, iterator: Iterator[T], cost: int) -> Iterator[T]:
+        """
+        Admits a lazily consumed iterator, e.g. the chunks of a streamed response, at once, so that a rejection
+        happens before anything is consumed, and holds its cost until it is exhausted, fails or is closed.
+
+        :param iterator: The iterator.
+        :param cost: The estimated bytes the iterator reads.
+
+        :return: The admitted iterator.
+
+        :raise OverloadError: If the iterator could not be admitted within max_wait seconds.
+        """
+        admission: ContextManager[None] = self.admit(cost)
+        admission.__enter__()
+
+        return _AdmittedIterator(iterator, admission)
+
+    def in_flight_bytes(self) -> int:
+        with self._condition:
+            return self._in_flight_bytes
+
+
+class _AdmittedIterator(Iterator[T]):
+    """
+    An iterator that releases its admission once it is exhausted, fails or is closed, whichever comes first.
+    """
+
+    def __init__(self, iterator: Iterator[T], admission: ContextManager[None]):
+        self._iterator = iterator
+        self._admission: Optional[ContextManager[None]] = admission
+
+    def __next__(self) -> T:
+        try:
+            return next(self._iterator)
+        except BaseException:
+            self._release()
+            raise
+
+    def close(self) -> None:
+        try:
+            close: Any = getattr(self._iterator, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        admission, self._admission = self._admission, None
+        if admission is not None:
+            admission.__exit__(None, None, None)
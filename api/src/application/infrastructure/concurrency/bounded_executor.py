@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from application.infrastructure.error.errors import InvalidArgumentError
+
+
+class BoundedExecutor:
+    """
+    Runs the heavy, blocking work of the requests, e.g. the scans of the VCF files, on a pool of max_workers
+    threads shared by the process.
+
+    With threaded workers, however many request threads there are, at most max_workers of them scan at once.
+    The rest of the threads keep the CPU and the disk for the cheap requests (logins, 304s, cache hits),
+    which are not offloaded and so never queue behind the scans.
+
+    The caller waits for its work and gets its result or its error. Work run from a thread of the pool itself,
+    e.g. nested work, runs inline, so it can not deadlock the pool. The pool is only started on first use, so
+    that it is not inherited by forked worker processes.
+    """
+
+    def __init__(
+            self,
+            max_workers: int = 4,
+            thread_name_prefix: str = 'bounded-executor',
+    ):
+        if max_workers is None or max_workers <= 0:
+            raise InvalidArgumentError('A max workers above 0 is required.')
+
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pool_thread = threading.local()
+
+    def run(self, func: Callable[[], Any]) -> Any:
+        """
+        Runs the func on the pool, once one of its threads is free.
+
+        :param func: The work to run.
+
+        :return: The result of the func.
+
+        :raise: Any error raised by the func.
+        """
+        if getattr(self._pool_thread, 'active', False):
+            return func()
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.thread_name_prefix,
+                    initializer=self._mark_pool_thread,
+                )
+
+        return self._executor.submit(func).result()
+
+    def _mark_pool_thread(self) -> None:
+        self._pool_thread.active = True
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
@@ -0,0 +1,110 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from application.infrastructure.error.errors import InvalidArgumentError
+
+
+class _Batch:
+    """
+    Holds the items that the callers of a key add to a batch, until its leader commits it.
+    """
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class GroupCommit:
+    """
+    Commits the items that concurrent callers submit under the same key in batches, instead of one by one.
+
+    The first caller of a key (the leader) opens a batch. When no other commit of the key is running, it commits
+    its batch at once, so a lone writer never waits. Otherwise the callers arriving while that commit runs add
+    their items to the batch, and the leader waits for the running commit to finish, up to max_delay seconds, or
+    until the batch holds max_items items. It then commits the whole batch at once, while the callers arriving in
+    the meantime open the next batch. Every caller returns only once the commit of its items is done, and gets
+    the error of the commit if it failed, so the callers see the same outcome as if they had committed their
+    items themselves.
+
+    Batching happens between the threads of one process.
+    """
+
+    def __init__(
+            self,
+            max_delay: float = 0.005,
+            max_items: int = 1000,
+    ):
+        if max_delay is None or max_delay < 0:
+            raise InvalidArgumentError('A max delay of at least 0 is required.')
+        if max_items is None or max_items <= 0:
+            raise InvalidArgumentError('A max items above 0 is required.')
+
+        self.max_delay = max_delay
+        self.max_items = max_items
+
+        self._condition = threading.Condition()
+        self._batches: Dict[str, _Batch] = {}
+        # The number of commits running for each key.
+        self._commits: Dict[str, int] = {}
+
+    def submit(self, key: str, items: List[Any], commit: Callable[[List[Any]], Any]) -> None:
+        """
+        Commits the items, along with the items the concurrent callers submit under the same key.
+
+        :param key: The key that identifies the items that are committed together, e.g. a file path.
+        :param items: The items to commit.
+        :param commit: The function that commits a batch, it takes the items of the batch in submission order.
+                       The callers of the same key are expected to provide equivalent functions.
+
+        :raise: Any error raised by the commit of the batch, re-raised to every caller of the batch.
+        """
+        with self._condition:
+            batch: Optional[_Batch] = self._batches.get(key)
+            leader: bool = batch is None
+            if leader:
+                batch = _Batch()
+                self._batches[key] = batch
+            batch.items.extend(items)
+            if len(batch.items) >= self.max_items:
+                # The batch takes no more items, the next callers open the next one.
+                self._batches.pop(key)
+                self._condition.notify_all()
+
+        if not leader:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return
+
+        with self._condition:
+            deadline: float = time.monotonic() + self.max_delay
+            while self._commits.get(key) and self._batches.get(key) is batch:
+                remaining: float = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if self._batches.get(key) is batch:
+                self._batches.pop(key)
+            self._commits[key] = self._commits.get(key, 0) + 1
+
+        try:
+            commit(batch.items)
+        except BaseException as ex:
+            batch.error = ex
+            raise
+        finally:
+            with self._condition:
+                self._commits[key] -= 1
+                if not self._commits[key]:
+                    self._commits.pop(key)
+                self._condition.notify_all()
+            batch.done.set()
+
+    def open_batches(self) -> int:
+        """
+        :return: The number of distinct keys that currently have a batch open to new items.
+        """
+        with self._condition:
+            return len(self._batches)
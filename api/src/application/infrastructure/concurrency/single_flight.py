@@ -0,0 +1,156 @@
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from marshmallow import Schema
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.infrastructure.logging.loggers import LOGGER
+
+
+class _InFlightCall:
+    """
+    Holds the state of a computation that is currently executed by a leader caller,
+    and which the rest of the callers with the same key are waiting on.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one execution.
+
+    The first caller of a key (the leader) executes the provided function, while every other caller
+    arriving with the same key before the leader finishes waits and receives the same result (or error).
+
+    Coalescing always happens between the threads of one process. When a Redis client is provided,
+    the leaders of different processes are also coalesced through a Redis lock: only the lock holder
+    computes, and publishes its result for a short period so the rest of the workers pick it up
+    instead of computing it again. The results are published as JSON, dumped and loaded by the result
+    schema, so that nothing read from Redis is ever executed.
+    """
+
+    LOCK_KEY_PREFIX = 'single-flight:lock:'
+    RESULT_KEY_PREFIX = 'single-flight:result:'
+
+    def __init__(
+            self,
+            redis_client: Any = None,
+            result_schema: Schema = None,
+            lock_timeout: int = 60,
+            result_ttl: int = 5,
+    ):
+        if redis_client is not None and result_schema is None:
+            raise InvalidArgumentError('A result schema is required to share the results across workers.')
+        if lock_timeout is None or lock_timeout <= 0:
+            raise InvalidArgumentError('A lock timeout above 0 is required.')
+        if result_ttl is None or result_ttl <= 0:
+            raise InvalidArgumentError('A result ttl above 0 is required.')
+
+        self.redis_client = redis_client
+        self.result_schema = result_schema
+        self.lock_timeout = lock_timeout
+        self.result_ttl = result_ttl
+
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Executes the func once for all the concurrent callers of the same key.
+
+        :param key: The key that identifies identical calls.
+        :param func: The function to execute, it takes no arguments.
+
+        :return: The result of the func, shared among the concurrent callers.
+
+        :raise: Any error raised by the func, re-raised to every concurrent caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.redis_client is not None:
+                call.result = self._do_across_workers(key=key, func=func)
+            else:
+                call.result = func()
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+    def in_flight(self) -> int:
+        """
+        :return: The number of distinct keys that are currently being computed by this process.
+        """
+        with self._lock:
+            return len(self._calls)
+
+    def _do_across_workers(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Coalesces the call of the func with the rest of the workers through a Redis lock.
+
+        If Redis is not reachable, the func is executed locally; coalescing across workers is an
+        optimization and must never fail a request.
+
+        :param key: The key that identifies identical calls.
+        :param func: The function to execute.
+
+        :return: The result of the func, either computed locally or by another worker.
+        """
+        result_key = self.RESULT_KEY_PREFIX + key
+
+        try:
+            lock = self.redis_client.lock(
+                self.LOCK_KEY_PREFIX + key,
+                timeout=self.lock_timeout,
+                blocking_timeout=self.lock_timeout,
+            )
+            acquired = lock.acquire(blocking=False)
+            if not acquired:
+                # Another worker computes the same key, wait for it to finish and use its result.
+                acquired = lock.acquire(blocking=True)
+                published = self.redis_client.get(result_key)
+                if published is not None:
+                    if acquired:
+                        lock.release()
+                    return self.result_schema.loads(published)
+        except Exception as ex:
+            LOGGER.warning('Single flight across workers is not available: {}'.format(ex))
+            return func()
+
+        try:
+            result = func()
+            try:
+                self.redis_client.set(result_key, self.result_schema.dumps(result), ex=self.result_ttl)
+            except Exception as ex:
+                LOGGER.warning('Single flight result could not be published: {}'.format(ex))
+            return result
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except Exception as ex:
+                    LOGGER.warning('Single flight lock could not be released: {}'.format(ex))
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 from application.infrastructure.configurations.enums import Environment
 from application.infrastructure.configurations.errors import (
@@ -10,6 +11,14 @@ from application.infrastructure.error.errors import InvalidArgumentError
 ENV_VAR_NAME = "VCF_FILES_API_ENVIRONMENT"
 
 
+def _validate_range(value: Optional[float], message: str, minimum: float, maximum: float = None) -> None:
+    """
+    :raise InvalidArgumentError: With the message, if the value is missing, below the minimum or above the maximum.
+    """
+    if value is None or value < minimum or (maximum is not None and value > maximum):
+        raise InvalidArgumentError(message)
+
+
 class Configuration:
     """
     The Application global Configuration Instance. It is used throughout the application and
@@ -31,6 +40,24 @@ class Configuration:
         celery_result_backend: str,
         jwt_expiration: int = 3600,
         debug: bool = False,
+        single_flight_redis_url: str = None,
+        page_cache_size: int = 256,
+        prefetch_max_workers: int = 2,
+        prefetch_max_load: int = 8,
+        header_cache_size: int = 128,
+        delta_log_enabled: bool = False,
+        delta_compaction_size: int = 64 * 1024 * 1024,
+        delta_compaction_count: int = 10000,
+        append_batch_delay: float = 0.005,
+        append_batch_max_rows: int = 1000,
+        compression_level: int = 6,
+        compression_threads: int = 4,
+        query_index_min_size: int = 64 * 1024 * 1024,
+        api_workers: int = 2,
+        api_threads: int = 8,
+        scan_threads: int = 4,
+        scan_max_bytes: int = 2 * 1024 * 1024 * 1024,
+        scan_max_wait: float = 1.0,
     ):
         if not salt:
             raise InvalidArgumentError("The salt is required.")
@@ -46,6 +73,24 @@ class Configuration:
             raise InvalidArgumentError("The jwt expiration is required.")
         if not isinstance(debug, bool):
             raise InvalidArgumentError("The Debug flag is not a boolean.")
+        _validate_range(page_cache_size, "A page cache size above 0 is required.", minimum=1)
+        _validate_range(prefetch_max_workers, "A prefetch max workers above 0 is required.", minimum=1)
+        _validate_range(prefetch_max_load, "A prefetch max load above 0 is required.", minimum=1)
+        _validate_range(header_cache_size, "A header cache size above 0 is required.", minimum=1)
+        if not isinstance(delta_log_enabled, bool):
+            raise InvalidArgumentError("The delta log enabled flag is not a boolean.")
+        _validate_range(delta_compaction_size, "A delta compaction size above 0 is required.", minimum=1)
+        _validate_range(delta_compaction_count, "A delta compaction count above 0 is required.", minimum=1)
+        _validate_range(append_batch_delay, "An append batch delay of at least 0 is required.", minimum=0)
+        _validate_range(append_batch_max_rows, "An append batch max rows above 0 is required.", minimum=1)
+        _validate_range(compression_level, "A compression level from 0 to 9 is required.", minimum=0, maximum=9)
+        _validate_range(compression_threads, "A compression threads above 0 is required.", minimum=1)
+        _validate_range(query_index_min_size, "A query index min size of at least 0 is required.", minimum=0)
+        _validate_range(api_workers, "An api workers above 0 is required.", minimum=1)
+        _validate_range(api_threads, "An api threads above 0 is required.", minimum=1)
+        _validate_range(scan_threads, "A scan threads above 0 is required.", minimum=1)
+        _validate_range(scan_max_bytes, "A scan max bytes above 0 is required.", minimum=1)
+        _validate_range(scan_max_wait, "A scan max wait of at least 0 is required.", minimum=0)
 
         self.salt = salt
         self.postgresql_connection_uri = postgresql_connection_uri
@@ -54,6 +99,47 @@ class Configuration:
         self.jwt_secret_key = jwt_secret_key
         self.jwt_expiration = jwt_expiration
         self.debug = debug
+        # When set, identical concurrent VCF queries are coalesced across the workers through Redis,
+        # otherwise only within each worker process.
+        self.single_flight_redis_url = single_flight_redis_url
+        # The number of pagination pages kept in memory by each worker process.
+        self.page_cache_size = page_cache_size
+        # The next page prefetch runs at most prefetch_max_workers pages at once, and stops while more than
+        # prefetch_max_load pagination requests are in flight.
+        self.prefetch_max_workers = prefetch_max_workers
+        self.prefetch_max_load = prefetch_max_load
+        # The number of parsed VCF file headers kept in memory by each worker process.
+        self.header_cache_size = header_cache_size
+        # When enabled, the mutations are recorded in a delta log next to the VCF file instead of rewriting it,
+        # and the delta log is folded into the file once it holds delta_compaction_size bytes or
+        # delta_compaction_count entries.
+        self.delta_log_enabled = delta_log_enabled
+        self.delta_compaction_size = delta_compaction_size
+        self.delta_compaction_count = delta_compaction_count
+        # The rows that concurrent requests append to the same file are written together, in one write (and one
+        # gzip member). A lone append is written at once, the appends that arrive while another append of the file
+        # is written wait for it, up to append_batch_delay seconds, or for append_batch_max_rows rows.
+        self.append_batch_delay = append_batch_delay
+        self.append_batch_max_rows = append_batch_max_rows
+        # The rewritten gzip files are written as BGZF blocks, compressed at compression_level by a pool of
+        # compression_threads threads shared by each process.
+        self.compression_level = compression_level
+        self.compression_threads = compression_threads
+        # The pagination reads the rows of the uncompressed files through their fresh ID index, which the index
+        # job and the writers build. The explained plans of the files of at least query_index_min_size bytes
+        # without a fresh ID index say that they are worth indexing.
+        self.query_index_min_size = query_index_min_size
+        # The API runs api_workers gunicorn gthread worker processes of api_threads request threads each. In each
+        # process at most scan_threads of the threads scan or rewrite VCF files at once, the rest stay available
+        # for the cheap requests.
+        self.api_workers = api_workers
+        self.api_threads = api_threads
+        self.scan_threads = scan_threads
+        # The scans and rewrites of a process read at most scan_max_bytes of VCF files at once, estimated from the
+        # file sizes and the query plans. The requests over the budget wait up to scan_max_wait seconds, and are
+        # then answered with a 503 and a Retry-After header.
+        self.scan_max_bytes = scan_max_bytes
+        self.scan_max_wait = scan_max_wait
 
     @classmethod
     def initialize(cls) -> "Configuration":
@@ -125,6 +211,11 @@ class Configuration:
             jwt_secret_key=os.getenv("JWT_SECRET_KEY"),
             salt=os.getenv("SALT"),
             debug=True,
+            single_flight_redis_url=os.getenv("SINGLE_FLIGHT_REDIS_URL"),
+            delta_log_enabled=os.getenv("DELTA_LOG_ENABLED", "false").lower() == "true",
+            api_workers=int(os.getenv("API_WORKERS", "2")),
+            api_threads=int(os.getenv("API_THREADS", "8")),
+            scan_threads=int(os.getenv("SCAN_THREADS", "4")),
         )
 
     @staticmethod
@@ -157,4 +248,9 @@ class Configuration:
             jwt_secret_key=os.getenv("JWT_SECRET_KEY"),
             salt=os.getenv("SALT"),
             debug=False,
+            single_flight_redis_url=os.getenv("SINGLE_FLIGHT_REDIS_URL"),
+            delta_log_enabled=os.getenv("DELTA_LOG_ENABLED", "false").lower() == "true",
+            api_workers=int(os.getenv("API_WORKERS", "2")),
+            api_threads=int(os.getenv("API_THREADS", "8")),
+            scan_threads=int(os.getenv("SCAN_THREADS", "4")),
         )
@@ -8,6 +8,8 @@ class VCFHandlerBaseError(Exception):
     error_type = "VCFHandlerBaseError"
 
     def __init__(self, message: str = None, error_type: str = None):
+        # The message is the argument of the exception too, so that it survives the Celery result backend.
+        super().__init__(*([message] if message else []))
         if message:
             self.message = message
 
@@ -69,3 +71,13 @@ class NoneArgumentError(ArgumentError):
 class ValidationError(InvalidArgumentError):
     message = "Validation error."
     error_type = "ValidationError"
+
+
+class OverloadError(VCFHandlerBaseError):
+    message = "Overload error."
+    error_type = "OverloadError"
+
+    def __init__(self, message: str = None, retry_after: int = 1):
+        super().__init__(message)
+        # The seconds after which the client should retry.
+        self.retry_after = retry_after
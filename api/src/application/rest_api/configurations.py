@@ -3,15 +3,21 @@ from typing import Dict, Union, List, Tuple
 from flask_restplus import Api
 
 from application.infrastructure.logging.loggers import LOGGER
-from application.rest_api.errors import PublicHttpError
+from application.rest_api.errors import PublicHttpError, ServiceUnavailableHttpError
 
 
 def configure_api_error_handling(api: Api) -> None:
     @api.errorhandler(PublicHttpError)
-    def http_error_handler(error: PublicHttpError) -> Tuple[Dict[str, Union[List[Dict[str, str]], int]], int]:
+    def http_error_handler(
+            error: PublicHttpError
+    ) -> Tuple[Dict[str, Union[List[Dict[str, str]], int]], int, Dict[str, str]]:
         LOGGER.exception(error)
 
+        headers: Dict[str, str] = {}
+        if isinstance(error, ServiceUnavailableHttpError) and error.retry_after:
+            headers['Retry-After'] = str(error.retry_after)
+
         return {
             'errors': [_error.dump() for _error in error.errors],
             'errorCode': error.ERROR_CODE
-        }, error.ERROR_CODE
+        }, error.ERROR_CODE, headers
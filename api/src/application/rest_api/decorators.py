@@ -1,38 +1,40 @@
 import json
-from typing import Any, Callable, List
+from typing import Any, Callable, List, Tuple
 
 import flask
 from flask import Response, make_response, request
 from flask_jwt_extended.exceptions import NoAuthorizationError
-from json2xml.utils import readfromstring
 from jwt import InvalidSignatureError
 from marshmallow import Schema
 from webargs.flaskparser import use_kwargs
 from werkzeug.exceptions import UnprocessableEntity
 
 from application.authentication.errors import AuthorizationError, AuthenticationError
-from application.infrastructure.error.errors import VCFHandlerBaseError, MultipleVCFHandlerBaseError, ArgumentError
+from application.infrastructure.error.errors import VCFHandlerBaseError, MultipleVCFHandlerBaseError, ArgumentError, \
+    OverloadError
 from application.rest_api.enums import AcceptHeader
 from application.rest_api.errors import NotFoundHttpError, BadRequestHttpError, \
-    AuthenticationHttpError, InternalServerHttpError, Error, AuthorizationHttpError
+    AuthenticationHttpError, InternalServerHttpError, Error, AuthorizationHttpError, ServiceUnavailableHttpError
 from application.rest_api.models import BaseToHttpErrorPair
-from json2xml import json2xml
 
 from application.rest_api.utils import ETagManager
 from application.vcf_files.errors import VcfRowsByIdNotExistError, VcfDataAppendError, VcfNoDataDeletedError, \
-    VcfDataDeleteError, VcfDataUpdateError
+    VcfDataDeleteError, VcfDataUpdateError, VcfFileNotFoundError, VcfFileHeaderError, \
+    VcfDataExportError, VcfDataMutationError
 
 
-def map_request(schema: Schema) -> Callable:
+def map_request(schema: Schema, locations: Tuple[str, ...] = None) -> Callable:
     """
     Parses the request body by a provided Marshmallow Schema.
 
     :param schema: The Marshmallow Schema to check the validity of the request provided attributes.
+    :param locations: The locations of the request attributes, e.g. ('query',) to leave the body unread.
+                      Defaults to the query string, the form and the JSON body.
     """
 
     def decorator(func: Callable) -> Callable:
         # Validates the provided by client request body to the Marshmallow Schema.
-        @use_kwargs(schema)
+        @use_kwargs(schema, locations=locations)
         def wrapper(*args: Any, **kwargs: Any) -> Response:
             # In case the request body passed the Marshmallow validation, but a field is not provided.
             # In that case we set it to None and let Service handle the InvalidArgumentError.
@@ -142,6 +144,10 @@ def map_response(
             enveloped_response = {"status": status_code, "data": response_body}
 
             if response_type == AcceptHeader.xml.value:
+                # json2xml is only imported by the first XML response.
+                from json2xml import json2xml
+                from json2xml.utils import readfromstring
+
                 json_object: str = json.dumps(enveloped_response)
                 enveloped_response = json2xml.Json2xml(readfromstring(json_object)).to_xml()
                 response = make_response(enveloped_response, status_code)
@@ -185,6 +191,22 @@ def map_errors() -> Callable:
                 vcf_handler_base_error=VcfDataUpdateError(),
                 public_error=NotFoundHttpError(),
             ),
+            BaseToHttpErrorPair(
+                vcf_handler_base_error=VcfFileNotFoundError(),
+                public_error=NotFoundHttpError(),
+            ),
+            BaseToHttpErrorPair(
+                vcf_handler_base_error=VcfFileHeaderError(),
+                public_error=BadRequestHttpError(),
+            ),
+            BaseToHttpErrorPair(
+                vcf_handler_base_error=VcfDataExportError(),
+                public_error=BadRequestHttpError(),
+            ),
+            BaseToHttpErrorPair(
+                vcf_handler_base_error=VcfDataMutationError(),
+                public_error=BadRequestHttpError(),
+            ),
         ],
     )
 
@@ -226,9 +248,8 @@ def map_base_errors_to_public(
                 if base_to_public_error_maps:
                     for base_to_public_error in base_to_public_error_maps:
                         if isinstance(ex, type(base_to_public_error.vcf_handler_base_error)):
-                            public_error = base_to_public_error.public_error
-                            public_error.errors = ex.get_mapped_errors()
-                            raise public_error
+                            # A new public error for each request, the mapped ones are shared by the request threads.
+                            raise type(base_to_public_error.public_error)(errors=ex.get_mapped_errors())
 
                 if isinstance(ex, AuthorizationError):
                     raise NotFoundHttpError(errors=ex.get_mapped_errors())
@@ -238,6 +259,8 @@ def map_base_errors_to_public(
                     raise BadRequestHttpError(errors=ex.get_mapped_errors())
                 if isinstance(ex, MultipleVCFHandlerBaseError):
                     raise BadRequestHttpError(errors=ex.get_mapped_errors())
+                if isinstance(ex, OverloadError):
+                    raise ServiceUnavailableHttpError(errors=ex.get_mapped_errors(), retry_after=ex.retry_after)
 
                 # In case we haven't mapped the Base Exception to any Public Error.
                 raise InternalServerHttpError()
@@ -43,3 +43,11 @@ class NotFoundHttpError(PublicHttpError):
 
 class InternalServerHttpError(PublicHttpError):
     ERROR_CODE = 500
+
+
+class ServiceUnavailableHttpError(PublicHttpError):
+    ERROR_CODE = 503
+
+    def __init__(self, errors: List[Error] = None, retry_after: int = None):
+        super().__init__(errors)
+        self.retry_after = retry_after
@@ -1,5 +1,6 @@
 from typing import List
 
+from flask import Response, request, stream_with_context
 from flask_restplus import Resource
 from flask_accept import accept
 
@@ -9,11 +10,17 @@ from application.rest_api.enums import AcceptHeader
 from application.rest_api.rest_plus import api
 from application.rest_api.vcf_files.schemas import VcfFilePaginationRequestSchema, VcfFilePaginationResponseSchema, \
     VcfFilePostRequestSchema, VcfFilePostResponseSchema, VcfFileDeleteRequestSchema, VcfFileUpdateRequestSchema, \
-    VcfFileUpdateResponseSchema
+    VcfFileUpdateResponseSchema, VcfFileHeaderRequestSchema, VcfFileHeaderResponseSchema, \
+    VcfFileExportRequestSchema, VcfFileBatchRequestSchema, VcfFileBatchResponseSchema, VcfFileIndexRequestSchema, \
+    VcfJobRequestSchema, VcfJobResponseSchema, VcfFileIngestRequestSchema, VcfFileConvertRequestSchema
 from application.user.enums import Permission
 from application.vcf_files.factories import vcf_file_pagination_service, append_data_to_vcf_file_service, \
-    filter_out_rows_by_id_service, vcf_file_update_by_id_service, async_filter_out_rows_by_id_service
-from application.vcf_files.models import AppendRowsExecutionArtifact, VcfRow, UpdatedRowsExecutionArtifact
+    filter_out_rows_by_id_service, vcf_file_update_by_id_service, async_filter_out_rows_by_id_service, \
+    vcf_file_header_service, export_vcf_file_service, vcf_file_batch_mutation_service, \
+    async_vcf_file_update_by_id_service, async_append_data_to_vcf_file_service, async_export_vcf_file_service, \
+    async_build_vcf_id_index_service, vcf_job_status_service, ingest_vcf_rows_service, async_convert_vcf_file_service
+from application.vcf_files.models import AppendRowsExecutionArtifact, VcfRow, UpdatedRowsExecutionArtifact, \
+    VcfFileHeader, VcfFileExport, VcfMutation, BatchMutationExecutionArtifact, VcfJob
 
 ns = api.namespace(
     "vcf-files", description="VCF files related endpoints."
@@ -29,7 +36,7 @@ class VcfFilePagination(Resource):
     @check_etag()
     @add_etag(add_etag=True)
     @map_response(schema=VcfFilePaginationResponseSchema(), entity_name="results")
-    def get(self, file_path: str, filter_id: str, page_size: int, page_index: int):
+    def get(self, file_path: str, filter_id: str, page_size: int, page_index: int, explain: bool):
         """
         Controller for handling the VCF files pagination requests.
 
@@ -37,6 +44,7 @@ class VcfFilePagination(Resource):
         :param filter_id: The id to filter the VCF file with.
         :param page_size: The page size.
         :param page_index: The page index.
+        :param explain: True to return how the rows of the page were read, along with them.
 
         :return: The paginated VCF File rows.
         """
@@ -46,6 +54,7 @@ class VcfFilePagination(Resource):
             filter_id=filter_id,
             page_size=page_size,
             page_index=page_index,
+            explain=explain,
         )
 
 
@@ -69,6 +78,35 @@ class AppendDataToVcfFile(Resource):
         return append_data_to_vcf_file_service().apply(vcf_file_path=file_path, vcf_rows=data)
 
 
+@ns.route("/ingest")
+class IngestDataToVcfFile(Resource):
+    # The size of the chunks the request body is read in.
+    CHUNK_SIZE = 64 * 1024
+
+    @accept(AcceptHeader.json.value, AcceptHeader.xml.value, AcceptHeader.all.value)
+    @map_errors()
+    @guard(permission=Permission.execute)
+    @map_request(VcfFileIngestRequestSchema(), locations=('query',))
+    @map_response(schema=VcfFilePostResponseSchema(), status_code=201)
+    def post(self, file_path: str) -> AppendRowsExecutionArtifact:
+        """
+        Controller for handling the bulk append of rows to VCF files, streamed from the request body.
+
+        The body is either NDJSON (application/x-ndjson), one JSON row per line with the CHROM, POS, ID, REF and
+        ALT attributes, or tab separated VCF rows (text/tab-separated-values). It may be sent chunked.
+
+        :param file_path: The VCF filename, in the query string.
+
+        :return: The VCF file rows append execution artifact.
+        """
+
+        return ingest_vcf_rows_service().apply(
+            vcf_file_path=file_path,
+            chunks=iter(lambda: request.stream.read(self.CHUNK_SIZE), b''),
+            content_type=request.mimetype,
+        )
+
+
 @ns.route("")
 class DeleteDataToVcfFile(Resource):
     @accept(AcceptHeader.json.value, AcceptHeader.xml.value, AcceptHeader.all.value)
@@ -121,15 +159,233 @@ class AsyncDeleteDataToVcfFile(Resource):
     @map_errors()
     @guard(permission=Permission.execute)
     @map_request(VcfFileDeleteRequestSchema())
-    @map_response(status_code=204)
-    def delete(self, file_path: str, filter_id: str) -> None:
+    @map_response(schema=VcfJobResponseSchema(), entity_name="job", status_code=202)
+    def delete(self, file_path: str, filter_id: str) -> VcfJob:
         """
-        Controller for handling removing rows to VCF files.
+        Controller for starting a job removing rows to VCF files.
 
         :param file_path: The VCF filename.
         :param filter_id: The id rows to remove from the VCF file.
 
-        :return: Upon successfully deletion, a 204 NO CONTENT response is returned.
+        :return: The job, its status is polled at /jobs.
+        """
+
+        return async_filter_out_rows_by_id_service().apply(vcf_file_path=file_path, filter_id=filter_id)
+
+
+@ns.route("/async")
+class AsyncAppendDataToVcfFile(Resource):
+    @accept(AcceptHeader.json.value, AcceptHeader.xml.value, AcceptHeader.all.value)
+    @map_errors()
+    @guard(permission=Permission.execute)
+    @map_request(VcfFilePostRequestSchema())
+    @map_response(schema=VcfJobResponseSchema(), entity_name="job", status_code=202)
+    def post(self, file_path: str, data: List[VcfRow]) -> VcfJob:
+        """
+        Controller for starting a job appending rows to VCF files.
+
+        :param file_path: The VCF filename.
+        :param data: A list of rows to append to the file.
+
+        :return: The job, its status is polled at /jobs.
+        """
+
+        return async_append_data_to_vcf_file_service().apply(vcf_file_path=file_path, vcf_rows=data)
+
+
+@ns.route("/async")
+class AsyncUpdateDataToVcfFile(Resource):
+    @accept(AcceptHeader.json.value, AcceptHeader.xml.value, AcceptHeader.all.value)
+    @map_errors()
+    @guard(permission=Permission.execute)
+    @map_request(VcfFileUpdateRequestSchema())
+    @map_response(schema=VcfJobResponseSchema(), entity_name="job", status_code=202)
+    def patch(self, file_path: str, filter_id: str, data: VcfRow) -> VcfJob:
+        """
+        Controller for starting a job updating rows of VCF files.
+
+        :param file_path: The VCF filename.
+        :param filter_id: The id rows to update in the VCF file.
+        :param data: The data to update file by id.
+
+        :return: The job, its status is polled at /jobs.
+        """
+
+        return async_vcf_file_update_by_id_service().apply(vcf_file_path=file_path, filter_id=filter_id, data=data)
+
+
+@ns.route("/async/export")
+class AsyncExportDataOfVcfFile(Resource):
+    @accept(AcceptHeader.json.value, AcceptHeader.xml.value, AcceptHeader.all.value)
+    @map_errors()
+    @guard(permission=Permission.execute)
+    @map_request(VcfFileExportRequestSchema())
+    @map_response(schema=VcfJobResponseSchema(), entity_name="job", status_code=202)
+    def post(
+            self,
+            file_path: str,
+            filter_id: str,
+            region: str,
+            filter_status: str,
+            compression: str,
+    ) -> VcfJob:
+        """
+        Controller for starting a job exporting the rows of VCF files that match an id, a region and/or a filter
+        status to a VCF file next to them.
+
+        :param file_path: The VCF filename.
+        :param filter_id: The id of the rows to export.
+        :param region: The region of the rows to export, e.g. chr1:1000-2000.
+        :param filter_status: The FILTER column value of the rows to export, e.g. PASS.
+        :param compression: The compression of the exported file, one of none, gzip, bgzf or zstd.
+
+        :return: The job, its status is polled at /jobs and its artifact is the path of the exported file.
+        """
+
+        return async_export_vcf_file_service().apply(
+            vcf_file_path=file_path,
+            filter_id=filter_id,
+            region=region,
+            filter_status=filter_status,
+            compression=compression,
+        )
+
+
+@ns.route("/async/index")
+class AsyncBuildIndexOfVcfFile(Resource):
+    @accept(AcceptHeader.json.value, AcceptHeader.xml.value, AcceptHeader.all.value)
+    @map_errors()
+    @guard(permission=Permission.execute)
+    @map_request(VcfFileIndexRequestSchema())
+    @map_response(schema=VcfJobResponseSchema(), entity_name="job", status_code=202)
+    def post(self, file_path: str) -> VcfJob:
+        """
+        Controller for starting a job building the ID index of uncompressed VCF files.
+
+        :param file_path: The VCF filename.
+
+        :return: The job, its status is polled at /jobs.
+        """
+
+        return async_build_vcf_id_index_service().apply(vcf_file_path=file_path)
+
+
+@ns.route("/async/convert")
+class AsyncConvertCompressionOfVcfFile(Resource):
+    @accept(AcceptHeader.json.value, AcceptHeader.xml.value, AcceptHeader.all.value)
+    @map_errors()
+    @guard(permission=Permission.execute)
+    @map_request(VcfFileConvertRequestSchema())
+    @map_response(schema=VcfJobResponseSchema(), entity_name="job", status_code=202)
+    def post(self, file_path: str, compression: str) -> VcfJob:
+        """
+        Controller for starting a job converting VCF files to another compression, e.g. gzip to seekable zstd.
+
+        :param file_path: The VCF filename.
+        :param compression: The compression of the converted file, one of none, gzip, bgzf or zstd.
+
+        :return: The job, its status is polled at /jobs and its artifact is the path of the converted file.
+        """
+
+        return async_convert_vcf_file_service().apply(vcf_file_path=file_path, compression=compression)
+
+
+@ns.route("/jobs")
+class GetVcfJob(Resource):
+    @accept(AcceptHeader.json.value, AcceptHeader.xml.value, AcceptHeader.all.value)
+    @map_errors()
+    @guard(permission=Permission.execute)
+    @map_request(VcfJobRequestSchema())
+    @map_response(schema=VcfJobResponseSchema(), entity_name="job")
+    def get(self, job_id: str) -> VcfJob:
+        """
+        Controller for retrieving the status of the jobs on VCF files.
+
+        :param job_id: The job id.
+
+        :return: The job state, the rows and the bytes processed so far, its ETA and, once done, its artifact.
+        """
+
+        return vcf_job_status_service().apply(job_id=job_id)
+
+
+@ns.route("/batch")
+class ApplyBatchToVcfFile(Resource):
+    @accept(AcceptHeader.json.value, AcceptHeader.xml.value, AcceptHeader.all.value)
+    @map_errors()
+    @guard(permission=Permission.execute)
+    @map_request(VcfFileBatchRequestSchema())
+    @map_response(schema=VcfFileBatchResponseSchema(), status_code=200)
+    def post(self, file_path: str, mutations: List[VcfMutation]) -> BatchMutationExecutionArtifact:
         """
+        Controller for applying many deletes, updates and appends to VCF files with a single file rewrite.
 
-        async_filter_out_rows_by_id_service().apply(vcf_file_path=file_path, filter_id=filter_id)
+        :param file_path: The VCF filename.
+        :param mutations: The delete, update and append operations, applied in order.
+
+        :return: The VCF file batch mutation execution artifact, with the total rows of each operation.
+        """
+
+        return vcf_file_batch_mutation_service().apply(vcf_file_path=file_path, mutations=mutations)
+
+
+@ns.route("/header")
+class GetVcfFileHeader(Resource):
+    @accept(AcceptHeader.json.value, AcceptHeader.xml.value, AcceptHeader.all.value)
+    @map_errors()
+    @guard(permission=Permission.execute)
+    @map_request(VcfFileHeaderRequestSchema())
+    @map_response(schema=VcfFileHeaderResponseSchema(), entity_name="header")
+    def get(self, file_path: str) -> VcfFileHeader:
+        """
+        Controller for retrieving the header (meta-information and sample names) of VCF files.
+
+        :param file_path: The VCF filename.
+
+        :return: The parsed VCF file header.
+        """
+
+        return vcf_file_header_service().apply(vcf_file_path=file_path)
+
+
+@ns.route("/export")
+class ExportDataOfVcfFile(Resource):
+    @map_errors()
+    @guard(permission=Permission.execute)
+    @map_request(VcfFileExportRequestSchema())
+    def get(
+            self,
+            file_path: str,
+            filter_id: str,
+            region: str,
+            filter_status: str,
+            compression: str,
+    ) -> Response:
+        """
+        Controller for downloading the rows of VCF files that match an id, a region and/or a filter status,
+        as a VCF file with the original header.
+
+        The file is streamed with chunked transfer encoding while it is read and compressed, it is never buffered.
+
+        :param file_path: The VCF filename.
+        :param filter_id: The id of the rows to export.
+        :param region: The region of the rows to export, e.g. chr1:1000-2000.
+        :param filter_status: The FILTER column value of the rows to export, e.g. PASS.
+        :param compression: The compression of the exported file, one of none, gzip, bgzf or zstd.
+
+        :return: The streamed VCF file.
+        """
+
+        vcf_file_export: VcfFileExport = export_vcf_file_service().apply(
+            vcf_file_path=file_path,
+            filter_id=filter_id,
+            region=region,
+            filter_status=filter_status,
+            compression=compression,
+        )
+
+        return Response(
+            stream_with_context(vcf_file_export.chunks),
+            mimetype=vcf_file_export.media_type,
+            headers={'Content-Disposition': 'attachment; filename={}'.format(vcf_file_export.file_name)},
+        )
@@ -1,35 +1,35 @@
 import re
 
-from marshmallow import fields, validate, post_load
+from marshmallow import fields, validate, post_load, post_dump, validates_schema, ValidationError
 from marshmallow.schema import BaseSchema, Schema
 
-from application.vcf_files.models import VcfRow
+from application.vcf_files.enums import VcfCompression, VcfMutationOperation
+from application.vcf_files.ingest import BASES_REGEX, CHROM_REGEX, ID_REGEX
+from application.vcf_files.models import FilteredVcfRowsPage, VcfRow, VcfMutation
 
 
-# Validations on the fields are based on what the provided real file contains.
-# ref & alt: contains any number of ACGT. char occurrences.
-# chrom: contains a string starts with chr, followed by a number from 1 to 22 or followed by a X, Y or M.
+# Validations on the fields are based on what the provided real file contains, see the regexes of the ingest.
 class PostVcfRowSchema(Schema):
     chrom = fields.Str(
         data_key='CHROM',
         required=True,
-        validate=validate.Regexp(regex=re.compile("^chr((2[0-2]|1[0-9]|[1-9]|([X]?|[Y]?|[M])?)$)"))
+        validate=validate.Regexp(regex=re.compile(CHROM_REGEX))
     )
     pos = fields.Int(data_key='POS', required=True, strict=True)
     identifier = fields.Str(
         data_key='ID',
         required=True,
-        validate=validate.Regexp(regex=re.compile("^rs([0-9]+$)"))
+        validate=validate.Regexp(regex=re.compile(ID_REGEX))
     )
     ref = fields.Str(
         data_key='REF',
         required=True,
-        validate=validate.Regexp(regex=re.compile("([ACGT.]*)$"))
+        validate=validate.Regexp(regex=re.compile(BASES_REGEX))
     )
     alt = fields.Str(
         data_key='ALT',
         required=True,
-        validate=validate.Regexp(regex=re.compile("([ACGT.]*)$"))
+        validate=validate.Regexp(regex=re.compile(BASES_REGEX))
     )
 
     @post_load
@@ -76,6 +76,54 @@ class VcfFileUpdateRequestSchema(VcfFileFilteringRequestSchema):
     data = fields.Nested(PostVcfRowSchema, data_key='data', required=True)
 
 
+class VcfMutationSchema(Schema):
+    operation = fields.Str(
+        data_key='operation',
+        required=True,
+        validate=validate.OneOf(VcfMutationOperation.values())
+    )
+    filter_id = fields.Str(
+        data_key='id',
+        validate=validate.Regexp(regex=re.compile("^rs([0-9]+$)"))
+    )
+    data = fields.Nested(PostVcfRowSchema, data_key='data')
+    rows = fields.Nested(PostVcfRowSchema, many=True, data_key='rows')
+
+    @validates_schema
+    def validate_operation_fields(self, data, **kwargs):
+        operation: str = data.get('operation')
+        if operation in (VcfMutationOperation.delete.value, VcfMutationOperation.update.value) \
+                and not data.get('filter_id'):
+            raise ValidationError('The id is required for a {}.'.format(operation), 'id')
+        if operation == VcfMutationOperation.update.value and not data.get('data'):
+            raise ValidationError('The data are required for an update.', 'data')
+        if operation == VcfMutationOperation.append.value and not data.get('rows'):
+            raise ValidationError('The rows are required for an append.', 'rows')
+
+    @post_load
+    def load_vcf_mutation(self, data, **kwargs):
+        data['operation'] = VcfMutationOperation(data['operation'])
+        return VcfMutation(**data)
+
+
+class VcfFileBatchRequestSchema(BaseSchema):
+    file_path = fields.Str(required=True, data_key='filePath', default=None)
+    mutations = fields.Nested(
+        VcfMutationSchema, many=True, data_key='operations', required=True, validate=validate.Length(min=1)
+    )
+
+
+class VcfMutationResultSchema(Schema):
+    operation = fields.Function(lambda result: result.operation.value, data_key='operation')
+    filter_id = fields.Str(data_key='id')
+    total_rows = fields.Int(data_key='totalRows')
+
+
+class VcfFileBatchResponseSchema(BaseSchema):
+    file_path = fields.Str(data_key='filePath', required=True)
+    results = fields.Nested(VcfMutationResultSchema, many=True, data_key='results')
+
+
 class VcfFileDeletedResponseSchema(BaseSchema):
     total_rows_deleted = fields.Int(data_key='totalRowsDeleted', default=0)
     file_path = fields.Str(data_key='filePath', required=True)
@@ -102,6 +150,7 @@ class VcfFilePaginationRequestSchema(BaseSchema):
     page_index = fields.Int(
         data_key='pageIndex', missing=0, required=False, allow_none=False, validate=validate.Range(min=0)
     )
+    explain = fields.Bool(data_key='explain', missing=False, required=False, allow_none=False)
 
 
 class VcfRowSchema(Schema):
@@ -111,6 +160,21 @@ class VcfRowSchema(Schema):
     ref = fields.Str(data_key='ref')
     alt = fields.Str(data_key='alt')
 
+    @post_load
+    def load_vcf_row(self, data, **kwargs):
+        return VcfRow(**data)
+
+
+class VcfQueryPlanSchema(Schema):
+    access_path = fields.Function(lambda plan: plan.access_path.value, data_key='accessPath')
+    reason = fields.Str(data_key='reason')
+    compression = fields.Function(lambda plan: plan.compression.value, data_key='compression')
+    file_size = fields.Int(data_key='fileSize')
+    estimated_rows = fields.Int(data_key='estimatedRows')
+    estimated_bytes = fields.Int(data_key='estimatedBytes')
+    actual_rows = fields.Int(data_key='actualRows')
+    actual_bytes = fields.Int(data_key='actualBytes')
+
 
 class VcfFilePaginationResponseSchema(BaseSchema):
     results = fields.Nested(VcfRowSchema, many=True, data_key='rows')
@@ -118,3 +182,94 @@ class VcfFilePaginationResponseSchema(BaseSchema):
     page_index = fields.Int(data_key='pageIndex')
     total = fields.Int(data_key='total')
     filtered_id = fields.Str(data_key='id')
+    plan = fields.Nested(VcfQueryPlanSchema, data_key='plan')
+
+    @post_dump
+    def remove_missing_plan(self, data, **kwargs):
+        # Only the explained requests return the plan of their page.
+        if data.get('plan') is None:
+            data.pop('plan', None)
+        return data
+
+    @post_load
+    def load_page(self, data, **kwargs):
+        # The pages shared across the workers through the SingleFlight, which are never explained.
+        data.pop('plan', None)
+        return FilteredVcfRowsPage(**data)
+
+
+class VcfFileHeaderRequestSchema(BaseSchema):
+    file_path = fields.Str(required=True, data_key='filePath', default=None)
+
+
+class VcfMetaDefinitionSchema(Schema):
+    identifier = fields.Str(data_key='id')
+    number = fields.Str(data_key='number')
+    value_type = fields.Str(data_key='type')
+    description = fields.Str(data_key='description')
+    length = fields.Int(data_key='length')
+
+
+class VcfFileHeaderResponseSchema(BaseSchema):
+    file_format = fields.Str(data_key='fileFormat')
+    infos = fields.Nested(VcfMetaDefinitionSchema, many=True, data_key='info')
+    formats = fields.Nested(VcfMetaDefinitionSchema, many=True, data_key='format')
+    filters = fields.Nested(VcfMetaDefinitionSchema, many=True, data_key='filter')
+    contigs = fields.Nested(VcfMetaDefinitionSchema, many=True, data_key='contigs')
+    samples = fields.List(fields.Str(), data_key='samples')
+
+
+class VcfFileExportRequestSchema(BaseSchema):
+    file_path = fields.Str(required=True, data_key='filePath', default=None)
+    filter_id = fields.Str(
+        required=False, data_key='id', default=None, validate=validate.Regexp(regex=re.compile("^rs([0-9]+$)"))
+    )
+    region = fields.Str(required=False, data_key='region', default=None)
+    filter_status = fields.Str(required=False, data_key='filterStatus', default=None)
+    compression = fields.Str(
+        data_key='compression', missing=VcfCompression.none.value, required=False,
+        validate=validate.OneOf(VcfCompression.values())
+    )
+
+
+class VcfFileIngestRequestSchema(BaseSchema):
+    file_path = fields.Str(required=True, data_key='filePath', default=None)
+
+
+class VcfFileIndexRequestSchema(BaseSchema):
+    file_path = fields.Str(required=True, data_key='filePath', default=None)
+
+
+class VcfFileConvertRequestSchema(BaseSchema):
+    file_path = fields.Str(required=True, data_key='filePath', default=None)
+    compression = fields.Str(
+        data_key='compression', missing=VcfCompression.zstd.value, required=False,
+        validate=validate.OneOf(VcfCompression.values())
+    )
+
+
+class VcfJobRequestSchema(BaseSchema):
+    job_id = fields.Str(required=True, data_key='jobId', default=None)
+
+
+class VcfJobArtifactSchema(Schema):
+    # The artifacts of the different operations, only the attributes of the job operation are dumped.
+    file_path = fields.Str(data_key='filePath')
+    total_rows_deleted = fields.Int(data_key='totalRowsDeleted')
+    total_rows_updated = fields.Int(data_key='totalRowsUpdated')
+    total_rows_added = fields.Int(data_key='totalRowsAdded')
+    export_path = fields.Str(data_key='exportPath')
+    total_rows_indexed = fields.Int(data_key='totalRowsIndexed')
+    converted_path = fields.Str(data_key='convertedPath')
+
+
+class VcfJobResponseSchema(BaseSchema):
+    job_id = fields.Str(data_key='jobId')
+    state = fields.Function(lambda job: job.state.value.lower(), data_key='state')
+    operation = fields.Function(lambda job: job.operation.value if job.operation else None, data_key='operation')
+    rows_processed = fields.Int(data_key='rowsProcessed')
+    bytes_processed = fields.Int(data_key='bytesProcessed')
+    total_bytes = fields.Int(data_key='totalBytes')
+    eta = fields.Float(data_key='eta')
+    artifact = fields.Nested(VcfJobArtifactSchema, data_key='artifact')
+    error = fields.Str(data_key='error')
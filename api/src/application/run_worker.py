@@ -1,6 +1,11 @@
+import os
+
+from kombu import Queue
+
 from application.factories import vcf_handler_api
-from application.infrastructure.celery.celery import celery_app
+from application.infrastructure.celery.celery import celery_app, celery_queue_partitions
 from application.infrastructure.celery.celery_utils import init_celery
+from application.infrastructure.celery.routing import worker_queues
 
 application = vcf_handler_api(
     name="VCF Handler API"
@@ -10,3 +15,14 @@ celery = init_celery(
         celery=celery_app,
         app=application
     )
+
+if celery_queue_partitions:
+    # Every worker consumes its share of the partitioned queues, and the default queue. The workers are run with
+    # a concurrency of 1, so that the tasks of a queue, and so of a file, are executed one at a time.
+    celery.conf.task_queues = [Queue(celery.conf.task_default_queue)] + [
+        Queue(queue) for queue in worker_queues(
+            worker_index=int(os.environ.get("CELERY_WORKER_INDEX", "0")),
+            worker_count=int(os.environ.get("CELERY_WORKER_COUNT", "1")),
+            partitions=celery_queue_partitions,
+        )
+    ]
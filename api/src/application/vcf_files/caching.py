@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from application.infrastructure.error.errors import InvalidArgumentError
+
+
+class LruCache:
+    """
+    A thread safe, size bounded, least recently used cache.
+
+    The VCF caches key their entries by the FileVersion of the file they were computed from, so an entry
+    of a file that changed is never returned again and is evicted once it becomes the least recently used.
+    """
+
+    def __init__(self, max_size: int = 256):
+        if max_size is None or max_size <= 0:
+            raise InvalidArgumentError('A cache max size above 0 is required.')
+
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        :param key: The key of the entry.
+
+        :return: The cached value, or None if the key is not cached.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Caches a value, evicting the least recently used entry if the cache is full.
+
+        :param key: The key of the entry.
+        :param value: The value to cache.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class VcfPageCache(LruCache):
+    """
+    Caches the FilteredVcfRowsPages served by the pagination, keyed by
+    (FileVersion, filter id, page size, page index).
+    """
+
+
+class VcfHeaderCache(LruCache):
+    """
+    Caches the parsed VcfFileHeaders, keyed by the FileVersion of the file they were read from.
+    """
@@ -0,0 +1,343 @@
+import io
+import os
+import struct
+from typing import IO, Callable, Iterator, List, Optional, Set, Tuple
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.compression import BGZF_EOF, BGZF_HEADER_SIZE, StreamCompressor, \
+    decompress_bgzf_block, decompress_zstd_frame, is_bgzf_header, read_bgzf_block, read_zstd_frame, \
+    read_zstd_seek_table, zstd_seek_table
+from application.vcf_files.enums import VcfCompression
+from application.vcf_files.errors import VcfFileChangedError
+from application.vcf_files.indexes import VcfIdIndex
+from application.vcf_files.models import FileVersion, VcfChunk, VcfChunkResult, VcfRewriteResult
+from application.vcf_files.rewriting import RowTransform, transform_vcf_row
+from application.vcf_files.splicing import copy_byte_range, write_all
+from application.vcf_files.storage import vcf_file_compression
+from application.vcf_files.utils import atomic_rewrite, get_file_version
+
+# The bytes of a VCF file (compressed bytes for BGZF and zstd files) rewritten by one chunk task.
+VCF_CHUNK_SIZE = 256 * 1024 * 1024
+
+# Reads the next block (or frame) of a compressed file: its offset and the block as found in the file, or None at
+# the end of the file.
+BlockReader = Callable[[IO[bytes]], Optional[Tuple[int, bytes]]]
+
+
+def plan_vcf_chunks(vcf_file_path: str, job_id: str, chunk_size: int = VCF_CHUNK_SIZE) -> List[VcfChunk]:
+    """
+    Splits a VCF file into chunks of about chunk_size bytes, which are rewritten in parallel by the chunk tasks
+    of a job and merged back into the file.
+
+    Uncompressed files are split at row boundaries, BGZF files at block boundaries and seekable zstd files at
+    frame boundaries, the rows that span two blocks belong to the chunk they start in. Plain gzip files and zstd
+    files without a seek table can not be split. Uncompressed files with a fresh ID index are not split either,
+    their rows are found by the index without reading the whole file.
+
+    :param vcf_file_path: The VCF file path.
+    :param job_id: The id of the job, which names the part files of the chunks.
+    :param chunk_size: The size of the chunks.
+
+    :return: The chunks, a single chunk when the file is not split.
+    """
+    compression: VcfCompression = vcf_file_compression(vcf_file_path)
+    if compression == VcfCompression.none:
+        starts: List[int] = [0] if VcfIdIndex.exists(vcf_file_path) else _plain_chunk_starts(vcf_file_path, chunk_size)
+    elif compression == VcfCompression.bgzf:
+        with open(vcf_file_path, 'rb') as file:
+            starts = _block_chunk_starts(
+                file, _bgzf_block_offsets(file), _read_bgzf_block, decompress_bgzf_block, chunk_size
+            )
+    elif compression == VcfCompression.zstd:
+        with open(vcf_file_path, 'rb') as file:
+            frame_offsets: Optional[List[int]] = _zstd_frame_offsets(file)
+            starts = [0] if frame_offsets is None else _block_chunk_starts(
+                file, iter(frame_offsets), _read_zstd_frame, decompress_zstd_frame, chunk_size
+            )
+    else:
+        starts = [0]
+
+    return [
+        VcfChunk(
+            index=index,
+            start=start,
+            end=starts[index + 1] if index + 1 < len(starts) else None,
+            compression=compression.value,
+            part_path=vcf_chunk_part_path(vcf_file_path, job_id, index),
+        )
+        for index, start in enumerate(starts)
+    ]
+
+
+def vcf_chunk_part_path(vcf_file_path: str, job_id: str, index: int) -> str:
+    """
+    :return: The path of the part file of a chunk, a hidden file next to the VCF file.
+    """
+    return os.path.join(
+        os.path.dirname(os.path.abspath(vcf_file_path)),
+        '.{}.{}.{}.part'.format(os.path.basename(vcf_file_path), job_id, index),
+    )
+
+
+def _plain_chunk_starts(vcf_file_path: str, chunk_size: int) -> List[int]:
+    starts: List[int] = [0]
+    with open(vcf_file_path, 'rb') as file:
+        file_size: int = os.fstat(file.fileno()).st_size
+        for offset in range(chunk_size, file_size, chunk_size):
+            # The rest of the row the offset falls in, or just its line ending when the offset starts a row.
+            file.seek(offset - 1)
+            start: int = offset - 1 + len(file.readline())
+            if starts[-1] < start < file_size:
+                starts.append(start)
+
+    return starts
+
+
+def _block_chunk_starts(
+        file: IO[bytes],
+        block_offsets: Iterator[int],
+        read_block: BlockReader,
+        decompress_block: Callable[[bytes], bytes],
+        chunk_size: int,
+) -> List[int]:
+    starts: List[int] = [0]
+    next_split: int = chunk_size
+    previous_block_offset: Optional[int] = None
+    for block_offset in block_offsets:
+        if block_offset >= next_split and previous_block_offset is not None:
+            start: Optional[int] = _first_row_start(file, previous_block_offset, read_block, decompress_block)
+            if start is None:
+                break
+            if start > starts[-1]:
+                starts.append(start)
+            next_split = max(block_offset, start >> 16) + chunk_size
+        previous_block_offset = block_offset
+
+    return starts
+
+
+def _bgzf_block_offsets(file: IO[bytes]) -> Iterator[int]:
+    """
+    :return: The offsets of the blocks of a BGZF file, read from the block headers alone.
+    """
+    file_size: int = os.fstat(file.fileno()).st_size
+    offset = 0
+    while offset < file_size:
+        header: bytes = os.pread(file.fileno(), BGZF_HEADER_SIZE, offset)
+        if len(header) < BGZF_HEADER_SIZE or not is_bgzf_header(header):
+            raise InvalidArgumentError('The file is not BGZF compressed.')
+        yield offset
+        offset += struct.unpack('<H', header[16:18])[0] + 1
+
+
+def _zstd_frame_offsets(file: IO[bytes]) -> Optional[List[int]]:
+    """
+    :return: The offsets of the frames of a zstd file with data, read from its seek table alone. None if the file
+             has no seek table, or a frame too large to be addressed by a virtual offset.
+    """
+    frames: Optional[List[Tuple[int, int]]] = read_zstd_seek_table(file.fileno())
+    if frames is None or any(size > 0xffff for _, size in frames):
+        return None
+
+    offsets: List[int] = []
+    offset = 0
+    for compressed_size, size in frames:
+        # The frames without data are the seek tables left behind by appends.
+        if size:
+            offsets.append(offset)
+        offset += compressed_size
+
+    return offsets
+
+
+def _read_bgzf_block(file: IO[bytes]) -> Optional[Tuple[int, bytes]]:
+    offset: int = file.tell()
+    block: Optional[bytes] = read_bgzf_block(file)
+
+    return None if block is None else (offset, block)
+
+
+def _read_zstd_frame(file: IO[bytes]) -> Optional[Tuple[int, bytes]]:
+    frame: Optional[bytes] = read_zstd_frame(file)
+
+    # The skippable frames before the frame are skipped, so its offset is told by its end.
+    return None if frame is None else (file.tell() - len(frame), frame)
+
+
+def _first_row_start(
+        file: IO[bytes],
+        previous_block_offset: int,
+        read_block: BlockReader,
+        decompress_block: Callable[[bytes], bytes],
+) -> Optional[int]:
+    """
+    :return: The virtual offset of the first row that starts in the block after the previous block, or in the
+             blocks after it when a row spans the whole block. None if no row starts after the previous block.
+    """
+    file.seek(previous_block_offset)
+    ends_row: bool = decompress_block(read_block(file)[1]).endswith(b'\n')
+    while True:
+        next_block: Optional[Tuple[int, bytes]] = read_block(file)
+        if next_block is None:
+            return None
+        block_offset, block = next_block
+        if ends_row:
+            return block_offset << 16
+        data: bytes = decompress_block(block)
+        newline: int = data.find(b'\n')
+        if newline != -1 and newline + 1 < len(data):
+            return block_offset << 16 | newline + 1
+        ends_row = newline != -1
+
+
+def rewrite_vcf_chunk(
+        vcf_file_path: str,
+        chunk: VcfChunk,
+        transform: RowTransform,
+        identifiers: Optional[Set[bytes]] = None,
+) -> VcfChunkResult:
+    """
+    Rewrites the rows of a chunk of a VCF file through a row transform, into the part file of the chunk.
+
+    The header rows, which are in the first chunk, are kept as they are. The part of a BGZF file is written as
+    BGZF blocks without the end of file block, and the part of a zstd file as zstd frames without a seek table,
+    so that the parts are merged by concatenating them.
+
+    :param vcf_file_path: The VCF file path.
+    :param chunk: The VcfChunk.
+    :param transform: The transform of the data rows, see rewrite_vcf_rows.
+    :param identifiers: The ids of the rows to transform, None to transform every row.
+
+    :return: The VcfChunkResult.
+    """
+    result = VcfRewriteResult()
+    rows_processed = 0
+    changed = False
+    compression = VcfCompression(chunk.compression)
+    compressor = StreamCompressor(compression)
+    try:
+        with open(vcf_file_path, 'rb') as file, open(chunk.part_path, 'wb') as part_file:
+            if compression == VcfCompression.bgzf:
+                rows: Iterator[bytes] = _block_rows(file, chunk, _read_bgzf_block, decompress_bgzf_block)
+            elif compression == VcfCompression.zstd:
+                rows = _block_rows(file, chunk, _read_zstd_frame, decompress_zstd_frame)
+            else:
+                rows = _plain_rows(file, chunk)
+            for row in rows:
+                if row.startswith(b'#'):
+                    part_file.write(compressor.compress(row))
+                    continue
+                rows_processed += 1
+                transformed_row: Optional[bytes] = transform_vcf_row(row, transform, identifiers, result)
+                if transformed_row is None:
+                    changed = True
+                    continue
+                changed = changed or transformed_row != row
+                part_file.write(compressor.compress(transformed_row))
+            part_file.write(compressor.flush(end_of_file=False))
+    except BaseException:
+        if os.path.exists(chunk.part_path):
+            os.remove(chunk.part_path)
+        raise
+
+    return VcfChunkResult(
+        index=chunk.index,
+        part_path=chunk.part_path,
+        rows_processed=rows_processed,
+        total_rows_matched=result.total_rows_matched,
+        total_rows_dropped=result.total_rows_dropped,
+        changed=changed,
+        zstd_frames=compressor.zstd_frames if compression == VcfCompression.zstd else None,
+    )
+
+
+def _plain_rows(file: IO[bytes], chunk: VcfChunk) -> Iterator[bytes]:
+    file.seek(chunk.start)
+    offset: int = chunk.start
+    for row in file:
+        if chunk.end is not None and offset >= chunk.end:
+            return
+        offset += len(row)
+        yield row
+
+
+def _block_rows(
+        file: IO[bytes],
+        chunk: VcfChunk,
+        read_block: BlockReader,
+        decompress_block: Callable[[bytes], bytes],
+) -> Iterator[bytes]:
+    file.seek(chunk.start >> 16)
+    pending = b''
+    while True:
+        next_block: Optional[Tuple[int, bytes]] = read_block(file)
+        if next_block is None:
+            break
+        block_offset, block = next_block
+        data: bytes = decompress_block(block)
+        last_block: bool = chunk.end is not None and block_offset == chunk.end >> 16
+        if last_block:
+            data = data[:chunk.end & 0xffff]
+        if block_offset == chunk.start >> 16:
+            data = data[chunk.start & 0xffff:]
+
+        pending += data
+        last_newline: int = pending.rfind(b'\n')
+        if last_newline != -1:
+            yield from io.BytesIO(pending[:last_newline + 1])
+            pending = pending[last_newline + 1:]
+        if last_block:
+            break
+
+    if pending:
+        yield pending
+
+
+def merge_vcf_chunks(
+        vcf_file_path: str,
+        chunk_results: List[VcfChunkResult],
+        file_version: FileVersion,
+        compression: VcfCompression = VcfCompression.none,
+) -> VcfRewriteResult:
+    """
+    Merges the part files of the chunks of a VCF file into a new version of the file, which atomically replaces
+    it. The file is left untouched when no chunk changed. The part files are removed in any case.
+
+    The caller holds the writer lock of the file.
+
+    :param vcf_file_path: The VCF file path.
+    :param chunk_results: The VcfChunkResults of all the chunks of the file.
+    :param file_version: The version of the file the chunks were rewritten from.
+    :param compression: The VcfCompression of the file.
+
+    :return: The VcfRewriteResult, the sum of the results of the chunks.
+
+    :raise VcfFileChangedError: If the file changed since it was split into chunks.
+    """
+    chunk_results = sorted(chunk_results, key=lambda chunk_result: chunk_result.index)
+    try:
+        if get_file_version(vcf_file_path) != file_version:
+            raise VcfFileChangedError('The VCF file {} changed while it was rewritten.'.format(vcf_file_path))
+
+        if any(chunk_result.changed for chunk_result in chunk_results):
+            with atomic_rewrite(vcf_file_path) as temporary_file:
+                for chunk_result in chunk_results:
+                    with open(chunk_result.part_path, 'rb') as part_file:
+                        copy_byte_range(
+                            part_file.fileno(), temporary_file.fileno(), 0, os.fstat(part_file.fileno()).st_size
+                        )
+                if compression == VcfCompression.bgzf:
+                    write_all(temporary_file.fileno(), BGZF_EOF)
+                elif compression == VcfCompression.zstd:
+                    write_all(temporary_file.fileno(), zstd_seek_table([
+                        tuple(frame) for chunk_result in chunk_results for frame in chunk_result.zstd_frames
+                    ]))
+    finally:
+        for chunk_result in chunk_results:
+            if os.path.exists(chunk_result.part_path):
+                os.remove(chunk_result.part_path)
+
+    return VcfRewriteResult(
+        total_rows_matched=sum(chunk_result.total_rows_matched for chunk_result in chunk_results),
+        total_rows_dropped=sum(chunk_result.total_rows_dropped for chunk_result in chunk_results),
+    )
@@ -0,0 +1,503 @@
+import os
+import struct
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import TracebackType
+from typing import IO, Callable, Deque, List, Optional, Tuple, Type
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.enums import VcfCompression
+
+try:
+    import zstandard
+except ImportError:
+    # Optional, only the .vcf.zst files need it.
+    zstandard = None
+
+# The uncompressed payload of a BGZF block. Kept below 64 KiB so that even incompressible data
+# fits in the 16 bit block size of the BGZF extra field.
+BGZF_BLOCK_SIZE = 65280
+
+# The empty BGZF block that marks the end of a BGZF file.
+BGZF_EOF = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000000000')
+
+# The gzip header of a BGZF block, up to its BSIZE field: the gzip magic with the FEXTRA flag, and the 'BC' extra field.
+BGZF_HEADER_SIZE = 18
+
+
+def compress_bgzf_block(data: bytes, level: int = 6) -> bytes:
+    """
+    Compresses data into a single BGZF block, i.e. a gzip member whose header carries the 'BC' extra field
+    with the total block size, which is what makes BGZF files randomly accessible.
+
+    :param data: The uncompressed data, at most BGZF_BLOCK_SIZE bytes.
+    :param level: The zlib compression level.
+
+    :return: The BGZF block.
+    """
+    if len(data) > BGZF_BLOCK_SIZE:
+        raise InvalidArgumentError('A BGZF block holds at most {} bytes.'.format(BGZF_BLOCK_SIZE))
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    deflated: bytes = compressor.compress(data) + compressor.flush()
+
+    # 18 bytes of header (with the 6 bytes of the extra field) and 8 bytes of footer.
+    block_size: int = len(deflated) + 26
+
+    return b''.join([
+        struct.pack('<4BI2BH2BHH', 31, 139, 8, 4, 0, 0, 255, 6, 66, 67, 2, block_size - 1),
+        deflated,
+        struct.pack('<II', zlib.crc32(data) & 0xffffffff, len(data) & 0xffffffff),
+    ])
+
+
+def read_bgzf_block(file: IO[bytes]) -> Optional[bytes]:
+    """
+    Reads the next BGZF block of a file, as found in the file.
+
+    :param file: The file, opened in binary mode at the start of a block.
+
+    :return: The block, or None at the end of the file.
+
+    :raise InvalidArgumentError: If the file is not BGZF compressed at this position.
+    """
+    header: bytes = file.read(BGZF_HEADER_SIZE)
+    if not header:
+        return None
+    if len(header) < BGZF_HEADER_SIZE or not is_bgzf_header(header):
+        raise InvalidArgumentError('The file is not BGZF compressed.')
+
+    block_size: int = struct.unpack('<H', header[16:18])[0] + 1
+
+    return header + file.read(block_size - BGZF_HEADER_SIZE)
+
+
+def decompress_bgzf_block(block: bytes) -> bytes:
+    """
+    :param block: A BGZF block.
+
+    :return: The uncompressed data of the block.
+    """
+    return zlib.decompress(block[BGZF_HEADER_SIZE:-8], -15)
+
+
+def is_bgzf_header(header: bytes) -> bool:
+    """
+    :param header: The first bytes of a gzip member.
+
+    :return: True if the member is a BGZF block, i.e. its extra field is the 'BC' field and nothing else.
+    """
+    return header[:4] == b'\x1f\x8b\x08\x04' and header[10:16] == b'\x06\x00BC\x02\x00'
+
+
+def is_bgzf_file(vcf_file_path: str) -> bool:
+    """
+    :param vcf_file_path: The VCF file path.
+
+    :return: True if the file is BGZF compressed, False if it is plain gzip compressed, or not compressed at all.
+    """
+    with open(vcf_file_path, 'rb') as file:
+        return is_bgzf_header(file.read(BGZF_HEADER_SIZE))
+
+
+# The zstd files are written as seekable zstd: independent frames, each of a BGZF block of data so that the rows
+# of both are addressed with the same virtual offsets, followed by a seek table of the sizes of the frames.
+ZSTD_FRAME_SIZE = BGZF_BLOCK_SIZE
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# The seek table is a skippable frame, which ends with a footer of the number of frames, a descriptor and the
+# seekable magic number.
+ZSTD_SKIPPABLE_MAGICS = range(0x184D2A50, 0x184D2A60)
+ZSTD_SEEK_TABLE_MAGIC = 0x184D2A5E
+ZSTD_SEEKABLE_MAGIC = 0x8F92EAB1
+ZSTD_SEEK_TABLE_FOOTER_SIZE = 9
+
+
+def zstandard_module():
+    """
+    :return: The zstandard module.
+
+    :raise InvalidArgumentError: If the zstandard package is not installed.
+    """
+    if zstandard is None:
+        raise InvalidArgumentError('The zstd compression requires the zstandard package.')
+
+    return zstandard
+
+
+def compress_zstd_frame(data: bytes, level: int = 6) -> bytes:
+    """
+    :param data: The uncompressed data, at most ZSTD_FRAME_SIZE bytes.
+    :param level: The zstd compression level.
+
+    :return: An independent zstd frame, with the size of the data in its header.
+    """
+    return zstandard_module().ZstdCompressor(level=level, write_content_size=True).compress(data)
+
+
+def decompress_zstd_frame(frame: bytes) -> bytes:
+    """
+    :param frame: A zstd frame.
+
+    :return: The uncompressed data of the frame.
+    """
+    return zstandard_module().ZstdDecompressor().decompressobj().decompress(frame)
+
+
+def zstd_frame_size(file_descriptor: int, offset: int) -> Optional[Tuple[int, bool]]:
+    """
+    Tells the size of the frame of a zstd file at an offset, from the headers of the frame and of its blocks.
+
+    :param file_descriptor: The file descriptor of the file.
+    :param offset: The offset of the frame.
+
+    :return: The size of the frame and True if it is a skippable frame, or None at the end of the file.
+
+    :raise InvalidArgumentError: If the file is not zstd compressed at this offset.
+    """
+    magic: bytes = os.pread(file_descriptor, 4, offset)
+    if not magic:
+        return None
+    if len(magic) == 4 and struct.unpack('<I', magic)[0] in ZSTD_SKIPPABLE_MAGICS:
+        return 8 + struct.unpack('<I', os.pread(file_descriptor, 4, offset + 4))[0], True
+    if magic != ZSTD_MAGIC:
+        raise InvalidArgumentError('The file is not zstd compressed.')
+
+    descriptor: int = os.pread(file_descriptor, 1, offset + 4)[0]
+    single_segment: int = descriptor >> 5 & 1
+    header_size: int = (
+        1
+        + (0 if single_segment else 1)
+        + (0, 1, 2, 4)[descriptor & 3]
+        + (single_segment, 2, 4, 8)[descriptor >> 6]
+    )
+    position: int = offset + 4 + header_size
+    while True:
+        block_header: bytes = os.pread(file_descriptor, 3, position)
+        if len(block_header) < 3:
+            raise InvalidArgumentError('The file is not zstd compressed.')
+        block: int = int.from_bytes(block_header, 'little')
+        block_type: int = block >> 1 & 3
+        if block_type == 3:
+            raise InvalidArgumentError('The file is not zstd compressed.')
+        # An RLE block holds a single byte.
+        position += 3 + (1 if block_type == 1 else block >> 3)
+        if block & 1:
+            break
+
+    # The content checksum of the frame, if it has one.
+    return position - offset + (4 if descriptor >> 2 & 1 else 0), False
+
+
+def read_zstd_frame(file: IO[bytes]) -> Optional[bytes]:
+    """
+    Reads the next frame of a zstd file, as found in the file, skipping the skippable frames.
+
+    :param file: The file, opened in binary mode at the start of a frame.
+
+    :return: The frame, or None at the end of the file.
+
+    :raise InvalidArgumentError: If the file is not zstd compressed at this position.
+    """
+    while True:
+        frame_size: Optional[Tuple[int, bool]] = zstd_frame_size(file.fileno(), file.tell())
+        if frame_size is None:
+            return None
+        size, skippable = frame_size
+        if not skippable:
+            return file.read(size)
+        file.seek(size, os.SEEK_CUR)
+
+
+def zstd_seek_table(frames: List[Tuple[int, int]]) -> bytes:
+    """
+    :param frames: The compressed and the uncompressed size of every frame of a zstd file, in file order.
+
+    :return: The seek table of the file.
+    """
+    entries: bytes = b''.join(struct.pack('<II', compressed_size, size) for compressed_size, size in frames)
+    footer: bytes = struct.pack('<IBI', len(frames), 0, ZSTD_SEEKABLE_MAGIC)
+
+    return struct.pack('<II', ZSTD_SEEK_TABLE_MAGIC, len(entries) + len(footer)) + entries + footer
+
+
+def read_zstd_seek_table(file_descriptor: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    :param file_descriptor: The file descriptor of a zstd file.
+
+    :return: The compressed and the uncompressed size of every frame of the file, from the seek table at its end,
+             or None if the file does not end with a seek table.
+    """
+    file_size: int = os.fstat(file_descriptor).st_size
+    if file_size < 8 + ZSTD_SEEK_TABLE_FOOTER_SIZE:
+        return None
+    frame_count, descriptor, magic = struct.unpack(
+        '<IBI', os.pread(file_descriptor, ZSTD_SEEK_TABLE_FOOTER_SIZE, file_size - ZSTD_SEEK_TABLE_FOOTER_SIZE)
+    )
+    if magic != ZSTD_SEEKABLE_MAGIC:
+        return None
+
+    # The entries hold a checksum too when the highest bit of the descriptor is set.
+    entry_size: int = 12 if descriptor & 0x80 else 8
+    table_size: int = 8 + frame_count * entry_size + ZSTD_SEEK_TABLE_FOOTER_SIZE
+    if table_size > file_size:
+        return None
+    table: bytes = os.pread(file_descriptor, table_size, file_size - table_size)
+    if struct.unpack('<I', table[:4])[0] != ZSTD_SEEK_TABLE_MAGIC:
+        return None
+
+    return [struct.unpack_from('<II', table, 8 + index * entry_size) for index in range(frame_count)]
+
+
+def zstd_seek_table_after_append(file_descriptor: int, frames: List[Tuple[int, int]]) -> bytes:
+    """
+    The seek table to write after frames appended to a zstd file, so that the file stays seekable. The current
+    seek table stays where it is, as a frame without data.
+
+    :param file_descriptor: The file descriptor of the zstd file, before the frames are appended.
+    :param frames: The compressed and the uncompressed size of the appended frames.
+
+    :return: The seek table, or nothing if the file does not end with a seek table.
+    """
+    current_frames: Optional[List[Tuple[int, int]]] = read_zstd_seek_table(file_descriptor)
+    if current_frames is None:
+        return b''
+
+    return zstd_seek_table(current_frames + [(len(zstd_seek_table(current_frames)), 0)] + frames)
+
+
+class StreamCompressor:
+    """
+    Incrementally compresses a stream of chunks, as plain, gzip, BGZF or seekable zstd output.
+
+    The compressed bytes are returned as soon as they are produced, so the whole output is never held in memory.
+    """
+
+    def __init__(self, compression: VcfCompression = VcfCompression.none, level: int = 6):
+        if not isinstance(compression, VcfCompression):
+            raise InvalidArgumentError('The compression is not supported.')
+
+        self.compression = compression
+        self.level = level
+        # The compressed and the uncompressed size of the zstd frames produced so far.
+        self.zstd_frames: List[Tuple[int, int]] = []
+
+        self._gzip_compressor = None
+        self._zstd_compressor = None
+        self._block_buffer = bytearray()
+        if compression == VcfCompression.gzip:
+            # A wbits of 31 makes zlib write a gzip header and footer.
+            self._gzip_compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        elif compression == VcfCompression.zstd:
+            self._zstd_compressor = zstandard_module().ZstdCompressor(level=level, write_content_size=True)
+
+    def _compress_block(self, data: bytes) -> bytes:
+        if self.compression == VcfCompression.bgzf:
+            return compress_bgzf_block(data, self.level)
+
+        frame: bytes = self._zstd_compressor.compress(data)
+        self.zstd_frames.append((len(frame), len(data)))
+
+        return frame
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        :param data: The next uncompressed chunk.
+
+        :return: The compressed bytes that are ready to be written, possibly empty.
+        """
+        if self.compression == VcfCompression.none:
+            return data
+        if self.compression == VcfCompression.gzip:
+            return self._gzip_compressor.compress(data)
+
+        # BGZF_BLOCK_SIZE == ZSTD_FRAME_SIZE
+        self._block_buffer += data
+        blocks = []
+        while len(self._block_buffer) >= BGZF_BLOCK_SIZE:
+            blocks.append(self._compress_block(bytes(self._block_buffer[:BGZF_BLOCK_SIZE])))
+            del self._block_buffer[:BGZF_BLOCK_SIZE]
+
+        return b''.join(blocks)
+
+    def flush(self, end_of_file: bool = True) -> bytes:
+        """
+        :param end_of_file: False to leave out the BGZF end of file block or the zstd seek table, e.g. for a part
+                            of a file.
+
+        :return: The remaining compressed bytes, including the gzip footer, the BGZF end of file block or the zstd
+                 seek table.
+        """
+        if self.compression == VcfCompression.none:
+            return b''
+        if self.compression == VcfCompression.gzip:
+            return self._gzip_compressor.flush()
+
+        remaining: bytes = self._compress_block(bytes(self._block_buffer)) if self._block_buffer else b''
+        self._block_buffer = bytearray()
+        if not end_of_file:
+            return remaining
+
+        return remaining + (BGZF_EOF if self.compression == VcfCompression.bgzf else zstd_seek_table(self.zstd_frames))
+
+
+class BlockCompressor:
+    """
+    Compresses output as BGZF blocks or seekable zstd frames in parallel, on a pool of threads shared by the
+    process: zlib and zstd release the GIL while they compress a block, so the blocks of an output are compressed
+    on as many cores as there are threads. BGZF output is a valid multi member gzip stream, which is also randomly
+    accessible by block.
+
+    The process wide instance is initialized with the Configuration at the Application initialization. The
+    pool is only started on first use, so that it is not inherited by forked worker processes.
+    """
+
+    __instance: Optional['BlockCompressor'] = None
+
+    def __init__(
+            self,
+            level: int = 6,
+            threads: int = 4,
+    ):
+        if level is None or not 0 <= level <= 9:
+            raise InvalidArgumentError('A compression level from 0 to 9 is required.')
+        if threads is None or threads <= 0:
+            raise InvalidArgumentError('At least one compression thread is required.')
+
+        self.level = level
+        self.threads = threads
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def initialize(cls, level: int = 6, threads: int = 4) -> 'BlockCompressor':
+        """
+        Sets the process wide instance.
+
+        :param level: The compression level of the blocks.
+        :param threads: The number of threads compressing blocks, shared by all the outputs of the process.
+
+        :return: The process wide instance.
+        """
+        cls.__instance = cls(level=level, threads=threads)
+
+        return cls.__instance
+
+    @classmethod
+    def get_instance(cls) -> 'BlockCompressor':
+        """
+        :return: The process wide instance, with the default settings if it was not initialized.
+        """
+        if cls.__instance is None:
+            cls.__instance = cls()
+
+        return cls.__instance
+
+    def submit(self, compress_block: Callable[[bytes, int], bytes], data: bytes) -> 'Future[bytes]':
+        """
+        :param compress_block: The function compressing a block, compress_bgzf_block or compress_zstd_frame.
+        :param data: The uncompressed data of a block, at most BGZF_BLOCK_SIZE bytes.
+
+        :return: The future of the compressed block.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='compression')
+
+        return self._executor.submit(compress_block, data, self.level)
+
+    def open(self, file: IO[bytes], compression: VcfCompression = VcfCompression.bgzf) -> 'BlockWriter':
+        """
+        :param file: The file to write the compressed output to, opened in binary mode.
+        :param compression: The compression of the output, bgzf or zstd.
+
+        :return: A BlockWriter over the file, to use as a context manager.
+        """
+        return BlockWriter(file=file, compressor=self, compression=compression)
+
+
+class BlockWriter:
+    """
+    Writes BGZF or seekable zstd output to a file, as a binary file object: the written data is cut into blocks
+    which are compressed in parallel by a BlockCompressor and written to the file in order.
+
+    At most two blocks per compression thread are pending at once, so the memory used does not depend on the
+    size of the output. The BGZF end of file block, or the zstd seek table, is written when the writer is closed,
+    and left out on error.
+    """
+
+    def __init__(
+            self,
+            file: IO[bytes],
+            compressor: BlockCompressor,
+            compression: VcfCompression = VcfCompression.bgzf,
+    ):
+        if compression not in (VcfCompression.bgzf, VcfCompression.zstd):
+            raise InvalidArgumentError('Only the bgzf and zstd compressions are written by block.')
+
+        self.file = file
+        self.compressor = compressor
+        self.compression = compression
+
+        self._compress_block = compress_bgzf_block if compression == VcfCompression.bgzf else compress_zstd_frame
+        self._buffer = bytearray()
+        self._pending: Deque[Tuple[Future, int]] = deque()
+        # The compressed and the uncompressed size of the zstd frames written so far.
+        self._frames: List[Tuple[int, int]] = []
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        while len(self._buffer) >= BGZF_BLOCK_SIZE:
+            self._submit(bytes(self._buffer[:BGZF_BLOCK_SIZE]))
+            del self._buffer[:BGZF_BLOCK_SIZE]
+
+        return len(data)
+
+    def _submit(self, data: bytes) -> None:
+        if self.compressor.threads == 1:
+            self._write_block(self._compress_block(data, self.compressor.level), len(data))
+            return
+
+        self._pending.append((self.compressor.submit(self._compress_block, data), len(data)))
+        while len(self._pending) >= 2 * self.compressor.threads:
+            self._write_pending_block()
+
+    def _write_pending_block(self) -> None:
+        future, size = self._pending.popleft()
+        self._write_block(future.result(), size)
+
+    def _write_block(self, block: bytes, size: int) -> None:
+        self.file.write(block)
+        self._frames.append((len(block), size))
+
+    def close(self) -> None:
+        """
+        Writes the remaining blocks and the BGZF end of file block, or the zstd seek table.
+        """
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+        while self._pending:
+            self._write_pending_block()
+        self.file.write(BGZF_EOF if self.compression == VcfCompression.bgzf else zstd_seek_table(self._frames))
+
+    def __enter__(self) -> 'BlockWriter':
+        return self
+
+    def __exit__(
+            self,
+            exc_type: Optional[Type[BaseException]],
+            exc_value: Optional[BaseException],
+            traceback: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.close()
+            return
+
+        for future, _ in self._pending:
+            future.cancel()
+        self._pending.clear()
@@ -0,0 +1,273 @@
+import bisect
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.enums import VcfMutationOperation
+from application.vcf_files.models import FileVersion, VcfDeltaEntry
+from application.vcf_files.utils import atomic_rewrite, replace_vcf_row_columns
+
+# The code of each operation in the delta log file.
+OPERATION_CODES: Dict[VcfMutationOperation, bytes] = {
+    VcfMutationOperation.append: b'A',
+    VcfMutationOperation.delete: b'D',
+    VcfMutationOperation.update: b'U',
+}
+OPERATIONS_BY_CODE: Dict[bytes, VcfMutationOperation] = {
+    code: operation for operation, code in OPERATION_CODES.items()
+}
+
+
+class VcfDeltaLog:
+    """
+    The delta log of a VCF file: the appends, deletes (tombstones) and updates recorded since the file was last
+    rewritten, in the order they were made. Readers merge it with the rows of the file, and the compaction
+    folds it into a new version of the file.
+
+    The log is stored as a '<vcf file>.delta' sidecar file, stamped with the version of the VCF file it applies
+    to. A VCF file that was replaced since (e.g. by the compaction) does not match the stamp, so the log is
+    ignored instead of being applied twice.
+    """
+
+    SUFFIX = '.delta'
+
+    def __init__(
+            self,
+            file_size: int,
+            modified_at: int,
+            inode: int,
+            entries: List[VcfDeltaEntry] = None,
+            size: int = 0,
+    ):
+        self.file_size = file_size
+        self.modified_at = modified_at
+        self.inode = inode
+        self.entries: List[VcfDeltaEntry] = []
+        # The size of the stored log, in bytes.
+        self.size = size
+        # The positions of the delete and update entries of each id, in log order.
+        self._positions_by_id: Dict[bytes, List[int]] = {}
+        for entry in entries or []:
+            self.add(entry)
+        # The number of entries that are already in the log file.
+        self._stored_entries = len(self.entries)
+
+    @classmethod
+    def for_file_version(cls, file_version: FileVersion) -> 'VcfDeltaLog':
+        """
+        :param file_version: The version of the VCF file.
+
+        :return: An empty delta log of that version of the VCF file.
+        """
+        return cls(file_size=file_version.size, modified_at=file_version.modified_at, inode=file_version.inode)
+
+    def is_for(self, file_version: Optional[FileVersion]) -> bool:
+        """
+        :param file_version: The version of the VCF file.
+
+        :return: True if the log applies to that version of the VCF file.
+        """
+        return (
+            file_version is not None
+            and file_version.size == self.file_size
+            and file_version.modified_at == self.modified_at
+            and file_version.inode == self.inode
+        )
+
+    def add(self, entry: VcfDeltaEntry) -> None:
+        """
+        Adds an entry at the end of the log, it is written to the log file by the next store.
+        """
+        if entry.operation != VcfMutationOperation.append:
+            self._positions_by_id.setdefault(entry.identifier, []).append(len(self.entries))
+        self.entries.append(entry)
+
+    def _follow(self, identifier: bytes, since: int) -> Tuple[Optional[bytes], Optional[VcfDeltaEntry]]:
+        """
+        Follows a row with an id through the delete and update entries from a position of the log on, an
+        update may change the id of the row and so the entries that apply to it next.
+
+        :return: The final id of the row, or None if it is deleted, and the last update of the row.
+        """
+        last_update: Optional[VcfDeltaEntry] = None
+        while True:
+            positions: Optional[List[int]] = self._positions_by_id.get(identifier)
+            if not positions:
+                return identifier, last_update
+            index = bisect.bisect_left(positions, since)
+            if index == len(positions):
+                return identifier, last_update
+            entry: VcfDeltaEntry = self.entries[positions[index]]
+            if entry.operation == VcfMutationOperation.delete:
+                return None, last_update
+            last_update = entry
+            identifier = entry.row.split(b'\t', 3)[2]
+            since = positions[index] + 1
+
+    def mutate(self, row: bytes, since: int = 0) -> Optional[bytes]:
+        """
+        Applies the delete and update entries of the log, from a position on, to a data row.
+
+        :param row: The data row.
+        :param since: The position of the log the row was added at, 0 for the rows of the VCF file.
+
+        :return: The row as it is after the entries, or None if it is deleted.
+        """
+        identifier, last_update = self._follow(row.split(b'\t', 3)[2], since)
+        if identifier is None:
+            return None
+        if last_update is None:
+            return row if row.endswith(b'\n') else row + b'\n'
+
+        return replace_vcf_row_columns(row, last_update.row)
+
+    def appended_rows(self) -> List[bytes]:
+        """
+        :return: The rows appended by the log, as they are after the entries that follow them.
+        """
+        rows: List[bytes] = []
+        for position, entry in enumerate(self.entries):
+            if entry.operation == VcfMutationOperation.append:
+                row: Optional[bytes] = self.mutate(entry.row, since=position + 1)
+                if row is not None:
+                    rows.append(row)
+
+        return rows
+
+    def merge(self, rows: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Merges the log with the data rows of the VCF file.
+
+        :param rows: The data rows of the VCF file.
+
+        :return: The data rows as they are after the entries of the log, followed by the appended rows.
+        """
+        for row in rows:
+            merged_row: Optional[bytes] = self.mutate(row)
+            if merged_row is not None:
+                yield merged_row
+
+        yield from self.appended_rows()
+
+    def count_rows(self, identifier: bytes, file_rows_by_id: Dict[bytes, int]) -> int:
+        """
+        Counts the rows with an id, after the entries of the log.
+
+        A row of the VCF file can only get the id if it had it already, or if an update gave it to it, so only
+        the rows of these ids are followed through the log.
+
+        :param identifier: The id.
+        :param file_rows_by_id: The number of rows of the VCF file with each of the id and the ids of the
+                                entries of the log.
+
+        :return: The total number of rows with the id.
+        """
+        total_rows = 0
+        for file_identifier in {identifier} | set(self._positions_by_id):
+            if file_rows_by_id.get(file_identifier) and self._follow(file_identifier, 0)[0] == identifier:
+                total_rows += file_rows_by_id[file_identifier]
+
+        for position, entry in enumerate(self.entries):
+            if entry.operation == VcfMutationOperation.append \
+                    and self._follow(entry.identifier, position + 1)[0] == identifier:
+                total_rows += 1
+
+        return total_rows
+
+    def identifiers(self) -> Set[bytes]:
+        """
+        :return: The ids of the delete and update entries of the log.
+        """
+        return set(self._positions_by_id)
+
+    def store(self, vcf_file_path: str) -> None:
+        """
+        Stores the entries added since the log was loaded or last stored, by appending them to the log file
+        (and syncing it to disk) without touching the stored entries. A new log file is written instead if
+        there is none yet, or if the stored one is not the one the log was loaded from.
+
+        :param vcf_file_path: The VCF file path.
+        """
+        delta_log_path: str = vcf_file_path + self.SUFFIX
+        new_entries: bytes = b''.join(self._encode(entry) for entry in self.entries[self._stored_entries:])
+
+        if self.size and os.path.exists(delta_log_path) and os.path.getsize(delta_log_path) == self.size:
+            with open(delta_log_path, 'ab') as file:
+                file.write(new_entries)
+                file.flush()
+                os.fsync(file.fileno())
+            self.size += len(new_entries)
+        else:
+            contents: bytes = '{}\t{}\t{}\n'.format(self.file_size, self.modified_at, self.inode).encode('utf-8') \
+                + b''.join(self._encode(entry) for entry in self.entries)
+            with atomic_rewrite(delta_log_path) as file:
+                file.write(contents)
+            self.size = len(contents)
+
+        self._stored_entries = len(self.entries)
+
+    @staticmethod
+    def _encode(entry: VcfDeltaEntry) -> bytes:
+        if entry.operation == VcfMutationOperation.delete:
+            return OPERATION_CODES[entry.operation] + b'\t' + entry.identifier + b'\n'
+        if entry.operation == VcfMutationOperation.update:
+            return OPERATION_CODES[entry.operation] + b'\t' + entry.identifier + b'\t' + entry.row + b'\n'
+        return OPERATION_CODES[entry.operation] + b'\t' + entry.row + b'\n'
+
+    @classmethod
+    def load(cls, vcf_file_path: str) -> Optional['VcfDeltaLog']:
+        """
+        Loads the delta log of a VCF file.
+
+        Readers must load the log before they open the VCF file: the compaction replaces the VCF file before
+        it removes the log, so a log that is already gone means the VCF file was already replaced.
+
+        :param vcf_file_path: The VCF file path.
+
+        :return: The VcfDeltaLog, or None if there is no delta log.
+
+        :raise InvalidArgumentError: If the delta log is corrupted.
+        """
+        try:
+            with open(vcf_file_path + cls.SUFFIX, 'rb') as file:
+                contents: bytes = file.read()
+        except FileNotFoundError:
+            return None
+
+        lines: List[bytes] = contents.split(b'\n')
+        try:
+            file_size, modified_at, inode = (int(value) for value in lines[0].split(b'\t'))
+            # The last line is empty, or a partially written entry that was never acknowledged, which is left out
+            # of the size so that the next store rewrites the log without it.
+            delta_log = cls(
+                file_size=file_size, modified_at=modified_at, inode=inode, size=len(contents) - len(lines[-1])
+            )
+            for line in lines[1:-1]:
+                code, payload = line.split(b'\t', 1)
+                operation: VcfMutationOperation = OPERATIONS_BY_CODE[code]
+                if operation == VcfMutationOperation.delete:
+                    delta_log.add(VcfDeltaEntry(operation=operation, identifier=payload))
+                elif operation == VcfMutationOperation.update:
+                    identifier, row = payload.split(b'\t', 1)
+                    delta_log.add(VcfDeltaEntry(operation=operation, identifier=identifier, row=row))
+                else:
+                    delta_log.add(
+                        VcfDeltaEntry(operation=operation, identifier=payload.split(b'\t', 3)[2], row=payload)
+                    )
+            delta_log._stored_entries = len(delta_log.entries)
+        except (ValueError, KeyError, IndexError):
+            raise InvalidArgumentError('The delta log of {} is corrupted.'.format(vcf_file_path))
+
+        return delta_log
+
+    @classmethod
+    def remove(cls, vcf_file_path: str) -> None:
+        """
+        Removes the delta log of a VCF file, if there is one.
+
+        :param vcf_file_path: The VCF file path.
+        """
+        try:
+            os.remove(vcf_file_path + cls.SUFFIX)
+        except FileNotFoundError:
+            pass
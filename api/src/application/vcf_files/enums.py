@@ -0,0 +1,65 @@
+from enum import Enum
+from typing import List
+
+
+class VcfCompression(Enum):
+    none = 'none'
+    gzip = 'gzip'
+    bgzf = 'bgzf'
+    zstd = 'zstd'
+
+    @classmethod
+    def values(cls) -> List[str]:
+        return [member.value for member in cls]
+
+
+class VcfMutationOperation(Enum):
+    delete = 'delete'
+    update = 'update'
+    append = 'append'
+
+    @classmethod
+    def values(cls) -> List[str]:
+        return [member.value for member in cls]
+
+
+class VcfJobOperation(Enum):
+    delete = 'delete'
+    update = 'update'
+    append = 'append'
+    export = 'export'
+    index = 'index'
+    convert = 'convert'
+
+
+class VcfJobState(Enum):
+    # The Celery states of the job: a job that is unknown to the result backend is pending too.
+    pending = 'PENDING'
+    started = 'STARTED'
+    progress = 'PROGRESS'
+    success = 'SUCCESS'
+    failure = 'FAILURE'
+    retry = 'RETRY'
+    revoked = 'REVOKED'
+
+
+class VcfIngestFormat(Enum):
+    # The media types of the bodies of the bulk ingest requests: one JSON row or one tab separated row per line.
+    ndjson = 'application/x-ndjson'
+    tsv = 'text/tab-separated-values'
+
+    @classmethod
+    def values(cls) -> List[str]:
+        return [member.value for member in cls]
+
+
+class VcfAccessPath(Enum):
+    # The ways the rows of a VCF file with an id are read, chosen by the VcfQueryPlanner.
+    # The rows are read at their offsets in the ID index.
+    id_index = 'id_index'
+    # The ID index has no rows with the id for the page, nothing is read.
+    index_miss = 'index_miss'
+    # Every row of the file is read.
+    stream_scan = 'stream_scan'
+    # Every row of the file is read and merged with the pending delta log.
+    merge_scan = 'merge_scan'
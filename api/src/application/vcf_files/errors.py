@@ -1,4 +1,4 @@
-from application.infrastructure.error.errors import ValidationError
+from application.infrastructure.error.errors import ValidationError, VCFHandlerBaseError
 
 
 class VcfRowsByIdNotExistError(ValidationError):
@@ -24,3 +24,33 @@ class VcfDataUpdateError(ValidationError):
 class VcfNoDataDeletedError(ValidationError):
     message = "Vcf Data Delete Error."
     error_type = "VcfDataDeleteError"
+
+
+class VcfFileNotFoundError(VCFHandlerBaseError):
+    message = "Vcf File Not Found Error."
+    error_type = "VcfFileNotFoundError"
+
+
+class VcfFileHeaderError(ValidationError):
+    message = "Vcf File Header Error."
+    error_type = "VcfFileHeaderError"
+
+
+class VcfDataExportError(ValidationError):
+    message = "Vcf Data Export Error."
+    error_type = "VcfDataExportError"
+
+
+class VcfDataMutationError(ValidationError):
+    message = "Vcf Data Mutation Error."
+    error_type = "VcfDataMutationError"
+
+
+class VcfDataConversionError(ValidationError):
+    message = "Vcf Data Conversion Error."
+    error_type = "VcfDataConversionError"
+
+
+class VcfFileChangedError(ValidationError):
+    message = "Vcf File Changed Error."
+    error_type = "VcfFileChangedError"
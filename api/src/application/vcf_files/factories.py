@@ -1,34 +1,263 @@
+import threading
+from typing import Optional
+
+from application.infrastructure.concurrency.admission import AdmissionController
+from application.infrastructure.concurrency.bounded_executor import BoundedExecutor
+from application.infrastructure.concurrency.group_commit import GroupCommit
+from application.infrastructure.concurrency.single_flight import SingleFlight
+from application.infrastructure.configurations.models import Configuration
+from application.rest_api.vcf_files.schemas import VcfFilePaginationResponseSchema
+from application.vcf_files.caching import VcfPageCache, VcfHeaderCache
 from application.vcf_files.operations import FilterVcfFile, AppendToVcfFile, FilterOutRowsById, \
-    UpdateByIdVcfFile, AsyncFilterOutRowsById
+    UpdateByIdVcfFile, AsyncFilterOutRowsById, ReadVcfFileHeader, ExportVcfFile, ApplyVcfFileMutations, \
+    RecordVcfFileMutations, AsyncUpdateByIdVcfFile, AsyncAppendToVcfFile, AsyncExportVcfFile, AsyncBuildVcfIdIndex, \
+    ReadVcfJob, IngestVcfRows, AsyncConvertVcfFile
 from application.vcf_files.services import VcfFilePaginationService, AppendDataToVcfFileService, \
-    FilterOutRowsByIdService, VcfFileUpdateByIdService, AsyncFilterOutRowsByIdService
+    FilterOutRowsByIdService, VcfFileUpdateByIdService, AsyncFilterOutRowsByIdService, VcfFileHeaderService, \
+    ExportVcfFileService, VcfFileBatchMutationService, AsyncVcfFileUpdateByIdService, AsyncAppendDataToVcfFileService, \
+    AsyncExportVcfFileService, AsyncBuildVcfIdIndexService, VcfJobStatusService, IngestVcfRowsService, \
+    AsyncConvertVcfFileService
+from application.vcf_files.planning import VcfQueryPlanner
+from application.vcf_files.prefetching import NextPagePrefetcher
+
+# The SingleFlight, the append GroupCommit, the page and header caches, the prefetcher, the scan executor and the
+# scan AdmissionController must outlive the per request services, so the requests of the same process share them. They are created on first
+# use, after the Configuration is initialized, under a lock so the request threads of a worker create only one.
+_pagination_single_flight: Optional[SingleFlight] = None
+_page_cache: Optional[VcfPageCache] = None
+_next_page_prefetcher: Optional[NextPagePrefetcher] = None
+_header_cache: Optional[VcfHeaderCache] = None
+_append_group_commit: Optional[GroupCommit] = None
+_scan_executor: Optional[BoundedExecutor] = None
+_scan_admission_controller: Optional[AdmissionController] = None
+_singletons_lock = threading.RLock()
+
+
+def pagination_single_flight() -> SingleFlight:
+    global _pagination_single_flight
+
+    with _singletons_lock:
+        if _pagination_single_flight is None:
+            redis_url: Optional[str] = Configuration.get_instance().single_flight_redis_url
+            redis_client = None
+            if redis_url:
+                # redis is only imported by the workers that coalesce the queries through it.
+                import redis
+
+                redis_client = redis.Redis.from_url(redis_url)
+            _pagination_single_flight = SingleFlight(
+                redis_client=redis_client,
+                result_schema=VcfFilePaginationResponseSchema(),
+            )
+
+    return _pagination_single_flight
+
+
+def append_group_commit() -> GroupCommit:
+    global _append_group_commit
+
+    with _singletons_lock:
+        if _append_group_commit is None:
+            configuration: Configuration = Configuration.get_instance()
+            _append_group_commit = GroupCommit(
+                max_delay=configuration.append_batch_delay,
+                max_items=configuration.append_batch_max_rows,
+            )
+
+    return _append_group_commit
+
+
+def page_cache() -> VcfPageCache:
+    global _page_cache
+
+    with _singletons_lock:
+        if _page_cache is None:
+            _page_cache = VcfPageCache(max_size=Configuration.get_instance().page_cache_size)
+
+    return _page_cache
+
+
+def next_page_prefetcher() -> NextPagePrefetcher:
+    global _next_page_prefetcher
+
+    with _singletons_lock:
+        if _next_page_prefetcher is None:
+            configuration: Configuration = Configuration.get_instance()
+            _next_page_prefetcher = NextPagePrefetcher(
+                page_cache=page_cache(),
+                max_workers=configuration.prefetch_max_workers,
+                max_load=configuration.prefetch_max_load,
+            )
+
+    return _next_page_prefetcher
+
+
+def header_cache() -> VcfHeaderCache:
+    global _header_cache
+
+    with _singletons_lock:
+        if _header_cache is None:
+            _header_cache = VcfHeaderCache(max_size=Configuration.get_instance().header_cache_size)
+
+    return _header_cache
+
+
+def scan_executor() -> BoundedExecutor:
+    global _scan_executor
+
+    with _singletons_lock:
+        if _scan_executor is None:
+            _scan_executor = BoundedExecutor(
+                max_workers=Configuration.get_instance().scan_threads,
+                thread_name_prefix='vcf-scan',
+            )
+
+    return _scan_executor
+
+
+def scan_admission_controller() -> AdmissionController:
+    global _scan_admission_controller
+
+    with _singletons_lock:
+        if _scan_admission_controller is None:
+            configuration: Configuration = Configuration.get_instance()
+            _scan_admission_controller = AdmissionController(
+                max_bytes=configuration.scan_max_bytes,
+                max_wait=configuration.scan_max_wait,
+            )
+
+    return _scan_admission_controller
+
+
+def record_vcf_file_mutations() -> Optional[RecordVcfFileMutations]:
+    configuration: Configuration = Configuration.get_instance()
+    if not configuration.delta_log_enabled:
+        return None
+
+    return RecordVcfFileMutations(
+        compaction_size=configuration.delta_compaction_size,
+        compaction_count=configuration.delta_compaction_count,
+    )
+
+
+def read_vcf_file_header() -> ReadVcfFileHeader:
+    return ReadVcfFileHeader(
+        header_cache=header_cache(),
+    )
 
 
 def vcf_file_pagination_service() -> VcfFilePaginationService:
     return VcfFilePaginationService(
-        filter_vcf_file=FilterVcfFile(),
+        filter_vcf_file=FilterVcfFile(
+            read_vcf_file_header=read_vcf_file_header(),
+        ),
+        single_flight=pagination_single_flight(),
+        page_cache=page_cache(),
+        prefetcher=next_page_prefetcher(),
+        query_planner=VcfQueryPlanner(
+            index_min_size=Configuration.get_instance().query_index_min_size,
+        ),
+        scan_executor=scan_executor(),
+        admission_controller=scan_admission_controller(),
     )
 
 
 def append_data_to_vcf_file_service() -> AppendDataToVcfFileService:
     return AppendDataToVcfFileService(
         append_to_vcf_file=AppendToVcfFile(),
+        record_vcf_file_mutations=record_vcf_file_mutations(),
+        group_commit=append_group_commit(),
+    )
+
+
+def ingest_vcf_rows_service() -> IngestVcfRowsService:
+    return IngestVcfRowsService(
+        ingest_vcf_rows=IngestVcfRows(),
     )
 
 
 def filter_out_rows_by_id_service() -> FilterOutRowsByIdService:
     return FilterOutRowsByIdService(
         filter_out_rows_by_id=FilterOutRowsById(),
+        record_vcf_file_mutations=record_vcf_file_mutations(),
+        scan_executor=scan_executor(),
+        admission_controller=scan_admission_controller(),
     )
 
 
 def async_filter_out_rows_by_id_service() -> AsyncFilterOutRowsByIdService:
     return AsyncFilterOutRowsByIdService(
         filter_out_rows_by_id=AsyncFilterOutRowsById(),
+        record_vcf_file_mutations=record_vcf_file_mutations(),
     )
 
 
 def vcf_file_update_by_id_service() -> VcfFileUpdateByIdService:
     return VcfFileUpdateByIdService(
         update_by_id_vcf_file=UpdateByIdVcfFile(),
+        record_vcf_file_mutations=record_vcf_file_mutations(),
+        scan_executor=scan_executor(),
+        admission_controller=scan_admission_controller(),
+    )
+
+
+def async_vcf_file_update_by_id_service() -> AsyncVcfFileUpdateByIdService:
+    return AsyncVcfFileUpdateByIdService(
+        update_by_id_vcf_file=AsyncUpdateByIdVcfFile(),
+        record_vcf_file_mutations=record_vcf_file_mutations(),
+    )
+
+
+def async_append_data_to_vcf_file_service() -> AsyncAppendDataToVcfFileService:
+    return AsyncAppendDataToVcfFileService(
+        append_to_vcf_file=AsyncAppendToVcfFile(),
+        record_vcf_file_mutations=record_vcf_file_mutations(),
+    )
+
+
+def vcf_file_batch_mutation_service() -> VcfFileBatchMutationService:
+    return VcfFileBatchMutationService(
+        apply_vcf_file_mutations=ApplyVcfFileMutations(),
+        record_vcf_file_mutations=record_vcf_file_mutations(),
+        scan_executor=scan_executor(),
+        admission_controller=scan_admission_controller(),
+    )
+
+
+def vcf_file_header_service() -> VcfFileHeaderService:
+    return VcfFileHeaderService(
+        read_vcf_file_header=read_vcf_file_header(),
+    )
+
+
+def export_vcf_file_service() -> ExportVcfFileService:
+    return ExportVcfFileService(
+        export_vcf_file=ExportVcfFile(
+            read_vcf_file_header=read_vcf_file_header(),
+        ),
+        admission_controller=scan_admission_controller(),
+    )
+
+
+def async_export_vcf_file_service() -> AsyncExportVcfFileService:
+    return AsyncExportVcfFileService(
+        export_vcf_file=AsyncExportVcfFile(),
+    )
+
+
+def async_build_vcf_id_index_service() -> AsyncBuildVcfIdIndexService:
+    return AsyncBuildVcfIdIndexService(
+        build_vcf_id_index=AsyncBuildVcfIdIndex(),
+    )
+
+
+def async_convert_vcf_file_service() -> AsyncConvertVcfFileService:
+    return AsyncConvertVcfFileService(
+        convert_vcf_file=AsyncConvertVcfFile(),
+    )
+
+
+def vcf_job_status_service() -> VcfJobStatusService:
+    return VcfJobStatusService(
+        read_vcf_job=ReadVcfJob(),
     )
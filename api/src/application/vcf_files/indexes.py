@@ -0,0 +1,637 @@
+import bisect
+import mmap
+import os
+import struct
+import zlib
+from typing import IO, Dict, Iterator, List, Optional, Tuple, Union
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.infrastructure.logging.loggers import LOGGER
+from application.vcf_files.caching import LruCache
+from application.vcf_files.jobs import PROGRESS_INTERVAL_ROWS, ProgressCallback
+from application.vcf_files.models import ByteRangeChange, FileVersion
+from application.vcf_files.utils import atomic_rewrite, get_file_version, get_open_file_version
+
+
+class VcfIdIndex:
+    """
+    The ID index of an uncompressed VCF file: the byte offset and length of every data row, grouped by row id.
+
+    The index is stored as a '<vcf file>.idx' sidecar file, stamped with the size and the modification time
+    of the VCF file it was built from. A sidecar whose stamp does not match the VCF file is stale and ignored,
+    unless the file only grew since, then the rows past the indexed size are indexed and appended to the
+    sidecar (see catch_up_id_index).
+
+    The stamp is a fixed width first line, so that it is rewritten in place when rows are appended. Along with
+    the version of the VCF file, it holds a checksum of the last bytes of the file it covers, which tells that
+    the file was appended to rather than rewritten, and the size of the sidecar it covers, so that rows
+    appended to the sidecar by an interrupted catch-up are ignored.
+    """
+
+    SUFFIX = '.idx'
+
+    # The bytes at the end of the indexed VCF file covered by the checksum of the stamp.
+    TAIL_SIZE = 4096
+
+    def __init__(
+            self,
+            file_size: int,
+            modified_at: int,
+            data_offset: int,
+            rows: Dict[str, List[Tuple[int, int]]],
+    ):
+        self.file_size = file_size
+        self.modified_at = modified_at
+        self.data_offset = data_offset
+        self.rows = rows
+
+    @property
+    def total_rows(self) -> int:
+        return sum(len(rows) for rows in self.rows.values())
+
+    def lookup(self, identifier: str) -> List[Tuple[int, int]]:
+        """
+        :param identifier: The row id.
+
+        :return: The (offset, length) of the rows with the id, in file order.
+        """
+        return self.rows.get(identifier, [])
+
+    def is_fresh(self, file_version: Optional[FileVersion]) -> bool:
+        """
+        :param file_version: The current version of the VCF file.
+
+        :return: True if the index was built from, or kept up to date with, that version of the file.
+        """
+        return (
+            file_version is not None
+            and file_version.size == self.file_size
+            and file_version.modified_at == self.modified_at
+        )
+
+    def stamp(self, file_version: FileVersion) -> None:
+        """
+        Marks the index as up to date with a version of the VCF file.
+
+        :param file_version: The version of the VCF file.
+        """
+        self.file_size = file_version.size
+        self.modified_at = file_version.modified_at
+
+    def apply_changes(self, changes: List[ByteRangeChange]) -> None:
+        """
+        Moves the indexed rows to their offsets after the byte ranges of the changes were replaced, without
+        reading the VCF file again.
+
+        :param changes: The non overlapping changes that were applied to the rows of the file.
+        """
+        changes = sorted(changes, key=lambda change: change.offset)
+        change_offsets: List[int] = [change.offset for change in changes]
+        changed_offsets = set(change_offsets)
+
+        # The shift of the rows that follow each change.
+        shifts: List[int] = []
+        shift = 0
+        for change in changes:
+            shift += len(change.replacement) - change.length
+            shifts.append(shift)
+
+        rows: Dict[str, List[Tuple[int, int]]] = {}
+        for identifier, identifier_rows in self.rows.items():
+            for offset, length in identifier_rows:
+                if offset in changed_offsets:
+                    continue
+                position = bisect.bisect_right(change_offsets, offset)
+                rows.setdefault(identifier, []).append((offset + (shifts[position - 1] if position else 0), length))
+
+        for position, change in enumerate(changes):
+            if not change.replacement:
+                continue
+            identifier: Optional[str] = change.identifier
+            if identifier is None:
+                identifier = change.replacement.split(b'\t', 3)[2].decode('utf-8')
+            offset = change.offset + (shifts[position - 1] if position else 0)
+            rows.setdefault(identifier, []).append((offset, len(change.replacement)))
+
+        for identifier_rows in rows.values():
+            identifier_rows.sort()
+
+        self.rows = rows
+
+    @classmethod
+    def build(cls, vcf_file_path: str, on_progress: ProgressCallback = None) -> 'VcfIdIndex':
+        """
+        Builds the ID index of an uncompressed VCF file with a single sequential read. Only the rows of the version
+        of the file that was opened are indexed, the rows appended while it is read are left to catch_up_id_index.
+
+        :param vcf_file_path: The VCF file path.
+        :param on_progress: Called with the rows and the bytes of the file indexed so far.
+
+        :return: The built VcfIdIndex.
+
+        :raise InvalidArgumentError: If the file does not exist.
+        """
+        rows: Dict[str, List[Tuple[int, int]]] = {}
+        data_offset: Optional[int] = None
+        total_rows = 0
+
+        try:
+            file = open(vcf_file_path, 'rb')
+        except FileNotFoundError:
+            raise InvalidArgumentError('The VCF file {} does not exist.'.format(vcf_file_path))
+        with file:
+            file_version: FileVersion = get_open_file_version(vcf_file_path, file.fileno())
+            for identifier, offset, length in _scan_rows(file, 0, end=file_version.size):
+                if data_offset is None:
+                    data_offset = offset
+                rows.setdefault(identifier, []).append((offset, length))
+                total_rows += 1
+                if on_progress is not None and total_rows % PROGRESS_INTERVAL_ROWS == 0:
+                    on_progress(total_rows, offset)
+        offset = file_version.size
+        if on_progress is not None:
+            on_progress(total_rows, offset)
+
+        return cls(
+            file_size=file_version.size,
+            modified_at=file_version.modified_at,
+            data_offset=offset if data_offset is None else data_offset,
+            rows=rows,
+        )
+
+    @classmethod
+    def load(cls, vcf_file_path: str) -> Optional['VcfIdIndex']:
+        """
+        Loads the sidecar ID index of a VCF file.
+
+        :param vcf_file_path: The VCF file path.
+
+        :return: The VcfIdIndex, or None if there is no sidecar index or it is stale.
+        """
+        try:
+            with open(vcf_file_path + cls.SUFFIX, 'rb') as file:
+                stamp: _IndexStamp = _read_stamp(file)
+                index = cls(
+                    file_size=stamp.file_size,
+                    modified_at=stamp.modified_at,
+                    data_offset=stamp.data_offset,
+                    rows={},
+                )
+                if not index.is_fresh(get_file_version(vcf_file_path)):
+                    return None
+                for line in file.read(stamp.index_size - file.tell()).splitlines():
+                    identifier, offset, length = line.decode('utf-8').split('\t')
+                    index.rows.setdefault(identifier, []).append((int(offset), int(length)))
+        except (OSError, ValueError):
+            return None
+
+        return index
+
+    @classmethod
+    def exists(cls, vcf_file_path: str) -> bool:
+        """
+        :param vcf_file_path: The VCF file path.
+
+        :return: True if the VCF file has a fresh sidecar ID index, which is told by its stamp alone.
+        """
+        try:
+            with open(vcf_file_path + cls.SUFFIX, 'rb') as file:
+                stamp: _IndexStamp = _read_stamp(file)
+        except (OSError, ValueError):
+            return False
+
+        return stamp.is_fresh(get_file_version(vcf_file_path))
+
+    def save(self, vcf_file_path: str) -> None:
+        """
+        Stores the index as the sidecar ID index of a VCF file.
+
+        :param vcf_file_path: The VCF file path.
+        """
+        try:
+            with atomic_rewrite(vcf_file_path + self.SUFFIX) as file:
+                file.seek(STAMP_LENGTH)
+                for identifier, identifier_rows in self.rows.items():
+                    file.write(_format_rows(identifier, identifier_rows))
+                stamp = _IndexStamp(
+                    file_size=self.file_size,
+                    modified_at=self.modified_at,
+                    data_offset=self.data_offset,
+                    tail_checksum=_tail_checksum(vcf_file_path, self.file_size),
+                    index_size=file.tell(),
+                )
+                file.seek(0)
+                file.write(stamp.to_bytes())
+        except OSError as ex:
+            # The index is an accelerator, failing to store it only means it is built again on next use.
+            LOGGER.warning('The ID index of {} could not be stored: {}'.format(vcf_file_path, ex))
+
+
+# The widths of the fields of the stamp: the size, modification time and data offset of the VCF file, the tail
+# checksum and the size of the sidecar, tab separated and zero padded.
+STAMP_WIDTHS = (20, 20, 20, 10, 20)
+STAMP_LENGTH = sum(STAMP_WIDTHS) + len(STAMP_WIDTHS)
+
+
+class _IndexStamp:
+    """
+    The stamp, the first line, of a sidecar ID index.
+    """
+
+    def __init__(
+            self,
+            file_size: int,
+            modified_at: int,
+            data_offset: int,
+            tail_checksum: int,
+            index_size: int,
+    ):
+        self.file_size = file_size
+        self.modified_at = modified_at
+        self.data_offset = data_offset
+        self.tail_checksum = tail_checksum
+        self.index_size = index_size
+
+    def is_fresh(self, file_version: Optional[FileVersion]) -> bool:
+        return (
+            file_version is not None
+            and file_version.size == self.file_size
+            and file_version.modified_at == self.modified_at
+        )
+
+    def to_bytes(self) -> bytes:
+        values = (self.file_size, self.modified_at, self.data_offset, self.tail_checksum, self.index_size)
+
+        return '\t'.join(
+            str(value).zfill(width) for value, width in zip(values, STAMP_WIDTHS)
+        ).encode('utf-8') + b'\n'
+
+
+def _read_stamp(file: IO[bytes]) -> _IndexStamp:
+    """
+    :raise ValueError: If the file does not start with a stamp.
+    """
+    line: bytes = file.read(STAMP_LENGTH)
+    if len(line) != STAMP_LENGTH or not line.endswith(b'\n'):
+        raise ValueError('The ID index has no stamp.')
+    file_size, modified_at, data_offset, tail_checksum, index_size = (int(value) for value in line.split(b'\t'))
+
+    return _IndexStamp(
+        file_size=file_size,
+        modified_at=modified_at,
+        data_offset=data_offset,
+        tail_checksum=tail_checksum,
+        index_size=index_size,
+    )
+
+
+def _format_rows(identifier: str, identifier_rows: List[Tuple[int, int]]) -> bytes:
+    return ''.join(
+        '{}\t{}\t{}\n'.format(identifier, offset, length) for offset, length in identifier_rows
+    ).encode('utf-8')
+
+
+def _tail_checksum(vcf_file_path: str, file_size: int) -> int:
+    """
+    :return: The checksum of the last VcfIdIndex.TAIL_SIZE bytes of the first file_size bytes of the VCF file.
+    """
+    tail_size: int = min(VcfIdIndex.TAIL_SIZE, file_size)
+    with open(vcf_file_path, 'rb') as file:
+        return zlib.crc32(os.pread(file.fileno(), tail_size, file_size - tail_size))
+
+
+def _scan_rows(file: IO[bytes], offset: int, end: int = None) -> Iterator[Tuple[str, int, int]]:
+    """
+    :return: The id, offset and length of the data rows of a VCF file, from an offset to the end offset, or to the
+             end of the file when None.
+    """
+    file.seek(offset)
+    for row in file:
+        if end is not None and offset + len(row) > end:
+            # The rows appended past the end, while the file is read, are left out.
+            row = row[:end - offset]
+            if not row:
+                return
+        if not row.startswith(b'#'):
+            yield row.split(b'\t', 3)[2].decode('utf-8'), offset, len(row)
+        offset += len(row)
+        if end is not None and offset >= end:
+            return
+
+
+def catch_up_id_index(vcf_file_path: str) -> Optional[int]:
+    """
+    Brings a stale sidecar ID index up to date with a VCF file that was only appended to since it was stamped,
+    by the application or by an external tool: the rows past the indexed size are indexed, at their offsets,
+    appended to the sidecar and the stamp is rewritten. The cost depends on the appended bytes alone, the rest
+    of the file and of the sidecar is not read.
+
+    The file is deemed only appended to when it grew and the last bytes it had when the index was stamped are
+    the same. An index that can not be caught up is left as it is, to be rebuilt.
+
+    The caller holds the writer lock of the file.
+
+    :param vcf_file_path: The VCF file path.
+
+    :return: The number of rows indexed, 0 if the index is already up to date, or None if there is no sidecar
+             index, or the index can not be caught up.
+    """
+    file_version: Optional[FileVersion] = get_file_version(vcf_file_path)
+    try:
+        with open(vcf_file_path + VcfIdIndex.SUFFIX, 'r+b') as index_file:
+            stamp: _IndexStamp = _read_stamp(index_file)
+            if stamp.is_fresh(file_version):
+                return 0
+            if (
+                    file_version is None
+                    or file_version.size <= stamp.file_size
+                    or _tail_checksum(vcf_file_path, stamp.file_size) != stamp.tail_checksum
+            ):
+                return None
+
+            rows: Dict[str, List[Tuple[int, int]]] = {}
+            with open(vcf_file_path, 'rb') as file:
+                for identifier, offset, length in _scan_rows(file, stamp.file_size):
+                    rows.setdefault(identifier, []).append((offset, length))
+                file_version = get_open_file_version(vcf_file_path, file.fileno())
+                file_size: int = file.tell()
+
+            # The rows appended by an interrupted catch-up are overwritten.
+            index_file.truncate(stamp.index_size)
+            index_file.seek(stamp.index_size)
+            for identifier, identifier_rows in rows.items():
+                index_file.write(_format_rows(identifier, identifier_rows))
+            index_file.flush()
+
+            if stamp.data_offset == stamp.file_size and rows:
+                stamp.data_offset = min(identifier_rows[0][0] for identifier_rows in rows.values())
+            stamp.tail_checksum = _tail_checksum(vcf_file_path, file_size)
+            stamp.file_size = file_size
+            stamp.modified_at = file_version.modified_at
+            stamp.index_size = index_file.tell()
+            index_file.seek(0)
+            index_file.write(stamp.to_bytes())
+    except (OSError, ValueError) as ex:
+        if not isinstance(ex, FileNotFoundError):
+            LOGGER.warning('The ID index of {} could not be caught up: {}'.format(vcf_file_path, ex))
+        return None
+
+    return sum(len(identifier_rows) for identifier_rows in rows.values())
+
+
+def load_or_build_id_index(vcf_file_path: str) -> VcfIdIndex:
+    """
+    Loads the sidecar ID index of an uncompressed VCF file, catching it up with the rows appended to the file,
+    or building and storing it if it is missing or stale.
+
+    :param vcf_file_path: The VCF file path.
+
+    :return: The up to date VcfIdIndex.
+    """
+    index: Optional[VcfIdIndex] = VcfIdIndex.load(vcf_file_path)
+    if index is None and catch_up_id_index(vcf_file_path):
+        index = VcfIdIndex.load(vcf_file_path)
+    if index is None:
+        index = VcfIdIndex.build(vcf_file_path)
+        index.save(vcf_file_path)
+
+    return index
+
+
+def restamp_id_index(vcf_file_path: str, previous_version: FileVersion) -> None:
+    """
+    Marks the sidecar ID indexes of a VCF file, fresh for its previous version, as up to date with its current
+    version, after rows were overwritten with rows of the same length and the same ids, which leaves the offsets
+    and the ids of the rows as they were. Only the stamps are rewritten, in place, the rows of the sidecars are
+    neither read nor written. A sidecar that was not fresh is left as it is, to be rebuilt.
+
+    The caller holds the writer lock of the file.
+
+    :param vcf_file_path: The VCF file path.
+    :param previous_version: The version of the VCF file before its rows were overwritten.
+    """
+    file_version: Optional[FileVersion] = get_file_version(vcf_file_path)
+    if file_version is None or file_version.size != previous_version.size:
+        return
+
+    try:
+        with open(vcf_file_path + VcfIdIndex.SUFFIX, 'r+b') as index_file:
+            stamp: _IndexStamp = _read_stamp(index_file)
+            if stamp.is_fresh(previous_version):
+                stamp.modified_at = file_version.modified_at
+                stamp.tail_checksum = _tail_checksum(vcf_file_path, file_version.size)
+                index_file.seek(0)
+                index_file.write(stamp.to_bytes())
+    except (OSError, ValueError) as ex:
+        if not isinstance(ex, FileNotFoundError):
+            LOGGER.warning('The ID index of {} could not be restamped: {}'.format(vcf_file_path, ex))
+    MappedVcfIdIndex.restamp(vcf_file_path, previous_version, file_version)
+
+
+class MappedVcfIdIndex:
+    """
+    A read only ID index, memory mapped from a '<vcf file>.idx.map' sidecar file in a binary layout that is
+    looked up in place, without being parsed:
+
+    - a header: a magic, the size, the modification time and the data offset of the indexed VCF file, the
+      number of rows and of ids and the width of the ids.
+    - the ids, zero padded to that width and sorted, each with the position and the number of its rows.
+    - the (offset, length) of the rows, grouped by id, in file order.
+
+    The pages of a mapped file are the pages of the OS page cache, so every worker process that maps the same
+    sidecar shares a single copy of the index, however many workers there are.
+    """
+
+    SUFFIX = '.idx.map'
+
+    MAGIC = b'VCFIDXM1'
+    HEADER = struct.Struct('<8sQQQQQQ')
+    ROW = struct.Struct('<QI')
+
+    def __init__(self, buffer: mmap.mmap):
+        magic, self.file_size, self.modified_at, self.data_offset, self.total_rows, self.total_ids, id_width = \
+            self.HEADER.unpack_from(buffer, 0)
+        if magic != self.MAGIC:
+            raise ValueError('The mapped ID index has no magic.')
+
+        self._buffer = buffer
+        self._id_width = id_width
+        self._id_entry = struct.Struct('<{}sQQ'.format(id_width))
+        self._rows_offset = self.HEADER.size + self.total_ids * self._id_entry.size
+
+    def lookup(self, identifier: str, start: int = 0, count: int = None) -> List[Tuple[int, int]]:
+        """
+        :param identifier: The row id.
+        :param start: The position of the first row to return among the rows with the id.
+        :param count: The number of rows to return, all the following rows when None.
+
+        :return: The (offset, length) of the rows with the id, in file order.
+        """
+        key: bytes = identifier.encode('utf-8')
+        if len(key) > self._id_width:
+            return []
+        key = key.ljust(self._id_width, b'\x00')
+
+        low, high = 0, self.total_ids
+        while low < high:
+            middle = (low + high) // 2
+            if self._id_entry.unpack_from(self._buffer, self.HEADER.size + middle * self._id_entry.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.total_ids:
+            return []
+        entry_key, position, total = self._id_entry.unpack_from(
+            self._buffer, self.HEADER.size + low * self._id_entry.size
+        )
+        if entry_key != key:
+            return []
+
+        stop: int = total if count is None else min(total, start + count)
+        return [
+            self.ROW.unpack_from(self._buffer, self._rows_offset + (position + row) * self.ROW.size)
+            for row in range(start, stop)
+        ]
+
+    def is_fresh(self, file_version: Optional[FileVersion]) -> bool:
+        """
+        :param file_version: The current version of the VCF file.
+
+        :return: True if the index was mapped from an index of that version of the file.
+        """
+        return (
+            file_version is not None
+            and file_version.size == self.file_size
+            and file_version.modified_at == self.modified_at
+        )
+
+    @classmethod
+    def map(cls, vcf_file_path: str) -> Optional['MappedVcfIdIndex']:
+        """
+        Maps the mapped sidecar ID index of a VCF file.
+
+        :param vcf_file_path: The VCF file path.
+
+        :return: The MappedVcfIdIndex, or None if there is no mapped sidecar index or it is stale.
+        """
+        try:
+            with open(vcf_file_path + cls.SUFFIX, 'rb') as file:
+                # The mapping outlives the file descriptor, and the file if it is replaced.
+                index = cls(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        except (OSError, ValueError, struct.error):
+            return None
+
+        return index if index.is_fresh(get_file_version(vcf_file_path)) else None
+
+    @classmethod
+    def restamp(cls, vcf_file_path: str, previous_version: FileVersion, file_version: FileVersion) -> None:
+        """
+        Marks the mapped sidecar ID index of a VCF file, fresh for a previous version of the same size, as up to
+        date with a version whose rows kept their offsets and ids. Only the modification time of the header is
+        rewritten, in place, the mappings of the previous version keep the header they read.
+
+        :param vcf_file_path: The VCF file path.
+        :param previous_version: The previous version of the VCF file.
+        :param file_version: The current version of the VCF file.
+        """
+        try:
+            with open(vcf_file_path + cls.SUFFIX, 'r+b') as file:
+                header: List = list(cls.HEADER.unpack(file.read(cls.HEADER.size)))
+                magic, file_size, modified_at = header[:3]
+                if magic != cls.MAGIC or file_size != previous_version.size \
+                        or modified_at != previous_version.modified_at:
+                    return
+                header[2] = file_version.modified_at
+                file.seek(0)
+                file.write(cls.HEADER.pack(*header))
+        except (OSError, struct.error) as ex:
+            if not isinstance(ex, FileNotFoundError):
+                LOGGER.warning('The mapped ID index of {} could not be restamped: {}'.format(vcf_file_path, ex))
+
+    @classmethod
+    def save(cls, vcf_file_path: str, id_index: VcfIdIndex) -> None:
+        """
+        Stores an ID index as the mapped sidecar ID index of a VCF file.
+
+        :param vcf_file_path: The VCF file path.
+        :param id_index: The ID index.
+        """
+        keys: List[Tuple[bytes, List[Tuple[int, int]]]] = sorted(
+            (identifier.encode('utf-8'), identifier_rows) for identifier, identifier_rows in id_index.rows.items()
+        )
+        id_width: int = max((len(key) for key, _ in keys), default=0)
+        id_entry = struct.Struct('<{}sQQ'.format(id_width))
+
+        try:
+            with atomic_rewrite(vcf_file_path + cls.SUFFIX) as file:
+                file.write(cls.HEADER.pack(
+                    cls.MAGIC, id_index.file_size, id_index.modified_at, id_index.data_offset,
+                    id_index.total_rows, len(keys), id_width,
+                ))
+                position = 0
+                for key, identifier_rows in keys:
+                    file.write(id_entry.pack(key, position, len(identifier_rows)))
+                    position += len(identifier_rows)
+                for _, identifier_rows in keys:
+                    file.write(b''.join(cls.ROW.pack(offset, length) for offset, length in identifier_rows))
+        except OSError as ex:
+            LOGGER.warning('The mapped ID index of {} could not be stored: {}'.format(vcf_file_path, ex))
+
+
+# The mapped ID indexes of the process, keyed by the FileVersion of the file they index, so each process maps
+# a sidecar once and its threads share the mapping.
+_MAPPED_ID_INDEXES = LruCache(max_size=64)
+
+
+def load_mapped_id_index(vcf_file_path: str) -> Optional[MappedVcfIdIndex]:
+    """
+    Maps the fresh ID index of an uncompressed VCF file for the lookups of the readers. A missing or stale mapped
+    sidecar is written first, from the fresh sidecar ID index, which is only read.
+
+    The readers do not hold the writer lock of the file, so they never catch up or build the sidecar ID index,
+    a missing or stale one is left to the index job and the writers (see load_or_build_id_index).
+
+    :param vcf_file_path: The VCF file path.
+
+    :return: The fresh MappedVcfIdIndex, or None if the file has no fresh ID index or changed while its index
+             was mapped.
+    """
+    file_version: Optional[FileVersion] = get_file_version(vcf_file_path)
+    index: Optional[MappedVcfIdIndex] = _MAPPED_ID_INDEXES.get(file_version)
+    if index is not None:
+        return index
+
+    index = MappedVcfIdIndex.map(vcf_file_path)
+    if index is None:
+        id_index: Optional[VcfIdIndex] = VcfIdIndex.load(vcf_file_path)
+        if id_index is None:
+            return None
+        # The mapped sidecar is replaced atomically, so the readers that write it at once do not mix their writes.
+        MappedVcfIdIndex.save(vcf_file_path, id_index)
+        index = MappedVcfIdIndex.map(vcf_file_path)
+    if index is not None and index.is_fresh(file_version):
+        _MAPPED_ID_INDEXES.put(file_version, index)
+
+    return index
+
+
+def load_or_build_mapped_id_index(vcf_file_path: str) -> Union[MappedVcfIdIndex, VcfIdIndex]:
+    """
+    Maps the ID index of an uncompressed VCF file for the lookups of the writers. A missing or stale sidecar ID
+    index is caught up or built first, as by load_or_build_id_index, but a fresh one is mapped without being
+    parsed, so the lookups of a write cost the rows they find rather than the size of the index.
+
+    The caller holds the writer lock of the file.
+
+    :param vcf_file_path: The VCF file path.
+
+    :return: The up to date MappedVcfIdIndex, or the up to date VcfIdIndex if it could not be mapped.
+    """
+    if not VcfIdIndex.exists(vcf_file_path) and catch_up_id_index(vcf_file_path) is None:
+        VcfIdIndex.build(vcf_file_path).save(vcf_file_path)
+
+    index: Optional[MappedVcfIdIndex] = load_mapped_id_index(vcf_file_path)
+    if index is None:
+        return load_or_build_id_index(vcf_file_path)
+
+    return index
@@ -0,0 +1,98 @@
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, Optional, Pattern
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.enums import VcfIngestFormat
+
+# The validations of the rows appended to VCF files, based on what the provided real file contains.
+# chrom: contains a string starts with chr, followed by a number from 1 to 22 or followed by a X, Y or M.
+# ref & alt: contains any number of ACGT. char occurrences.
+CHROM_REGEX = '^chr((2[0-2]|1[0-9]|[1-9]|([X]?|[Y]?|[M])?)$)'
+ID_REGEX = '^rs([0-9]+$)'
+BASES_REGEX = '([ACGT.]*)$'
+
+# The ingested tab separated rows are validated in a single match: the same five first columns as the JSON rows,
+# followed by any number of columns (QUAL, FILTER, INFO, ...) which are kept as they are.
+TSV_ROW_PATTERN = re.compile(
+    rb'chr(?:2[0-2]|1[0-9]|[1-9]|X|Y|M)?\t-?[0-9]+\trs[0-9]+\t[ACGT.]*\t[ACGT.]*(?:\t[^\t\r\n]*)*'
+)
+
+# The JSON row attribute -> the pattern of its value, the POS is an integer.
+NDJSON_ROW_PATTERNS: Dict[str, Optional[Pattern]] = {
+    'CHROM': re.compile(CHROM_REGEX),
+    'POS': None,
+    'ID': re.compile(ID_REGEX),
+    'REF': re.compile(BASES_REGEX),
+    'ALT': re.compile(BASES_REGEX),
+}
+
+# The longest line of an ingest request body, so that a body without line endings is not buffered whole.
+MAX_INGEST_LINE_LENGTH = 1024 * 1024
+
+
+def iter_ingest_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Splits the chunks of an ingest request body into lines, as the chunks arrive.
+
+    :param chunks: The chunks of the body, of any size.
+
+    :return: The lines of the body, without their line endings.
+
+    :raise InvalidArgumentError: If a line is longer than MAX_INGEST_LINE_LENGTH.
+    """
+    pending = b''
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip(b'\r')
+        if len(pending) > MAX_INGEST_LINE_LENGTH:
+            raise InvalidArgumentError('A row is longer than {} bytes.'.format(MAX_INGEST_LINE_LENGTH))
+
+    if pending:
+        yield pending.rstrip(b'\r')
+
+
+def parse_ingest_row(line: bytes, ingest_format: VcfIngestFormat) -> Optional[bytes]:
+    """
+    Validates a line of an ingest request body, and converts it to a VCF data row.
+
+    :param line: The line, without its line ending.
+    :param ingest_format: The VcfIngestFormat of the body.
+
+    :return: The data row with its line ending, or None for a blank line, or a header line of a TSV body.
+
+    :raise InvalidArgumentError: If the line is not a valid row.
+    """
+    if not line.strip() or (ingest_format == VcfIngestFormat.tsv and line.startswith(b'#')):
+        return None
+
+    if ingest_format == VcfIngestFormat.tsv:
+        if TSV_ROW_PATTERN.fullmatch(line) is None:
+            raise InvalidArgumentError('The row is not a valid tab separated VCF row.')
+        return line + b'\n'
+
+    try:
+        row: Any = json.loads(line)
+    except ValueError:
+        raise InvalidArgumentError('The row is not valid JSON.')
+    if not isinstance(row, dict):
+        raise InvalidArgumentError('The row is not a JSON object.')
+
+    for attribute in row:
+        if attribute not in NDJSON_ROW_PATTERNS:
+            raise InvalidArgumentError('Unknown attribute {}.'.format(attribute))
+    for attribute, pattern in NDJSON_ROW_PATTERNS.items():
+        value: Any = row.get(attribute)
+        if value is None:
+            raise InvalidArgumentError('The {} is required.'.format(attribute))
+        if pattern is None:
+            valid: bool = isinstance(value, int) and not isinstance(value, bool)
+        else:
+            valid = isinstance(value, str) and pattern.fullmatch(value) is not None
+        if not valid:
+            raise InvalidArgumentError('The {} {} is not valid.'.format(attribute, value))
+
+    return '\t'.join(str(row[attribute]) for attribute in NDJSON_ROW_PATTERNS).encode('utf-8') + b'\n'
@@ -0,0 +1,131 @@
+import time
+from typing import Callable, Optional
+
+from celery import Task
+
+from application.vcf_files.enums import VcfJobOperation, VcfJobState
+from application.vcf_files.models import VcfJob
+
+# Reports the progress of a long running operation: the rows and the bytes of the VCF file processed so far.
+ProgressCallback = Callable[[int, int], None]
+
+# The long running operations report their progress once every that many rows.
+PROGRESS_INTERVAL_ROWS = 10000
+
+
+def job_meta(
+        operation: VcfJobOperation,
+        rows_processed: int,
+        bytes_processed: int,
+        total_bytes: Optional[int],
+        started_at: float,
+        artifact: dict = None,
+) -> dict:
+    """
+    :return: The meta of a job, as it is stored in the Celery result backend while the job runs (the meta of
+             the PROGRESS state) and once it is done (the result of its task).
+    """
+    return {
+        'operation': operation.value,
+        'rows_processed': rows_processed,
+        'bytes_processed': bytes_processed,
+        'total_bytes': total_bytes,
+        'started_at': started_at,
+        'artifact': artifact,
+    }
+
+
+def to_vcf_job(job_id: str, state: str, info: object, now: float) -> VcfJob:
+    """
+    Builds a VcfJob out of what the Celery result backend knows about the task of a job.
+
+    The ETA of a running job is extrapolated from the rate at which it read the VCF file so far.
+
+    :param job_id: The job id, the id of the Celery task.
+    :param state: The Celery state of the task.
+    :param info: The meta of the task, its exception once it failed.
+    :param now: The current time, in seconds since the epoch.
+
+    :return: The VcfJob.
+    """
+    try:
+        job_state = VcfJobState(state)
+    except ValueError:
+        job_state = VcfJobState.started
+
+    if isinstance(info, BaseException):
+        return VcfJob(job_id=job_id, state=job_state, error=getattr(info, 'message', None) or str(info))
+    if not isinstance(info, dict) or 'operation' not in info:
+        return VcfJob(job_id=job_id, state=job_state)
+
+    eta: Optional[float] = None
+    if job_state == VcfJobState.success:
+        eta = 0.0
+    elif job_state == VcfJobState.progress and info['bytes_processed'] and info['total_bytes']:
+        elapsed: float = max(now - info['started_at'], 0.0)
+        remaining_bytes: int = max(info['total_bytes'] - info['bytes_processed'], 0)
+        eta = elapsed * remaining_bytes / info['bytes_processed']
+
+    return VcfJob(
+        job_id=job_id,
+        state=job_state,
+        operation=VcfJobOperation(info['operation']),
+        rows_processed=info['rows_processed'],
+        bytes_processed=info['bytes_processed'],
+        total_bytes=info['total_bytes'],
+        eta=eta,
+        artifact=info['artifact'],
+    )
+
+
+class JobProgressReporter:
+    """
+    Reports the progress of the Celery task of a job to the result backend, as the meta of its PROGRESS state.
+
+    The reports are throttled, a long running operation can call the reporter as often as it wants. A task
+    that is run directly, outside of a worker, has no job and nothing is reported.
+    """
+
+    # The minimal number of seconds between two reports.
+    REPORT_INTERVAL = 1.0
+
+    def __init__(
+            self,
+            task: Task,
+            operation: VcfJobOperation,
+            total_bytes: Optional[int] = None,
+    ):
+        self.task = task
+        self.operation = operation
+        self.total_bytes = total_bytes
+        self.started_at = time.time()
+        self.rows_processed = 0
+        self.bytes_processed = 0
+        self._reported_at: Optional[float] = None
+
+    def __call__(self, rows_processed: int, bytes_processed: int) -> None:
+        self.rows_processed = rows_processed
+        self.bytes_processed = bytes_processed
+
+        if self.task.request.id is None:
+            return
+        now: float = time.monotonic()
+        if self._reported_at is not None and now - self._reported_at < self.REPORT_INTERVAL:
+            return
+        self._reported_at = now
+        self.task.update_state(state=VcfJobState.progress.value, meta=self.meta())
+
+    def meta(self, artifact: dict = None) -> dict:
+        """
+        :param artifact: The execution artifact of the job, once it is done.
+
+        :return: The meta of the job, see job_meta.
+        """
+        return job_meta(
+            operation=self.operation,
+            rows_processed=self.rows_processed,
+            bytes_processed=self.bytes_processed,
+            total_bytes=self.total_bytes,
+            started_at=self.started_at,
+            artifact=artifact,
+        )
@@ -0,0 +1,70 @@
+import fcntl
+from contextlib import contextmanager
+from typing import Iterator
+
+# The suffix of the sidecar file that is locked on behalf of a VCF file by its writers. The VCF file itself can
+# not be locked, since rewrites replace it with a new file.
+LOCK_SUFFIX = '.lock'
+
+# The suffix of the sidecar file that the readers of a VCF file share, against the writes made in place.
+READ_LOCK_SUFFIX = '.rlock'
+
+
+@contextmanager
+def file_lock(vcf_file_path: str, exclusive: bool = True) -> Iterator[None]:
+    """
+    Holds an fcntl lock on behalf of a VCF file, shared between the threads and processes of a host.
+
+    The writers of a VCF file hold it exclusively for the whole read-modify-write of the file, so concurrent
+    writes are serialized instead of overwriting each other. Readers never take it.
+
+    :param vcf_file_path: The VCF file path.
+    :param exclusive: True for an exclusive (writer) lock, False for a shared (reader) lock.
+    """
+    with open(vcf_file_path + LOCK_SUFFIX, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def snapshot_read_lock(vcf_file_path: str) -> Iterator[None]:
+    """
+    Holds a shared lock on behalf of a reader of a VCF file, for as long as it reads the file.
+
+    Rewrites replace the file atomically, so a reader keeps reading the file it opened without any lock.
+    The lock only keeps the writes made in place (appends and same length patches) off the file while it
+    is read, and these do not wait for it, see in_place_write_lock.
+
+    :param vcf_file_path: The VCF file path.
+    """
+    with open(vcf_file_path + READ_LOCK_SUFFIX, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def in_place_write_lock(vcf_file_path: str) -> Iterator[bool]:
+    """
+    Tries to lock a VCF file against its readers, to write it in place. It never waits for the readers.
+
+    :param vcf_file_path: The VCF file path.
+
+    :return: True if the lock is held and the file can be written in place, False if the file is being read,
+             in which case the writer must write a new version of the file instead.
+    """
+    with open(vcf_file_path + READ_LOCK_SUFFIX, 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
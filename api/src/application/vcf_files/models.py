@@ -1,7 +1,10 @@
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 
 from attr import attrs, attrib
 
+from application.vcf_files.enums import VcfCompression, VcfMutationOperation, VcfJobOperation, VcfJobState, \
+    VcfAccessPath
+
 
 @attrs(auto_attribs=True)
 class VcfRow:
@@ -19,6 +22,51 @@ class FilteredVcfRowsPage:
     filtered_id = attrib(type=str)
     page_size = attrib(type=int)
     page_index = attrib(type=int)
+    # The plan the page was read with, only for the explained requests.
+    plan = attrib(type=Optional['VcfQueryPlan'], default=None)
+
+
+@attrs
+class VcfQueryPlan:
+    access_path = attrib(type=VcfAccessPath)
+    # Why the access path was chosen.
+    reason = attrib(type=str)
+    compression = attrib(type=VcfCompression)
+    file_size = attrib(type=int)
+    # The estimates are None when they are not known before the file is read.
+    estimated_rows = attrib(type=Optional[int], default=None)
+    estimated_bytes = attrib(type=Optional[int], default=None)
+    # The data rows and the bytes of the file, as stored, that were read.
+    actual_rows = attrib(type=Optional[int], default=None)
+    actual_bytes = attrib(type=Optional[int], default=None)
+    # The (offset, length) of the rows of the page in the version of the file, for the id_index access path.
+    row_ranges = attrib(type=List[Tuple[int, int]], factory=list)
+    file_version = attrib(type=Optional['FileVersion'], default=None)
+
+
+@attrs
+class VcfMetaDefinition:
+    identifier = attrib(type=str)
+    number = attrib(type=Optional[str], default=None)
+    value_type = attrib(type=Optional[str], default=None)
+    description = attrib(type=Optional[str], default=None)
+    length = attrib(type=Optional[int], default=None)
+
+
+@attrs
+class VcfFileHeader:
+    file_format = attrib(type=Optional[str])
+    infos = attrib(type=List[VcfMetaDefinition])
+    formats = attrib(type=List[VcfMetaDefinition])
+    filters = attrib(type=List[VcfMetaDefinition])
+    contigs = attrib(type=List[VcfMetaDefinition])
+    samples = attrib(type=List[str])
+    # All the columns of the '#CHROM' header line, starting with '#CHROM'.
+    columns = attrib(type=List[str])
+    # The '##' meta-information lines as found in the file, without their line endings.
+    meta_lines = attrib(type=List[str])
+    # The offset of the first data row, in the decompressed contents of the file.
+    data_offset = attrib(type=int)
 
 
 @attrs
@@ -31,3 +79,156 @@ class AppendRowsExecutionArtifact:
 class UpdatedRowsExecutionArtifact:
     file_path = attrib(type=str)
     total_rows_updated = attrib(type=int)
+
+
+@attrs
+class DeletedRowsExecutionArtifact:
+    file_path = attrib(type=str)
+    total_rows_deleted = attrib(type=int)
+
+
+@attrs
+class ExportedVcfFileArtifact:
+    file_path = attrib(type=str)
+    # The file the rows were exported to.
+    export_path = attrib(type=str)
+
+
+@attrs
+class ConvertedVcfFileArtifact:
+    file_path = attrib(type=str)
+    # The file the VCF file was converted to.
+    converted_path = attrib(type=str)
+
+
+@attrs
+class VcfIdIndexArtifact:
+    file_path = attrib(type=str)
+    total_rows_indexed = attrib(type=int)
+
+
+@attrs
+class VcfJob:
+    job_id = attrib(type=str)
+    state = attrib(type=VcfJobState)
+    operation = attrib(type=Optional[VcfJobOperation], default=None)
+    # The progress of the job, the bytes are the bytes of the VCF file read so far.
+    rows_processed = attrib(type=Optional[int], default=None)
+    bytes_processed = attrib(type=Optional[int], default=None)
+    total_bytes = attrib(type=Optional[int], default=None)
+    # The estimated number of seconds until the job is done.
+    eta = attrib(type=Optional[float], default=None)
+    # The execution artifact of the done job, e.g. the total rows deleted.
+    artifact = attrib(type=Optional[dict], default=None)
+    error = attrib(type=Optional[str], default=None)
+
+
+@attrs
+class VcfMutation:
+    operation = attrib(type=VcfMutationOperation)
+    # The id of the rows to delete or update.
+    filter_id = attrib(type=Optional[str], default=None)
+    # The row that replaces the first five columns of the updated rows.
+    data = attrib(type=Optional[VcfRow], default=None)
+    # The rows to append.
+    rows = attrib(type=Optional[List[VcfRow]], default=None)
+
+
+@attrs
+class VcfMutationResult:
+    operation = attrib(type=VcfMutationOperation)
+    filter_id = attrib(type=Optional[str])
+    total_rows = attrib(type=int)
+
+
+@attrs
+class BatchMutationExecutionArtifact:
+    file_path = attrib(type=str)
+    results = attrib(type=List[VcfMutationResult])
+
+
+@attrs
+class VcfDeltaEntry:
+    operation = attrib(type=VcfMutationOperation)
+    # The id of the deleted or updated rows, or the id of the appended row.
+    identifier = attrib(type=bytes)
+    # The five first columns of the updated rows, or the appended row, without a line ending.
+    row = attrib(type=Optional[bytes], default=None)
+
+
+@attrs
+class VcfRewriteResult:
+    # The rows the transform was applied to.
+    total_rows_matched = attrib(type=int, default=0)
+    # The rows the transform dropped.
+    total_rows_dropped = attrib(type=int, default=0)
+    total_rows_added = attrib(type=int, default=0)
+
+
+@attrs
+class VcfChunk:
+    index = attrib(type=int)
+    # The chunk runs from the start of a row to the start of another row, or to the end of the file when its end
+    # is None. The offsets are byte offsets in uncompressed files, and virtual offsets in BGZF and zstd files: the
+    # offset of a block (or frame) in the file << 16 | the offset in the uncompressed data of the block.
+    start = attrib(type=int)
+    end = attrib(type=Optional[int], default=None)
+    # The VcfCompression value of the file.
+    compression = attrib(type=str, default=VcfCompression.none.value)
+    # The file the rewritten rows of the chunk are written to, in the compression of the VCF file.
+    part_path = attrib(type=Optional[str], default=None)
+
+
+@attrs
+class VcfChunkResult:
+    index = attrib(type=int)
+    part_path = attrib(type=str)
+    rows_processed = attrib(type=int)
+    total_rows_matched = attrib(type=int)
+    total_rows_dropped = attrib(type=int)
+    # False if the rows of the part are the rows of the chunk, as they were.
+    changed = attrib(type=bool)
+    # The compressed and the uncompressed size of the frames of the part of a zstd file, for its seek table.
+    zstd_frames = attrib(type=Optional[List[List[int]]], default=None)
+
+
+@attrs(frozen=True)
+class FileVersion:
+    file_path = attrib(type=str)
+    size = attrib(type=int)
+    modified_at = attrib(type=int)
+    inode = attrib(type=int)
+
+
+@attrs
+class VcfRegion:
+    chrom = attrib(type=str)
+    start = attrib(type=int, default=None)
+    end = attrib(type=int, default=None)
+
+    def contains(self, chrom: str, pos: int) -> bool:
+        if chrom != self.chrom:
+            return False
+        if self.start is not None and pos < self.start:
+            return False
+        if self.end is not None and pos > self.end:
+            return False
+        return True
+
+
+@attrs
+class VcfFileExport:
+    file_name = attrib(type=str)
+    media_type = attrib(type=str)
+    chunks = attrib(type=Iterator[bytes])
+
+
+@attrs
+class ByteRangeChange:
+    # The offset and the length of the replaced byte range of the file.
+    offset = attrib(type=int)
+    length = attrib(type=int)
+    # The bytes written in place of the range, empty to drop it.
+    replacement = attrib(type=bytes, default=b'')
+    # The id of the replacement row, when it differs from the id of the replaced row.
+    identifier = attrib(type=Optional[str], default=None)
@@ -1,20 +1,196 @@
-import gzip
-import io
-import mimetypes
+import os
+import re
+import tempfile
+import time
 from collections import OrderedDict
-from typing import List, Tuple, Union
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
-from application.infrastructure.error.errors import InvalidArgumentError, MultipleVCFHandlerBaseError, ValidationError
+from application.infrastructure.error.errors import InvalidArgumentError, MultipleVCFHandlerBaseError, \
+    ValidationError, VCFHandlerBaseError
+from application.infrastructure.logging.loggers import LOGGER
 from application.rest_api.vcf_files.enums import VCFHeader
+from application.vcf_files.caching import VcfHeaderCache
+from application.vcf_files.chunking import merge_vcf_chunks, plan_vcf_chunks, rewrite_vcf_chunk
 from application.vcf_files.errors import VcfRowsByIdNotExistError, VcfDataAppendError, VcfDataDeleteError, \
-    VcfDataUpdateError
-from application.vcf_files.models import VcfRow
-import pandas as pd
+    VcfDataUpdateError, VcfFileNotFoundError, VcfFileHeaderError, VcfDataExportError, VcfDataMutationError, \
+    VcfNoDataDeletedError, VcfDataConversionError
+from application.vcf_files.compression import StreamCompressor
+from application.vcf_files.deltas import VcfDeltaLog
+from application.vcf_files.enums import VcfCompression, VcfMutationOperation, VcfJobOperation, VcfJobState, \
+    VcfIngestFormat, VcfAccessPath
+from application.vcf_files.indexes import MappedVcfIdIndex, VcfIdIndex, catch_up_id_index, \
+    load_or_build_mapped_id_index
+from application.vcf_files.ingest import iter_ingest_lines, parse_ingest_row
+from application.vcf_files.jobs import PROGRESS_INTERVAL_ROWS, JobProgressReporter, ProgressCallback, job_meta, \
+    to_vcf_job
+from application.vcf_files.locking import file_lock, in_place_write_lock, snapshot_read_lock
+from application.vcf_files.models import VcfRow, VcfFileHeader, VcfMetaDefinition, FileVersion, VcfRegion, \
+    ByteRangeChange, VcfMutation, VcfDeltaEntry, VcfRewriteResult, VcfJob, AppendRowsExecutionArtifact, \
+    UpdatedRowsExecutionArtifact, DeletedRowsExecutionArtifact, ExportedVcfFileArtifact, VcfIdIndexArtifact, \
+    VcfChunk, VcfChunkResult, ConvertedVcfFileArtifact, VcfQueryPlan
+from application.vcf_files.rewriting import rewrite_vcf_rows
+from application.vcf_files.splicing import splice_rewrite, copy_byte_range, write_all
+from application.vcf_files.storage import VcfStorageEngine, open_vcf_file, storage_engine_for, vcf_file_compression, \
+    vcf_storage_engine
+from application.vcf_files.utils import get_file_version, atomic_rewrite, format_vcf_row, get_open_file_version, \
+    replace_vcf_row_columns, parse_region, is_other_file
+from attr import asdict
+from celery import Signature, Task, chord
+from celery.result import AsyncResult
+from celery.utils import uuid
 from application.infrastructure.celery.celery import celery_app
 
+# Matches the key=value attributes of a structured meta-information line, e.g.
+# ##INFO=<ID=DP,Number=1,Type=Integer,Description="Total Depth, over all samples">
+META_ATTRIBUTE_PATTERN = re.compile(r'([A-Za-z_][\w.]*)=("(?:[^"\\]|\\.)*"|[^,]*)')
+
+
+class ReadVcfFileHeader:
+
+    def __init__(
+            self,
+            header_cache: VcfHeaderCache = None,
+    ):
+        self.header_cache = header_cache
+
+    def run(
+            self,
+            vcf_file_path: str = None,
+    ) -> VcfFileHeader:
+        """
+        Reads and parses the header of a VCF File, i.e. the '##' meta-information lines and the '#CHROM' line.
+
+        Only the header is read, the reading stops at the '#CHROM' line. The parsed header is cached per
+        file version when a header cache is provided.
+
+        :param vcf_file_path: The VCF file path to load.
+
+        :return: The parsed VcfFileHeader.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+               VcfFileNotFoundError: If the VCF file does not exist.
+               VcfFileHeaderError: If the VCF file does not have a valid header.
+        """
+        if not vcf_file_path:
+            raise InvalidArgumentError('The VCF file path is required.')
+
+        file_version: Optional[FileVersion] = get_file_version(vcf_file_path)
+        if not file_version:
+            raise VcfFileNotFoundError('The VCF file {} does not exist.'.format(vcf_file_path))
+
+        if self.header_cache is not None:
+            vcf_file_header: Optional[VcfFileHeader] = self.header_cache.get(file_version)
+            if vcf_file_header is not None:
+                return vcf_file_header
+
+        try:
+            with open_vcf_file(vcf_file_path) as file:
+                vcf_file_header = self._parse(file)
+        except VcfFileHeaderError:
+            raise
+        except Exception as ex:
+            raise VcfFileHeaderError(str(ex))
+
+        if self.header_cache is not None:
+            self.header_cache.put(file_version, vcf_file_header)
+
+        return vcf_file_header
+
+    @staticmethod
+    def _parse(file) -> VcfFileHeader:
+        """
+        Parses the header lines of an opened binary VCF file, leaving the file positioned at the first data row.
+
+        :param file: The opened binary VCF file.
+
+        :return: The parsed VcfFileHeader.
+
+        :raise VcfFileHeaderError: If the file does not have a '#CHROM' header line.
+        """
+        meta_lines: List[str] = []
+        definitions: Dict[str, List[VcfMetaDefinition]] = {'INFO': [], 'FORMAT': [], 'FILTER': [], 'contig': []}
+        file_format: Optional[str] = None
+        data_offset = 0
+
+        for row in file:
+            data_offset += len(row)
+            line: str = row.decode('utf-8').rstrip('\r\n')
+
+            if line.startswith('##'):
+                meta_lines.append(line)
+                key, _, value = line[2:].partition('=')
+                if key == 'fileformat':
+                    file_format = value
+                elif key in definitions and value.startswith('<') and value.endswith('>'):
+                    attributes: Dict[str, str] = {
+                        name: attribute_value[1:-1] if attribute_value.startswith('"') else attribute_value
+                        for name, attribute_value in META_ATTRIBUTE_PATTERN.findall(value[1:-1])
+                    }
+                    length: Optional[str] = attributes.get('length')
+                    definitions[key].append(
+                        VcfMetaDefinition(
+                            identifier=attributes.get('ID'),
+                            number=attributes.get('Number'),
+                            value_type=attributes.get('Type'),
+                            description=attributes.get('Description'),
+                            length=int(length) if length and length.isdigit() else None,
+                        )
+                    )
+                continue
+
+            if line.startswith('#CHROM'):
+                columns: List[str] = line.split('\t')
+                return VcfFileHeader(
+                    file_format=file_format,
+                    infos=definitions['INFO'],
+                    formats=definitions['FORMAT'],
+                    filters=definitions['FILTER'],
+                    contigs=definitions['contig'],
+                    # The sample columns follow the fixed columns up to FORMAT.
+                    samples=columns[9:],
+                    columns=columns,
+                    meta_lines=meta_lines,
+                    data_offset=data_offset,
+                )
+
+            break
+
+        raise VcfFileHeaderError('The VCF file does not have a #CHROM header line.')
+
+
+class _CountedRows:
+    """
+    The data rows of a scan, counted as they are read.
+    """
+
+    def __init__(self, rows: Iterator[bytes]):
+        self._rows = rows
+        self.total = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for row in self._rows:
+            self.total += 1
+            yield row
+
 
 class FilterVcfFile:
 
+    # The VcfRow attribute of each VCF column.
+    ROW_ATTRIBUTES = {
+        '#CHROM': 'chrom',
+        'POS': 'pos',
+        'ID': 'identifier',
+        'REF': 'ref',
+        'ALT': 'alt',
+    }
+
+    def __init__(
+            self,
+            read_vcf_file_header: ReadVcfFileHeader = None,
+    ):
+        self.read_vcf_file_header = read_vcf_file_header or ReadVcfFileHeader()
+
     def run(
             self,
             vcf_file_path: str = None,
@@ -22,20 +198,27 @@ class FilterVcfFile:
             filter_id: str = None,
             page_size: int = 10,
             page_index: int = 0,
+            query_plan: VcfQueryPlan = None,
     ) -> List[VcfRow]:
         """
         Loads and filters a VCF File based on the provided filtered id.
 
+        The rows are read the way the query plan says, see VcfQueryPlanner, and the rows and the bytes actually
+        read are recorded in it. Without a plan, the whole file is scanned.
+
         :param vcf_file_path: The VCF file path to load.
         :param headers: The VCF file headers to load.
         :param filter_id: The filter id.
         :param page_size: The size of the page.
         :param page_index: The index of the page.
+        :param query_plan: The VcfQueryPlan of the page.
 
         :return: The list of filtered by ID VcfRows.
 
         :raise InvalidArgumentError: If there is an invalid argument.
                 VcfRowsByIdNotExistError: If there aren't any rows filtered by the provided filter id.
+                VcfFileNotFoundError: If the VCF file does not exist.
+                VcfFileHeaderError: If the VCF file does not have a valid header.
         """
         errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
         if not vcf_file_path:
@@ -52,55 +235,157 @@ class FilterVcfFile:
         if errors.errors:
             raise errors
 
-        # The second item in the tuple indicates the guessed filetype.
-        # In case of .gz file, the guessed filetype is gzip
-        # In case of .vcf file, the guessed filetype is None
-        file_type: Tuple[Union[None, str], str] = mimetypes.guess_type(vcf_file_path)
+        # The header is parsed once per file version, and gives the columns and the offset of the data rows,
+        # so the scan starts straight at the first data row.
+        vcf_file_header: VcfFileHeader = self.read_vcf_file_header.run(vcf_file_path=vcf_file_path)
 
-        if file_type[1] == 'gzip':
-            with gzip.open(vcf_file_path, 'r') as file:
-                rows = [row.decode("utf-8") for row in file if not row.startswith(b'##')]
-        elif file_type[1] is None:
-            with open(vcf_file_path, 'r') as file:
-                rows = [row for row in file if not row.startswith('##')]
+        if query_plan is not None and query_plan.access_path == VcfAccessPath.index_miss:
+            query_plan.actual_rows = query_plan.actual_bytes = 0
+            raise VcfRowsByIdNotExistError('None rows found in VCF by the provided id:{}'.format(filter_id))
 
-        # Use io.StringIO because we do not have the an actual csv file.
-        # Read as csv the rows, keep the columns that we are interested in and rename them to map them later on.
+        # Read as csv the data rows, keep the columns that we are interested in and rename them to map them later on.
         # Query the csv by the ID column (renamed to identifier).
         try:
-            df_rows = pd.read_csv(
-                io.StringIO(''.join(rows)),
-                sep='\t',
-                usecols=[header.value for header in headers],
-                dtype={'POS': int},
-            ).rename(
-                columns={
-                    '#CHROM': 'chrom',
-                    'POS': 'pos',
-                    'ID': 'identifier',
-                    'REF': 'ref',
-                    'ALT': 'alt',
-                }
-            ).query('identifier == \'{0}\''.format(filter_id))
+            # Select the columns by position, the data rows may have less trailing columns than the header.
+            column_positions: List[int] = sorted(vcf_file_header.columns.index(header.value) for header in headers)
+            columns: List[str] = [vcf_file_header.columns[position] for position in column_positions]
+            # The delta log is loaded before the file is opened, see VcfDeltaLog.load.
+            delta_log: Optional[VcfDeltaLog] = VcfDeltaLog.load(vcf_file_path)
+            with snapshot_read_lock(vcf_file_path), open_vcf_file(vcf_file_path) as file:
+                file_version: FileVersion = get_open_file_version(vcf_file_path, file.fileno())
+                if delta_log is not None and not delta_log.is_for(file_version):
+                    delta_log = None
+                if query_plan is not None:
+                    self._replan(query_plan, file_version, delta_log)
+
+                if query_plan is not None and query_plan.access_path == VcfAccessPath.id_index:
+                    # Only the rows of the page are read, at their offsets.
+                    rows: List[bytes] = [
+                        os.pread(file.fileno(), length, offset) for offset, length in query_plan.row_ranges
+                    ]
+                    vcf_rows: List[VcfRow] = self._filter_merged_rows(
+                        rows=iter(rows),
+                        columns=columns,
+                        column_positions=column_positions,
+                        filter_id=filter_id,
+                        page_size=page_size,
+                        page_index=0,
+                    )
+                    query_plan.actual_rows = len(rows)
+                    query_plan.actual_bytes = sum(len(row) for row in rows)
+                elif delta_log is not None:
+                    file.seek(vcf_file_header.data_offset)
+                    # The pending mutations are merged with the rows of the file while they are read.
+                    merged_rows = _CountedRows(delta_log.merge(file))
+                    vcf_rows = self._filter_merged_rows(
+                        rows=iter(merged_rows),
+                        columns=columns,
+                        column_positions=column_positions,
+                        filter_id=filter_id,
+                        page_size=page_size,
+                        page_index=page_index,
+                    )
+                    self._record_scan(query_plan, merged_rows.total, file.fileno())
+                else:
+                    # pandas is only imported by the first full scan, it is the slowest import of the workers.
+                    import pandas as pd
+
+                    file.seek(vcf_file_header.data_offset)
+                    try:
+                        df_rows = pd.read_csv(
+                            file,
+                            sep='\t',
+                            header=None,
+                            usecols=column_positions,
+                            names=columns,
+                            dtype={'POS': int},
+                        )
+                    except pd.errors.EmptyDataError:
+                        # The file has no rows, the page is empty.
+                        df_rows = pd.DataFrame(columns=columns)
+                    self._record_scan(query_plan, len(df_rows), file.fileno())
+                    df_rows = df_rows.rename(
+                        columns=self.ROW_ATTRIBUTES
+                    ).query('identifier == \'{0}\''.format(filter_id))
+
+                    # Keep the page rows only.
+                    _from = page_index * page_size
+                    paginated_df_rows = df_rows[_from:][:page_size]
+
+                    # Map the found df rows to our VcfRow model.
+                    vcf_rows = [
+                        VcfRow(
+                            **dict(paginated_row)
+                        )
+                        for index, paginated_row in paginated_df_rows.iterrows()
+                    ]
         except Exception as ex:
             raise ValidationError(str(ex))
-        # Keep the page rows only.
-        _from = page_index * page_size
-        paginated_df_rows = df_rows[_from:][:page_size]
-
-        # Map the found df rows to our VcfRow model.
-        vcf_rows: List[VcfRow] = [
-            VcfRow(
-                **dict(paginated_row)
-            )
-            for index, paginated_row in paginated_df_rows.iterrows()
-        ]
 
         if not vcf_rows:
             raise VcfRowsByIdNotExistError('None rows found in VCF by the provided id:{}'.format(filter_id))
 
         return vcf_rows
 
+    @staticmethod
+    def _replan(query_plan: VcfQueryPlan, file_version: FileVersion, delta_log: Optional[VcfDeltaLog]) -> None:
+        """
+        Falls back to a scan when the opened file is not the one the page was planned for, or when its delta
+        log does not apply to it.
+        """
+        if delta_log is not None and query_plan.access_path != VcfAccessPath.merge_scan:
+            query_plan.access_path = VcfAccessPath.merge_scan
+            query_plan.reason = 'A delta log was recorded since the page was planned.'
+        elif delta_log is None and query_plan.access_path == VcfAccessPath.merge_scan:
+            query_plan.access_path = VcfAccessPath.stream_scan
+            query_plan.reason = 'The delta log of the file is stale, the rows are read as they are.'
+        elif query_plan.access_path == VcfAccessPath.id_index and query_plan.file_version != file_version:
+            query_plan.access_path = VcfAccessPath.stream_scan
+            query_plan.reason = 'The file changed since the page was planned.'
+
+    @staticmethod
+    def _record_scan(query_plan: Optional[VcfQueryPlan], total_rows: int, file_descriptor: int) -> None:
+        if query_plan is not None:
+            query_plan.actual_rows = total_rows
+            # The offset of the underlying file, i.e. the compressed bytes read for compressed files.
+            query_plan.actual_bytes = os.lseek(file_descriptor, 0, os.SEEK_CUR)
+
+    def _filter_merged_rows(
+            self,
+            rows: Iterator[bytes],
+            columns: List[str],
+            column_positions: List[int],
+            filter_id: str,
+            page_size: int,
+            page_index: int,
+    ) -> List[VcfRow]:
+        """
+        Filters a page of rows by id, the same way the csv is queried when there is no delta log to merge.
+        """
+        identifier: bytes = filter_id.encode('utf-8')
+        _from = page_index * page_size
+        total_matched_rows = 0
+        vcf_rows: List[VcfRow] = []
+
+        for row in rows:
+            row_columns: List[bytes] = row.rstrip(b'\r\n').split(b'\t')
+            if row_columns[2] != identifier:
+                continue
+            total_matched_rows += 1
+            if total_matched_rows <= _from:
+                continue
+            vcf_row_values: Dict[str, Union[str, int]] = {
+                self.ROW_ATTRIBUTES[column]: row_columns[position].decode('utf-8')
+                for column, position in zip(columns, column_positions)
+            }
+            if 'pos' in vcf_row_values:
+                vcf_row_values['pos'] = int(vcf_row_values['pos'])
+            vcf_rows.append(VcfRow(**vcf_row_values))
+            if len(vcf_rows) == page_size:
+                break
+
+        return vcf_rows
+
 
 class AppendToVcfFile:
 
@@ -129,11 +414,6 @@ class AppendToVcfFile:
         if errors.errors:
             raise errors
 
-        # The second item in the tuple indicates the guessed filetype.
-        # In case of .gz file, the guessed filetype is gzip
-        # In case of .vcf file, the guessed filetype is None
-        file_type: Tuple[Union[None, str], str] = mimetypes.guess_type(vcf_file_path)
-
         rows_to_add: List[str] = []
 
         for vcf_row in vcf_rows:
@@ -147,106 +427,228 @@ class AppendToVcfFile:
             rows_to_add.append('\t'.join([str(value) for value in OrderedDict(vcf_row_dict).values()]) + '\n')
 
         try:
-            if file_type[1] == 'gzip':
-                with gzip.open(vcf_file_path, 'a') as file:
-                    for row in rows_to_add:
-                        file.write(str.encode(row))
-            elif file_type[1] is None:
-                with open(vcf_file_path, 'a') as file:
-                    for row in rows_to_add:
-                        file.write(row)
+            # The rows are appended in place, unless the file is being read: then they are appended to a new
+            # version of the file, so that the readers never see a partially appended row.
+            with file_lock(vcf_file_path), in_place_write_lock(vcf_file_path) as locked:
+                engine: VcfStorageEngine = vcf_storage_engine(vcf_file_path)
+                data: bytes = str.encode(''.join(rows_to_add))
+                if engine.compression != VcfCompression.none:
+                    data = engine.compress_appended_rows(vcf_file_path, data)
+
+                if locked:
+                    with open(vcf_file_path, 'ab') as file:
+                        file.write(data)
+                elif engine.compression != VcfCompression.none:
+                    # The compressed members (or blocks, or frames) of the file are copied as they are.
+                    with open(vcf_file_path, 'rb') as source, atomic_rewrite(vcf_file_path) as temporary_file:
+                        copy_byte_range(
+                            source.fileno(), temporary_file.fileno(), 0, os.fstat(source.fileno()).st_size
+                        )
+                        write_all(temporary_file.fileno(), data)
+                else:
+                    splice_rewrite(
+                        vcf_file_path,
+                        changes=[ByteRangeChange(offset=os.path.getsize(vcf_file_path), length=0, replacement=data)],
+                    )
+
+                if engine.compression == VcfCompression.none:
+                    # Only the appended rows are added to the ID index of the file, if it has one.
+                    catch_up_id_index(vcf_file_path)
         except Exception as ex:
             raise VcfDataAppendError(str(ex))
 
         return len(vcf_rows)
 
 
-class FilterOutRowsById:
+class IngestVcfRows:
+
+    # The most invalid rows reported for an ingest request, the rest of the body is not read.
+    MAX_ERRORS = 100
 
     def run(
             self,
             vcf_file_path: str = None,
-            filter_id: str = None,
+            chunks: Iterable[bytes] = None,
+            ingest_format: VcfIngestFormat = None,
     ) -> int:
         """
-        Loads and filters a VCF File based on the provided filtered id.
+        Appends the rows of a bulk ingest request body to a VCF File, as the body is received.
 
-        :param vcf_file_path: The VCF file path to load.
-        :param filter_id: The filter id.
+        The rows are validated and compressed one by one into a staging file next to the VCF file, so the body
+        is never held in memory, and the staging file is appended to the VCF file in a single copy once the whole
+        body is valid. Nothing is appended if any row is invalid. The pending delta log of the file, if any, is
+        folded into the file first, since it only applies to the file as it was.
 
-        :return: The list of filtered by ID VcfRows.
+        :param vcf_file_path: The VCF file path to append to.
+        :param chunks: The chunks of the request body.
+        :param ingest_format: The VcfIngestFormat of the request body.
+
+        :return: The total number of appended data rows.
 
         :raise InvalidArgumentError: If there is an invalid argument.
-               VcfDataDeleteError: If there was an error in the data deletion logic.
+               MultipleVCFHandlerBaseError: If there are invalid rows, with the line of each of them.
+               VcfFileNotFoundError: If the VCF file does not exist.
+               VcfDataAppendError: If was an error appending data to the VCF file.
         """
         errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
         if not vcf_file_path:
             errors.append(InvalidArgumentError('The VCF file path is required.'))
-        if not filter_id:
-            errors.append(InvalidArgumentError('The filter id is required.'))
+        if chunks is None:
+            errors.append(InvalidArgumentError('The rows are required.'))
+        if not isinstance(ingest_format, VcfIngestFormat):
+            errors.append(InvalidArgumentError('The ingest format is not supported.'))
 
         if errors.errors:
             raise errors
 
-        # The second item in the tuple indicates the guessed filetype.
-        # In case of .gz file, the guessed filetype is gzip
-        # In case of .vcf file, the guessed filetype is None
-        file_type: Tuple[Union[None, str], str] = mimetypes.guess_type(vcf_file_path)
-        total_deleted_rows = 0
+        if not os.path.exists(vcf_file_path):
+            raise VcfFileNotFoundError('The VCF file {} does not exist.'.format(vcf_file_path))
 
-        try:
+        engine: VcfStorageEngine = vcf_storage_engine(vcf_file_path)
+        compressor: StreamCompressor = engine.stream_compressor()
 
-            if file_type[1] == 'gzip':
-                with gzip.open(vcf_file_path, 'r') as file:
-                    rows = []
-                    for row in file:
-                        if row.startswith(b'##') or row.startswith(b'#'):
-                            rows.append(row)
-                            continue
-                        row_id = row.split(b'\t')[2].decode("utf-8")
-                        if row_id != filter_id:
-                            rows.append(row)
-                        else:
-                            total_deleted_rows += 1
-
-                with gzip.open(vcf_file_path, 'wb') as file:
-                    file.writelines(rows)
-
-            elif file_type[1] is None:
-                with open(vcf_file_path, 'r') as file:
-                    rows = []
-                    for row in file:
-                        if row.startswith('##') or row.startswith('#'):
-                            rows.append(row)
-                            continue
-                        row_id = row.split('\t')[2]
-                        if row_id != filter_id:
-                            rows.append(row)
-                        else:
-                            total_deleted_rows += 1
-
-                with open(vcf_file_path, 'w') as file:
-                    file.writelines(rows)
+        file_descriptor, staging_file_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(vcf_file_path)),
+            prefix='.{}.'.format(os.path.basename(vcf_file_path)),
+            suffix='.ingest',
+        )
+        try:
+            total_rows_added: int = self._stage_rows(
+                file_descriptor, chunks, ingest_format, engine, compressor, errors
+            )
+            if errors.errors:
+                raise errors
+            if total_rows_added == 0:
+                raise InvalidArgumentError('At least one row of data is required.')
+
+            with file_lock(vcf_file_path):
+                _fold_delta_log(vcf_file_path)
+                self._append_staging_file(vcf_file_path, staging_file_path, engine, compressor)
+                if engine.compression == VcfCompression.none:
+                    catch_up_id_index(vcf_file_path)
+        except VCFHandlerBaseError:
+            raise
         except Exception as ex:
-            raise VcfDataDeleteError(str(ex))
+            raise VcfDataAppendError(str(ex))
+        finally:
+            if os.path.exists(staging_file_path):
+                os.remove(staging_file_path)
 
-        return total_deleted_rows
+        return total_rows_added
 
+    def _stage_rows(
+            self,
+            file_descriptor: int,
+            chunks: Iterable[bytes],
+            ingest_format: VcfIngestFormat,
+            engine: VcfStorageEngine,
+            compressor: StreamCompressor,
+            errors: MultipleVCFHandlerBaseError,
+    ) -> int:
+        """
+        Validates the rows of the body and writes them to the staging file, in the format of the VCF file. The
+        trailer of the appended rows, e.g. the seek table of zstd files, is written when the staging file is
+        appended, see _append_staging_file.
 
-class AsyncFilterOutRowsById:
+        :return: The total number of valid rows. The invalid ones are added to the errors.
+        """
+        total_rows = 0
+        with os.fdopen(file_descriptor, 'wb') as staging_file:
+            for line_number, line in enumerate(iter_ingest_lines(chunks), start=1):
+                try:
+                    row: Optional[bytes] = parse_ingest_row(line, ingest_format)
+                except InvalidArgumentError as ex:
+                    errors.append(InvalidArgumentError('Line {}: {}'.format(line_number, ex.message)))
+                    if len(errors.errors) >= self.MAX_ERRORS:
+                        break
+                    continue
+                if row is None:
+                    continue
+                total_rows += 1
+                if not errors.errors:
+                    staging_file.write(compressor.compress(row))
+            staging_file.write(engine.flush_appended(compressor))
+
+        return total_rows
+
+    @staticmethod
+    def _append_staging_file(
+            vcf_file_path: str,
+            staging_file_path: str,
+            engine: VcfStorageEngine,
+            compressor: StreamCompressor,
+    ) -> None:
+        """
+        Appends the staging file to the VCF file: in place, unless the file is being read, then to a new version
+        of the file, so that the readers never see partially appended rows. Compressed staging files are whole
+        gzip members (or BGZF blocks, or zstd frames), which are appended as they are, followed by the trailer
+        of the engine of the file, e.g. a new seek table for zstd files.
+        """
+        with open(staging_file_path, 'rb') as staging_file, in_place_write_lock(vcf_file_path) as locked:
+            staging_file_size: int = os.fstat(staging_file.fileno()).st_size
+            with open(vcf_file_path, 'rb') as file:
+                trailer: bytes = engine.append_trailer(file.fileno(), compressor)
+            if locked:
+                # Not opened in append mode, which copy_file_range and sendfile do not support.
+                with open(vcf_file_path, 'r+b') as file:
+                    os.lseek(file.fileno(), 0, os.SEEK_END)
+                    copy_byte_range(staging_file.fileno(), file.fileno(), 0, staging_file_size)
+                    write_all(file.fileno(), trailer)
+            else:
+                with open(vcf_file_path, 'rb') as source, atomic_rewrite(vcf_file_path) as temporary_file:
+                    copy_byte_range(source.fileno(), temporary_file.fileno(), 0, os.fstat(source.fileno()).st_size)
+                    copy_byte_range(staging_file.fileno(), temporary_file.fileno(), 0, staging_file_size)
+                    write_all(temporary_file.fileno(), trailer)
+
+
+class AsyncAppendToVcfFile:
+
+    @celery_app.task(bind=True, name='application.vcf_files.operations.AsyncAppendToVcfFile')
+    def run(
+            self,
+            vcf_file_path: str = None,
+            vcf_rows: List[dict] = None,
+    ) -> dict:
+        """
+        Async version, the task of an append job.
+        Appends rows to a VCF File.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param vcf_rows: The attributes of the VcfRows to append.
+
+        :return: The meta of the job, with the AppendRowsExecutionArtifact.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+               VcfDataAppendError: If there was an error in the data append logic.
+        """
+        # Appending does not read the file, only the appended rows are processed.
+        progress = JobProgressReporter(task=self, operation=VcfJobOperation.append)
+        total_rows_added: int = AppendToVcfFile().run(
+            vcf_file_path=vcf_file_path,
+            vcf_rows=[VcfRow(**vcf_row) for vcf_row in vcf_rows or []],
+        )
+        progress(total_rows_added, 0)
+
+        return progress.meta(artifact=asdict(AppendRowsExecutionArtifact(
+            file_path=vcf_file_path,
+            total_rows_added=total_rows_added,
+        )))
+
+
+class FilterOutRowsById:
 
-    @celery_app.task(bind=True)
     def run(
             self,
             vcf_file_path: str = None,
             filter_id: str = None,
+            on_progress: ProgressCallback = None,
     ) -> int:
         """
-        Async version.
         Loads and filters a VCF File based on the provided filtered id.
 
         :param vcf_file_path: The VCF file path to load.
         :param filter_id: The filter id.
+        :param on_progress: Called with the rows and the bytes of the file processed so far.
 
         :return: The list of filtered by ID VcfRows.
 
@@ -262,49 +664,65 @@ class AsyncFilterOutRowsById:
         if errors.errors:
             raise errors
 
-        # The second item in the tuple indicates the guessed filetype.
-        # In case of .gz file, the guessed filetype is gzip
-        # In case of .vcf file, the guessed filetype is None
-        file_type: Tuple[Union[None, str], str] = mimetypes.guess_type(vcf_file_path)
-        total_deleted_rows = 0
-
         try:
-
-            if file_type[1] == 'gzip':
-                with gzip.open(vcf_file_path, 'r') as file:
-                    rows = []
-                    for row in file:
-                        if row.startswith(b'##') or row.startswith(b'#'):
-                            rows.append(row)
-                            continue
-                        row_id = row.split(b'\t')[2].decode("utf-8")
-                        if row_id != filter_id:
-                            rows.append(row)
-                        else:
-                            total_deleted_rows += 1
-
-                with gzip.open(vcf_file_path, 'wb') as file:
-                    file.writelines(rows)
-
-            elif file_type[1] is None:
-                with open(vcf_file_path, 'r') as file:
-                    rows = []
-                    for row in file:
-                        if row.startswith('##') or row.startswith('#'):
-                            rows.append(row)
-                            continue
-                        row_id = row.split('\t')[2]
-                        if row_id != filter_id:
-                            rows.append(row)
-                        else:
-                            total_deleted_rows += 1
-
-                with open(vcf_file_path, 'w') as file:
-                    file.writelines(rows)
+            with file_lock(vcf_file_path):
+                result: VcfRewriteResult = rewrite_vcf_rows(
+                    vcf_file_path,
+                    transform=lambda row: None,
+                    identifiers={filter_id.encode('utf-8')},
+                    on_progress=on_progress,
+                )
         except Exception as ex:
             raise VcfDataDeleteError(str(ex))
 
-        return total_deleted_rows
+        return result.total_rows_dropped
+
+
+class AsyncFilterOutRowsById:
+
+    @celery_app.task(bind=True, name='application.vcf_files.operations.AsyncFilterOutRowsById')
+    def run(
+            self,
+            vcf_file_path: str = None,
+            filter_id: str = None,
+    ) -> dict:
+        """
+        Async version, the task of a delete job.
+        Loads and filters a VCF File based on the provided filtered id, and reports the progress of the job.
+        Within a worker, a file that can be split is rewritten by chunk tasks instead, see RewriteVcfChunk.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param filter_id: The filter id.
+
+        :return: The meta of the job, with the DeletedRowsExecutionArtifact.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+               VcfDataDeleteError: If there was an error in the data deletion logic.
+               VcfNoDataDeletedError: If no data were found to delete.
+        """
+        progress = JobProgressReporter(
+            task=self, operation=VcfJobOperation.delete, total_bytes=_file_size(vcf_file_path)
+        )
+        if self.request.id is not None and vcf_file_path and filter_id and progress.total_bytes is not None:
+            chunked_rewrite: Optional[Signature] = _chunked_rewrite(
+                self, progress, vcf_file_path=vcf_file_path, filter_id=filter_id
+            )
+            if chunked_rewrite is not None:
+                return self.replace(chunked_rewrite)
+
+        total_rows_deleted: int = FilterOutRowsById().run(
+            vcf_file_path=vcf_file_path,
+            filter_id=filter_id,
+            on_progress=progress,
+        )
+
+        if total_rows_deleted == 0:
+            raise VcfNoDataDeletedError("No data found for deletion")
+
+        return progress.meta(artifact=asdict(DeletedRowsExecutionArtifact(
+            file_path=vcf_file_path,
+            total_rows_deleted=total_rows_deleted,
+        )))
 
 
 class UpdateByIdVcfFile:
@@ -313,7 +731,8 @@ class UpdateByIdVcfFile:
             self,
             vcf_file_path: str = None,
             filter_id: str = None,
-            data: VcfRow = None
+            data: VcfRow = None,
+            on_progress: ProgressCallback = None,
     ) -> int:
         """
         Loads and updates a VCF File based on the provided filtered id.
@@ -321,6 +740,7 @@ class UpdateByIdVcfFile:
         :param vcf_file_path: The VCF file path to load.
         :param filter_id: The filter id.
         :param data: The data to update file by id.
+        :param on_progress: Called with the rows and the bytes of the file processed so far.
 
         :return: The list of filtered by ID VcfRows.
 
@@ -338,62 +758,852 @@ class UpdateByIdVcfFile:
         if errors.errors:
             raise errors
 
-        # The second item in the tuple indicates the guessed filetype.
-        # In case of .gz file, the guessed filetype is gzip
-        # In case of .vcf file, the guessed filetype is None
-        file_type: Tuple[Union[None, str], str] = mimetypes.guess_type(vcf_file_path)
-        total_updated_rows = 0
+        columns: bytes = format_vcf_row(data)
+
+        try:
+            with file_lock(vcf_file_path):
+                result: VcfRewriteResult = rewrite_vcf_rows(
+                    vcf_file_path,
+                    transform=lambda row: replace_vcf_row_columns(row, columns),
+                    identifiers={filter_id.encode('utf-8')},
+                    on_progress=on_progress,
+                )
+        except Exception as ex:
+            raise VcfDataUpdateError(str(ex))
+
+        return result.total_rows_matched
+
 
-        vcf_row_dict: dict = data.__dict__
+class AsyncUpdateByIdVcfFile:
 
-        vcf_row_dict['1'] = vcf_row_dict.pop('chrom')
-        vcf_row_dict['2'] = vcf_row_dict.pop('pos')
-        vcf_row_dict['3'] = vcf_row_dict.pop('identifier')
-        vcf_row_dict['4'] = vcf_row_dict.pop('ref')
-        vcf_row_dict['5'] = vcf_row_dict.pop('alt')
+    @celery_app.task(bind=True, name='application.vcf_files.operations.AsyncUpdateByIdVcfFile')
+    def run(
+            self,
+            vcf_file_path: str = None,
+            filter_id: str = None,
+            data: dict = None,
+    ) -> dict:
+        """
+        Async version, the task of an update job.
+        Loads and updates a VCF File based on the provided filtered id, and reports the progress of the job.
+        Within a worker, a file that can be split is rewritten by chunk tasks instead, see RewriteVcfChunk.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param filter_id: The filter id.
+        :param data: The attributes of the VcfRow to update file by id.
+
+        :return: The meta of the job, with the UpdatedRowsExecutionArtifact.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+               VcfDataUpdateError: If there was an error in the data update logic, or no data were found to update.
+        """
+        progress = JobProgressReporter(
+            task=self, operation=VcfJobOperation.update, total_bytes=_file_size(vcf_file_path)
+        )
+        if self.request.id is not None and vcf_file_path and filter_id and data and progress.total_bytes is not None:
+            chunked_rewrite: Optional[Signature] = _chunked_rewrite(
+                self, progress, vcf_file_path=vcf_file_path, filter_id=filter_id, data=data
+            )
+            if chunked_rewrite is not None:
+                return self.replace(chunked_rewrite)
+
+        total_rows_updated: int = UpdateByIdVcfFile().run(
+            vcf_file_path=vcf_file_path,
+            filter_id=filter_id,
+            data=VcfRow(**data) if data else None,
+            on_progress=progress,
+        )
+
+        if total_rows_updated == 0:
+            raise VcfDataUpdateError("No data found for update")
+
+        return progress.meta(artifact=asdict(UpdatedRowsExecutionArtifact(
+            file_path=vcf_file_path,
+            total_rows_updated=total_rows_updated,
+        )))
+
+
+class RewriteVcfChunk:
+
+    @celery_app.task(bind=True, name='application.vcf_files.operations.RewriteVcfChunk')
+    def run(
+            self,
+            vcf_file_path: str = None,
+            chunk: dict = None,
+            filter_id: str = None,
+            data: dict = None,
+    ) -> dict:
+        """
+        The map task of a delete or update job on a large VCF file: rewrites a chunk of the file into its part
+        file, deleting the rows with the filter id, or updating them with the data when there are data.
 
-        row_to_append = '\t'.join([str(value) for value in OrderedDict(vcf_row_dict).values()]) + '\t'
+        The chunks of a file are rewritten in parallel, by any worker, and merged by MergeVcfChunks.
 
+        :param vcf_file_path: The VCF file path.
+        :param chunk: The attributes of the VcfChunk.
+        :param filter_id: The filter id.
+        :param data: The attributes of the VcfRow to update the rows with, None to delete them.
+
+        :return: The attributes of the VcfChunkResult.
+        """
+        return asdict(rewrite_vcf_chunk(
+            vcf_file_path,
+            chunk=VcfChunk(**chunk),
+            transform=_by_id_row_transform(VcfRow(**data) if data else None),
+            identifiers={filter_id.encode('utf-8')},
+        ))
+
+
+class MergeVcfChunks:
+
+    @celery_app.task(bind=True, name='application.vcf_files.operations.MergeVcfChunks')
+    def run(
+            self,
+            chunk_results: List[dict],
+            vcf_file_path: str = None,
+            operation: str = None,
+            file_version: dict = None,
+            compression: str = VcfCompression.none.value,
+            started_at: float = None,
+    ) -> dict:
+        """
+        The reduce task of a delete or update job on a large VCF file, the callback of the chord of its chunk
+        tasks: merges the part files of the chunks into the new version of the file. It replaces the task of
+        the job, so it ends the job.
+
+        :param chunk_results: The attributes of the VcfChunkResults of all the chunks.
+        :param vcf_file_path: The VCF file path.
+        :param operation: The operation of the job, delete or update.
+        :param file_version: The attributes of the FileVersion the chunks were rewritten from.
+        :param compression: The VcfCompression value of the file.
+        :param started_at: When the job started, in seconds since the epoch.
+
+        :return: The meta of the job, with the DeletedRowsExecutionArtifact or the UpdatedRowsExecutionArtifact.
+
+        :raise VcfDataDeleteError | VcfDataUpdateError: If there was an error in the merge, e.g. the file changed
+               in the meantime.
+               VcfNoDataDeletedError | VcfDataUpdateError: If no data were found to delete or update.
+        """
+        job_operation = VcfJobOperation(operation)
+        error_type = VcfDataDeleteError if job_operation == VcfJobOperation.delete else VcfDataUpdateError
         try:
+            with file_lock(vcf_file_path):
+                result: VcfRewriteResult = merge_vcf_chunks(
+                    vcf_file_path,
+                    chunk_results=[VcfChunkResult(**chunk_result) for chunk_result in chunk_results],
+                    file_version=FileVersion(**file_version),
+                    compression=VcfCompression(compression),
+                )
+        except Exception as ex:
+            raise error_type(str(ex))
 
-            if file_type[1] == 'gzip':
-                with gzip.open(vcf_file_path, 'r') as file:
-                    rows = []
-                    for row in file:
-                        if row.startswith(b'##') or row.startswith(b'#'):
-                            rows.append(row)
-                            continue
-                        row_id = row.split(b'\t')[2].decode("utf-8")
-                        if row_id != filter_id:
-                            rows.append(row)
-                        else:
-                            columns_to_not_update: bytes = b'\t'.join(row.split(b'\t')[5:])
-                            final_updated_row: bytes = str.encode(row_to_append) + columns_to_not_update
-                            rows.append(final_updated_row)
-                            total_updated_rows += 1
-
-                with gzip.open(vcf_file_path, 'wb') as file:
-                    file.writelines(rows)
-
-            elif file_type[1] is None:
-                with open(vcf_file_path, 'r') as file:
-                    rows = []
+        if job_operation == VcfJobOperation.delete:
+            if result.total_rows_dropped == 0:
+                raise VcfNoDataDeletedError("No data found for deletion")
+            artifact = DeletedRowsExecutionArtifact(
+                file_path=vcf_file_path, total_rows_deleted=result.total_rows_dropped
+            )
+        else:
+            if result.total_rows_matched == 0:
+                raise VcfDataUpdateError("No data found for update")
+            artifact = UpdatedRowsExecutionArtifact(
+                file_path=vcf_file_path, total_rows_updated=result.total_rows_matched
+            )
+
+        return job_meta(
+            operation=job_operation,
+            rows_processed=sum(chunk_result['rows_processed'] for chunk_result in chunk_results),
+            bytes_processed=file_version['size'],
+            total_bytes=file_version['size'],
+            started_at=started_at,
+            artifact=asdict(artifact),
+        )
+
+
+def _chunked_rewrite(
+        task: Task,
+        progress: JobProgressReporter,
+        vcf_file_path: str,
+        filter_id: str,
+        data: dict = None,
+) -> Optional[Signature]:
+    """
+    Splits the VCF file of a delete or update job into chunks, for the task of the job to be replaced with the
+    chord of their chunk tasks and their merge.
+
+    The chunk tasks go to the default queue, so that every worker takes part, while the merge goes to the queue
+    of the file like the rest of its tasks. The file is not locked in the meantime: the merge fails if the file
+    changed since it was split.
+
+    :param task: The task of the job, which must be run by a worker.
+    :param progress: The JobProgressReporter of the job.
+    :param vcf_file_path: The VCF file path.
+    :param filter_id: The filter id.
+    :param data: The attributes of the VcfRow to update the rows with, None to delete them.
+
+    :return: The chord, or None when the file can not be split and the task rewrites it itself.
+    """
+    file_version: Optional[FileVersion] = get_file_version(vcf_file_path)
+    chunks: List[VcfChunk] = plan_vcf_chunks(vcf_file_path, job_id=task.request.id)
+    if file_version is None or len(chunks) < 2:
+        return None
+
+    # Everything else the job reports comes from the merge, once the chunks are done.
+    progress(0, 0)
+
+    return chord(
+        [
+            RewriteVcfChunk.run.s(
+                vcf_file_path=vcf_file_path, chunk=asdict(chunk), filter_id=filter_id, data=data
+            ).set(queue=celery_app.conf.task_default_queue)
+            for chunk in chunks
+        ],
+        MergeVcfChunks.run.s(
+            vcf_file_path=vcf_file_path,
+            operation=progress.operation.value,
+            file_version=asdict(file_version),
+            compression=chunks[0].compression,
+            started_at=progress.started_at,
+        ),
+    )
+
+
+def _by_id_row_transform(data: Optional[VcfRow]) -> Callable[[bytes], Optional[bytes]]:
+    """
+    :param data: The VcfRow to update the rows with, None to delete them.
+
+    :return: The row transform that deletes the rows, or replaces their first five columns with the data.
+    """
+    if data is None:
+        return lambda row: None
+
+    columns: bytes = format_vcf_row(data)
+
+    return lambda row: replace_vcf_row_columns(row, columns)
+
+
+def validate_vcf_file_mutations(vcf_file_path: Optional[str], mutations: Optional[List[VcfMutation]]) -> None:
+    """
+    Validates the arguments of a batch of mutations of a VCF File.
+
+    :param vcf_file_path: The VCF file path.
+    :param mutations: The mutations.
+
+    :raise MultipleVCFHandlerBaseError: If there are invalid arguments.
+    """
+    errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
+    if not vcf_file_path:
+        errors.append(InvalidArgumentError('The VCF file path is required.'))
+    if not mutations:
+        errors.append(InvalidArgumentError('At least one mutation is required.'))
+    for mutation in mutations or []:
+        if mutation.operation != VcfMutationOperation.append and not mutation.filter_id:
+            errors.append(InvalidArgumentError('The filter id of the {} is required.'.format(
+                mutation.operation.value
+            )))
+        if mutation.operation == VcfMutationOperation.update and not mutation.data:
+            errors.append(InvalidArgumentError('Data of the update are required.'))
+        if mutation.operation == VcfMutationOperation.append and not mutation.rows:
+            errors.append(InvalidArgumentError('At least one row of data is required.'))
+
+    if errors.errors:
+        raise errors
+
+
+class ApplyVcfFileMutations:
+
+    def run(
+            self,
+            vcf_file_path: str = None,
+            mutations: List[VcfMutation] = None,
+    ) -> List[int]:
+        """
+        Applies a batch of deletes, updates and appends to a VCF File, in a single pass over the file.
+
+        The deletes and updates are grouped by id, so every row is looked up once, and the mutations of its id
+        are applied to it in the order they were given: an update after a delete of the same id finds nothing.
+        Mutations are matched against the ids of the rows as they are in the file, not as earlier updates of
+        the batch left them. The appended rows are written after the rest of the rows.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param mutations: The mutations to apply.
+
+        :return: The total number of rows deleted, updated or appended by each mutation, in the mutations order.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+               VcfDataMutationError: If there was an error applying the mutations to the VCF file.
+        """
+        validate_vcf_file_mutations(vcf_file_path=vcf_file_path, mutations=mutations)
+
+        # The id -> mutations hash map, every data row of the file is matched against it once.
+        mutations_by_id: Dict[bytes, List[Tuple[int, VcfMutation]]] = {}
+        rows_to_add: List[bytes] = []
+        totals: List[int] = [0] * len(mutations)
+        for position, mutation in enumerate(mutations):
+            if mutation.operation == VcfMutationOperation.append:
+                rows_to_add.extend(format_vcf_row(vcf_row) + b'\n' for vcf_row in mutation.rows)
+                totals[position] = len(mutation.rows)
+            else:
+                mutations_by_id.setdefault(mutation.filter_id.encode('utf-8'), []).append((position, mutation))
+
+        try:
+            with file_lock(vcf_file_path):
+                rewrite_vcf_rows(
+                    vcf_file_path,
+                    transform=lambda row: self._mutate_row(row, mutations_by_id[row.split(b'\t', 3)[2]], totals),
+                    identifiers=set(mutations_by_id),
+                    rows_to_add=rows_to_add,
+                )
+        except Exception as ex:
+            raise VcfDataMutationError(str(ex))
+
+        return totals
+
+    @staticmethod
+    def _mutate_row(row: bytes, row_mutations: List[Tuple[int, VcfMutation]], totals: List[int]) -> Optional[bytes]:
+        """
+        Applies the mutations of an id to one of its rows and counts the row for each of them.
+
+        :return: The mutated row, or None if the row is deleted.
+        """
+        for position, mutation in row_mutations:
+            totals[position] += 1
+            if mutation.operation == VcfMutationOperation.delete:
+                return None
+            row = replace_vcf_row_columns(row, format_vcf_row(mutation.data))
+
+        return row
+
+
+class RecordVcfFileMutations:
+
+    def __init__(
+            self,
+            compaction_size: int = 64 * 1024 * 1024,
+            compaction_count: int = 10000,
+    ):
+        self.compaction_size = compaction_size
+        self.compaction_count = compaction_count
+
+    def run(
+            self,
+            vcf_file_path: str = None,
+            mutations: List[VcfMutation] = None,
+    ) -> List[int]:
+        """
+        Records a batch of deletes, updates and appends in the delta log of a VCF File, instead of rewriting it.
+
+        Only the new entries are appended to the delta log, the VCF file is not written. The mutations are
+        applied one after the other, each one to the rows as the previous ones left them. The deletes and
+        updates that match no rows are not recorded. Once the delta log passes the compaction size or count,
+        the compaction task folds it into the VCF file in the background.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param mutations: The mutations to record.
+
+        :return: The total number of rows deleted, updated or appended by each mutation, in the mutations order.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+               VcfFileNotFoundError: If the VCF file does not exist.
+               VcfDataMutationError: If there was an error recording the mutations.
+        """
+        validate_vcf_file_mutations(vcf_file_path=vcf_file_path, mutations=mutations)
+
+        if not os.path.exists(vcf_file_path):
+            raise VcfFileNotFoundError('The VCF file {} does not exist.'.format(vcf_file_path))
+
+        engine: VcfStorageEngine = vcf_storage_engine(vcf_file_path)
+        totals: List[int] = [0] * len(mutations)
+
+        try:
+            # The writers of the delta log and the compaction exclude each other, the readers do not lock.
+            with file_lock(vcf_file_path):
+                file_version: Optional[FileVersion] = get_file_version(vcf_file_path)
+                delta_log: Optional[VcfDeltaLog] = VcfDeltaLog.load(vcf_file_path)
+                if delta_log is None or not delta_log.is_for(file_version):
+                    delta_log = VcfDeltaLog.for_file_version(file_version)
+
+                file_rows_by_id: Dict[bytes, int] = self._count_file_rows(
+                    vcf_file_path=vcf_file_path,
+                    engine=engine,
+                    identifiers={
+                        mutation.filter_id.encode('utf-8') for mutation in mutations
+                        if mutation.operation != VcfMutationOperation.append
+                    } | delta_log.identifiers(),
+                )
+
+                for position, mutation in enumerate(mutations):
+                    if mutation.operation == VcfMutationOperation.append:
+                        for vcf_row in mutation.rows:
+                            delta_log.add(VcfDeltaEntry(
+                                operation=mutation.operation,
+                                identifier=str(vcf_row.identifier).encode('utf-8'),
+                                row=format_vcf_row(vcf_row),
+                            ))
+                        totals[position] = len(mutation.rows)
+                        continue
+
+                    identifier: bytes = mutation.filter_id.encode('utf-8')
+                    totals[position] = delta_log.count_rows(identifier, file_rows_by_id)
+                    if totals[position]:
+                        delta_log.add(VcfDeltaEntry(
+                            operation=mutation.operation,
+                            identifier=identifier,
+                            row=format_vcf_row(mutation.data) if mutation.operation == VcfMutationOperation.update
+                            else None,
+                        ))
+
+                delta_log.store(vcf_file_path)
+        except Exception as ex:
+            raise VcfDataMutationError(str(ex))
+
+        if delta_log.size >= self.compaction_size or len(delta_log.entries) >= self.compaction_count:
+            try:
+                CompactVcfFileDelta.run.delay(vcf_file_path=vcf_file_path)
+            except Exception as ex:
+                # The mutations are already recorded, the compaction is triggered again by the next ones.
+                LOGGER.warning('The compaction of {} could not be scheduled: {}'.format(vcf_file_path, ex))
+
+        return totals
+
+    @staticmethod
+    def _count_file_rows(
+            vcf_file_path: str,
+            engine: VcfStorageEngine,
+            identifiers: Set[bytes],
+    ) -> Dict[bytes, int]:
+        """
+        Counts the rows of the VCF file with each of the ids, through the ID index of uncompressed files or
+        with a read of compressed ones.
+        """
+        if engine.compression == VcfCompression.none:
+            id_index: Union[MappedVcfIdIndex, VcfIdIndex] = load_or_build_mapped_id_index(vcf_file_path)
+            return {identifier: len(id_index.lookup(identifier.decode('utf-8'))) for identifier in identifiers}
+
+        file_rows_by_id: Dict[bytes, int] = {identifier: 0 for identifier in identifiers}
+        with open_vcf_file(vcf_file_path, engine) as file:
+            for row in file:
+                if row.startswith(b'#'):
+                    continue
+                identifier = row.split(b'\t', 3)[2]
+                if identifier in file_rows_by_id:
+                    file_rows_by_id[identifier] += 1
+
+        return file_rows_by_id
+
+
+class CompactVcfFileDelta:
+
+    @celery_app.task(bind=True, name='application.vcf_files.operations.CompactVcfFileDelta')
+    def run(
+            self,
+            vcf_file_path: str = None,
+    ) -> int:
+        """
+        Async version.
+        Folds the delta log of a VCF File into a new version of the file, and removes the delta log.
+
+        The new version of the file replaces the current one atomically before the delta log is removed, so
+        readers see either the current file and its delta log, or the new file.
+
+        :param vcf_file_path: The VCF file path to compact.
+
+        :return: The total number of folded delta log entries.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+               VcfDataMutationError: If there was an error compacting the VCF file.
+        """
+        if not vcf_file_path:
+            raise InvalidArgumentError('The VCF file path is required.')
+
+        try:
+            with file_lock(vcf_file_path):
+                return _fold_delta_log(vcf_file_path)
+        except Exception as ex:
+            raise VcfDataMutationError(str(ex))
+
+
+def _fold_delta_log(vcf_file_path: str) -> int:
+    """
+    Folds the delta log of a VCF File, if any, into a new version of the file, and removes the delta log.
+
+    The caller holds the writer lock of the file.
+
+    :param vcf_file_path: The VCF file path.
+
+    :return: The total number of folded delta log entries.
+    """
+    delta_log: Optional[VcfDeltaLog] = VcfDeltaLog.load(vcf_file_path)
+    if delta_log is None:
+        return 0
+    if not delta_log.is_for(get_file_version(vcf_file_path)):
+        # The file was rewritten without the delta log, which can not be applied to it anymore.
+        LOGGER.warning('The stale delta log of {} is discarded.'.format(vcf_file_path))
+        VcfDeltaLog.remove(vcf_file_path)
+        return 0
+
+    # Only the rows of the ids of the deletes and updates can change, the uncompressed files are
+    # spliced through their ID index.
+    rewrite_vcf_rows(
+        vcf_file_path,
+        transform=delta_log.mutate,
+        identifiers=delta_log.identifiers(),
+        rows_to_add=delta_log.appended_rows(),
+    )
+
+    VcfDeltaLog.remove(vcf_file_path)
+
+    return len(delta_log.entries)
+
+
+class ExportVcfFile:
+
+    # The size of the chunks handed to the compressor and to the response.
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+            self,
+            read_vcf_file_header: ReadVcfFileHeader = None,
+    ):
+        self.read_vcf_file_header = read_vcf_file_header or ReadVcfFileHeader()
+
+    def run(
+            self,
+            vcf_file_path: str = None,
+            filter_id: str = None,
+            region: VcfRegion = None,
+            filter_status: str = None,
+            compression: VcfCompression = VcfCompression.none,
+            on_progress: ProgressCallback = None,
+    ) -> Iterator[bytes]:
+        """
+        Exports the rows of a VCF File that match all the provided criteria as a valid VCF, with the original header
+        and every column of the matching rows.
+
+        The arguments and the header are validated eagerly, the rows are then read, filtered and compressed lazily,
+        chunk by chunk, while the returned iterator is consumed.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param filter_id: The id of the rows to export.
+        :param region: The region of the rows to export.
+        :param filter_status: The FILTER column value of the rows to export, e.g. PASS.
+        :param compression: The compression of the exported VCF.
+        :param on_progress: Called with the rows and the bytes of the file read so far, while the chunks are consumed.
+
+        :return: An iterator over the chunks of the exported VCF.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+               VcfFileNotFoundError: If the VCF file does not exist.
+               VcfFileHeaderError: If the VCF file does not have a valid header.
+        """
+        errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
+        if not vcf_file_path:
+            errors.append(InvalidArgumentError('The VCF file path is required.'))
+        if not filter_id and not region and not filter_status:
+            errors.append(InvalidArgumentError('An id, a region or a filter status is required.'))
+        if not isinstance(compression, VcfCompression):
+            errors.append(InvalidArgumentError('The compression is not supported.'))
+
+        if errors.errors:
+            raise errors
+
+        vcf_file_header: VcfFileHeader = self.read_vcf_file_header.run(vcf_file_path=vcf_file_path)
+
+        return self._stream(
+            vcf_file_path=vcf_file_path,
+            vcf_file_header=vcf_file_header,
+            filter_id=filter_id.encode('utf-8') if filter_id else None,
+            region=region,
+            filter_status=filter_status.encode('utf-8') if filter_status else None,
+            compressor=StreamCompressor(compression=compression),
+            on_progress=on_progress,
+        )
+
+    def _stream(
+            self,
+            vcf_file_path: str,
+            vcf_file_header: VcfFileHeader,
+            filter_id: Optional[bytes],
+            region: Optional[VcfRegion],
+            filter_status: Optional[bytes],
+            compressor: StreamCompressor,
+            on_progress: Optional[ProgressCallback],
+    ) -> Iterator[bytes]:
+        header_lines: List[str] = vcf_file_header.meta_lines + ['\t'.join(vcf_file_header.columns)]
+        buffer = bytearray('\n'.join(header_lines).encode('utf-8') + b'\n')
+
+        try:
+            # The delta log is loaded before the file is opened, see VcfDeltaLog.load.
+            delta_log: Optional[VcfDeltaLog] = VcfDeltaLog.load(vcf_file_path)
+            with snapshot_read_lock(vcf_file_path), open_vcf_file(vcf_file_path) as file:
+                if delta_log is not None and \
+                        not delta_log.is_for(get_open_file_version(vcf_file_path, file.fileno())):
+                    delta_log = None
+                file.seek(vcf_file_header.data_offset)
+                rows_read = 0
+                for row in (delta_log.merge(file) if delta_log is not None else file):
+                    rows_read += 1
+                    if on_progress is not None and rows_read % PROGRESS_INTERVAL_ROWS == 0:
+                        on_progress(rows_read, os.lseek(file.fileno(), 0, os.SEEK_CUR))
+                    # Only the first seven columns are needed to match a row, the rest are copied as they are.
+                    columns: List[bytes] = row.split(b'\t', 7)
+                    if filter_id is not None and columns[2] != filter_id:
+                        continue
+                    if filter_status is not None and (len(columns) < 7 or columns[6].rstrip(b'\r\n') != filter_status):
+                        continue
+                    if region is not None and not region.contains(columns[0].decode('utf-8'), int(columns[1])):
+                        continue
+
+                    buffer += row if row.endswith(b'\n') else row + b'\n'
+                    if len(buffer) >= self.CHUNK_SIZE:
+                        chunk: bytes = compressor.compress(bytes(buffer))
+                        buffer.clear()
+                        if chunk:
+                            yield chunk
+                if on_progress is not None:
+                    on_progress(rows_read, os.fstat(file.fileno()).st_size)
+
+            yield compressor.compress(bytes(buffer)) + compressor.flush()
+        except Exception as ex:
+            # Raised while the response is streamed, so it cuts the stream short instead of producing an error response.
+            raise VcfDataExportError(str(ex))
+
+
+class AsyncExportVcfFile:
+
+    @celery_app.task(bind=True, name='application.vcf_files.operations.AsyncExportVcfFile')
+    def run(
+            self,
+            vcf_file_path: str = None,
+            export_path: str = None,
+            filter_id: str = None,
+            region: str = None,
+            filter_status: str = None,
+            compression: str = VcfCompression.none.value,
+    ) -> dict:
+        """
+        Async version, the task of an export job.
+        Exports the rows of a VCF File that match all the provided criteria to another VCF file.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param export_path: The path of the VCF file to export the rows to, it is replaced once the export is done.
+        :param filter_id: The id of the rows to export.
+        :param region: The region of the rows to export, e.g. chr1:1000-2000.
+        :param filter_status: The FILTER column value of the rows to export, e.g. PASS.
+        :param compression: The compression of the exported VCF, one of none, gzip, bgzf or zstd.
+
+        :return: The meta of the job, with the ExportedVcfFileArtifact.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+               VcfFileNotFoundError: If the VCF file does not exist.
+               VcfFileHeaderError: If the VCF file does not have a valid header.
+               VcfDataExportError: If there was an error exporting the rows.
+        """
+        if not export_path:
+            raise InvalidArgumentError('The export path is required.')
+
+        progress = JobProgressReporter(
+            task=self, operation=VcfJobOperation.export, total_bytes=_file_size(vcf_file_path)
+        )
+        chunks: Iterator[bytes] = ExportVcfFile().run(
+            vcf_file_path=vcf_file_path,
+            filter_id=filter_id,
+            region=parse_region(region) if region else None,
+            filter_status=filter_status,
+            compression=VcfCompression(compression),
+            on_progress=progress,
+        )
+
+        with atomic_rewrite(export_path) as file:
+            for chunk in chunks:
+                file.write(chunk)
+
+        return progress.meta(artifact=asdict(ExportedVcfFileArtifact(
+            file_path=vcf_file_path,
+            export_path=export_path,
+        )))
+
+
+class AsyncBuildVcfIdIndex:
+
+    @celery_app.task(bind=True, name='application.vcf_files.operations.AsyncBuildVcfIdIndex')
+    def run(
+            self,
+            vcf_file_path: str = None,
+    ) -> dict:
+        """
+        Async version, the task of an index job.
+        Builds the ID index of an uncompressed VCF File and saves it next to the file, replacing the current one.
+        If the file was only appended to since its current index was built, e.g. by an external tool, only the
+        appended rows are indexed instead.
+
+        :param vcf_file_path: The VCF file path to index.
+
+        :return: The meta of the job, with the VcfIdIndexArtifact.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+               VcfFileNotFoundError: If the VCF file does not exist.
+        """
+        if not vcf_file_path:
+            raise InvalidArgumentError('The VCF file path is required.')
+        if vcf_file_compression(vcf_file_path) != VcfCompression.none:
+            raise InvalidArgumentError('Only uncompressed VCF files have an ID index.')
+        if not os.path.exists(vcf_file_path):
+            raise VcfFileNotFoundError('The VCF file {} does not exist.'.format(vcf_file_path))
+
+        progress = JobProgressReporter(
+            task=self, operation=VcfJobOperation.index, total_bytes=_file_size(vcf_file_path)
+        )
+        # The writers of the file wait, so that they neither change the file while it is indexed nor update the
+        # index at the same time.
+        with file_lock(vcf_file_path):
+            total_rows_indexed: Optional[int] = catch_up_id_index(vcf_file_path)
+            if total_rows_indexed is not None:
+                progress(total_rows_indexed, progress.total_bytes)
+            else:
+                id_index: VcfIdIndex = VcfIdIndex.build(vcf_file_path, on_progress=progress)
+                id_index.save(vcf_file_path)
+                total_rows_indexed = id_index.total_rows
+
+        return progress.meta(artifact=asdict(VcfIdIndexArtifact(
+            file_path=vcf_file_path,
+            total_rows_indexed=total_rows_indexed,
+        )))
+
+
+class AsyncConvertVcfFile:
+
+    @celery_app.task(bind=True, name='application.vcf_files.operations.AsyncConvertVcfFile')
+    def run(
+            self,
+            vcf_file_path: str = None,
+            converted_path: str = None,
+            compression: str = VcfCompression.zstd.value,
+    ) -> dict:
+        """
+        Async version, the task of a convert job.
+        Converts a VCF File to another compression, into another VCF file which is replaced once the conversion is
+        done. The pending delta log of the file, if any, is folded into the file first. The gzip files are written
+        as BGZF and the zstd files as seekable zstd frames, compressed in parallel.
+
+        :param vcf_file_path: The VCF file path to convert.
+        :param converted_path: The path of the converted VCF file, it may be the VCF file path itself, but not
+                               another existing file.
+        :param compression: The compression of the converted VCF file, one of none, gzip, bgzf or zstd.
+
+        :return: The meta of the job, with the ConvertedVcfFileArtifact.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+               VcfFileNotFoundError: If the VCF file does not exist.
+               VcfDataConversionError: If there was an error converting the file.
+        """
+        if not vcf_file_path:
+            raise InvalidArgumentError('The VCF file path is required.')
+        if not converted_path:
+            raise InvalidArgumentError('The converted path is required.')
+        if not os.path.exists(vcf_file_path):
+            raise VcfFileNotFoundError('The VCF file {} does not exist.'.format(vcf_file_path))
+        converted_is_source: bool = os.path.abspath(converted_path) == os.path.abspath(vcf_file_path)
+
+        progress = JobProgressReporter(
+            task=self, operation=VcfJobOperation.convert, total_bytes=_file_size(vcf_file_path)
+        )
+        try:
+            # The writers of the file wait, so that the converted file has all their changes, and so do the writers
+            # of the converted file.
+            with file_lock(vcf_file_path), nullcontext() if converted_is_source else file_lock(converted_path):
+                if is_other_file(converted_path, vcf_file_path):
+                    raise InvalidArgumentError('The converted VCF file {} already exists.'.format(converted_path))
+                _fold_delta_log(vcf_file_path)
+                with open_vcf_file(vcf_file_path) as file, atomic_rewrite(converted_path) as converted_file, \
+                        storage_engine_for(VcfCompression(compression)).open_output(converted_file) as output:
+                    rows_processed = 0
                     for row in file:
-                        if row.startswith('##') or row.startswith('#'):
-                            rows.append(row)
+                        output.write(row)
+                        if row.startswith(b'#'):
                             continue
-                        row_id = row.split('\t')[2]
-                        if row_id != filter_id:
-                            rows.append(row)
-                        else:
-                            columns_to_not_update: str = '\t'.join(row.split('\t')[5:])
-                            final_updated_row: str = row_to_append + columns_to_not_update
-                            rows.append(final_updated_row)
-                            total_updated_rows += 1
-
-                with open(vcf_file_path, 'w') as file:
-                    file.writelines(rows)
+                        rows_processed += 1
+                        if rows_processed % PROGRESS_INTERVAL_ROWS == 0:
+                            progress(rows_processed, os.lseek(file.fileno(), 0, os.SEEK_CUR))
+                    progress(rows_processed, os.fstat(file.fileno()).st_size)
+        except VCFHandlerBaseError:
+            raise
         except Exception as ex:
-            raise VcfDataUpdateError(str(ex))
+            raise VcfDataConversionError(str(ex))
+
+        return progress.meta(artifact=asdict(ConvertedVcfFileArtifact(
+            file_path=vcf_file_path,
+            converted_path=converted_path,
+        )))
+
+
+class ReadVcfJob:
+
+    def run(
+            self,
+            job_id: str = None,
+    ) -> VcfJob:
+        """
+        Reads the state, the progress and the artifact of a job from the Celery result backend.
+
+        The result backend does not know the jobs that are not started yet from the jobs that do not exist,
+        both are pending.
+
+        :param job_id: The job id.
+
+        :return: The VcfJob.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+        """
+        if not job_id:
+            raise InvalidArgumentError('The job id is required.')
+
+        result: AsyncResult = celery_app.AsyncResult(job_id)
+
+        return to_vcf_job(job_id=job_id, state=result.state, info=result.info, now=time.time())
 
-        return total_updated_rows
+
+class StoreVcfJob:
+
+    def run(
+            self,
+            operation: VcfJobOperation = None,
+            artifact: dict = None,
+            rows_processed: int = 0,
+    ) -> VcfJob:
+        """
+        Stores a job that was done without a worker (e.g. a mutation recorded in the delta log) in the Celery
+        result backend, so that it is read like the jobs of the worker.
+
+        :param operation: The operation of the job.
+        :param artifact: The execution artifact of the job.
+        :param rows_processed: The rows processed by the job.
+
+        :return: The successful VcfJob.
+
+        :raise InvalidArgumentError: If there is an invalid argument.
+        """
+        if not operation:
+            raise InvalidArgumentError('The job operation is required.')
+
+        job_id: str = uuid()
+        meta: dict = job_meta(
+            operation=operation,
+            rows_processed=rows_processed,
+            bytes_processed=0,
+            total_bytes=None,
+            started_at=time.time(),
+            artifact=artifact,
+        )
+        celery_app.backend.store_result(job_id, meta, VcfJobState.success.value)
+
+        return to_vcf_job(job_id=job_id, state=VcfJobState.success.value, info=meta, now=time.time())
+
+
+def _file_size(vcf_file_path: Optional[str]) -> Optional[int]:
+    """
+    :return: The size of the VCF file, or None if it does not exist.
+    """
+    file_version: Optional[FileVersion] = get_file_version(vcf_file_path) if vcf_file_path else None
+
+    return file_version.size if file_version else None
@@ -0,0 +1,113 @@
+import os
+from typing import List, Optional, Tuple
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.deltas import VcfDeltaLog
+from application.vcf_files.enums import VcfAccessPath, VcfCompression
+from application.vcf_files.indexes import MappedVcfIdIndex, load_mapped_id_index
+from application.vcf_files.models import FileVersion, VcfQueryPlan
+from application.vcf_files.storage import vcf_file_compression
+from application.vcf_files.utils import get_file_version
+
+
+class VcfQueryPlanner:
+    """
+    Chooses how the rows of a VCF file with an id are read for a page, from the format and the size of the file,
+    the freshness of its ID index and the shape of the query:
+
+    - merge_scan when the file has a pending delta log, whose updates may give the id to any row.
+    - stream_scan for compressed files, which have no ID index, and for uncompressed files without a fresh ID
+      index. Planning only reads, a missing or stale index is built or caught up by the index job and the
+      writers, under the writer lock of the file, never by the requests.
+    - id_index for the uncompressed files with a fresh ID index, memory mapped, only the rows of the page are
+      read at their offsets.
+    - index_miss when the index has no rows with the id for the page, nothing is read.
+
+    The index_min_size tells the files that are worth indexing, an explained plan of a larger file without a
+    fresh ID index says so.
+    """
+
+    def __init__(
+            self,
+            index_min_size: int = 64 * 1024 * 1024,
+    ):
+        if index_min_size is None or index_min_size < 0:
+            raise InvalidArgumentError('An index min size of at least 0 is required.')
+
+        self.index_min_size = index_min_size
+
+    def plan(
+            self,
+            vcf_file_path: str,
+            filter_id: str,
+            page_size: int,
+            page_index: int,
+    ) -> VcfQueryPlan:
+        """
+        :param vcf_file_path: The VCF file path.
+        :param filter_id: The filter id.
+        :param page_size: The size of the page.
+        :param page_index: The index of the page.
+
+        :return: The VcfQueryPlan of the page, with the estimated rows and bytes read.
+
+        :raise InvalidArgumentError: If the format of the file is not supported.
+        """
+        file_version: Optional[FileVersion] = get_file_version(vcf_file_path)
+        file_size: int = file_version.size if file_version else 0
+        compression: VcfCompression = vcf_file_compression(vcf_file_path)
+
+        if os.path.exists(vcf_file_path + VcfDeltaLog.SUFFIX):
+            return VcfQueryPlan(
+                access_path=VcfAccessPath.merge_scan,
+                reason='The file has a pending delta log, which is merged with every row.',
+                compression=compression,
+                file_size=file_size,
+                estimated_bytes=file_size,
+            )
+        if compression != VcfCompression.none:
+            return VcfQueryPlan(
+                access_path=VcfAccessPath.stream_scan,
+                reason='The file is {} compressed, only uncompressed files have an ID index.'.format(
+                    compression.value
+                ),
+                compression=compression,
+                file_size=file_size,
+                estimated_bytes=file_size,
+            )
+        id_index: Optional[MappedVcfIdIndex] = load_mapped_id_index(vcf_file_path) if file_version else None
+        file_version = get_file_version(vcf_file_path)
+        if id_index is None or not id_index.is_fresh(file_version):
+            return VcfQueryPlan(
+                access_path=VcfAccessPath.stream_scan,
+                reason=(
+                    'The file is smaller than {} bytes and has no fresh ID index.'.format(self.index_min_size)
+                    if file_size < self.index_min_size else
+                    'The file has no fresh ID index yet, it is built by the index job.'
+                ),
+                compression=compression,
+                file_size=file_size,
+                estimated_bytes=file_size,
+            )
+
+        row_ranges: List[Tuple[int, int]] = id_index.lookup(filter_id, start=page_index * page_size, count=page_size)
+        if not row_ranges:
+            return VcfQueryPlan(
+                access_path=VcfAccessPath.index_miss,
+                reason='The ID index has no rows with the id for the page.',
+                compression=compression,
+                file_size=file_size,
+                estimated_rows=0,
+                estimated_bytes=0,
+            )
+
+        return VcfQueryPlan(
+            access_path=VcfAccessPath.id_index,
+            reason='The ID index gives the offsets of the rows of the page.',
+            compression=compression,
+            file_size=file_size,
+            estimated_rows=len(row_ranges),
+            estimated_bytes=sum(length for _, length in row_ranges),
+            row_ranges=row_ranges,
+            file_version=file_version,
+        )
@@ -0,0 +1,109 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable
+
+from application.infrastructure.error.errors import InvalidArgumentError, OverloadError
+from application.infrastructure.logging.loggers import LOGGER
+from application.vcf_files.caching import VcfPageCache
+from application.vcf_files.errors import VcfRowsByIdNotExistError
+
+
+class NextPagePrefetcher:
+    """
+    Speculatively computes the next page of clients that walk the pages of a (file, id) in order.
+
+    When page N of a (file, id, page size) is served right after page N - 1, page N + 1 is computed in a
+    background thread pool while page N is still being serialized, and is put into the page cache so the
+    next request of the client is a cache hit.
+
+    Prefetching is an optimization only: it is skipped when max_workers prefetches already run, or when
+    more than max_load foreground requests are in flight.
+    """
+
+    def __init__(
+            self,
+            page_cache: VcfPageCache,
+            max_workers: int = 2,
+            max_load: int = 8,
+            max_tracked_clients: int = 1024,
+    ):
+        if page_cache is None:
+            raise InvalidArgumentError('The page cache is required.')
+        if max_workers is None or max_workers <= 0:
+            raise InvalidArgumentError('A prefetch max workers above 0 is required.')
+        if max_load is None or max_load <= 0:
+            raise InvalidArgumentError('A prefetch max load above 0 is required.')
+
+        self.page_cache = page_cache
+        self.max_workers = max_workers
+        self.max_load = max_load
+        self.max_tracked_clients = max_tracked_clients
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='vcf-prefetch')
+        self._lock = threading.Lock()
+        self._last_page_indexes: OrderedDict = OrderedDict()
+        self._running_prefetches = 0
+        self._foreground_requests = 0
+
+    def foreground_request_started(self) -> None:
+        with self._lock:
+            self._foreground_requests += 1
+
+    def foreground_request_finished(self) -> None:
+        with self._lock:
+            self._foreground_requests -= 1
+
+    def page_served(
+            self,
+            sequence_key: Hashable,
+            page_index: int,
+            next_page_cache_key: Hashable,
+            load_next_page: Callable[[], object],
+    ) -> bool:
+        """
+        Records that a page was served, and prefetches the next page if the access is sequential.
+
+        :param sequence_key: Identifies the client walk, i.e. the (file, id, page size).
+        :param page_index: The index of the served page.
+        :param next_page_cache_key: The page cache key of the next page.
+        :param load_next_page: Computes the next page.
+
+        :return: True if the next page prefetch was scheduled.
+        """
+        with self._lock:
+            previous_page_index = self._last_page_indexes.pop(sequence_key, None)
+            self._last_page_indexes[sequence_key] = page_index
+            if len(self._last_page_indexes) > self.max_tracked_clients:
+                self._last_page_indexes.popitem(last=False)
+
+            if previous_page_index is None or page_index != previous_page_index + 1:
+                return False
+            if next_page_cache_key in self.page_cache:
+                return False
+            if self._running_prefetches >= self.max_workers or self._foreground_requests > self.max_load:
+                return False
+
+            self._running_prefetches += 1
+
+        self._executor.submit(self._prefetch, next_page_cache_key, load_next_page)
+
+        return True
+
+    def _prefetch(self, next_page_cache_key: Hashable, load_next_page: Callable[[], object]) -> None:
+        try:
+            self.page_cache.put(next_page_cache_key, load_next_page())
+        except VcfRowsByIdNotExistError:
+            # The served page was the last one.
+            pass
+        except OverloadError:
+            # The foreground scans use the whole budget.
+            pass
+        except Exception as ex:
+            LOGGER.warning('Next page prefetch failed: {}'.format(ex))
+        finally:
+            with self._lock:
+                self._running_prefetches -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
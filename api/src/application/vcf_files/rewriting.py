@@ -0,0 +1,174 @@
+import os
+from typing import Callable, List, Optional, Set, Union
+
+from application.vcf_files.enums import VcfCompression
+from application.vcf_files.indexes import MappedVcfIdIndex, VcfIdIndex, load_or_build_id_index, \
+    load_or_build_mapped_id_index, restamp_id_index
+from application.vcf_files.jobs import PROGRESS_INTERVAL_ROWS, ProgressCallback
+from application.vcf_files.models import ByteRangeChange, FileVersion, VcfRewriteResult
+from application.vcf_files.splicing import patch_in_place, splice_rewrite
+from application.vcf_files.storage import VcfStorageEngine, vcf_storage_engine
+from application.vcf_files.utils import atomic_rewrite, get_file_version
+
+# A transform of a data row: it returns the row to keep it, None to drop it, or the row to replace it with.
+RowTransform = Callable[[bytes], Optional[bytes]]
+
+
+class _NothingToRewrite(Exception):
+    """
+    Raised to leave a rewrite that changed nothing, so that the VCF file is not replaced by an identical one.
+    """
+
+
+def rewrite_vcf_rows(
+        vcf_file_path: str,
+        transform: RowTransform,
+        identifiers: Optional[Set[bytes]] = None,
+        rows_to_add: List[bytes] = None,
+        on_progress: ProgressCallback = None,
+) -> VcfRewriteResult:
+    """
+    Rewrites the data rows of a VCF file through a row transform, and adds rows at its end.
+
+    The header rows are kept as they are. With ids, the transform is only applied to the rows with one of them:
+    for uncompressed files the memory mapped ID index gives their offsets, so only these rows are read and the
+    rest of the file is spliced as it is (or the rows are patched in place, when they keep their length), and the
+    index is kept up to date. Rows patched in place that keep their ids only restamp the index. Compressed files, and every row when there are no ids, are streamed through a temporary file
+    which atomically replaces the VCF file, gzip files are written as BGZF blocks and zstd files as seekable zstd
+    frames, compressed in parallel.
+    The VCF file is left untouched when nothing changed.
+
+    The caller holds the writer lock of the file. The transform may be applied to the rows in any order.
+
+    :param vcf_file_path: The VCF file path.
+    :param transform: The transform of the data rows, each row is given with its line ending.
+    :param identifiers: The ids of the rows to transform, None to transform every row.
+    :param rows_to_add: The rows to add at the end of the file, with their line endings.
+    :param on_progress: Called with the rows and the bytes of the file processed so far, while the file is read.
+
+    :return: The VcfRewriteResult.
+
+    :raise InvalidArgumentError: If the format of the file is not supported.
+    """
+    rows_to_add = rows_to_add or []
+    result = VcfRewriteResult(total_rows_added=len(rows_to_add))
+
+    engine: VcfStorageEngine = vcf_storage_engine(vcf_file_path)
+    if engine.compression == VcfCompression.none and identifiers is not None:
+        _rewrite_indexed_rows(vcf_file_path, transform, identifiers, rows_to_add, result, on_progress)
+    else:
+        _rewrite_stream(vcf_file_path, transform, identifiers, rows_to_add, result, on_progress, engine)
+
+    return result
+
+
+def transform_vcf_row(
+        row: bytes,
+        transform: RowTransform,
+        identifiers: Optional[Set[bytes]],
+        result: VcfRewriteResult,
+) -> Optional[bytes]:
+    """
+    Applies a row transform to a data row, when the row has one of the ids, and counts it in the result.
+
+    :param row: The data row, with its line ending.
+    :param transform: The transform of the data rows.
+    :param identifiers: The ids of the rows to transform, None to transform every row.
+    :param result: The VcfRewriteResult the row is counted in.
+
+    :return: The transformed row, the row itself when it is not transformed, or None when it is dropped.
+    """
+    if identifiers is not None and row.split(b'\t', 3)[2] not in identifiers:
+        return row
+
+    result.total_rows_matched += 1
+    transformed_row: Optional[bytes] = transform(row)
+    if transformed_row is None:
+        result.total_rows_dropped += 1
+
+    return transformed_row
+
+
+def _rewrite_stream(
+        vcf_file_path: str,
+        transform: RowTransform,
+        identifiers: Optional[Set[bytes]],
+        rows_to_add: List[bytes],
+        result: VcfRewriteResult,
+        on_progress: Optional[ProgressCallback],
+        engine: VcfStorageEngine,
+) -> None:
+    changed: bool = bool(rows_to_add)
+    rows_processed = 0
+    try:
+        with engine.open(vcf_file_path) as file, \
+                atomic_rewrite(vcf_file_path) as temporary_file, \
+                engine.open_output(temporary_file) as output:
+            for row in file:
+                if row.startswith(b'#'):
+                    output.write(row)
+                    continue
+                rows_processed += 1
+                if on_progress is not None and rows_processed % PROGRESS_INTERVAL_ROWS == 0:
+                    # The offset of the underlying file, i.e. the compressed bytes read for compressed files.
+                    on_progress(rows_processed, os.lseek(file.fileno(), 0, os.SEEK_CUR))
+                transformed_row: Optional[bytes] = transform_vcf_row(row, transform, identifiers, result)
+                if transformed_row is None:
+                    changed = True
+                    continue
+                changed = changed or transformed_row != row
+                output.write(transformed_row)
+            for row in rows_to_add:
+                output.write(row)
+            if on_progress is not None:
+                on_progress(rows_processed, os.fstat(file.fileno()).st_size)
+
+            if not changed:
+                raise _NothingToRewrite()
+    except _NothingToRewrite:
+        pass
+
+
+def _rewrite_indexed_rows(
+        vcf_file_path: str,
+        transform: RowTransform,
+        identifiers: Set[bytes],
+        rows_to_add: List[bytes],
+        result: VcfRewriteResult,
+        on_progress: Optional[ProgressCallback],
+) -> None:
+    mapped_id_index: Union[MappedVcfIdIndex, VcfIdIndex] = load_or_build_mapped_id_index(vcf_file_path)
+    file_version: FileVersion = get_file_version(vcf_file_path)
+    changes: List[ByteRangeChange] = []
+    identifiers_kept = True
+    with open(vcf_file_path, 'rb') as file:
+        for identifier in identifiers:
+            for offset, length in mapped_id_index.lookup(identifier.decode('utf-8')):
+                result.total_rows_matched += 1
+                row: bytes = os.pread(file.fileno(), length, offset)
+                transformed_row: Optional[bytes] = transform(row)
+                if transformed_row is None:
+                    result.total_rows_dropped += 1
+                    changes.append(ByteRangeChange(offset=offset, length=length))
+                elif transformed_row != row:
+                    changes.append(ByteRangeChange(offset=offset, length=length, replacement=transformed_row))
+                    identifiers_kept = identifiers_kept and transformed_row.split(b'\t', 3)[2] == identifier
+        file_size: int = os.fstat(file.fileno()).st_size
+    changes.extend(ByteRangeChange(offset=file_size, length=0, replacement=row) for row in rows_to_add)
+
+    if changes and all(len(change.replacement) == change.length for change in changes) and identifiers_kept:
+        # e.g. base corrections, the rows are overwritten where they are, without any rewrite, and the offsets
+        # and the ids of the index stay the same.
+        patch_in_place(vcf_file_path, changes=changes)
+        restamp_id_index(vcf_file_path, previous_version=file_version)
+    elif changes:
+        # The rows move or change their ids, so the whole index is updated.
+        id_index: VcfIdIndex = load_or_build_id_index(vcf_file_path)
+        if all(len(change.replacement) == change.length for change in changes):
+            patch_in_place(vcf_file_path, changes=changes, id_index=id_index)
+        else:
+            splice_rewrite(vcf_file_path, changes=changes, id_index=id_index)
+
+    if on_progress is not None:
+        # Only the matched rows are read, but the whole file is done with.
+        on_progress(result.total_rows_matched, file_size)
@@ -1,12 +1,58 @@
-from typing import List
+import os
+from contextlib import nullcontext
+from typing import Any, Callable, Iterable, List, Optional
 
+from attr import asdict
+from celery.result import AsyncResult
+from celery.utils import uuid
+
+from application.infrastructure.concurrency.admission import AdmissionController
+from application.infrastructure.concurrency.bounded_executor import BoundedExecutor
+from application.infrastructure.concurrency.group_commit import GroupCommit
+from application.infrastructure.concurrency.single_flight import SingleFlight
 from application.infrastructure.error.errors import InvalidArgumentError, MultipleVCFHandlerBaseError
 from application.rest_api.vcf_files.enums import VCFHeader
 from application.vcf_files.operations import FilterVcfFile, AppendToVcfFile, FilterOutRowsById, \
-    UpdateByIdVcfFile, AsyncFilterOutRowsById
+    UpdateByIdVcfFile, AsyncFilterOutRowsById, ReadVcfFileHeader, ExportVcfFile, ApplyVcfFileMutations, \
+    RecordVcfFileMutations, AsyncUpdateByIdVcfFile, AsyncAppendToVcfFile, AsyncExportVcfFile, AsyncBuildVcfIdIndex, \
+    ReadVcfJob, StoreVcfJob, IngestVcfRows, AsyncConvertVcfFile
 from application.vcf_files.errors import VcfNoDataDeletedError, VcfDataUpdateError
+from application.vcf_files.caching import VcfPageCache
 from application.vcf_files.models import FilteredVcfRowsPage, VcfRow, AppendRowsExecutionArtifact, \
-    UpdatedRowsExecutionArtifact
+    UpdatedRowsExecutionArtifact, FileVersion, VcfFileHeader, VcfFileExport, VcfRegion, VcfMutation, \
+    VcfMutationResult, BatchMutationExecutionArtifact, VcfJob, DeletedRowsExecutionArtifact, VcfQueryPlan
+from application.vcf_files.planning import VcfQueryPlanner
+from application.vcf_files.prefetching import NextPagePrefetcher
+from application.vcf_files.enums import VcfCompression, VcfMutationOperation, VcfJobOperation, VcfJobState, \
+    VcfIngestFormat
+from application.vcf_files.storage import vcf_file_compression
+from application.vcf_files.deltas import VcfDeltaLog
+from application.vcf_files.utils import converted_vcf_file_path, get_file_version, is_other_file, parse_region
+
+
+def _run_scan(
+        scan_executor: Optional[BoundedExecutor],
+        scan: Callable[[], Any],
+        admission_controller: Optional[AdmissionController] = None,
+        cost: int = 0,
+) -> Any:
+    """
+    Runs a scan of a VCF file on the BoundedExecutor of the scans, if there is one, or in the calling thread, once
+    the AdmissionController, if there is one, admits its estimated cost in bytes.
+
+    :raise OverloadError: If the scan was not admitted.
+    """
+    with admission_controller.admit(cost) if admission_controller is not None else nullcontext():
+        if scan_executor is None:
+            return scan()
+
+        return scan_executor.run(scan)
+
+
+def _file_size(vcf_file_path: str) -> int:
+    file_version: Optional[FileVersion] = get_file_version(vcf_file_path)
+
+    return file_version.size if file_version else 0
 
 
 class VcfFilePaginationService:
@@ -14,23 +60,48 @@ class VcfFilePaginationService:
     def __init__(
             self,
             filter_vcf_file: FilterVcfFile,
+            single_flight: SingleFlight = None,
+            page_cache: VcfPageCache = None,
+            prefetcher: NextPagePrefetcher = None,
+            query_planner: VcfQueryPlanner = None,
+            scan_executor: BoundedExecutor = None,
+            admission_controller: AdmissionController = None,
     ):
         self.filter_vcf_file = filter_vcf_file
+        self.single_flight = single_flight
+        self.page_cache = page_cache
+        self.prefetcher = prefetcher
+        self.query_planner = query_planner
+        self.scan_executor = scan_executor
+        self.admission_controller = admission_controller
 
     def apply(
             self,
             vcf_file_path: str,
             filter_id: str,
             page_size: int = 10,
-            page_index: int = 0
+            page_index: int = 0,
+            explain: bool = False,
     ) -> FilteredVcfRowsPage:
         """
         VCF File pagination Service.
 
+        Concurrent identical requests (same file version, filter id and page) are coalesced when a
+        SingleFlight is provided, so only one of them scans the file and the rest share its page.
+        Served pages are kept in the page cache when one is provided, and the prefetcher computes the
+        next page of clients that walk the pages in order. When a VcfQueryPlanner is provided, it chooses
+        how the rows of each page are read. The pages that are read run on the scan BoundedExecutor when one is
+        provided, once the AdmissionController, if any, admits the bytes their plan reads (the whole file without
+        a plan), while the cached pages are returned right away.
+
+        The explained requests always read their page, without the SingleFlight and the page cache, and
+        return it with its plan and the rows and bytes it actually read.
+
         :param vcf_file_path: The VCF file path to load.
         :param filter_id: The filter id.
         :param page_size: The size of the page.
         :param page_index: The index of the page.
+        :param explain: True to return the VcfQueryPlan of the page along with it.
 
         :return: A FilteredVcfRowsPage.
 
@@ -49,12 +120,199 @@ class VcfFilePaginationService:
         if errors.errors:
             raise errors
 
+        if explain:
+            return self._load_page(
+                vcf_file_path=vcf_file_path,
+                filter_id=filter_id,
+                page_size=page_size,
+                page_index=page_index,
+                explain=True,
+            )
+
+        # The file version is part of the keys, so a request arriving after a write to the file
+        # never gets a page of the previous contents. So is the version of the delta log, the mutations
+        # recorded in it change the rows without writing to the file.
+        file_version: Optional[FileVersion] = get_file_version(vcf_file_path)
+        delta_log_version: Optional[FileVersion] = get_file_version(vcf_file_path + VcfDeltaLog.SUFFIX)
+        cache_key = (file_version, delta_log_version, filter_id, page_size, page_index)
+
+        if self.page_cache is not None and file_version:
+            page: Optional[FilteredVcfRowsPage] = self.page_cache.get(cache_key)
+            if page is not None:
+                if page.total == page_size:
+                    self._prefetch_next_page(
+                        file_version, delta_log_version, vcf_file_path, filter_id, page_size, page_index
+                    )
+                return page
+
+        if self.prefetcher:
+            self.prefetcher.foreground_request_started()
+        try:
+            page = self._get_page(file_version, delta_log_version, vcf_file_path, filter_id, page_size, page_index)
+        finally:
+            if self.prefetcher:
+                self.prefetcher.foreground_request_finished()
+
+        if self.page_cache is not None and file_version:
+            self.page_cache.put(cache_key, page)
+            if page.total == page_size:
+                self._prefetch_next_page(
+                    file_version, delta_log_version, vcf_file_path, filter_id, page_size, page_index
+                )
+
+        return page
+
+    def _get_page(
+            self,
+            file_version: Optional[FileVersion],
+            delta_log_version: Optional[FileVersion],
+            vcf_file_path: str,
+            filter_id: str,
+            page_size: int,
+            page_index: int,
+    ) -> FilteredVcfRowsPage:
+        """
+        Loads a page, through the SingleFlight if there is one.
+        """
+        if not self.single_flight:
+            return self._load_page(
+                vcf_file_path=vcf_file_path,
+                filter_id=filter_id,
+                page_size=page_size,
+                page_index=page_index,
+            )
+
+        return self.single_flight.do(
+            key='{}|{}|{}|{}|{}'.format(file_version, delta_log_version, filter_id, page_size, page_index),
+            func=lambda: self._load_page(
+                vcf_file_path=vcf_file_path,
+                filter_id=filter_id,
+                page_size=page_size,
+                page_index=page_index,
+            ),
+        )
+
+    def _prefetch_next_page(
+            self,
+            file_version: FileVersion,
+            delta_log_version: Optional[FileVersion],
+            vcf_file_path: str,
+            filter_id: str,
+            page_size: int,
+            page_index: int,
+    ) -> None:
+        """
+        Lets the prefetcher compute the next page in the background, if the client walks the pages in order.
+        """
+        if not self.prefetcher:
+            return
+
+        self.prefetcher.page_served(
+            sequence_key=(vcf_file_path, filter_id, page_size),
+            page_index=page_index,
+            next_page_cache_key=(file_version, delta_log_version, filter_id, page_size, page_index + 1),
+            load_next_page=lambda: self._get_page(
+                file_version, delta_log_version, vcf_file_path, filter_id, page_size, page_index + 1
+            ),
+        )
+
+    def _load_page(
+            self,
+            vcf_file_path: str,
+            filter_id: str,
+            page_size: int,
+            page_index: int,
+            explain: bool = False,
+    ) -> FilteredVcfRowsPage:
+        """
+        Loads a page of the VCF file rows filtered by the provided id.
+
+        The page is planned on the BoundedExecutor of the scans too, so a burst of requests does not plan at once
+        on the request threads, and its read is then admitted with the estimated cost of the plan.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param filter_id: The filter id.
+        :param page_size: The size of the page.
+        :param page_index: The index of the page.
+        :param explain: True to plan the page even without a VcfQueryPlanner, and return it with its plan.
+
+        :return: A FilteredVcfRowsPage.
+
+        :raise OverloadError: If the read of the page was not admitted.
+        """
+        return _run_scan(
+            self.scan_executor,
+            lambda: self._plan_and_read_page(
+                vcf_file_path=vcf_file_path,
+                filter_id=filter_id,
+                page_size=page_size,
+                page_index=page_index,
+                explain=explain,
+            ),
+        )
+
+    def _plan_and_read_page(
+            self,
+            vcf_file_path: str,
+            filter_id: str,
+            page_size: int,
+            page_index: int,
+            explain: bool,
+    ) -> FilteredVcfRowsPage:
+        """
+        Plans a page, and reads it once its cost is admitted.
+
+        :raise OverloadError: If the read of the page was not admitted.
+        """
+        query_planner: Optional[VcfQueryPlanner] = self.query_planner or (VcfQueryPlanner() if explain else None)
+        query_plan: Optional[VcfQueryPlan] = None
+        if query_planner is not None:
+            query_plan = query_planner.plan(
+                vcf_file_path=vcf_file_path,
+                filter_id=filter_id,
+                page_size=page_size,
+                page_index=page_index,
+            )
+        cost: int = 0
+        if self.admission_controller is not None:
+            cost = query_plan.estimated_bytes if query_plan is not None else _file_size(vcf_file_path)
+
+        # Already on a thread of the executor, if there is one, so the read runs inline.
+        page: FilteredVcfRowsPage = _run_scan(
+            self.scan_executor,
+            lambda: self._read_page(
+                vcf_file_path=vcf_file_path,
+                filter_id=filter_id,
+                page_size=page_size,
+                page_index=page_index,
+                query_plan=query_plan,
+            ),
+            admission_controller=self.admission_controller,
+            cost=cost,
+        )
+        if explain:
+            page.plan = query_plan
+
+        return page
+
+    def _read_page(
+            self,
+            vcf_file_path: str,
+            filter_id: str,
+            page_size: int,
+            page_index: int,
+            query_plan: Optional[VcfQueryPlan],
+    ) -> FilteredVcfRowsPage:
+        """
+        Reads a page of the VCF file rows filtered by the provided id.
+        """
         vcf_filtered_rows: List[VcfRow] = self.filter_vcf_file.run(
             vcf_file_path=vcf_file_path,
             headers=[VCFHeader.chrom, VCFHeader.pos, VCFHeader.alt, VCFHeader.ref, VCFHeader.id],
             filter_id=filter_id,
             page_size=page_size,
             page_index=page_index,
+            query_plan=query_plan,
         )
 
         return FilteredVcfRowsPage(
@@ -71,8 +329,12 @@ class AppendDataToVcfFileService:
     def __init__(
             self,
             append_to_vcf_file: AppendToVcfFile,
+            record_vcf_file_mutations: RecordVcfFileMutations = None,
+            group_commit: GroupCommit = None,
     ):
         self.append_to_vcf_file = append_to_vcf_file
+        self.record_vcf_file_mutations = record_vcf_file_mutations
+        self.group_commit = group_commit
 
     def apply(
             self,
@@ -82,6 +344,10 @@ class AppendDataToVcfFileService:
         """
         Handles data appending on a VCF File.
 
+        The rows are recorded in the delta log of the file when a RecordVcfFileMutations is provided. Otherwise,
+        when a GroupCommit is provided, they are appended along with the rows of the concurrent requests on the
+        same file, in one write, and the request returns once they are all appended.
+
         :param vcf_file_path: The VCF file path to load.
         :param vcf_rows: The list of VcfRows to append.
 
@@ -98,9 +364,73 @@ class AppendDataToVcfFileService:
         if errors.errors:
             raise errors
 
-        total_rows_added: int = self.append_to_vcf_file.run(
+        if self.record_vcf_file_mutations is not None:
+            total_rows_added: int = self.record_vcf_file_mutations.run(
+                vcf_file_path=vcf_file_path,
+                mutations=[VcfMutation(operation=VcfMutationOperation.append, rows=vcf_rows)],
+            )[0]
+        elif self.group_commit is not None:
+            self.group_commit.submit(
+                key=os.path.abspath(vcf_file_path),
+                items=vcf_rows,
+                commit=lambda batch_rows: self.append_to_vcf_file.run(
+                    vcf_file_path=vcf_file_path,
+                    vcf_rows=batch_rows
+                ),
+            )
+            total_rows_added = len(vcf_rows)
+        else:
+            total_rows_added = self.append_to_vcf_file.run(
+                vcf_file_path=vcf_file_path,
+                vcf_rows=vcf_rows
+            )
+
+        return AppendRowsExecutionArtifact(
+            total_rows_added=total_rows_added,
+            file_path=vcf_file_path
+        )
+
+
+class IngestVcfRowsService:
+
+    def __init__(
+            self,
+            ingest_vcf_rows: IngestVcfRows,
+    ):
+        self.ingest_vcf_rows = ingest_vcf_rows
+
+    def apply(
+            self,
+            vcf_file_path: str,
+            chunks: Iterable[bytes] = None,
+            content_type: str = None,
+    ) -> AppendRowsExecutionArtifact:
+        """
+        Handles the bulk ingest of rows on a VCF File, streamed from the request body.
+
+        :param vcf_file_path: The VCF file path to append to.
+        :param chunks: The chunks of the request body.
+        :param content_type: The media type of the request body, one of the VcfIngestFormat values.
+
+        :return: The VCF file rows append execution artifact.
+
+        :raise: InvalidArgumentError: In case an invalid argument is provided.
+        """
+        errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
+        if not vcf_file_path:
+            errors.append(InvalidArgumentError('The VCF file path is required.'))
+        if content_type not in VcfIngestFormat.values():
+            errors.append(InvalidArgumentError('The content type {} is not supported, it must be one of {}.'.format(
+                content_type, ', '.join(VcfIngestFormat.values())
+            )))
+
+        if errors.errors:
+            raise errors
+
+        total_rows_added: int = self.ingest_vcf_rows.run(
             vcf_file_path=vcf_file_path,
-            vcf_rows=vcf_rows
+            chunks=chunks,
+            ingest_format=VcfIngestFormat(content_type),
         )
 
         return AppendRowsExecutionArtifact(
@@ -114,8 +444,14 @@ class FilterOutRowsByIdService:
     def __init__(
             self,
             filter_out_rows_by_id: FilterOutRowsById,
+            record_vcf_file_mutations: RecordVcfFileMutations = None,
+            scan_executor: BoundedExecutor = None,
+            admission_controller: AdmissionController = None,
     ):
         self.filter_out_rows_by_id = filter_out_rows_by_id
+        self.record_vcf_file_mutations = record_vcf_file_mutations
+        self.scan_executor = scan_executor
+        self.admission_controller = admission_controller
 
     def apply(
             self,
@@ -125,11 +461,15 @@ class FilterOutRowsByIdService:
         """
         Handles data appending on a VCF File.
 
+        The delete runs on the scan BoundedExecutor when one is provided, once the AdmissionController, if any,
+        admits the size of the file.
+
         :param vcf_file_path: The VCF file path to load.
         :param filter_id: The filter id.
 
         :raise: InvalidArgumentError: In case an invalid argument is provided.
                 VcfNoDataDeletedError: In case no data were found to delete.
+                OverloadError: In case the delete was not admitted.
         """
         errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
         if not vcf_file_path:
@@ -140,10 +480,26 @@ class FilterOutRowsByIdService:
         if errors.errors:
             raise errors
 
-        deleted_rows: int = self.filter_out_rows_by_id.run(
-            vcf_file_path=vcf_file_path,
-            filter_id=filter_id,
-        )
+        if self.record_vcf_file_mutations is not None:
+            deleted_rows: int = _run_scan(
+                self.scan_executor,
+                lambda: self.record_vcf_file_mutations.run(
+                    vcf_file_path=vcf_file_path,
+                    mutations=[VcfMutation(operation=VcfMutationOperation.delete, filter_id=filter_id)],
+                )[0],
+                admission_controller=self.admission_controller,
+                cost=_file_size(vcf_file_path),
+            )
+        else:
+            deleted_rows = _run_scan(
+                self.scan_executor,
+                lambda: self.filter_out_rows_by_id.run(
+                    vcf_file_path=vcf_file_path,
+                    filter_id=filter_id,
+                ),
+                admission_controller=self.admission_controller,
+                cost=_file_size(vcf_file_path),
+            )
 
         if deleted_rows == 0:
             raise VcfNoDataDeletedError("No data found for deletion")
@@ -154,22 +510,28 @@ class AsyncFilterOutRowsByIdService:
     def __init__(
             self,
             filter_out_rows_by_id: AsyncFilterOutRowsById,
+            record_vcf_file_mutations: RecordVcfFileMutations = None,
+            store_vcf_job: StoreVcfJob = None,
     ):
         self.filter_out_rows_by_id = filter_out_rows_by_id
+        self.record_vcf_file_mutations = record_vcf_file_mutations
+        self.store_vcf_job = store_vcf_job or StoreVcfJob()
 
     def apply(
             self,
             vcf_file_path: str,
             filter_id: str,
-    ) -> None:
+    ) -> VcfJob:
         """
-        Handles data appending on a VCF File.
+        Starts a delete job on a VCF File.
 
         :param vcf_file_path: The VCF file path to load.
         :param filter_id: The filter id.
 
+        :return: The pending VcfJob, or the done one when the delete is recorded in the delta log of the file.
+
         :raise: InvalidArgumentError: In case an invalid argument is provided.
-                VcfNoDataDeletedError: In case no data were found to delete.
+                VcfNoDataDeletedError: In case no data were found to delete in the delta log of the file.
         """
         errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
         if not vcf_file_path:
@@ -180,13 +542,27 @@ class AsyncFilterOutRowsByIdService:
         if errors.errors:
             raise errors
 
-        deleted_rows: int = self.filter_out_rows_by_id.run.delay(
+        if self.record_vcf_file_mutations is not None:
+            # Recording the tombstone is cheap enough to be done without the worker.
+            deleted_rows: int = self.record_vcf_file_mutations.run(
+                vcf_file_path=vcf_file_path,
+                mutations=[VcfMutation(operation=VcfMutationOperation.delete, filter_id=filter_id)],
+            )[0]
+            if deleted_rows == 0:
+                raise VcfNoDataDeletedError("No data found for deletion")
+
+            return self.store_vcf_job.run(
+                operation=VcfJobOperation.delete,
+                artifact=asdict(DeletedRowsExecutionArtifact(file_path=vcf_file_path, total_rows_deleted=deleted_rows)),
+                rows_processed=deleted_rows,
+            )
+
+        result: AsyncResult = self.filter_out_rows_by_id.run.delay(
             vcf_file_path=vcf_file_path,
             filter_id=filter_id,
         )
 
-        if deleted_rows == 0:
-            raise VcfNoDataDeletedError("No data found for deletion")
+        return VcfJob(job_id=result.id, state=VcfJobState.pending, operation=VcfJobOperation.delete)
 
 
 class VcfFileUpdateByIdService:
@@ -194,8 +570,14 @@ class VcfFileUpdateByIdService:
     def __init__(
             self,
             update_by_id_vcf_file: UpdateByIdVcfFile,
+            record_vcf_file_mutations: RecordVcfFileMutations = None,
+            scan_executor: BoundedExecutor = None,
+            admission_controller: AdmissionController = None,
     ):
         self.update_by_id_vcf_file = update_by_id_vcf_file
+        self.record_vcf_file_mutations = record_vcf_file_mutations
+        self.scan_executor = scan_executor
+        self.admission_controller = admission_controller
 
     def apply(
             self,
@@ -206,6 +588,10 @@ class VcfFileUpdateByIdService:
         """
         VCF File update Service.
 
+        The update is recorded in the delta log of the file when a RecordVcfFileMutations is provided, and runs
+        on the scan BoundedExecutor when one is provided, once the AdmissionController, if any, admits the size
+        of the file.
+
         :param vcf_file_path: The VCF file path to load.
         :param filter_id: The filter id.
         :param data: The data to update file by id.
@@ -225,11 +611,27 @@ class VcfFileUpdateByIdService:
         if errors.errors:
             raise errors
 
-        updated_rows = self.update_by_id_vcf_file.run(
-            vcf_file_path=vcf_file_path,
-            filter_id=filter_id,
-            data=data
-        )
+        if self.record_vcf_file_mutations is not None:
+            updated_rows: int = _run_scan(
+                self.scan_executor,
+                lambda: self.record_vcf_file_mutations.run(
+                    vcf_file_path=vcf_file_path,
+                    mutations=[VcfMutation(operation=VcfMutationOperation.update, filter_id=filter_id, data=data)],
+                )[0],
+                admission_controller=self.admission_controller,
+                cost=_file_size(vcf_file_path),
+            )
+        else:
+            updated_rows = _run_scan(
+                self.scan_executor,
+                lambda: self.update_by_id_vcf_file.run(
+                    vcf_file_path=vcf_file_path,
+                    filter_id=filter_id,
+                    data=data
+                ),
+                admission_controller=self.admission_controller,
+                cost=_file_size(vcf_file_path),
+            )
 
         if updated_rows == 0:
             raise VcfDataUpdateError("No data found for update")
@@ -238,3 +640,502 @@ class VcfFileUpdateByIdService:
             total_rows_updated=updated_rows,
             file_path=vcf_file_path
         )
+
+
+class AsyncVcfFileUpdateByIdService:
+
+    def __init__(
+            self,
+            update_by_id_vcf_file: AsyncUpdateByIdVcfFile,
+            record_vcf_file_mutations: RecordVcfFileMutations = None,
+            store_vcf_job: StoreVcfJob = None,
+    ):
+        self.update_by_id_vcf_file = update_by_id_vcf_file
+        self.record_vcf_file_mutations = record_vcf_file_mutations
+        self.store_vcf_job = store_vcf_job or StoreVcfJob()
+
+    def apply(
+            self,
+            vcf_file_path: str,
+            filter_id: str,
+            data: VcfRow = None
+    ) -> VcfJob:
+        """
+        Starts an update job on a VCF File.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param filter_id: The filter id.
+        :param data: The data to update file by id.
+
+        :return: The pending VcfJob, or the done one when the update is recorded in the delta log of the file.
+
+        :raise: InvalidArgumentError: In case an invalid argument is provided.
+                VcfDataUpdateError: In case no data were found to update in the delta log of the file.
+        """
+        errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
+        if not vcf_file_path:
+            errors.append(InvalidArgumentError('The VCF file path is required.'))
+        if not filter_id:
+            errors.append(InvalidArgumentError('The Filter ID is required.'))
+        if not data:
+            errors.append(InvalidArgumentError('Data are required.'))
+
+        if errors.errors:
+            raise errors
+
+        if self.record_vcf_file_mutations is not None:
+            updated_rows: int = self.record_vcf_file_mutations.run(
+                vcf_file_path=vcf_file_path,
+                mutations=[VcfMutation(operation=VcfMutationOperation.update, filter_id=filter_id, data=data)],
+            )[0]
+            if updated_rows == 0:
+                raise VcfDataUpdateError("No data found for update")
+
+            return self.store_vcf_job.run(
+                operation=VcfJobOperation.update,
+                artifact=asdict(UpdatedRowsExecutionArtifact(file_path=vcf_file_path, total_rows_updated=updated_rows)),
+                rows_processed=updated_rows,
+            )
+
+        result: AsyncResult = self.update_by_id_vcf_file.run.delay(
+            vcf_file_path=vcf_file_path,
+            filter_id=filter_id,
+            data=asdict(data),
+        )
+
+        return VcfJob(job_id=result.id, state=VcfJobState.pending, operation=VcfJobOperation.update)
+
+
+class AsyncAppendDataToVcfFileService:
+
+    def __init__(
+            self,
+            append_to_vcf_file: AsyncAppendToVcfFile,
+            record_vcf_file_mutations: RecordVcfFileMutations = None,
+            store_vcf_job: StoreVcfJob = None,
+    ):
+        self.append_to_vcf_file = append_to_vcf_file
+        self.record_vcf_file_mutations = record_vcf_file_mutations
+        self.store_vcf_job = store_vcf_job or StoreVcfJob()
+
+    def apply(
+            self,
+            vcf_file_path: str,
+            vcf_rows: List[VcfRow] = None
+    ) -> VcfJob:
+        """
+        Starts an append job on a VCF File.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param vcf_rows: The list of VcfRows to append.
+
+        :return: The pending VcfJob, or the done one when the rows are recorded in the delta log of the file.
+
+        :raise: InvalidArgumentError: In case an invalid argument is provided.
+        """
+        errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
+        if not vcf_file_path:
+            errors.append(InvalidArgumentError('The VCF file path is required.'))
+        if not vcf_rows:
+            errors.append(InvalidArgumentError('At least one row of data is required.'))
+
+        if errors.errors:
+            raise errors
+
+        if self.record_vcf_file_mutations is not None:
+            total_rows_added: int = self.record_vcf_file_mutations.run(
+                vcf_file_path=vcf_file_path,
+                mutations=[VcfMutation(operation=VcfMutationOperation.append, rows=vcf_rows)],
+            )[0]
+
+            return self.store_vcf_job.run(
+                operation=VcfJobOperation.append,
+                artifact=asdict(AppendRowsExecutionArtifact(
+                    file_path=vcf_file_path,
+                    total_rows_added=total_rows_added,
+                )),
+                rows_processed=total_rows_added,
+            )
+
+        result: AsyncResult = self.append_to_vcf_file.run.delay(
+            vcf_file_path=vcf_file_path,
+            vcf_rows=[asdict(vcf_row) for vcf_row in vcf_rows],
+        )
+
+        return VcfJob(job_id=result.id, state=VcfJobState.pending, operation=VcfJobOperation.append)
+
+
+class VcfFileBatchMutationService:
+
+    def __init__(
+            self,
+            apply_vcf_file_mutations: ApplyVcfFileMutations,
+            record_vcf_file_mutations: RecordVcfFileMutations = None,
+            scan_executor: BoundedExecutor = None,
+            admission_controller: AdmissionController = None,
+    ):
+        self.apply_vcf_file_mutations = apply_vcf_file_mutations
+        self.record_vcf_file_mutations = record_vcf_file_mutations
+        self.scan_executor = scan_executor
+        self.admission_controller = admission_controller
+
+    def apply(
+            self,
+            vcf_file_path: str,
+            mutations: List[VcfMutation] = None
+    ) -> BatchMutationExecutionArtifact:
+        """
+        VCF File batch mutation Service, applies many deletes, updates and appends with a single file rewrite,
+        or records them in the delta log of the file when a RecordVcfFileMutations is provided. The mutations run
+        on the scan BoundedExecutor when one is provided, once the AdmissionController, if any, admits the size
+        of the file.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param mutations: The mutations to apply.
+
+        :return: The VCF file batch mutation execution artifact, with the total rows of each mutation.
+
+        :raise: InvalidArgumentError: In case an invalid argument is provided.
+        """
+        errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
+        if not vcf_file_path:
+            errors.append(InvalidArgumentError('The VCF file path is required.'))
+        if not mutations:
+            errors.append(InvalidArgumentError('At least one mutation is required.'))
+
+        if errors.errors:
+            raise errors
+
+        if self.record_vcf_file_mutations is not None:
+            totals: List[int] = _run_scan(
+                self.scan_executor,
+                lambda: self.record_vcf_file_mutations.run(
+                    vcf_file_path=vcf_file_path,
+                    mutations=mutations,
+                ),
+                admission_controller=self.admission_controller,
+                cost=_file_size(vcf_file_path),
+            )
+        else:
+            totals = _run_scan(
+                self.scan_executor,
+                lambda: self.apply_vcf_file_mutations.run(
+                    vcf_file_path=vcf_file_path,
+                    mutations=mutations,
+                ),
+                admission_controller=self.admission_controller,
+                cost=_file_size(vcf_file_path),
+            )
+
+        return BatchMutationExecutionArtifact(
+            file_path=vcf_file_path,
+            results=[
+                VcfMutationResult(operation=mutation.operation, filter_id=mutation.filter_id, total_rows=total)
+                for mutation, total in zip(mutations, totals)
+            ],
+        )
+
+
+class VcfFileHeaderService:
+
+    def __init__(
+            self,
+            read_vcf_file_header: ReadVcfFileHeader,
+    ):
+        self.read_vcf_file_header = read_vcf_file_header
+
+    def apply(
+            self,
+            vcf_file_path: str,
+    ) -> VcfFileHeader:
+        """
+        VCF File header Service.
+
+        :param vcf_file_path: The VCF file path to load.
+
+        :return: The parsed VcfFileHeader.
+
+        :raise: InvalidArgumentError: In case an invalid argument is provided.
+        """
+        if not vcf_file_path:
+            raise InvalidArgumentError('The VCF file path is required.')
+
+        return self.read_vcf_file_header.run(vcf_file_path=vcf_file_path)
+
+
+def validate_export(
+        vcf_file_path: Optional[str],
+        filter_id: Optional[str],
+        region: Optional[str],
+        filter_status: Optional[str],
+        compression: Optional[str],
+) -> Optional[VcfRegion]:
+    """
+    Validates the arguments of an export of a VCF File.
+
+    :return: The parsed region, if any.
+
+    :raise MultipleVCFHandlerBaseError: If there are invalid arguments.
+    """
+    errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
+    if not vcf_file_path:
+        errors.append(InvalidArgumentError('The VCF file path is required.'))
+    if not filter_id and not region and not filter_status:
+        errors.append(InvalidArgumentError('An id, a region or a filter status is required.'))
+    if compression not in VcfCompression.values():
+        errors.append(InvalidArgumentError('The compression must be one of {}.'.format(VcfCompression.values())))
+
+    vcf_region: Optional[VcfRegion] = None
+    if region:
+        try:
+            vcf_region = parse_region(region)
+        except InvalidArgumentError as ex:
+            errors.append(ex)
+
+    if errors.errors:
+        raise errors
+
+    return vcf_region
+
+
+class ExportVcfFileService:
+
+    # The media type and the file name suffix of each export compression.
+    MEDIA_TYPES = {
+        VcfCompression.none: ('text/x-vcf', '.vcf'),
+        VcfCompression.gzip: ('application/gzip', '.vcf.gz'),
+        VcfCompression.bgzf: ('application/gzip', '.vcf.gz'),
+        VcfCompression.zstd: ('application/zstd', '.vcf.zst'),
+    }
+
+    def __init__(
+            self,
+            export_vcf_file: ExportVcfFile,
+            admission_controller: AdmissionController = None,
+    ):
+        self.export_vcf_file = export_vcf_file
+        self.admission_controller = admission_controller
+
+    def apply(
+            self,
+            vcf_file_path: str,
+            filter_id: str = None,
+            region: str = None,
+            filter_status: str = None,
+            compression: str = VcfCompression.none.value,
+    ) -> VcfFileExport:
+        """
+        VCF File export Service.
+
+        An export scans the whole file, so when an AdmissionController is provided its stream is admitted with
+        the size of the file before the response starts, and holds that cost until it is consumed or closed.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param filter_id: The id of the rows to export.
+        :param region: The region of the rows to export, e.g. chr1:1000-2000.
+        :param filter_status: The FILTER column value of the rows to export, e.g. PASS.
+        :param compression: The compression of the exported VCF, one of none, gzip, bgzf or zstd.
+
+        :return: The VcfFileExport, with the lazily produced chunks of the exported VCF.
+
+        :raise: InvalidArgumentError: In case an invalid argument is provided.
+                OverloadError: If the export was not admitted.
+        """
+        vcf_region: Optional[VcfRegion] = validate_export(
+            vcf_file_path=vcf_file_path,
+            filter_id=filter_id,
+            region=region,
+            filter_status=filter_status,
+            compression=compression,
+        )
+
+        vcf_compression = VcfCompression(compression)
+        media_type, suffix = self.MEDIA_TYPES[vcf_compression]
+
+        chunks = self.export_vcf_file.run(
+            vcf_file_path=vcf_file_path,
+            filter_id=filter_id,
+            region=vcf_region,
+            filter_status=filter_status,
+            compression=vcf_compression,
+        )
+        if self.admission_controller is not None:
+            chunks = self.admission_controller.admit_iterator(chunks, cost=_file_size(vcf_file_path))
+
+        return VcfFileExport(
+            file_name=os.path.basename(vcf_file_path).split('.')[0] + suffix,
+            media_type=media_type,
+            chunks=chunks,
+        )
+
+
+class AsyncExportVcfFileService:
+
+    def __init__(
+            self,
+            export_vcf_file: AsyncExportVcfFile,
+    ):
+        self.export_vcf_file = export_vcf_file
+
+    def apply(
+            self,
+            vcf_file_path: str,
+            filter_id: str = None,
+            region: str = None,
+            filter_status: str = None,
+            compression: str = VcfCompression.none.value,
+    ) -> VcfJob:
+        """
+        Starts an export job of a VCF File, the rows are exported to a VCF file next to it, named after the job.
+
+        :param vcf_file_path: The VCF file path to load.
+        :param filter_id: The id of the rows to export.
+        :param region: The region of the rows to export, e.g. chr1:1000-2000.
+        :param filter_status: The FILTER column value of the rows to export, e.g. PASS.
+        :param compression: The compression of the exported VCF, one of none, gzip, bgzf or zstd.
+
+        :return: The pending VcfJob.
+
+        :raise: InvalidArgumentError: In case an invalid argument is provided.
+        """
+        validate_export(
+            vcf_file_path=vcf_file_path,
+            filter_id=filter_id,
+            region=region,
+            filter_status=filter_status,
+            compression=compression,
+        )
+
+        job_id: str = uuid()
+        _, suffix = ExportVcfFileService.MEDIA_TYPES[VcfCompression(compression)]
+        export_path: str = os.path.join(
+            os.path.dirname(vcf_file_path),
+            '{}.{}{}'.format(os.path.basename(vcf_file_path).split('.')[0], job_id, suffix),
+        )
+
+        self.export_vcf_file.run.apply_async(
+            kwargs={
+                'vcf_file_path': vcf_file_path,
+                'export_path': export_path,
+                'filter_id': filter_id,
+                'region': region,
+                'filter_status': filter_status,
+                'compression': compression,
+            },
+            task_id=job_id,
+        )
+
+        return VcfJob(job_id=job_id, state=VcfJobState.pending, operation=VcfJobOperation.export)
+
+
+class AsyncBuildVcfIdIndexService:
+
+    def __init__(
+            self,
+            build_vcf_id_index: AsyncBuildVcfIdIndex,
+    ):
+        self.build_vcf_id_index = build_vcf_id_index
+
+    def apply(
+            self,
+            vcf_file_path: str,
+    ) -> VcfJob:
+        """
+        Starts a job that builds the ID index of an uncompressed VCF File.
+
+        :param vcf_file_path: The VCF file path to index.
+
+        :return: The pending VcfJob.
+
+        :raise: InvalidArgumentError: In case an invalid argument is provided.
+        """
+        errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
+        if not vcf_file_path:
+            errors.append(InvalidArgumentError('The VCF file path is required.'))
+        elif vcf_file_compression(vcf_file_path) != VcfCompression.none:
+            errors.append(InvalidArgumentError('Only uncompressed VCF files have an ID index.'))
+
+        if errors.errors:
+            raise errors
+
+        result: AsyncResult = self.build_vcf_id_index.run.delay(vcf_file_path=vcf_file_path)
+
+        return VcfJob(job_id=result.id, state=VcfJobState.pending, operation=VcfJobOperation.index)
+
+
+class AsyncConvertVcfFileService:
+
+    def __init__(
+            self,
+            convert_vcf_file: AsyncConvertVcfFile,
+    ):
+        self.convert_vcf_file = convert_vcf_file
+
+    def apply(
+            self,
+            vcf_file_path: str,
+            compression: str = VcfCompression.zstd.value,
+    ) -> VcfJob:
+        """
+        Starts a job that converts a VCF File to another compression, into a VCF file next to it with the same
+        name and the extension of the compression, e.g. test.vcf.gz to test.vcf.zst. Only the VCF and compression
+        extensions of the name are replaced, and the conversion is refused if it would replace another file.
+
+        :param vcf_file_path: The VCF file path to convert.
+        :param compression: The compression of the converted VCF, one of none, gzip, bgzf or zstd.
+
+        :return: The pending VcfJob.
+
+        :raise: InvalidArgumentError: In case an invalid argument is provided.
+        """
+        errors: MultipleVCFHandlerBaseError = MultipleVCFHandlerBaseError()
+        if not vcf_file_path:
+            errors.append(InvalidArgumentError('The VCF file path is required.'))
+        if compression not in VcfCompression.values():
+            errors.append(InvalidArgumentError('The compression must be one of {}.'.format(VcfCompression.values())))
+        elif vcf_file_path and vcf_file_compression(vcf_file_path) == VcfCompression(compression):
+            errors.append(InvalidArgumentError('The VCF file is already {} compressed.'.format(compression)))
+
+        if errors.errors:
+            raise errors
+
+        _, suffix = ExportVcfFileService.MEDIA_TYPES[VcfCompression(compression)]
+        converted_path: str = converted_vcf_file_path(vcf_file_path, suffix)
+        if is_other_file(converted_path, vcf_file_path):
+            errors.append(InvalidArgumentError('The converted VCF file {} already exists.'.format(converted_path)))
+            raise errors
+
+        result: AsyncResult = self.convert_vcf_file.run.delay(
+            vcf_file_path=vcf_file_path,
+            converted_path=converted_path,
+            compression=compression,
+        )
+
+        return VcfJob(job_id=result.id, state=VcfJobState.pending, operation=VcfJobOperation.convert)
+
+
+class VcfJobStatusService:
+
+    def __init__(
+            self,
+            read_vcf_job: ReadVcfJob,
+    ):
+        self.read_vcf_job = read_vcf_job
+
+    def apply(
+            self,
+            job_id: str,
+    ) -> VcfJob:
+        """
+        VCF job status Service.
+
+        :param job_id: The job id.
+
+        :return: The VcfJob, with its state, progress, ETA and, once done, its artifact or its error.
+
+        :raise: InvalidArgumentError: In case an invalid argument is provided.
+        """
+        if not job_id:
+            raise InvalidArgumentError('The job id is required.')
+
+        return self.read_vcf_job.run(job_id=job_id)
@@ -0,0 +1,166 @@
+import errno
+import os
+import time
+from typing import List, Optional
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.indexes import VcfIdIndex
+from application.vcf_files.locking import in_place_write_lock
+from application.vcf_files.models import ByteRangeChange, FileVersion
+from application.vcf_files.utils import atomic_rewrite, get_file_version
+
+# The errors of copy_file_range and sendfile which mean that the kernel or the file system can not copy
+# between the two files, so the copy falls back to a slower way.
+UNSUPPORTED_COPY_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP}
+
+# The size of the chunks of the user space copy, when neither copy_file_range nor sendfile is available.
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def copy_byte_range(source_fd: int, destination_fd: int, offset: int, count: int) -> None:
+    """
+    Copies a byte range of a file to the current position of another file, in the kernel when possible.
+
+    copy_file_range lets the file system copy (or even share) the blocks without the bytes ever reaching user
+    space, sendfile at least avoids the copies to and from user space. Both fall back to a read/write loop.
+
+    :param source_fd: The file descriptor of the source file.
+    :param destination_fd: The file descriptor of the destination file, written at its current position.
+    :param offset: The offset of the range in the source file.
+    :param count: The length of the range.
+    """
+    end = offset + count
+
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while offset < end:
+                copied: int = os.copy_file_range(source_fd, destination_fd, end - offset, offset_src=offset)
+                if copied == 0:
+                    break
+                offset += copied
+        except OSError as ex:
+            if ex.errno not in UNSUPPORTED_COPY_ERRORS:
+                raise
+
+    if offset < end and hasattr(os, 'sendfile'):
+        try:
+            while offset < end:
+                copied = os.sendfile(destination_fd, source_fd, offset, end - offset)
+                if copied == 0:
+                    break
+                offset += copied
+        except OSError as ex:
+            if ex.errno not in UNSUPPORTED_COPY_ERRORS:
+                raise
+
+    while offset < end:
+        chunk: bytes = os.pread(source_fd, min(COPY_CHUNK_SIZE, end - offset), offset)
+        if not chunk:
+            break
+        write_all(destination_fd, chunk)
+        offset += len(chunk)
+
+
+def write_all(file_descriptor: int, data: bytes) -> None:
+    """
+    Writes all the data at the current position of a file, retrying on partial writes.
+    """
+    view = memoryview(data)
+    while view:
+        written: int = os.write(file_descriptor, view)
+        view = view[written:]
+
+
+def splice_rewrite(
+        vcf_file_path: str,
+        changes: List[ByteRangeChange],
+        id_index: Optional[VcfIdIndex] = None,
+) -> None:
+    """
+    Rewrites an uncompressed VCF file, replacing or dropping the byte ranges of the changes.
+
+    The unchanged ranges between the changes are copied with copy_byte_range, so only the bytes of the changes
+    pass through Python, and the result atomically replaces the file. The ID index of the file, when provided,
+    is moved to the new offsets and stored again, instead of being built from scratch.
+
+    :param vcf_file_path: The uncompressed VCF file path.
+    :param changes: The non overlapping changes to apply.
+    :param id_index: The up to date ID index of the file.
+    """
+    changes = sorted(changes, key=lambda change: change.offset)
+
+    with open(vcf_file_path, 'rb') as source, atomic_rewrite(vcf_file_path) as destination:
+        source_fd: int = source.fileno()
+        destination_fd: int = destination.fileno()
+        file_size: int = os.fstat(source_fd).st_size
+
+        position = 0
+        for change in changes:
+            copy_byte_range(source_fd, destination_fd, position, change.offset - position)
+            if change.replacement:
+                write_all(destination_fd, change.replacement)
+            position = change.offset + change.length
+        copy_byte_range(source_fd, destination_fd, position, file_size - position)
+
+    if id_index is not None:
+        id_index.apply_changes(changes)
+        id_index.stamp(get_file_version(vcf_file_path))
+        id_index.save(vcf_file_path)
+
+
+def patch_in_place(
+        vcf_file_path: str,
+        changes: List[ByteRangeChange],
+        id_index: Optional[VcfIdIndex] = None,
+) -> None:
+    """
+    Overwrites the byte ranges of same length changes directly in an uncompressed VCF file. The caller holds
+    the writer lock of the file.
+
+    Nothing else of the file is read or written, its size and the offsets of its rows stay the same, so the
+    ID index only needs to be stamped with the new version of the file (and to follow rows whose id changed).
+    While the file is being read the changes are spliced into a new version of the file instead, so that
+    the readers keep their snapshot of it.
+
+    :param vcf_file_path: The uncompressed VCF file path.
+    :param changes: The changes, each replacement exactly as long as the range it replaces.
+    :param id_index: The up to date ID index of the file.
+
+    :raise InvalidArgumentError: If a replacement is not as long as the range it replaces.
+    """
+    if any(len(change.replacement) != change.length for change in changes):
+        raise InvalidArgumentError('Only same length changes can be patched in place.')
+
+    with in_place_write_lock(vcf_file_path) as locked:
+        if not locked:
+            splice_rewrite(vcf_file_path, changes=changes, id_index=id_index)
+            return
+        _overwrite(vcf_file_path, changes=changes)
+
+    if id_index is not None:
+        id_index.apply_changes(changes)
+        id_index.stamp(get_file_version(vcf_file_path))
+        id_index.save(vcf_file_path)
+
+
+def _overwrite(vcf_file_path: str, changes: List[ByteRangeChange]) -> None:
+    with open(vcf_file_path, 'r+b') as file:
+        file_descriptor: int = file.fileno()
+        previous_version: FileVersion = get_file_version(vcf_file_path)
+
+        for change in changes:
+            view = memoryview(change.replacement)
+            offset: int = change.offset
+            while view:
+                written: int = os.pwrite(file_descriptor, view, offset)
+                view = view[written:]
+                offset += written
+        os.fsync(file_descriptor)
+
+        # The size of the file does not change, so make sure that its modification time does, even if the
+        # clock did not tick since the previous write. Everything keyed by the file version depends on it.
+        stat_result: os.stat_result = os.fstat(file_descriptor)
+        os.utime(
+            file_descriptor,
+            ns=(stat_result.st_atime_ns, max(time.time_ns(), previous_version.modified_at + 1)),
+        )
@@ -0,0 +1,324 @@
+import gzip
+import io
+import mimetypes
+import os
+import struct
+from contextlib import nullcontext
+from typing import IO, ContextManager, List, Optional, Tuple
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.compression import BGZF_HEADER_SIZE, ZSTD_FRAME_SIZE, ZSTD_MAGIC, ZSTD_SKIPPABLE_MAGICS, \
+    BlockCompressor, StreamCompressor, is_bgzf_header, zstandard_module, zstd_seek_table_after_append
+from application.vcf_files.enums import VcfCompression
+
+# The first bytes of a VCF file that the storage engines sniff its format from.
+SNIFF_SIZE = BGZF_HEADER_SIZE
+
+
+class VcfStorageEngine:
+    """
+    The way VCF files of a format are stored: how the format is told from the first bytes of a file, how the
+    uncompressed data of a file is read, and how data is written and appended in the format.
+
+    The operations get the engine of a file from vcf_storage_engine, so that a new format is supported by
+    registering its engine with register_vcf_storage_engine.
+    """
+
+    compression: VcfCompression = None
+    # The extensions of the files of the format, which tell the format of the files that are missing or empty.
+    extensions: Tuple[str, ...] = ()
+
+    def sniff(self, head: bytes) -> bool:
+        """
+        :param head: The first SNIFF_SIZE bytes of a file, fewer for a smaller file.
+
+        :return: True if the file is in the format of the engine.
+        """
+        raise NotImplementedError
+
+    def open(self, vcf_file_path: str) -> IO[bytes]:
+        """
+        :param vcf_file_path: The VCF file path.
+
+        :return: The file opened to read its uncompressed data, in binary mode. Its file descriptor is the one of
+                 the file as stored.
+        """
+        raise NotImplementedError
+
+    def open_output(self, file: IO[bytes]) -> ContextManager:
+        """
+        :param file: The file to write the output to, opened in binary mode.
+
+        :return: The output writing uncompressed data to the file in the format, to use as a context manager.
+        """
+        return BlockCompressor.get_instance().open(file, self.compression)
+
+    def stream_compressor(self) -> StreamCompressor:
+        """
+        :return: A StreamCompressor of data in the format, e.g. for the rows appended to a file.
+        """
+        return StreamCompressor(self.compression, level=BlockCompressor.get_instance().level)
+
+    def flush_appended(self, compressor: StreamCompressor) -> bytes:
+        """
+        :param compressor: The StreamCompressor of the rows appended to a file.
+
+        :return: The remaining compressed bytes of the appended rows.
+        """
+        return compressor.flush()
+
+    def append_trailer(self, file_descriptor: int, compressor: StreamCompressor) -> bytes:
+        """
+        :param file_descriptor: The file descriptor of the file, before the rows are appended.
+        :param compressor: The StreamCompressor of the appended rows, once flushed.
+
+        :return: The bytes to write after the appended rows, e.g. a new index of the blocks of the file.
+        """
+        return b''
+
+    def compress_appended_rows(self, vcf_file_path: str, data: bytes) -> bytes:
+        """
+        Compresses rows appended to a VCF file so that the file stays in its format, randomly accessible when
+        the format is. The caller holds the writer lock of the file.
+
+        :param vcf_file_path: The VCF file path.
+        :param data: The appended rows.
+
+        :return: The bytes to append to the file.
+        """
+        compressor: StreamCompressor = self.stream_compressor()
+        compressed: bytes = compressor.compress(data) + self.flush_appended(compressor)
+        with open(vcf_file_path, 'rb') as file:
+            return compressed + self.append_trailer(file.fileno(), compressor)
+
+
+class PlainStorageEngine(VcfStorageEngine):
+    """
+    Uncompressed VCF files, told by their first bytes being text.
+    """
+
+    compression = VcfCompression.none
+    extensions = ('.vcf',)
+
+    def sniff(self, head: bytes) -> bool:
+        return head.isascii() and b'\x00' not in head
+
+    def open(self, vcf_file_path: str) -> IO[bytes]:
+        return open(vcf_file_path, 'rb')
+
+    def open_output(self, file: IO[bytes]) -> ContextManager:
+        return nullcontext(file)
+
+
+class GzipStorageEngine(VcfStorageEngine):
+    """
+    Gzip compressed VCF files, which are not randomly accessible. They are written as BGZF, which is gzip too.
+    """
+
+    compression = VcfCompression.gzip
+    extensions = ('.gz',)
+
+    def sniff(self, head: bytes) -> bool:
+        return head[:2] == b'\x1f\x8b'
+
+    def open(self, vcf_file_path: str) -> IO[bytes]:
+        return gzip.open(vcf_file_path, 'rb')
+
+    def open_output(self, file: IO[bytes]) -> ContextManager:
+        return BlockCompressor.get_instance().open(file, VcfCompression.bgzf)
+
+
+class BgzfStorageEngine(GzipStorageEngine):
+    """
+    BGZF compressed VCF files, gzip files of BGZF blocks, told by the extra field of their first block.
+    """
+
+    compression = VcfCompression.bgzf
+    extensions = ('.bgz',)
+
+    def sniff(self, head: bytes) -> bool:
+        return is_bgzf_header(head)
+
+
+class ZstdStorageEngine(VcfStorageEngine):
+    """
+    Zstd compressed VCF files, written as seekable zstd: frames of a BGZF block of data each, followed by a seek
+    table which is rewritten after the frames of the appended rows.
+    """
+
+    compression = VcfCompression.zstd
+    extensions = ('.zst',)
+
+    def sniff(self, head: bytes) -> bool:
+        # A file may start with a skippable frame, e.g. the seek table of a file without data.
+        return head[:4] == ZSTD_MAGIC or (
+            len(head) >= 4 and struct.unpack('<I', head[:4])[0] in ZSTD_SKIPPABLE_MAGICS
+        )
+
+    def open(self, vcf_file_path: str) -> IO[bytes]:
+        return io.BufferedReader(_ZstdReader(vcf_file_path))
+
+    def flush_appended(self, compressor: StreamCompressor) -> bytes:
+        # The seek table is written by append_trailer, after the seek table of the file.
+        return compressor.flush(end_of_file=False)
+
+    def append_trailer(self, file_descriptor: int, compressor: StreamCompressor) -> bytes:
+        return zstd_seek_table_after_append(file_descriptor, compressor.zstd_frames)
+
+
+class _ZstdReader(io.RawIOBase):
+    """
+    The uncompressed data of a zstd file, across all its frames. Seeks like a gzip file: forward by reading,
+    backward by reading again from the start.
+    """
+
+    def __init__(self, vcf_file_path: str):
+        self._file = open(vcf_file_path, 'rb')
+        self._reader = None
+        self._position = 0
+        try:
+            self._open_reader()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def _open_reader(self) -> None:
+        self._file.seek(0)
+        self._reader = zstandard_module().ZstdDecompressor().stream_reader(self._file, read_across_frames=True)
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def fileno(self) -> int:
+        # The compressed file, e.g. for the progress of the reads.
+        return self._file.fileno()
+
+    def readinto(self, buffer) -> int:
+        data: bytes = self._reader.read(len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence != os.SEEK_SET:
+            raise io.UnsupportedOperation('Only seeks from the start or the current position are supported.')
+        if offset < self._position:
+            self._open_reader()
+        while self._position < offset:
+            data: bytes = self._reader.read(min(offset - self._position, ZSTD_FRAME_SIZE))
+            if not data:
+                break
+            self._position += len(data)
+
+        return self._position
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+# The registered engines, in the order their sniff is tried: the plain engine, which accepts any text, comes last.
+_VCF_STORAGE_ENGINES: List[VcfStorageEngine] = [
+    ZstdStorageEngine(),
+    BgzfStorageEngine(),
+    GzipStorageEngine(),
+    PlainStorageEngine(),
+]
+
+
+def register_vcf_storage_engine(engine: VcfStorageEngine) -> None:
+    """
+    Registers the engine of a storage format. Its sniff is tried before the ones of the engines registered so far,
+    and it replaces the engine registered for the same compression, if any.
+
+    :param engine: The VcfStorageEngine.
+    """
+    if not isinstance(engine, VcfStorageEngine) or not isinstance(engine.compression, VcfCompression):
+        raise InvalidArgumentError('The storage engine is not supported.')
+
+    _VCF_STORAGE_ENGINES[:] = [engine] + [
+        registered for registered in _VCF_STORAGE_ENGINES if registered.compression != engine.compression
+    ]
+
+
+def storage_engine_for(compression: VcfCompression) -> VcfStorageEngine:
+    """
+    :param compression: The VcfCompression.
+
+    :return: The VcfStorageEngine that writes files in the compression.
+
+    :raise InvalidArgumentError: If no engine is registered for the compression.
+    """
+    for engine in _VCF_STORAGE_ENGINES:
+        if engine.compression == compression:
+            return engine
+
+    raise InvalidArgumentError('The compression {} is not supported.'.format(compression))
+
+
+def vcf_storage_engine(vcf_file_path: str) -> VcfStorageEngine:
+    """
+    Tells the VcfStorageEngine of a VCF file from its first bytes, whatever its name. The files that are missing
+    or empty are told by their extension instead, e.g. the output of a conversion.
+
+    :param vcf_file_path: The VCF file path.
+
+    :return: The VcfStorageEngine of the file.
+
+    :raise InvalidArgumentError: If the format of the file is not supported.
+    """
+    try:
+        with open(vcf_file_path, 'rb') as file:
+            head: bytes = file.read(SNIFF_SIZE)
+    except FileNotFoundError:
+        head = b''
+
+    if head:
+        for engine in _VCF_STORAGE_ENGINES:
+            if engine.sniff(head):
+                return engine
+        raise InvalidArgumentError('The format of {} is not supported.'.format(vcf_file_path))
+
+    for engine in _VCF_STORAGE_ENGINES:
+        if any(vcf_file_path.endswith(extension) for extension in engine.extensions):
+            return engine
+
+    encoding: Optional[str] = mimetypes.guess_type(vcf_file_path)[1]
+    if encoding is not None:
+        raise InvalidArgumentError('The compression {} of {} is not supported.'.format(encoding, vcf_file_path))
+
+    return storage_engine_for(VcfCompression.none)
+
+
+def vcf_file_compression(vcf_file_path: str) -> VcfCompression:
+    """
+    :param vcf_file_path: The VCF file path.
+
+    :return: The VcfCompression of the file, told by its VcfStorageEngine.
+
+    :raise InvalidArgumentError: If the format of the file is not supported.
+    """
+    return vcf_storage_engine(vcf_file_path).compression
+
+
+def open_vcf_file(vcf_file_path: str, engine: VcfStorageEngine = None) -> IO[bytes]:
+    """
+    Opens a VCF file to read its uncompressed data, whatever its format.
+
+    :param vcf_file_path: The VCF file path.
+    :param engine: The VcfStorageEngine of the file, told by vcf_storage_engine when not given.
+
+    :return: The opened file, in binary mode. Its file descriptor is the one of the file as stored.
+    """
+    return (engine or vcf_storage_engine(vcf_file_path)).open(vcf_file_path)
@@ -0,0 +1,169 @@
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator, List, Optional
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.models import FileVersion, VcfRegion, VcfRow
+
+
+def get_file_version(vcf_file_path: str) -> Optional[FileVersion]:
+    """
+    Returns the current version of a VCF file, as identified by its size, modification time and inode.
+
+    Any write to the file (or an atomic replacement of it) produces a different version, so the version
+    can be used to key anything that is derived from the file contents.
+
+    :param vcf_file_path: The VCF file path.
+
+    :return: The FileVersion of the file, or None if the file does not exist.
+    """
+    try:
+        stat_result: os.stat_result = os.stat(vcf_file_path)
+    except OSError:
+        return None
+
+    return _to_file_version(vcf_file_path, stat_result)
+
+
+def get_open_file_version(vcf_file_path: str, file_descriptor: int) -> FileVersion:
+    """
+    Returns the version of an opened VCF file, which stays the one that was opened even if the file
+    is replaced in the meantime.
+
+    :param vcf_file_path: The VCF file path.
+    :param file_descriptor: The file descriptor of the opened file.
+
+    :return: The FileVersion of the opened file.
+    """
+    return _to_file_version(vcf_file_path, os.fstat(file_descriptor))
+
+
+def _to_file_version(vcf_file_path: str, stat_result: os.stat_result) -> FileVersion:
+    return FileVersion(
+        file_path=os.path.abspath(vcf_file_path),
+        size=stat_result.st_size,
+        modified_at=stat_result.st_mtime_ns,
+        inode=stat_result.st_ino,
+    )
+
+
+# chrom, chrom:pos or chrom:start-end, with 1-based inclusive positions. Thousands separators are allowed.
+REGION_PATTERN = re.compile(r'^([^:\s]+)(?::(\d[\d,]*)(?:-(\d[\d,]*))?)?$')
+
+
+def parse_region(region: str) -> VcfRegion:
+    """
+    Parses a genomic region, e.g. 'chr1', 'chr1:1000' or 'chr1:1,000-2,000'.
+
+    :param region: The region to parse.
+
+    :return: The parsed VcfRegion.
+
+    :raise InvalidArgumentError: If the region is not valid.
+    """
+    match = REGION_PATTERN.match(region or '')
+    if not match:
+        raise InvalidArgumentError('The region {} is not valid.'.format(region))
+
+    chrom, start, end = match.groups()
+    start = int(start.replace(',', '')) if start else None
+    end = int(end.replace(',', '')) if end else start
+
+    if start is not None and end < start:
+        raise InvalidArgumentError('The region {} ends before it starts.'.format(region))
+
+    return VcfRegion(chrom=chrom, start=start, end=end)
+
+
+@contextmanager
+def atomic_rewrite(vcf_file_path: str, mode: str = 'wb') -> Iterator[IO]:
+    """
+    Opens a temporary file next to a VCF file, to write its new contents into.
+
+    When the context exits successfully the temporary file is flushed to disk and atomically replaces the
+    VCF file, so readers see either the old or the new contents, and a crash in the middle of the rewrite
+    leaves the VCF file untouched. On error the temporary file is removed.
+
+    :param vcf_file_path: The VCF file path to rewrite.
+    :param mode: The mode to open the temporary file with, 'wb' or 'w'.
+
+    :return: The opened temporary file.
+    """
+    file_descriptor, temporary_file_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(vcf_file_path)),
+        prefix='.{}.'.format(os.path.basename(vcf_file_path)),
+        suffix='.tmp',
+    )
+    try:
+        with os.fdopen(file_descriptor, mode) as temporary_file:
+            yield temporary_file
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+        if os.path.exists(vcf_file_path):
+            shutil.copymode(vcf_file_path, temporary_file_path)
+        os.replace(temporary_file_path, vcf_file_path)
+    except BaseException:
+        if os.path.exists(temporary_file_path):
+            os.remove(temporary_file_path)
+        raise
+
+
+# The extensions of the VCF files, the longest first, that a conversion replaces.
+VCF_FILE_EXTENSIONS = ('.vcf.gz', '.vcf.bgz', '.vcf.zst', '.vcf', '.gz', '.bgz', '.zst')
+
+
+def converted_vcf_file_path(vcf_file_path: str, extension: str) -> str:
+    """
+    :param vcf_file_path: The VCF file path, e.g. /data/sample.v2.vcf.gz.
+    :param extension: The extension of the converted file, e.g. .vcf.zst.
+
+    :return: The path next to the VCF file with its VCF extension replaced, e.g. /data/sample.v2.vcf.zst.
+    """
+    name: str = os.path.basename(vcf_file_path)
+    for vcf_file_extension in VCF_FILE_EXTENSIONS:
+        if name.endswith(vcf_file_extension) and len(name) > len(vcf_file_extension):
+            name = name[:-len(vcf_file_extension)]
+            break
+
+    return os.path.join(os.path.dirname(vcf_file_path), name + extension)
+
+
+def is_other_file(file_path: str, vcf_file_path: str) -> bool:
+    """
+    :param file_path: A file path.
+    :param vcf_file_path: The VCF file path.
+
+    :return: Whether a file exists at the file path that is not the VCF file itself.
+    """
+    if not os.path.exists(file_path):
+        return False
+
+    return not os.path.exists(vcf_file_path) or not os.path.samefile(file_path, vcf_file_path)
+
+
+def format_vcf_row(vcf_row: VcfRow) -> bytes:
+    """
+    :param vcf_row: The VcfRow.
+
+    :return: The CHROM, POS, ID, REF and ALT columns of the row, tab separated, without a line ending.
+    """
+    return '\t'.join(
+        str(value) for value in (vcf_row.chrom, vcf_row.pos, vcf_row.identifier, vcf_row.ref, vcf_row.alt)
+    ).encode('utf-8')
+
+
+def replace_vcf_row_columns(row: bytes, columns: bytes) -> bytes:
+    """
+    :param row: A data row.
+    :param columns: The CHROM, POS, ID, REF and ALT columns to put in the row, without a line ending.
+
+    :return: The row with its first five columns replaced, and a line ending.
+    """
+    row_columns: List[bytes] = row.split(b'\t', 5)
+    if len(row_columns) > 5:
+        return columns + b'\t' + (row_columns[5] if row_columns[5].endswith(b'\n') else row_columns[5] + b'\n')
+
+    return columns + b'\n'
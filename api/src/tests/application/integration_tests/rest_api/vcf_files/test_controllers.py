@@ -1,5 +1,7 @@
+import gzip
 import io
 from typing import Optional, List
+from unittest import mock
 
 import pytest
 from deepdiff import DeepDiff
@@ -1225,3 +1227,388 @@ class TestUpdateDataToVcfFile:
         assert response.status_code == 400
         assert response.data == expected_error_response
         assert DeepDiff(response.json, expected_json_response) == {}
+
+
+class TestApplyBatchToVcfFile:
+
+    def test_apply_batch_to_vcf_file_require_auth_token(self, client: FlaskClient) -> None:
+        response: Response = client.post(
+            '/api/v1/vcf-files/batch',
+            headers={
+                'Accept': 'application/json',
+                'Content-Type': 'application/json'
+            },
+            json={"filePath": "test.vcf", "operations": [{"operation": "delete", "id": "rs1"}]}
+        )
+
+        assert response.status_code == 403
+
+    def test_apply_batch_to_vcf_file(
+            self,
+            client: FlaskClient,
+            access_token_execute_permission: str,
+            setup_vcf_unzipped_file,
+    ) -> None:
+        response: Response = client.post(
+            '/api/v1/vcf-files/batch',
+            headers={
+                'Authorization': f'Bearer {access_token_execute_permission}',
+                'Accept': 'application/json',
+                'Content-Type': 'application/json',
+            },
+            json={
+                "filePath": "test.vcf",
+                "operations": [
+                    {"operation": "delete", "id": "rs4"},
+                    {
+                        "operation": "update",
+                        "id": "rs1",
+                        "data": {"CHROM": "chr13", "POS": 1000, "ALT": "T", "REF": "AGCT", "ID": "rs1"}
+                    },
+                    {
+                        "operation": "append",
+                        "rows": [{"CHROM": "chr13", "POS": 1001, "ALT": "T", "REF": "A", "ID": "rs13"}]
+                    },
+                ]
+            }
+        )
+
+        assert response.status == '200 OK'
+        assert DeepDiff(
+            response.json, {
+                'data': {
+                    'filePath': 'test.vcf',
+                    'results': [
+                        {'operation': 'delete', 'id': 'rs4', 'totalRows': 4},
+                        {'operation': 'update', 'id': 'rs1', 'totalRows': 2},
+                        {'operation': 'append', 'id': None, 'totalRows': 1},
+                    ]
+                },
+                'status': 200
+            }
+        ) == {}
+
+        with open('test.vcf', 'r') as file:
+            assert [row for row in file if not row.startswith('#')] == [
+                'chr13\t1000\trs1\tAGCT\tT\t1.1\tPASS\ttest\n',
+                'chr13\t1000\trs1\tAGCT\tT\t1.1\tPASS\ttest\n',
+                'chr3\t3\trs3\tA\tG\t2.2\tPASS\ttest\n',
+                'chr13\t1001\trs13\tA\tT\n',
+            ]
+
+    def test_apply_batch_to_vcf_file_return_400_when_an_update_has_no_data(
+            self,
+            client: FlaskClient,
+            access_token_execute_permission: str,
+            setup_vcf_unzipped_file,
+    ) -> None:
+        response: Response = client.post(
+            '/api/v1/vcf-files/batch',
+            headers={
+                'Authorization': f'Bearer {access_token_execute_permission}',
+                'Accept': 'application/json',
+                'Content-Type': 'application/json',
+            },
+            json={"filePath": "test.vcf", "operations": [{"operation": "update", "id": "rs1"}]}
+        )
+
+        assert response.status_code == 400
+        assert response.json == {
+            'errors': [
+                {'message': "operations: {0: {'data': ['The data are required for an update.']}}",
+                 'errorType': 'Unprocessable Entity'}
+            ],
+            'errorCode': 400
+        }
+
+
+class TestIngestDataToVcfFile:
+
+    def test_ingest_data_to_vcf_file_require_auth_token(self, client: FlaskClient) -> None:
+        response: Response = client.post(
+            '/api/v1/vcf-files/ingest?filePath=test.vcf',
+            headers={'Accept': 'application/json', 'Content-Type': 'application/x-ndjson'},
+            data=b'{"CHROM": "chr13", "POS": 1001, "ID": "rs13", "REF": "A", "ALT": "T"}\n',
+        )
+
+        assert response.status_code == 403
+
+    def test_ingest_data_to_vcf_file_from_an_ndjson_body(
+            self,
+            client: FlaskClient,
+            access_token_execute_permission: str,
+            setup_vcf_unzipped_file,
+    ) -> None:
+        response: Response = client.post(
+            '/api/v1/vcf-files/ingest?filePath=test.vcf',
+            headers={
+                'Authorization': f'Bearer {access_token_execute_permission}',
+                'Accept': 'application/json',
+                'Content-Type': 'application/x-ndjson',
+            },
+            data=b'{"CHROM": "chr13", "POS": 1001, "ID": "rs13", "REF": "A", "ALT": "T"}\n'
+                 b'{"CHROM": "chr13", "POS": 1002, "ID": "rs14", "REF": "C", "ALT": "G"}\n',
+        )
+
+        assert response.status == '201 CREATED'
+        assert response.json == {'data': {'filePath': 'test.vcf', 'totalRowsAdded': 2}, 'status': 201}
+        with open('test.vcf', 'r') as file:
+            assert file.readlines()[-2:] == ['chr13\t1001\trs13\tA\tT\n', 'chr13\t1002\trs14\tC\tG\n']
+
+    def test_ingest_data_to_vcf_file_return_400_with_the_invalid_lines(
+            self,
+            client: FlaskClient,
+            access_token_execute_permission: str,
+            setup_vcf_unzipped_file,
+    ) -> None:
+        response: Response = client.post(
+            '/api/v1/vcf-files/ingest?filePath=test.vcf',
+            headers={
+                'Authorization': f'Bearer {access_token_execute_permission}',
+                'Accept': 'application/json',
+                'Content-Type': 'text/tab-separated-values',
+            },
+            data=b'chr13\t1001\trs13\tA\tT\nchr99\t1002\trs14\tC\tG\n',
+        )
+
+        assert response.status_code == 400
+        assert response.json == {
+            'errors': [
+                {
+                    'message': 'Line 2: The row is not a valid tab separated VCF row.',
+                    'errorType': 'InvalidArgumentError',
+                }
+            ],
+            'errorCode': 400
+        }
+        with open('test.vcf', 'r') as file:
+            assert 'rs13' not in file.read()
+
+
+class TestGetVcfFileHeader:
+
+    def test_get_vcf_file_header_require_auth_token(self, client: FlaskClient) -> None:
+        response: Response = client.get(
+            '/api/v1/vcf-files/header?filePath=test.vcf',
+            headers={
+                'Accept': 'application/json',
+                'Content-Type': 'application/json'
+            }
+        )
+
+        assert response.status_code == 403
+
+    def test_get_vcf_file_header_of_gz_file(
+            self,
+            client: FlaskClient,
+            access_token_execute_permission: str,
+            setup_vcf_gzip_file
+    ) -> None:
+        response: Response = client.get(
+            '/api/v1/vcf-files/header?filePath=test.vcf.gz',
+            headers={
+                'Authorization': f'Bearer {access_token_execute_permission}',
+                'Accept': 'application/json',
+                'Content-Type': 'application/json'
+            }
+        )
+
+        assert response.status == '200 OK'
+        assert DeepDiff(
+            response.json, {
+                "data": {
+                    "header": {
+                        "fileFormat": "VCFv4.2",
+                        "info": [],
+                        "format": [],
+                        "filter": [
+                            {
+                                "id": "FAIL",
+                                "number": None,
+                                "type": None,
+                                "description": "SNV quality < 100 or indel quality < 100 or DP < 8",
+                                "length": None
+                            }
+                        ],
+                        "contigs": [],
+                        "samples": ["NA12877 single 20180302"]
+                    }
+                },
+                "status": 200
+            }
+        ) == {}
+
+    def test_get_vcf_file_header_return_404_when_file_not_exist(
+            self,
+            client: FlaskClient,
+            access_token_execute_permission: str,
+    ) -> None:
+        response: Response = client.get(
+            '/api/v1/vcf-files/header?filePath=missing.vcf',
+            headers={
+                'Authorization': f'Bearer {access_token_execute_permission}',
+                'Accept': 'application/json',
+                'Content-Type': 'application/json'
+            }
+        )
+
+        assert response.status_code == 404
+        assert response.json == {
+            'errors': [
+                {'message': 'The VCF file missing.vcf does not exist.', 'errorType': 'VcfFileNotFoundError'}
+            ],
+            'errorCode': 404
+        }
+
+
+class TestExportDataOfVcfFile:
+
+    def test_export_data_of_vcf_file_require_auth_token(self, client: FlaskClient) -> None:
+        response: Response = client.get('/api/v1/vcf-files/export?filePath=test.vcf&id=rs1')
+
+        assert response.status_code == 403
+
+    def test_export_data_of_vcf_file_as_gzip(
+            self,
+            client: FlaskClient,
+            access_token_execute_permission: str,
+            setup_vcf_unzipped_file
+    ) -> None:
+        response: Response = client.get(
+            '/api/v1/vcf-files/export?filePath=test.vcf&id=rs1&compression=gzip',
+            headers={
+                'Authorization': f'Bearer {access_token_execute_permission}',
+            }
+        )
+
+        assert response.status == '200 OK'
+        assert response.is_streamed
+        assert response.headers['Content-Type'] == 'application/gzip'
+        assert response.headers['Content-Disposition'] == 'attachment; filename=test.vcf.gz'
+        assert gzip.decompress(response.data).decode('utf-8').splitlines()[3:] == [
+            '#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tNA12877 single 20180302',
+            'chr1\t1\trs1\tT\tG\t1.1\tPASS\ttest',
+            'chr2\t2\trs1\tT\tG\t1.1\tPASS\ttest',
+        ]
+
+    def test_export_data_of_vcf_file_return_400_when_no_criteria_provided(
+            self,
+            client: FlaskClient,
+            access_token_execute_permission: str,
+            setup_vcf_unzipped_file
+    ) -> None:
+        response: Response = client.get(
+            '/api/v1/vcf-files/export?filePath=test.vcf',
+            headers={
+                'Authorization': f'Bearer {access_token_execute_permission}',
+                'Accept': 'application/json',
+            }
+        )
+
+        assert response.status_code == 400
+        assert response.json == {
+            'errors': [
+                {'message': 'An id, a region or a filter status is required.', 'errorType': 'InvalidArgumentError'}
+            ],
+            'errorCode': 400
+        }
+
+
+class TestVcfJobs:
+
+    def test_async_delete_data_to_vcf_file_returns_the_job(
+            self,
+            client: FlaskClient,
+            access_token_execute_permission: str,
+    ) -> None:
+        with mock.patch('application.vcf_files.operations.AsyncFilterOutRowsById.run.delay') as mock_delay:
+            mock_delay.return_value.id = 'job-1'
+            response: Response = client.delete(
+                '/api/v1/vcf-files/async',
+                headers={
+                    'Authorization': f'Bearer {access_token_execute_permission}',
+                    'Accept': 'application/json',
+                    'Content-Type': 'application/json',
+                },
+                json={"filePath": "test.vcf", "id": "rs1"}
+            )
+
+        assert response.status_code == 202
+        assert response.json == {
+            'data': {
+                'job': {
+                    'jobId': 'job-1',
+                    'state': 'pending',
+                    'operation': 'delete',
+                    'rowsProcessed': None,
+                    'bytesProcessed': None,
+                    'totalBytes': None,
+                    'eta': None,
+                    'artifact': None,
+                    'error': None,
+                }
+            },
+            'status': 202,
+        }
+        mock_delay.assert_called_once_with(vcf_file_path='test.vcf', filter_id='rs1')
+
+    def test_async_build_index_of_vcf_file_return_400_for_compressed_files(
+            self,
+            client: FlaskClient,
+            access_token_execute_permission: str,
+    ) -> None:
+        response: Response = client.post(
+            '/api/v1/vcf-files/async/index',
+            headers={
+                'Authorization': f'Bearer {access_token_execute_permission}',
+                'Accept': 'application/json',
+                'Content-Type': 'application/json',
+            },
+            json={"filePath": "test.vcf.gz"}
+        )
+
+        assert response.status_code == 400
+        assert response.json['errors'] == [
+            {'message': 'Only uncompressed VCF files have an ID index.', 'errorType': 'InvalidArgumentError'}
+        ]
+
+    def test_get_vcf_job(
+            self,
+            client: FlaskClient,
+            access_token_execute_permission: str,
+    ) -> None:
+        with mock.patch('application.vcf_files.operations.celery_app.AsyncResult') as mock_async_result:
+            mock_async_result.return_value.state = 'SUCCESS'
+            mock_async_result.return_value.info = {
+                'operation': 'delete',
+                'rows_processed': 4,
+                'bytes_processed': 424,
+                'total_bytes': 424,
+                'started_at': 0.0,
+                'artifact': {'file_path': 'test.vcf', 'total_rows_deleted': 4},
+            }
+            response: Response = client.get(
+                '/api/v1/vcf-files/jobs?jobId=job-1',
+                headers={
+                    'Authorization': f'Bearer {access_token_execute_permission}',
+                    'Accept': 'application/json',
+                }
+            )
+
+        assert response.status == '200 OK'
+        assert response.json == {
+            'data': {
+                'job': {
+                    'jobId': 'job-1',
+                    'state': 'success',
+                    'operation': 'delete',
+                    'rowsProcessed': 4,
+                    'bytesProcessed': 424,
+                    'totalBytes': 424,
+                    'eta': 0.0,
+                    'artifact': {'filePath': 'test.vcf', 'totalRowsDeleted': 4},
+                    'error': None,
+                }
+            },
+            'status': 200,
+        }
@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+
+from application.infrastructure.configurations.enums import Environment
+from application.infrastructure.configurations.models import ENV_VAR_NAME
+
+# The seconds that a cold process may take to build the API, and to import the Celery worker, which builds the API
+# too. The startup of every gunicorn and Celery worker process pays them.
+API_STARTUP_BUDGET = 2.0
+WORKER_STARTUP_BUDGET = 2.5
+
+# The dependencies that are only imported at first use, by the requests that need them.
+LAZY_MODULES = ('pandas', 'json2xml', 'redis')
+
+STARTUP_SCRIPT = """
+import json
+import sys
+import time
+
+started_at = time.perf_counter()
+{statement}
+print(json.dumps({{
+    'seconds': time.perf_counter() - started_at,
+    'modules': [module for module in {lazy_modules!r} if module in sys.modules],
+}}))
+"""
+
+
+def _measure_startup(statement: str) -> Dict:
+    """
+    Runs the statement in a new Python process, so nothing is imported yet.
+
+    :return: The seconds the statement took, and the lazy modules it imported.
+    """
+    src_directory: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    output: bytes = subprocess.check_output(
+        [sys.executable, '-c', STARTUP_SCRIPT.format(statement=statement, lazy_modules=LAZY_MODULES)],
+        cwd=src_directory,
+        env=dict(os.environ, **{ENV_VAR_NAME: Environment.test.value, 'PYTHONPATH': src_directory}),
+    )
+
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+class TestStartup:
+
+    @pytest.mark.parametrize('statement, budget', [
+        # vcf_handler_api
+        (
+                'from application.factories import vcf_handler_api\nvcf_handler_api(name="VCF Handler API")',
+                API_STARTUP_BUDGET,
+        ),
+        # run_worker
+        ('import application.run_worker', WORKER_STARTUP_BUDGET),
+    ])
+    def test_startup_within_budget_without_the_lazy_modules(self, statement: str, budget: float) -> None:
+        startup: Dict = _measure_startup(statement)
+
+        assert startup['modules'] == []
+        assert startup['seconds'] < budget, 'The startup took {:.2f}s, over its budget of {}s.'.format(
+            startup['seconds'], budget
+        )
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from application.infrastructure.concurrency.admission import AdmissionController
+from application.infrastructure.error.errors import InvalidArgumentError, OverloadError
+
+
+class TestAdmissionController:
+
+    @pytest.mark.parametrize('max_bytes, max_wait, message', [
+        # when_max_bytes_is_zero
+        (0, 1.0, 'A max bytes above 0 is required.'),
+        # when_max_wait_is_negative
+        (100, -1, 'A max wait of at least 0 is required.'),
+    ])
+    def test_init_with_invalid_arguments(self, max_bytes: int, max_wait: float, message: str) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            AdmissionController(max_bytes=max_bytes, max_wait=max_wait)
+        assert ex.value.message == message
+
+    def test_admit_holds_the_cost_while_the_request_runs(self) -> None:
+        admission_controller = AdmissionController(max_bytes=100)
+
+        with admission_controller.admit(60):
+            assert admission_controller.in_flight_bytes() == 60
+            with admission_controller.admit(40):
+                assert admission_controller.in_flight_bytes() == 100
+        assert admission_controller.in_flight_bytes() == 0
+
+    def test_admit_rejects_the_request_over_budget_after_max_wait(self) -> None:
+        admission_controller = AdmissionController(max_bytes=100, max_wait=0.01)
+
+        with admission_controller.admit(60):
+            with pytest.raises(OverloadError) as ex:
+                with admission_controller.admit(60):
+                    pass
+            # The free requests are always admitted.
+            with admission_controller.admit(0):
+                pass
+        assert ex.value.retry_after == 1
+        assert admission_controller.in_flight_bytes() == 0
+
+    def test_admit_a_request_over_budget_alone(self) -> None:
+        admission_controller = AdmissionController(max_bytes=100, max_wait=0)
+
+        with admission_controller.admit(1000):
+            assert admission_controller.in_flight_bytes() == 1000
+
+    def test_admit_queues_the_request_until_the_budget_is_released(self) -> None:
+        admission_controller = AdmissionController(max_bytes=100, max_wait=5)
+        released = threading.Event()
+
+        def run_first_request() -> None:
+            with admission_controller.admit(100):
+                time.sleep(0.02)
+                released.set()
+
+        thread = threading.Thread(target=run_first_request)
+        thread.start()
+        while admission_controller.in_flight_bytes() == 0:
+            time.sleep(0.001)
+
+        with admission_controller.admit(100):
+            assert released.is_set()
+        thread.join()
+
+    def test_admit_iterator_holds_the_cost_until_the_iterator_is_exhausted(self) -> None:
+        admission_controller = AdmissionController(max_bytes=100)
+
+        chunks = admission_controller.admit_iterator(iter([b'a', b'b']), cost=60)
+
+        assert admission_controller.in_flight_bytes() == 60
+        assert list(chunks) == [b'a', b'b']
+        assert admission_controller.in_flight_bytes() == 0
+
+    def test_admit_iterator_releases_the_cost_when_closed_before_it_is_consumed(self) -> None:
+        admission_controller = AdmissionController(max_bytes=100)
+
+        chunks = admission_controller.admit_iterator(iter([b'a', b'b']), cost=60)
+        chunks.close()
+        chunks.close()
+
+        assert admission_controller.in_flight_bytes() == 0
+
+    def test_admit_iterator_rejects_the_iterator_before_it_is_consumed(self) -> None:
+        admission_controller = AdmissionController(max_bytes=100, max_wait=0)
+
+        with admission_controller.admit(60):
+            with pytest.raises(OverloadError):
+                admission_controller.admit_iterator(iter([b'a']), cost=60)
+        assert admission_controller.in_flight_bytes() == 0
@@ -0,0 +1,55 @@
+import threading
+import time
+from typing import List
+
+import pytest
+
+from application.infrastructure.concurrency.bounded_executor import BoundedExecutor
+from application.infrastructure.error.errors import InvalidArgumentError
+
+
+class TestBoundedExecutor:
+
+    def test_init_with_invalid_arguments(self) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            BoundedExecutor(max_workers=0)
+        assert ex.value.message == 'A max workers above 0 is required.'
+
+    def test_run_returns_the_result_and_raises_the_error(self) -> None:
+        executor = BoundedExecutor(max_workers=1)
+
+        assert executor.run(lambda: 42) == 42
+        with pytest.raises(ValueError):
+            executor.run(lambda: int('not a number'))
+        executor.shutdown()
+
+    def test_run_bounds_the_concurrent_work(self) -> None:
+        executor = BoundedExecutor(max_workers=2)
+        lock = threading.Lock()
+        running: List[int] = [0]
+        max_running: List[int] = [0]
+
+        def work() -> None:
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        threads = [threading.Thread(target=executor.run, args=(work,)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        executor.shutdown()
+
+        assert max_running[0] == 2
+
+    def test_run_nested_work_inline(self) -> None:
+        executor = BoundedExecutor(max_workers=1)
+
+        assert executor.run(lambda: executor.run(lambda: threading.current_thread().name)).startswith(
+            'bounded-executor'
+        )
+        executor.shutdown()
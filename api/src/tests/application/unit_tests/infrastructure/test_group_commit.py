@@ -0,0 +1,131 @@
+import threading
+import time
+from typing import List
+
+import pytest
+
+from application.infrastructure.concurrency.group_commit import GroupCommit
+from application.infrastructure.error.errors import InvalidArgumentError
+
+
+class TestGroupCommit:
+
+    @pytest.mark.parametrize('max_delay, max_items, message', [
+        # when_max_delay_is_negative
+        (-1, 10, 'A max delay of at least 0 is required.'),
+        # when_max_items_is_zero
+        (0.01, 0, 'A max items above 0 is required.'),
+    ])
+    def test_init_with_invalid_arguments(self, max_delay: float, max_items: int, message: str) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            GroupCommit(max_delay=max_delay, max_items=max_items)
+        assert ex.value.message == message
+
+    def test_submit_commits_a_lone_batch_at_once(self) -> None:
+        group_commit = GroupCommit(max_delay=5, max_items=100)
+        batches: List[List[int]] = []
+
+        started_at: float = time.monotonic()
+        group_commit.submit(key='key', items=[1, 2], commit=batches.append)
+        group_commit.submit(key='key', items=[3], commit=batches.append)
+
+        # Nothing else commits, so nothing waits for the max delay.
+        assert time.monotonic() - started_at < 1
+        assert batches == [[1, 2], [3]]
+
+    def test_submit_batches_the_callers_that_arrive_during_a_commit(self) -> None:
+        group_commit = GroupCommit(max_delay=5, max_items=4)
+        batches: List[List[int]] = []
+        first_commit_started = threading.Event()
+        release_first_commit = threading.Event()
+
+        def commit(items: List[int]) -> None:
+            batches.append(sorted(items))
+            if items == [0]:
+                first_commit_started.set()
+                release_first_commit.wait(5)
+
+        first = threading.Thread(target=group_commit.submit, args=('key', [0], commit))
+        first.start()
+        first_commit_started.wait(5)
+        threads = [threading.Thread(target=group_commit.submit, args=('key', [index], commit)) for index in range(1, 5)]
+        for thread in threads:
+            thread.start()
+        # The batch is committed as soon as it is full, long before its max delay.
+        for thread in threads:
+            thread.join()
+        release_first_commit.set()
+        first.join()
+
+        assert batches == [[0], [1, 2, 3, 4]]
+        assert group_commit.open_batches() == 0
+
+    def test_submit_commits_the_waiting_batch_once_the_running_commit_is_done(self) -> None:
+        group_commit = GroupCommit(max_delay=5, max_items=100)
+        batches: List[List[int]] = []
+        first_commit_started = threading.Event()
+        release_first_commit = threading.Event()
+
+        def commit(items: List[int]) -> None:
+            batches.append(items)
+            if items == [0]:
+                first_commit_started.set()
+                release_first_commit.wait(5)
+
+        first = threading.Thread(target=group_commit.submit, args=('key', [0], commit))
+        first.start()
+        first_commit_started.wait(5)
+        second = threading.Thread(target=group_commit.submit, args=('key', [1], commit))
+        started_at: float = time.monotonic()
+        second.start()
+        while group_commit.open_batches() == 0:
+            time.sleep(0.001)
+        release_first_commit.set()
+        first.join()
+        second.join()
+
+        assert batches == [[0], [1]]
+        assert time.monotonic() - started_at < 1
+
+    def test_submit_commits_the_waiting_batch_after_the_max_delay(self) -> None:
+        group_commit = GroupCommit(max_delay=0.01, max_items=100)
+        batches: List[List[int]] = []
+        first_commit_started = threading.Event()
+        release_first_commit = threading.Event()
+
+        def commit(items: List[int]) -> None:
+            batches.append(items)
+            if items == [0]:
+                first_commit_started.set()
+                release_first_commit.wait(5)
+
+        first = threading.Thread(target=group_commit.submit, args=('key', [0], commit))
+        first.start()
+        first_commit_started.wait(5)
+        # The running commit outlasts the max delay, the waiting batch is committed meanwhile.
+        group_commit.submit(key='key', items=[1], commit=commit)
+        release_first_commit.set()
+        first.join()
+
+        assert batches == [[0], [1]]
+
+    def test_submit_shares_the_error_with_the_callers_of_the_batch(self) -> None:
+        group_commit = GroupCommit(max_delay=5, max_items=3)
+        errors = []
+
+        def commit(items: List[int]) -> None:
+            raise OSError('disk full')
+
+        def submit(index: int) -> None:
+            try:
+                group_commit.submit(key='key', items=[index], commit=commit)
+            except OSError as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=submit, args=(index,)) for index in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(errors) == 3
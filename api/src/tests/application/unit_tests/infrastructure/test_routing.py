@@ -0,0 +1,77 @@
+from typing import List
+
+import pytest
+
+from application.infrastructure.celery.routing import (
+    ConsistentHashRing,
+    FilePathRouter,
+    partition_queues,
+    worker_queues,
+)
+from application.infrastructure.error.errors import InvalidArgumentError
+
+KEYS: List[str] = ['/mnt/data/file_{}.vcf'.format(index) for index in range(2000)]
+
+
+class TestConsistentHashRing:
+
+    def test_ring_spreads_the_keys_over_the_nodes(self) -> None:
+        ring = ConsistentHashRing(['a', 'b', 'c', 'd'])
+
+        nodes: List[str] = [ring.node_for(key) for key in KEYS]
+
+        assert nodes == [ring.node_for(key) for key in KEYS]
+        for node in ('a', 'b', 'c', 'd'):
+            assert len(KEYS) / 8 < nodes.count(node) < len(KEYS) / 2
+
+    def test_adding_a_node_only_moves_the_keys_of_that_node(self) -> None:
+        ring = ConsistentHashRing(['a', 'b', 'c', 'd'])
+        grown_ring = ConsistentHashRing(['a', 'b', 'c', 'd', 'e'])
+
+        moved: List[str] = [key for key in KEYS if ring.node_for(key) != grown_ring.node_for(key)]
+
+        assert all(grown_ring.node_for(key) == 'e' for key in moved)
+        assert len(moved) < len(KEYS) / 3
+
+    def test_ring_without_nodes(self) -> None:
+        with pytest.raises(InvalidArgumentError):
+            ConsistentHashRing([])
+
+
+class TestFilePathRouter:
+
+    def test_router_routes_the_tasks_on_the_same_file_to_the_same_queue(self) -> None:
+        router = FilePathRouter(partitions=8)
+
+        route = router('task', (), {'vcf_file_path': '/mnt/data/test.vcf', 'filter_id': 'rs1'}, {})
+
+        assert route['queue'] in partition_queues(8)
+        assert router('other_task', (), {'vcf_file_path': '/mnt/data/./test.vcf'}, {}) == route
+
+    def test_router_leaves_the_tasks_without_a_file_to_the_default_queue(self) -> None:
+        router = FilePathRouter(partitions=8)
+
+        assert router('task', (), {}, {}) is None
+        assert router('task', (), None, {}) is None
+
+
+class TestWorkerQueues:
+
+    def test_every_queue_is_consumed_by_exactly_one_worker(self) -> None:
+        queues: List[str] = [
+            queue for worker_index in range(3) for queue in worker_queues(worker_index, 3, partitions=32)
+        ]
+
+        assert sorted(queues) == sorted(partition_queues(32))
+
+    def test_adding_a_worker_only_moves_the_queues_it_takes(self) -> None:
+        before: List[List[str]] = [worker_queues(worker_index, 3, partitions=64) for worker_index in range(3)]
+        after: List[List[str]] = [worker_queues(worker_index, 4, partitions=64) for worker_index in range(4)]
+
+        for worker_index in range(3):
+            assert set(after[worker_index]) <= set(before[worker_index])
+        assert len(after[3]) < 64 / 2
+
+    def test_worker_index_out_of_range(self) -> None:
+        with pytest.raises(InvalidArgumentError):
+            worker_queues(3, 3, partitions=8)
@@ -0,0 +1,145 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from marshmallow import Schema, fields, post_load
+
+from application.infrastructure.concurrency.single_flight import SingleFlight
+from application.infrastructure.error.errors import InvalidArgumentError
+
+
+class PageSchema(Schema):
+    rows = fields.List(fields.Str(), data_key='rows')
+
+    @post_load
+    def load_page(self, data, **kwargs):
+        return data['rows']
+
+
+def wait_for_waiters(single_flight: SingleFlight, key: str, waiters: int, timeout: float = 5) -> None:
+    deadline: float = time.monotonic() + timeout
+    while single_flight._calls.get(key) is None or single_flight._calls[key].waiters < waiters:
+        if time.monotonic() > deadline:
+            pytest.fail('{} callers did not wait for the key {} in time.'.format(waiters, key))
+        time.sleep(0.001)
+
+
+class TestSingleFlight:
+
+    @pytest.mark.parametrize('lock_timeout, result_ttl, message', [
+        # when_lock_timeout_is_zero
+        (0, 5, 'A lock timeout above 0 is required.'),
+        # when_result_ttl_is_none
+        (60, None, 'A result ttl above 0 is required.'),
+    ])
+    def test_init_with_invalid_arguments(self, lock_timeout: int, result_ttl: int, message: str) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            SingleFlight(lock_timeout=lock_timeout, result_ttl=result_ttl)
+        assert ex.value.message == message
+
+    def test_init_raise_invalid_argument_error_for_redis_without_result_schema(self) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            SingleFlight(redis_client=MagicMock())
+        assert ex.value.message == 'A result schema is required to share the results across workers.'
+
+    def test_do_coalesces_concurrent_calls_with_the_same_key(self) -> None:
+        single_flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def compute() -> str:
+            calls.append(1)
+            release.wait(5)
+            return 'page'
+
+        def request() -> None:
+            results.append(single_flight.do(key='key', func=compute))
+
+        threads = [threading.Thread(target=request) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        # Let the followers join the leader before the leader finishes.
+        wait_for_waiters(single_flight, key='key', waiters=4)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ['page'] * 5
+        assert single_flight.in_flight() == 0
+
+    def test_do_shares_the_error_with_the_waiting_callers(self) -> None:
+        single_flight = SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def compute() -> None:
+            release.wait(5)
+            raise ValueError('scan failed')
+
+        def request() -> None:
+            try:
+                single_flight.do(key='key', func=compute)
+            except ValueError as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=request) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        wait_for_waiters(single_flight, key='key', waiters=2)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(errors) == 3
+        assert single_flight.in_flight() == 0
+
+    def test_do_does_not_coalesce_sequential_calls(self) -> None:
+        single_flight = SingleFlight()
+        func = MagicMock(side_effect=[1, 2])
+
+        assert single_flight.do(key='key', func=func) == 1
+        assert single_flight.do(key='key', func=func) == 2
+
+    def test_do_across_workers_uses_the_result_of_the_lock_holder(self) -> None:
+        redis_client = MagicMock()
+        lock = redis_client.lock.return_value
+        lock.acquire.side_effect = [False, True]
+        redis_client.get.return_value = b'{"rows": ["row"]}'
+        func = MagicMock()
+
+        assert SingleFlight(redis_client=redis_client, result_schema=PageSchema()).do(key='key', func=func) == ['row']
+
+        func.assert_not_called()
+        lock.release.assert_called_once()
+
+    def test_do_across_workers_publishes_the_result(self) -> None:
+        redis_client = MagicMock()
+        redis_client.lock.return_value.acquire.return_value = True
+        func = MagicMock(return_value={'rows': ['row']})
+        single_flight = SingleFlight(redis_client=redis_client, result_schema=PageSchema(), result_ttl=3)
+
+        assert single_flight.do(key='key', func=func) == {'rows': ['row']}
+
+        redis_client.set.assert_called_once_with('single-flight:result:key', '{"rows": ["row"]}', ex=3)
+
+    def test_do_across_workers_computes_the_result_when_the_published_one_is_not_valid(self) -> None:
+        redis_client = MagicMock()
+        redis_client.lock.return_value.acquire.side_effect = [False, True]
+        redis_client.get.return_value = b'{"rows": 1}'
+        func = MagicMock(return_value={'rows': ['row']})
+
+        assert SingleFlight(redis_client=redis_client, result_schema=PageSchema()).do(key='key', func=func) == {
+            'rows': ['row']
+        }
+        func.assert_called_once()
+
+    def test_do_across_workers_falls_back_to_local_execution_when_redis_fails(self) -> None:
+        redis_client = MagicMock()
+        redis_client.lock.side_effect = ConnectionError('redis down')
+        func = MagicMock(return_value='page')
+
+        assert SingleFlight(redis_client=redis_client, result_schema=PageSchema()).do(key='key', func=func) == 'page'
+        func.assert_called_once()
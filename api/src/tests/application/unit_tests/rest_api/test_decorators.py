@@ -0,0 +1,38 @@
+import threading
+from typing import Dict
+
+from application.rest_api.decorators import map_errors
+from application.rest_api.errors import NotFoundHttpError
+from application.vcf_files.errors import VcfRowsByIdNotExistError
+
+
+class TestMapErrors:
+
+    def test_map_errors_maps_the_error_of_each_concurrent_request(self) -> None:
+        raised = threading.Barrier(2)
+        mapped = threading.Barrier(2)
+        public_errors: Dict[str, NotFoundHttpError] = {}
+
+        @map_errors()
+        def get(filter_id: str) -> None:
+            raised.wait(timeout=5)
+            raise VcfRowsByIdNotExistError('No rows with the id {}.'.format(filter_id))
+
+        def request(filter_id: str) -> None:
+            try:
+                get(filter_id)
+            except NotFoundHttpError as ex:
+                # Both requests have failed before either reads its error.
+                mapped.wait(timeout=5)
+                public_errors[filter_id] = ex
+
+        threads = [threading.Thread(target=request, args=(filter_id,)) for filter_id in ('rs1', 'rs2')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert public_errors['rs1'] is not public_errors['rs2']
+        for filter_id, public_error in public_errors.items():
+            assert [error.message for error in public_error.errors] == ['No rows with the id {}.'.format(filter_id)]
+            assert public_error.errors[0].error_type == 'VcfRowsByIdNotExistError'
@@ -0,0 +1,29 @@
+import pytest
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.caching import LruCache
+
+
+class TestLruCache:
+
+    def test_init_with_invalid_max_size(self) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            LruCache(max_size=0)
+        assert ex.value.message == 'A cache max size above 0 is required.'
+
+    def test_get_returns_none_for_missing_key(self) -> None:
+        assert LruCache().get('missing') is None
+
+    def test_put_evicts_the_least_recently_used_entry(self) -> None:
+        cache = LruCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        # Reading 'a' makes 'b' the least recently used entry.
+        assert cache.get('a') == 1
+
+        cache.put('c', 3)
+
+        assert 'b' not in cache
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert len(cache) == 2
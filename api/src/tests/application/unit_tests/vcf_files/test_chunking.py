@@ -0,0 +1,146 @@
+import glob
+import gzip
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from application.vcf_files.chunking import merge_vcf_chunks, plan_vcf_chunks, rewrite_vcf_chunk
+from application.vcf_files.compression import BGZF_EOF, StreamCompressor, compress_bgzf_block, \
+    compress_zstd_frame, read_zstd_seek_table, zstd_seek_table
+from application.vcf_files.enums import VcfCompression
+from application.vcf_files.errors import VcfFileChangedError
+from application.vcf_files.indexes import load_or_build_id_index
+from application.vcf_files.models import VcfChunk, VcfChunkResult, VcfRewriteResult
+from application.vcf_files.operations import AsyncFilterOutRowsById
+from application.vcf_files.storage import open_vcf_file
+from application.vcf_files.utils import get_file_version
+
+
+def _write_bgzf_file(vcf_file_path: str, data: bytes, block_size: int) -> None:
+    """
+    Writes a BGZF file of small blocks, so that rows span blocks.
+    """
+    with open(vcf_file_path, 'wb') as file:
+        for offset in range(0, len(data), block_size):
+            file.write(compress_bgzf_block(data[offset:offset + block_size]))
+        file.write(BGZF_EOF)
+
+
+def _rewrite_in_chunks(vcf_file_path: str, chunks: List[VcfChunk]) -> VcfRewriteResult:
+    chunk_results: List[VcfChunkResult] = [
+        rewrite_vcf_chunk(vcf_file_path, chunk=chunk, transform=lambda row: None, identifiers={b'rs4'})
+        for chunk in chunks
+    ]
+
+    return merge_vcf_chunks(
+        vcf_file_path,
+        chunk_results=chunk_results,
+        file_version=get_file_version(vcf_file_path),
+        compression=VcfCompression(chunks[0].compression),
+    )
+
+
+class TestVcfChunks:
+
+    def test_plain_file_is_split_and_merged_at_row_boundaries(self, setup_vcf_unzipped_file) -> None:
+        with open('test.vcf', 'rb') as file:
+            rows = file.readlines()
+
+        chunks: List[VcfChunk] = plan_vcf_chunks('test.vcf', job_id='1', chunk_size=100)
+        result: VcfRewriteResult = _rewrite_in_chunks('test.vcf', chunks)
+
+        assert len(chunks) > 2
+        assert result == VcfRewriteResult(total_rows_matched=4, total_rows_dropped=4)
+        with open('test.vcf', 'rb') as file:
+            assert file.readlines() == [row for row in rows if b'\trs4\t' not in row]
+        assert not glob.glob('.test.vcf.*.part')
+
+    def test_plain_file_with_a_fresh_id_index_is_not_split(self, setup_vcf_unzipped_file) -> None:
+        load_or_build_id_index('test.vcf')
+
+        assert len(plan_vcf_chunks('test.vcf', job_id='1', chunk_size=100)) == 1
+
+    def test_bgzf_file_is_split_at_block_boundaries(self, setup_vcf_gzip_file) -> None:
+        with gzip.open('test.vcf.gz', 'rb') as file:
+            data: bytes = file.read() * 3
+        _write_bgzf_file('test.vcf.gz', data, block_size=25)
+
+        chunks: List[VcfChunk] = plan_vcf_chunks('test.vcf.gz', job_id='1', chunk_size=150)
+        result: VcfRewriteResult = _rewrite_in_chunks('test.vcf.gz', chunks)
+
+        assert len(chunks) > 2
+        assert all(chunk.compression == VcfCompression.bgzf.value for chunk in chunks)
+        assert result == VcfRewriteResult(total_rows_matched=3, total_rows_dropped=3)
+        with open('test.vcf.gz', 'rb') as file:
+            assert file.read().endswith(BGZF_EOF)
+        with gzip.open('test.vcf.gz', 'rb') as file:
+            assert file.read() == b''.join(row for row in data.splitlines(True) if b'\trs4\t' not in row)
+
+    def test_seekable_zstd_file_is_split_at_frame_boundaries(self, setup_vcf_zstd_file) -> None:
+        with open_vcf_file('test.vcf.zst') as file:
+            data: bytes = file.read() * 3
+        frames: List[bytes] = [compress_zstd_frame(data[offset:offset + 25]) for offset in range(0, len(data), 25)]
+        with open('test.vcf.zst', 'wb') as file:
+            file.write(b''.join(frames) + zstd_seek_table([(len(frame), 25) for frame in frames[:-1]] + [
+                (len(frames[-1]), len(data) - 25 * (len(frames) - 1))
+            ]))
+
+        chunks: List[VcfChunk] = plan_vcf_chunks('test.vcf.zst', job_id='1', chunk_size=150)
+        result: VcfRewriteResult = _rewrite_in_chunks('test.vcf.zst', chunks)
+
+        assert len(chunks) > 2
+        assert all(chunk.compression == VcfCompression.zstd.value for chunk in chunks)
+        assert result == VcfRewriteResult(total_rows_matched=3, total_rows_dropped=3)
+        with open('test.vcf.zst', 'rb') as file:
+            assert read_zstd_seek_table(file.fileno()) is not None
+        with open_vcf_file('test.vcf.zst') as file:
+            assert file.read() == b''.join(row for row in data.splitlines(True) if b'\trs4\t' not in row)
+
+    def test_zstd_file_without_seek_table_is_not_split(self, setup_vcf_zstd_file) -> None:
+        compressor = StreamCompressor(VcfCompression.zstd)
+        with open('test.vcf.zst', 'wb') as file:
+            file.write(compressor.compress(b'chr1\t1\trs1\tT\tG\n' * 10000) + compressor.flush(end_of_file=False))
+
+        assert len(plan_vcf_chunks('test.vcf.zst', job_id='1', chunk_size=10)) == 1
+
+    def test_plain_gzip_file_is_not_split(self, setup_vcf_gzip_file) -> None:
+        assert len(plan_vcf_chunks('test.vcf.gz', job_id='1', chunk_size=10)) == 1
+
+    def test_merge_fails_if_the_file_changed(self, setup_vcf_unzipped_file) -> None:
+        chunks: List[VcfChunk] = plan_vcf_chunks('test.vcf', job_id='1', chunk_size=100)
+        chunk_results: List[VcfChunkResult] = [
+            rewrite_vcf_chunk('test.vcf', chunk=chunk, transform=lambda row: None, identifiers={b'rs4'})
+            for chunk in chunks
+        ]
+        file_version = get_file_version('test.vcf')
+        with open('test.vcf', 'ab') as file:
+            file.write(b'chr5\t8\trs5\tA\tC\n')
+
+        with pytest.raises(VcfFileChangedError):
+            merge_vcf_chunks('test.vcf', chunk_results=chunk_results, file_version=file_version)
+
+        assert not glob.glob('.test.vcf.*.part')
+        with open('test.vcf', 'rb') as file:
+            assert file.read().count(b'\trs4\t') == 4
+
+    def test_async_delete_is_replaced_with_a_chord_of_chunk_tasks(self, setup_vcf_unzipped_file) -> None:
+        with patch(
+                'application.vcf_files.operations.plan_vcf_chunks',
+                side_effect=lambda vcf_file_path, job_id: plan_vcf_chunks(vcf_file_path, job_id, chunk_size=100),
+        ), patch.object(AsyncFilterOutRowsById.run, 'update_state'), \
+                patch.object(AsyncFilterOutRowsById.run, 'replace', side_effect=lambda sig: sig) as mock_replace:
+            chunked_rewrite = AsyncFilterOutRowsById.run.apply(
+                kwargs={'vcf_file_path': 'test.vcf', 'filter_id': 'rs4'}
+            ).get()
+
+        mock_replace.assert_called_once()
+        assert all(sig.options['queue'] == 'celery' for sig in chunked_rewrite.tasks)
+        # The chord, one task at a time.
+        chunk_results: List[dict] = [sig.apply().get() for sig in chunked_rewrite.tasks]
+        meta: dict = chunked_rewrite.body.apply(args=(chunk_results,)).get()
+
+        assert meta['artifact'] == {'file_path': 'test.vcf', 'total_rows_deleted': 4}
+        assert meta['rows_processed'] == 7
+        with open('test.vcf', 'rb') as file:
+            assert b'\trs4\t' not in file.read()
@@ -0,0 +1,127 @@
+import gzip
+import io
+import struct
+
+import pytest
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.compression import compress_bgzf_block, StreamCompressor, BGZF_BLOCK_SIZE, BGZF_EOF, \
+    BlockCompressor, read_zstd_seek_table, zstd_seek_table_after_append, ZSTD_FRAME_SIZE
+from application.vcf_files.enums import VcfCompression
+from application.vcf_files.storage import open_vcf_file
+
+
+class TestCompressBgzfBlock:
+
+    def test_compress_bgzf_block_raise_invalid_argument_error_when_data_too_big(self) -> None:
+        with pytest.raises(InvalidArgumentError):
+            compress_bgzf_block(b'a' * (BGZF_BLOCK_SIZE + 1))
+
+    def test_compress_bgzf_block(self) -> None:
+        block: bytes = compress_bgzf_block(b'chr1\t1\trs1\tT\tG\n')
+
+        # The BC extra field holds the total block size minus 1.
+        assert block[12:14] == b'BC'
+        assert struct.unpack('<H', block[16:18])[0] == len(block) - 1
+        assert gzip.decompress(block) == b'chr1\t1\trs1\tT\tG\n'
+
+
+class TestStreamCompressor:
+
+    @pytest.mark.parametrize('compression', [VcfCompression.none, VcfCompression.gzip, VcfCompression.bgzf])
+    def test_compress(self, compression: VcfCompression) -> None:
+        data = [b'chr1\t%d\trs1\tT\tG\n' % position for position in range(20000)]
+        compressor = StreamCompressor(compression=compression)
+
+        output: bytes = b''.join(compressor.compress(chunk) for chunk in data) + compressor.flush()
+
+        if compression == VcfCompression.none:
+            assert output == b''.join(data)
+        else:
+            assert gzip.decompress(output) == b''.join(data)
+
+    def test_compress_zstd_as_seekable_frames(self, tmp_path) -> None:
+        data: bytes = b''.join(b'chr1\t%d\trs1\tT\tG\n' % position for position in range(20000))
+        compressor = StreamCompressor(compression=VcfCompression.zstd)
+        vcf_file_path = str(tmp_path / 'test.vcf.zst')
+        with open(vcf_file_path, 'wb') as file:
+            file.write(compressor.compress(data) + compressor.flush())
+
+        with open(vcf_file_path, 'rb') as file:
+            frames = read_zstd_seek_table(file.fileno())
+        assert [size for _, size in frames] == [ZSTD_FRAME_SIZE] * (len(data) // ZSTD_FRAME_SIZE) + [
+            len(data) % ZSTD_FRAME_SIZE
+        ]
+        with open_vcf_file(vcf_file_path) as file:
+            assert file.read() == data
+            # Backward seeks read again from the start.
+            file.seek(ZSTD_FRAME_SIZE + 5)
+            assert file.read(10) == data[ZSTD_FRAME_SIZE + 5:ZSTD_FRAME_SIZE + 15]
+
+    def test_seek_table_after_append_keeps_the_file_seekable(self, tmp_path) -> None:
+        vcf_file_path = str(tmp_path / 'test.vcf.zst')
+        compressor = StreamCompressor(compression=VcfCompression.zstd)
+        with open(vcf_file_path, 'wb') as file:
+            file.write(compressor.compress(b'a\n') + compressor.flush())
+
+        appended = StreamCompressor(compression=VcfCompression.zstd)
+        frames: bytes = appended.compress(b'b\n') + appended.flush(end_of_file=False)
+        with open(vcf_file_path, 'r+b') as file:
+            seek_table: bytes = zstd_seek_table_after_append(file.fileno(), appended.zstd_frames)
+            file.seek(0, io.SEEK_END)
+            file.write(frames + seek_table)
+
+        with open(vcf_file_path, 'rb') as file:
+            # The previous seek table is a frame without data.
+            assert [size for _, size in read_zstd_seek_table(file.fileno())] == [2, 0, 2]
+        with open_vcf_file(vcf_file_path) as file:
+            assert file.read() == b'a\nb\n'
+
+    def test_flush_of_bgzf_ends_with_the_eof_block(self) -> None:
+        compressor = StreamCompressor(compression=VcfCompression.bgzf)
+        compressor.compress(b'data')
+
+        assert compressor.flush().endswith(BGZF_EOF)
+
+
+class TestBlockCompressor:
+
+    @pytest.mark.parametrize('threads', [1, 3])
+    def test_blocks_compressed_in_parallel_are_written_in_order(self, threads: int) -> None:
+        data = [b'chr1\t%d\trs1\tT\tG\n' % position for position in range(50000)]
+        compressor = StreamCompressor(compression=VcfCompression.bgzf, level=1)
+        output = io.BytesIO()
+
+        with BlockCompressor(level=1, threads=threads).open(output) as writer:
+            for chunk in data:
+                writer.write(chunk)
+
+        assert output.getvalue() == b''.join(compressor.compress(chunk) for chunk in data) + compressor.flush()
+        assert gzip.decompress(output.getvalue()) == b''.join(data)
+
+    def test_no_eof_block_is_written_on_error(self) -> None:
+        output = io.BytesIO()
+
+        with pytest.raises(ValueError):
+            with BlockCompressor(threads=2).open(output) as writer:
+                writer.write(b'a' * (BGZF_BLOCK_SIZE * 2))
+                raise ValueError()
+
+        assert not output.getvalue().endswith(BGZF_EOF)
+
+    @pytest.mark.parametrize('threads', [1, 3])
+    def test_zstd_frames_compressed_in_parallel_are_written_in_order(self, threads: int) -> None:
+        data = [b'chr1\t%d\trs1\tT\tG\n' % position for position in range(50000)]
+        compressor = StreamCompressor(compression=VcfCompression.zstd, level=1)
+        output = io.BytesIO()
+
+        with BlockCompressor(level=1, threads=threads).open(output, VcfCompression.zstd) as writer:
+            for chunk in data:
+                writer.write(chunk)
+
+        assert output.getvalue() == b''.join(compressor.compress(chunk) for chunk in data) + compressor.flush()
+
+    @pytest.mark.parametrize('level, threads', [(10, 1), (-1, 1), (6, 0)])
+    def test_raise_invalid_argument_error(self, level: int, threads: int) -> None:
+        with pytest.raises(InvalidArgumentError):
+            BlockCompressor(level=level, threads=threads)
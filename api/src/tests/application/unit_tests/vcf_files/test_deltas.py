@@ -0,0 +1,99 @@
+import pytest
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.deltas import VcfDeltaLog
+from application.vcf_files.enums import VcfMutationOperation
+from application.vcf_files.models import FileVersion, VcfDeltaEntry
+from application.vcf_files.utils import get_file_version
+
+ROWS = [
+    b'chr1\t1\trs1\tT\tG\t1.1\tPASS\ttest\n',
+    b'chr2\t2\trs1\tT\tG\t1.1\tPASS\ttest\n',
+    b'chr3\t3\trs3\tA\tG\t2.2\tPASS\ttest\n',
+]
+
+
+class TestVcfDeltaLog:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.delta_log = VcfDeltaLog(file_size=1, modified_at=2, inode=3)
+
+    def test_merge_applies_the_entries_in_order(self) -> None:
+        self.delta_log.add(VcfDeltaEntry(
+            operation=VcfMutationOperation.update, identifier=b'rs1', row=b'chr5\t5\trs5\tC\tA'
+        ))
+        self.delta_log.add(VcfDeltaEntry(operation=VcfMutationOperation.delete, identifier=b'rs3'))
+        self.delta_log.add(VcfDeltaEntry(
+            operation=VcfMutationOperation.append, identifier=b'rs3', row=b'chr9\t9\trs3\tA\tC'
+        ))
+        # Follows the rows the update gave the id to.
+        self.delta_log.add(VcfDeltaEntry(
+            operation=VcfMutationOperation.update, identifier=b'rs5', row=b'chr6\t6\trs6\tC\tA'
+        ))
+
+        assert list(self.delta_log.merge(ROWS)) == [
+            b'chr6\t6\trs6\tC\tA\t1.1\tPASS\ttest\n',
+            b'chr6\t6\trs6\tC\tA\t1.1\tPASS\ttest\n',
+            b'chr9\t9\trs3\tA\tC\n',
+        ]
+
+    def test_count_rows(self) -> None:
+        self.delta_log.add(VcfDeltaEntry(
+            operation=VcfMutationOperation.update, identifier=b'rs1', row=b'chr3\t3\trs3\tC\tA'
+        ))
+        self.delta_log.add(VcfDeltaEntry(
+            operation=VcfMutationOperation.append, identifier=b'rs1', row=b'chr9\t9\trs1\tA\tC'
+        ))
+        file_rows_by_id = {b'rs1': 2, b'rs3': 1}
+
+        assert self.delta_log.count_rows(b'rs3', file_rows_by_id) == 3
+        assert self.delta_log.count_rows(b'rs1', file_rows_by_id) == 1
+        assert self.delta_log.count_rows(b'rs4', file_rows_by_id) == 0
+
+    def test_is_for(self) -> None:
+        assert self.delta_log.is_for(FileVersion(file_path='test.vcf', size=1, modified_at=2, inode=3))
+        assert not self.delta_log.is_for(FileVersion(file_path='test.vcf', size=1, modified_at=2, inode=4))
+        assert not self.delta_log.is_for(None)
+
+    def test_store_and_load(self, setup_vcf_unzipped_file) -> None:
+        delta_log: VcfDeltaLog = VcfDeltaLog.for_file_version(get_file_version('test.vcf'))
+        delta_log.add(VcfDeltaEntry(operation=VcfMutationOperation.delete, identifier=b'rs3'))
+        delta_log.store('test.vcf')
+        delta_log.add(VcfDeltaEntry(
+            operation=VcfMutationOperation.append, identifier=b'rs9', row=b'chr9\t9\trs9\tA\tC'
+        ))
+        delta_log.store('test.vcf')
+
+        loaded_delta_log: VcfDeltaLog = VcfDeltaLog.load('test.vcf')
+
+        assert loaded_delta_log.entries == delta_log.entries
+        assert loaded_delta_log.size == delta_log.size
+        assert loaded_delta_log.is_for(get_file_version('test.vcf'))
+
+    def test_load_leaves_out_a_partially_written_entry(self, setup_vcf_unzipped_file) -> None:
+        delta_log: VcfDeltaLog = VcfDeltaLog.for_file_version(get_file_version('test.vcf'))
+        delta_log.add(VcfDeltaEntry(operation=VcfMutationOperation.delete, identifier=b'rs3'))
+        delta_log.store('test.vcf')
+        with open('test.vcf' + VcfDeltaLog.SUFFIX, 'ab') as file:
+            file.write(b'D\trs')
+
+        loaded_delta_log: VcfDeltaLog = VcfDeltaLog.load('test.vcf')
+        assert loaded_delta_log.entries == delta_log.entries
+
+        # The next store rewrites the log without the partial entry.
+        loaded_delta_log.add(VcfDeltaEntry(operation=VcfMutationOperation.delete, identifier=b'rs4'))
+        loaded_delta_log.store('test.vcf')
+        assert [entry.identifier for entry in VcfDeltaLog.load('test.vcf').entries] == [b'rs3', b'rs4']
+
+    def test_load_raise_invalid_argument_error_when_corrupted(self, setup_vcf_unzipped_file) -> None:
+        with open('test.vcf' + VcfDeltaLog.SUFFIX, 'wb') as file:
+            file.write(b'1\t2\t3\nX\trs1\n')
+
+        with pytest.raises(InvalidArgumentError) as ex:
+            VcfDeltaLog.load('test.vcf')
+        assert ex.value.message == 'The delta log of test.vcf is corrupted.'
+
+    def test_load_and_remove_without_a_delta_log(self, setup_vcf_unzipped_file) -> None:
+        assert VcfDeltaLog.load('test.vcf') is None
+        VcfDeltaLog.remove('test.vcf')
@@ -0,0 +1,206 @@
+import os
+from unittest.mock import patch
+
+from application.vcf_files.indexes import MappedVcfIdIndex, VcfIdIndex, catch_up_id_index, load_mapped_id_index, \
+    load_or_build_id_index, load_or_build_mapped_id_index, restamp_id_index
+from application.vcf_files.models import ByteRangeChange, VcfRow
+from application.vcf_files.operations import AppendToVcfFile
+from application.vcf_files.utils import get_file_version
+
+
+class TestVcfIdIndex:
+
+    def test_build(self, setup_vcf_unzipped_file) -> None:
+        id_index: VcfIdIndex = VcfIdIndex.build('test.vcf')
+
+        assert id_index.data_offset == 213
+        assert id_index.total_rows == 7
+        assert id_index.lookup('rs1') == [(213, 29), (242, 29)]
+        assert len(id_index.lookup('rs4')) == 4
+        assert id_index.lookup('rs9') == []
+        assert id_index.is_fresh(get_file_version('test.vcf'))
+
+    def test_build_leaves_the_rows_appended_while_the_file_is_read_to_the_catch_up(
+            self,
+            setup_vcf_unzipped_file,
+    ) -> None:
+        opened_version = get_file_version('test.vcf')
+        with open('test.vcf', 'a') as file:
+            file.write('chr1\t9\trs1\tA\tC\t1.0\tPASS\ttest\n')
+
+        # The file is opened before the row is appended.
+        with patch('application.vcf_files.indexes.get_open_file_version', return_value=opened_version):
+            id_index: VcfIdIndex = VcfIdIndex.build('test.vcf')
+        id_index.save('test.vcf')
+
+        assert len(id_index.lookup('rs1')) == 2
+        assert catch_up_id_index('test.vcf') == 1
+        assert load_or_build_id_index('test.vcf').rows == VcfIdIndex.build('test.vcf').rows
+
+    def test_save_and_load(self, setup_vcf_unzipped_file) -> None:
+        id_index: VcfIdIndex = VcfIdIndex.build('test.vcf')
+        id_index.save('test.vcf')
+
+        loaded_id_index: VcfIdIndex = VcfIdIndex.load('test.vcf')
+
+        assert loaded_id_index.rows == id_index.rows
+        assert loaded_id_index.data_offset == id_index.data_offset
+
+    def test_load_ignores_stale_index(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+
+        with open('test.vcf', 'a') as file:
+            file.write('chr9\t9\trs9\tA\tC\t1.0\tPASS\ttest\n')
+
+        assert VcfIdIndex.load('test.vcf') is None
+        assert load_or_build_id_index('test.vcf').lookup('rs9') != []
+
+    def test_apply_changes_matches_a_rebuilt_index(self, setup_vcf_unzipped_file) -> None:
+        id_index: VcfIdIndex = VcfIdIndex.build('test.vcf')
+        rs1_rows = id_index.lookup('rs1')
+        rs3_row = id_index.lookup('rs3')[0]
+        changes = [
+            ByteRangeChange(offset=rs1_rows[0][0], length=rs1_rows[0][1]),
+            ByteRangeChange(offset=rs3_row[0], length=rs3_row[1], replacement=b'chr3\t3\trs33\tAAA\tG\t2.2\tPASS\n'),
+        ]
+
+        with open('test.vcf', 'rb') as file:
+            contents: bytes = file.read()
+        for change in sorted(changes, key=lambda change: change.offset, reverse=True):
+            contents = contents[:change.offset] + change.replacement + contents[change.offset + change.length:]
+        with open('test.vcf', 'wb') as file:
+            file.write(contents)
+
+        id_index.apply_changes(changes)
+
+        assert id_index.rows == VcfIdIndex.build('test.vcf').rows
+        assert 'rs3' not in id_index.rows
+
+    def test_append_indexes_only_the_appended_rows(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+
+        with patch.object(VcfIdIndex, 'build', wraps=VcfIdIndex.build) as mock_build:
+            AppendToVcfFile().run(
+                vcf_file_path='test.vcf',
+                vcf_rows=[
+                    VcfRow(chrom='chr9', pos=9, identifier='rs9', ref='A', alt='C'),
+                    VcfRow(chrom='chr1', pos=1, identifier='rs1', ref='A', alt='C'),
+                ],
+            )
+            id_index: VcfIdIndex = VcfIdIndex.load('test.vcf')
+
+        mock_build.assert_not_called()
+        assert id_index.rows == VcfIdIndex.build('test.vcf').rows
+        assert len(id_index.lookup('rs1')) == 3
+
+    def test_catch_up_with_rows_appended_by_an_external_tool(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+
+        with open('test.vcf', 'a') as file:
+            file.write('chr9\t9\trs9\tA\tC\t1.0\tPASS\ttest\n')
+
+        assert catch_up_id_index('test.vcf') == 1
+        assert catch_up_id_index('test.vcf') == 0
+        assert VcfIdIndex.load('test.vcf').rows == VcfIdIndex.build('test.vcf').rows
+
+    def test_catch_up_ignores_the_rows_of_an_interrupted_catch_up(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+        with open('test.vcf', 'a') as file:
+            file.write('chr9\t9\trs9\tA\tC\t1.0\tPASS\ttest\n')
+
+        # The rows of a catch-up that did not rewrite the stamp.
+        with open('test.vcf' + VcfIdIndex.SUFFIX, 'a') as file:
+            file.write('rs9\t1000\t10\n')
+
+        assert catch_up_id_index('test.vcf') == 1
+        assert VcfIdIndex.load('test.vcf').rows == VcfIdIndex.build('test.vcf').rows
+
+    def test_catch_up_of_a_rewritten_file_is_refused(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+
+        with open('test.vcf', 'rb') as file:
+            contents: bytes = file.read()
+        with open('test.vcf', 'wb') as file:
+            file.write(contents.replace(b'rs3', b'rs5') + b'chr9\t9\trs9\tA\tC\n')
+
+        assert catch_up_id_index('test.vcf') is None
+        assert load_or_build_id_index('test.vcf').lookup('rs5') != []
+        assert load_or_build_id_index('test.vcf').lookup('rs3') == []
+
+    def test_catch_up_without_index(self, setup_vcf_unzipped_file) -> None:
+        assert catch_up_id_index('test.vcf') is None
+
+
+class TestMappedVcfIdIndex:
+
+    def test_lookup_matches_the_id_index(self, setup_vcf_unzipped_file) -> None:
+        id_index: VcfIdIndex = load_or_build_id_index('test.vcf')
+
+        mapped_id_index: MappedVcfIdIndex = load_mapped_id_index('test.vcf')
+
+        assert os.path.exists('test.vcf' + MappedVcfIdIndex.SUFFIX)
+        assert mapped_id_index.total_rows == id_index.total_rows
+        assert mapped_id_index.data_offset == id_index.data_offset
+        for identifier in ['rs1', 'rs3', 'rs4', 'rs9', 'rs', 'rs10000000000']:
+            assert mapped_id_index.lookup(identifier) == id_index.lookup(identifier)
+        assert mapped_id_index.lookup('rs4', start=1, count=2) == id_index.lookup('rs4')[1:3]
+        assert mapped_id_index.is_fresh(get_file_version('test.vcf'))
+
+    def test_load_mapped_id_index_maps_the_index_once(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+        mapped_id_index: MappedVcfIdIndex = load_mapped_id_index('test.vcf')
+
+        with patch.object(MappedVcfIdIndex, 'map') as mock_map:
+            assert load_mapped_id_index('test.vcf') is mapped_id_index
+        mock_map.assert_not_called()
+
+    def test_load_mapped_id_index_without_index_does_not_build_it(self, setup_vcf_unzipped_file) -> None:
+        assert load_mapped_id_index('test.vcf') is None
+        assert not os.path.exists('test.vcf' + VcfIdIndex.SUFFIX)
+        assert not os.path.exists('test.vcf' + MappedVcfIdIndex.SUFFIX)
+
+    def test_load_mapped_id_index_remaps_the_index_of_a_changed_file(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+        load_mapped_id_index('test.vcf')
+
+        with open('test.vcf', 'a') as file:
+            file.write('chr9\t9\trs9\tA\tC\t1.0\tPASS\ttest\n')
+
+        assert load_mapped_id_index('test.vcf') is None
+        catch_up_id_index('test.vcf')
+        mapped_id_index: MappedVcfIdIndex = load_mapped_id_index('test.vcf')
+        assert mapped_id_index.is_fresh(get_file_version('test.vcf'))
+        assert len(mapped_id_index.lookup('rs9')) == 1
+
+    def test_load_or_build_mapped_id_index_builds_a_missing_index(self, setup_vcf_unzipped_file) -> None:
+        mapped_id_index: MappedVcfIdIndex = load_or_build_mapped_id_index('test.vcf')
+
+        assert isinstance(mapped_id_index, MappedVcfIdIndex)
+        assert VcfIdIndex.exists('test.vcf')
+        assert mapped_id_index.lookup('rs1') == VcfIdIndex.build('test.vcf').lookup('rs1')
+
+    def test_restamp_id_index_after_an_overwrite_of_the_same_rows(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+        load_mapped_id_index('test.vcf')
+        previous_version = get_file_version('test.vcf')
+        with open('test.vcf', 'r+b') as file:
+            file.seek(VcfIdIndex.load('test.vcf').lookup('rs3')[0][0])
+            file.write(b'chr3')
+        os.utime('test.vcf', ns=(previous_version.modified_at + 1, previous_version.modified_at + 1))
+
+        restamp_id_index('test.vcf', previous_version=previous_version)
+
+        file_version = get_file_version('test.vcf')
+        assert VcfIdIndex.load('test.vcf').is_fresh(file_version)
+        assert MappedVcfIdIndex.map('test.vcf').is_fresh(file_version)
+        assert catch_up_id_index('test.vcf') == 0
+
+    def test_restamp_id_index_leaves_a_stale_index(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+        previous_version = get_file_version('test.vcf')
+        with open('test.vcf', 'a') as file:
+            file.write('chr9\t9\trs9\tA\tC\t1.0\tPASS\ttest\n')
+
+        restamp_id_index('test.vcf', previous_version=previous_version)
+
+        assert not VcfIdIndex.exists('test.vcf')
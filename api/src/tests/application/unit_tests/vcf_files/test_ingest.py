@@ -0,0 +1,47 @@
+from typing import List
+
+import pytest
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.enums import VcfIngestFormat
+from application.vcf_files.ingest import iter_ingest_lines, parse_ingest_row
+
+
+class TestIngestRows:
+
+    def test_lines_are_split_across_chunks(self) -> None:
+        chunks: List[bytes] = [b'chr1\t1\trs', b'1\tA\tC\r\nchr2', b'\t2\trs2\tA\tC\n\nchr3\t3\trs3\tA\tC']
+
+        assert list(iter_ingest_lines(chunks)) == [
+            b'chr1\t1\trs1\tA\tC', b'chr2\t2\trs2\tA\tC', b'', b'chr3\t3\trs3\tA\tC'
+        ]
+
+    def test_tsv_row(self) -> None:
+        assert parse_ingest_row(b'chrX\t10\trs10\tACG\t.\t.\tPASS\tDP=3', VcfIngestFormat.tsv) == \
+            b'chrX\t10\trs10\tACG\t.\t.\tPASS\tDP=3\n'
+        assert parse_ingest_row(b'#CHROM\tPOS\tID\tREF\tALT', VcfIngestFormat.tsv) is None
+        assert parse_ingest_row(b'  ', VcfIngestFormat.tsv) is None
+
+    @pytest.mark.parametrize('line', [b'chr23\t1\trs1\tA\tC', b'chr1\t1\trs1\tA', b'chr1 1 rs1 A C'])
+    def test_invalid_tsv_row(self, line: bytes) -> None:
+        with pytest.raises(InvalidArgumentError, match='The row is not a valid tab separated VCF row.'):
+            parse_ingest_row(line, VcfIngestFormat.tsv)
+
+    def test_ndjson_row(self) -> None:
+        assert parse_ingest_row(
+            b'{"CHROM": "chr22", "POS": 5, "ID": "rs5", "REF": "T", "ALT": "G"}', VcfIngestFormat.ndjson
+        ) == b'chr22\t5\trs5\tT\tG\n'
+
+    @pytest.mark.parametrize('line, message', [
+        (b'{"CHROM": "chr22", "POS": 5', 'The row is not valid JSON.'),
+        (b'["chr22", 5, "rs5", "T", "G"]', 'The row is not a JSON object.'),
+        (b'{"CHROM": "chr22", "POS": 5, "ID": "rs5", "REF": "T", "ALT": "G", "QUAL": 1}', 'Unknown attribute QUAL.'),
+        (b'{"CHROM": "chr22", "POS": 5, "ID": "rs5", "REF": "T"}', 'The ALT is required.'),
+        (b'{"CHROM": "chr22", "POS": true, "ID": "rs5", "REF": "T", "ALT": "G"}', 'The POS True is not valid.'),
+        (b'{"CHROM": "chr1\\n", "POS": 5, "ID": "rs5", "REF": "T", "ALT": "G"}', 'The CHROM chr1\n is not valid.'),
+    ])
+    def test_invalid_ndjson_row(self, line: bytes, message: str) -> None:
+        with pytest.raises(InvalidArgumentError) as error:
+            parse_ingest_row(line, VcfIngestFormat.ndjson)
+
+        assert error.value.message == message
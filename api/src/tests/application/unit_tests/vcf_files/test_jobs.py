@@ -0,0 +1,77 @@
+from unittest.mock import MagicMock
+
+from application.vcf_files.enums import VcfJobOperation, VcfJobState
+from application.vcf_files.errors import VcfNoDataDeletedError
+from application.vcf_files.jobs import JobProgressReporter, job_meta, to_vcf_job
+from application.vcf_files.models import VcfJob
+
+
+class TestToVcfJob:
+
+    def test_to_vcf_job_extrapolates_the_eta_of_a_running_job(self) -> None:
+        meta = job_meta(
+            operation=VcfJobOperation.delete, rows_processed=10, bytes_processed=100, total_bytes=400, started_at=50.0
+        )
+
+        assert to_vcf_job(job_id='1', state='PROGRESS', info=meta, now=60.0) == VcfJob(
+            job_id='1',
+            state=VcfJobState.progress,
+            operation=VcfJobOperation.delete,
+            rows_processed=10,
+            bytes_processed=100,
+            total_bytes=400,
+            eta=30.0,
+        )
+
+    def test_to_vcf_job_of_a_done_job(self) -> None:
+        meta = job_meta(
+            operation=VcfJobOperation.index,
+            rows_processed=7,
+            bytes_processed=400,
+            total_bytes=400,
+            started_at=50.0,
+            artifact={'file_path': 'test.vcf', 'total_rows_indexed': 7},
+        )
+
+        vcf_job: VcfJob = to_vcf_job(job_id='1', state='SUCCESS', info=meta, now=60.0)
+
+        assert vcf_job.state == VcfJobState.success
+        assert vcf_job.eta == 0.0
+        assert vcf_job.artifact == {'file_path': 'test.vcf', 'total_rows_indexed': 7}
+
+    def test_to_vcf_job_of_a_failed_job(self) -> None:
+        vcf_job: VcfJob = to_vcf_job(
+            job_id='1', state='FAILURE', info=VcfNoDataDeletedError('No data found for deletion'), now=60.0
+        )
+
+        assert vcf_job == VcfJob(job_id='1', state=VcfJobState.failure, error='No data found for deletion')
+
+    def test_to_vcf_job_of_a_pending_job(self) -> None:
+        assert to_vcf_job(job_id='1', state='PENDING', info=None, now=60.0) == VcfJob(
+            job_id='1', state=VcfJobState.pending
+        )
+
+
+class TestJobProgressReporter:
+
+    def test_reporter_throttles_the_reports(self) -> None:
+        mock_task = MagicMock()
+        mock_task.request.id = '1'
+        progress = JobProgressReporter(task=mock_task, operation=VcfJobOperation.delete, total_bytes=400)
+
+        progress(10, 100)
+        progress(20, 200)
+
+        mock_task.update_state.assert_called_once()
+        assert mock_task.update_state.call_args[1]['state'] == 'PROGRESS'
+        assert mock_task.update_state.call_args[1]['meta']['rows_processed'] == 10
+        assert progress.meta()['rows_processed'] == 20
+
+    def test_reporter_does_not_report_outside_of_a_worker(self) -> None:
+        mock_task = MagicMock()
+        mock_task.request.id = None
+        progress = JobProgressReporter(task=mock_task, operation=VcfJobOperation.delete)
+
+        progress(10, 100)
+
+        mock_task.update_state.assert_not_called()
@@ -0,0 +1,90 @@
+import gzip
+import os
+import threading
+
+from application.vcf_files.locking import file_lock, in_place_write_lock, snapshot_read_lock
+from application.vcf_files.operations import AppendToVcfFile, ApplyVcfFileMutations, UpdateByIdVcfFile
+from application.vcf_files.enums import VcfMutationOperation
+from application.vcf_files.models import VcfMutation, VcfRow
+
+
+class TestLocking:
+
+    def test_in_place_write_lock_is_not_held_while_the_file_is_read(self, setup_vcf_unzipped_file) -> None:
+        with snapshot_read_lock('test.vcf'), snapshot_read_lock('test.vcf'):
+            with in_place_write_lock('test.vcf') as locked:
+                assert not locked
+
+        with in_place_write_lock('test.vcf') as locked:
+            assert locked
+
+    def test_file_lock_serializes_the_writers(self, setup_vcf_unzipped_file) -> None:
+        events = []
+
+        def write() -> None:
+            with file_lock('test.vcf'):
+                events.append('second')
+
+        with file_lock('test.vcf'):
+            thread = threading.Thread(target=write)
+            thread.start()
+            thread.join(timeout=0.1)
+            events.append('first')
+        thread.join()
+
+        assert events == ['first', 'second']
+
+    def test_concurrent_rewrites_do_not_lose_updates(self, setup_vcf_unzipped_file) -> None:
+        threads = [
+            threading.Thread(
+                target=ApplyVcfFileMutations().run,
+                kwargs={
+                    'vcf_file_path': 'test.vcf',
+                    'mutations': [VcfMutation(operation=VcfMutationOperation.delete, filter_id=filter_id)],
+                },
+            )
+            for filter_id in ['rs1', 'rs3', 'rs4']
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open('test.vcf', 'r') as file:
+            assert [row for row in file if not row.startswith('#')] == []
+
+    def test_writes_made_while_the_file_is_read_produce_a_new_version(self, setup_vcf_unzipped_file) -> None:
+        with snapshot_read_lock('test.vcf'), open('test.vcf', 'rb') as snapshot:
+            contents: bytes = snapshot.read()
+            inode: int = os.stat('test.vcf').st_ino
+
+            AppendToVcfFile().run(
+                vcf_file_path='test.vcf',
+                vcf_rows=[VcfRow(chrom='chr9', pos=9, identifier='rs9', ref='A', alt='C')],
+            )
+            # Same length, it would be patched in place if the file was not read.
+            UpdateByIdVcfFile().run(
+                vcf_file_path='test.vcf',
+                filter_id='rs3',
+                data=VcfRow(chrom='chr3', pos=3, identifier='rs3', ref='C', alt='T'),
+            )
+
+            assert os.stat('test.vcf').st_ino != inode
+            snapshot.seek(0)
+            assert snapshot.read() == contents
+
+        with open('test.vcf', 'r') as file:
+            rows = [row for row in file if not row.startswith('#')]
+        assert rows[2] == 'chr3\t3\trs3\tC\tT\t2.2\tPASS\ttest\n'
+        assert rows[-1] == 'chr9\t9\trs9\tA\tC\n'
+
+    def test_append_to_gz_file_while_it_is_read(self, setup_vcf_gzip_file) -> None:
+        with snapshot_read_lock('test.vcf.gz'):
+            AppendToVcfFile().run(
+                vcf_file_path='test.vcf.gz',
+                vcf_rows=[VcfRow(chrom='chr9', pos=9, identifier='rs9', ref='A', alt='C')],
+            )
+
+        with gzip.open('test.vcf.gz', 'rt') as file:
+            rows = file.readlines()
+        assert rows[-2:] == ['chr4\t4\trs4\tCAG\tC\t3.3\tPASS\ttest\n', 'chr9\t9\trs9\tA\tC\n']
@@ -1,5 +1,7 @@
 import copy
+import glob
 import gzip
+import os
 from unittest import mock
 
 import pytest
@@ -8,10 +10,98 @@ from typing import Optional, List
 from application.infrastructure.error.errors import InvalidArgumentError, MultipleVCFHandlerBaseError, \
     VCFHandlerBaseError
 from application.rest_api.vcf_files.enums import VCFHeader
+from application.vcf_files.caching import VcfHeaderCache
+from application.vcf_files.chunking import plan_vcf_chunks
+from application.vcf_files.compression import BGZF_EOF, is_bgzf_file, read_zstd_seek_table
 from application.vcf_files.errors import VcfDataUpdateError, VcfDataDeleteError, \
-    VcfRowsByIdNotExistError, VcfDataAppendError
-from application.vcf_files.models import VcfRow
-from application.vcf_files.operations import FilterVcfFile, AppendToVcfFile, FilterOutRowsById, UpdateByIdVcfFile
+    VcfRowsByIdNotExistError, VcfDataAppendError, VcfFileNotFoundError, VcfFileHeaderError, VcfDataMutationError, \
+    VcfNoDataDeletedError
+from application.vcf_files.deltas import VcfDeltaLog
+from application.vcf_files.indexes import VcfIdIndex
+from application.vcf_files.models import VcfRow, VcfFileHeader, VcfMetaDefinition, VcfRegion, VcfMutation, VcfJob, \
+    VcfQueryPlan
+from application.vcf_files.enums import VcfCompression, VcfMutationOperation, VcfJobOperation, VcfJobState, \
+    VcfIngestFormat, VcfAccessPath
+from application.vcf_files.operations import FilterVcfFile, AppendToVcfFile, FilterOutRowsById, UpdateByIdVcfFile, \
+    ReadVcfFileHeader, ExportVcfFile, ApplyVcfFileMutations, RecordVcfFileMutations, CompactVcfFileDelta, \
+    AsyncFilterOutRowsById, AsyncExportVcfFile, AsyncBuildVcfIdIndex, ReadVcfJob, IngestVcfRows, AsyncConvertVcfFile
+from application.vcf_files.planning import VcfQueryPlanner
+from application.vcf_files.storage import open_vcf_file
+
+
+class TestReadVcfFileHeader:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.header_cache = VcfHeaderCache()
+        self.read_vcf_file_header = ReadVcfFileHeader(header_cache=self.header_cache)
+
+    def test_run_raise_vcf_file_not_found_error(self) -> None:
+        with pytest.raises(VcfFileNotFoundError) as ex:
+            self.read_vcf_file_header.run(vcf_file_path='missing.vcf')
+        assert ex.value.message == 'The VCF file missing.vcf does not exist.'
+
+    def test_run_raise_vcf_file_header_error_when_chrom_line_is_missing(self, tmp_path) -> None:
+        vcf_file_path = str(tmp_path / 'test.vcf')
+        with open(vcf_file_path, 'w') as file:
+            file.write('##fileformat=VCFv4.2\nchr1\t1\trs1\tT\tG\n')
+
+        with pytest.raises(VcfFileHeaderError) as ex:
+            self.read_vcf_file_header.run(vcf_file_path=vcf_file_path)
+        assert ex.value.message == 'The VCF file does not have a #CHROM header line.'
+
+    @pytest.mark.parametrize('vcf_file_path, data_offset', [
+        ('test.vcf', 213),
+        ('test.vcf.gz', 213),
+    ])
+    def test_run(self, vcf_file_path: str, data_offset: int, setup_vcf_unzipped_file, setup_vcf_gzip_file) -> None:
+        vcf_file_header: VcfFileHeader = self.read_vcf_file_header.run(vcf_file_path=vcf_file_path)
+
+        assert vcf_file_header.file_format == 'VCFv4.2'
+        assert vcf_file_header.filters == [
+            VcfMetaDefinition(
+                identifier='FAIL',
+                description='SNV quality < 100 or indel quality < 100 or DP < 8',
+            )
+        ]
+        assert vcf_file_header.infos == []
+        assert vcf_file_header.samples == ['NA12877 single 20180302']
+        assert vcf_file_header.columns[:5] == ['#CHROM', 'POS', 'ID', 'REF', 'ALT']
+        assert len(vcf_file_header.meta_lines) == 3
+        assert vcf_file_header.data_offset == data_offset
+
+    def test_run_parses_info_and_contig_definitions(self, tmp_path) -> None:
+        vcf_file_path = str(tmp_path / 'test.vcf')
+        with open(vcf_file_path, 'w') as file:
+            file.writelines([
+                '##fileformat=VCFv4.3\n',
+                '##contig=<ID=chr1,length=248956422>\n',
+                '##INFO=<ID=DP,Number=1,Type=Integer,Description="Total Depth, over all samples">\n',
+                '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">\n',
+                '#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tS1\tS2\n',
+            ])
+
+        vcf_file_header: VcfFileHeader = self.read_vcf_file_header.run(vcf_file_path=vcf_file_path)
+
+        assert vcf_file_header.contigs == [VcfMetaDefinition(identifier='chr1', length=248956422)]
+        assert vcf_file_header.infos == [
+            VcfMetaDefinition(
+                identifier='DP', number='1', value_type='Integer', description='Total Depth, over all samples'
+            )
+        ]
+        assert vcf_file_header.formats == [
+            VcfMetaDefinition(identifier='GT', number='1', value_type='String', description='Genotype')
+        ]
+        assert vcf_file_header.samples == ['S1', 'S2']
+
+    def test_run_returns_the_cached_header_of_the_same_file_version(self, setup_vcf_unzipped_file) -> None:
+        vcf_file_header: VcfFileHeader = self.read_vcf_file_header.run(vcf_file_path='test.vcf')
+
+        with mock.patch('application.vcf_files.operations.open') as mock_open:
+            assert self.read_vcf_file_header.run(vcf_file_path='test.vcf') is vcf_file_header
+            mock_open.assert_not_called()
+
+        assert len(self.header_cache) == 1
 
 
 class TestFilterVcfFile:
@@ -122,6 +212,15 @@ class TestFilterVcfFile:
             page_index=page_index
         ) == expected_vcf_rows
 
+    def test_run_zst_file_with_two_match_and_page_size_of_2(self, setup_vcf_zstd_file) -> None:
+        assert self.filter_vcf_file.run(
+            vcf_file_path='test.vcf.zst',
+            headers=[VCFHeader.chrom, VCFHeader.pos, VCFHeader.id],
+            filter_id='rs1',
+            page_size=2,
+            page_index=0
+        ) == [VcfRow(chrom='chr1', pos=1, identifier='rs1'), VcfRow(chrom='chr2', pos=2, identifier='rs1')]
+
     def test_run_gz_file_with_one_match_and_page_size_of_2(self, setup_vcf_gzip_file) -> None:
         page_size = 2
         page_index = 0
@@ -274,6 +373,66 @@ class TestFilterVcfFile:
             page_index=page_index + 1
         ) == expected_vcf_second_page_rows
 
+    def test_run_through_the_id_index_plan(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+        query_plan: VcfQueryPlan = VcfQueryPlanner(index_min_size=0).plan(
+            vcf_file_path='test.vcf', filter_id='rs4', page_size=2, page_index=1
+        )
+
+        assert self.filter_vcf_file.run(
+            vcf_file_path='test.vcf',
+            headers=[VCFHeader.chrom, VCFHeader.pos, VCFHeader.alt, VCFHeader.ref, VCFHeader.id],
+            filter_id='rs4',
+            page_size=2,
+            page_index=1,
+            query_plan=query_plan,
+        ) == [
+            VcfRow(chrom='chr4', pos=6, identifier='rs4', ref='CAG', alt='C'),
+            VcfRow(chrom='chr4', pos=7, identifier='rs4', ref='CAG', alt='C'),
+        ]
+        assert query_plan.access_path == VcfAccessPath.id_index
+        assert query_plan.actual_rows == 2
+        assert query_plan.actual_bytes == query_plan.estimated_bytes
+
+    def test_run_through_the_index_miss_plan_reads_nothing(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+        query_plan: VcfQueryPlan = VcfQueryPlanner(index_min_size=0).plan(
+            vcf_file_path='test.vcf', filter_id='rs9', page_size=2, page_index=0
+        )
+
+        with pytest.raises(VcfRowsByIdNotExistError):
+            self.filter_vcf_file.run(
+                vcf_file_path='test.vcf',
+                headers=[VCFHeader.chrom, VCFHeader.pos, VCFHeader.alt, VCFHeader.ref, VCFHeader.id],
+                filter_id='rs9',
+                page_size=2,
+                page_index=0,
+                query_plan=query_plan,
+            )
+        assert query_plan.actual_rows == 0
+        assert query_plan.actual_bytes == 0
+
+    def test_run_scans_the_file_that_changed_after_it_was_planned(self, setup_vcf_unzipped_file) -> None:
+        query_plan: VcfQueryPlan = VcfQueryPlanner(index_min_size=0).plan(
+            vcf_file_path='test.vcf', filter_id='rs1', page_size=10, page_index=0
+        )
+        with open('test.vcf', 'a') as file:
+            file.write('chr9\t9\trs1\tA\tC\t1.0\tPASS\ttest\n')
+
+        vcf_rows: List[VcfRow] = self.filter_vcf_file.run(
+            vcf_file_path='test.vcf',
+            headers=[VCFHeader.chrom, VCFHeader.pos, VCFHeader.alt, VCFHeader.ref, VCFHeader.id],
+            filter_id='rs1',
+            page_size=10,
+            page_index=0,
+            query_plan=query_plan,
+        )
+
+        assert [vcf_row.chrom for vcf_row in vcf_rows] == ['chr1', 'chr2', 'chr9']
+        assert query_plan.access_path == VcfAccessPath.stream_scan
+        assert query_plan.actual_rows == 8
+        assert query_plan.actual_bytes == os.path.getsize('test.vcf')
+
 
 class TestAppendToVcfFile:
 
@@ -363,8 +522,8 @@ class TestAppendToVcfFile:
 
         assert after_append_length == before_append_length + 2
 
-    @mock.patch('application.vcf_files.operations.gzip.open')
-    def test_raise_vcf_data_append_error(self, mock_gzip_open, setup_vcf_unzipped_file) -> None:
+    @mock.patch('application.vcf_files.storage.StreamCompressor')
+    def test_raise_vcf_data_append_error(self, mock_stream_compressor, setup_vcf_gzip_file) -> None:
         vcf_file_path = 'test.vcf.gz'
 
         vcf_rows: List[VcfRow] = [
@@ -384,7 +543,7 @@ class TestAppendToVcfFile:
             ),
         ]
 
-        mock_gzip_open.side_effect = Exception('error')
+        mock_stream_compressor.side_effect = Exception('error')
 
         with pytest.raises(VcfDataAppendError) as ex:
             self.append_vcf_file.run(
@@ -394,6 +553,32 @@ class TestAppendToVcfFile:
         assert ex.value.message == 'error'
         assert ex.typename == 'VcfDataAppendError'
 
+    def test_run_append_bgzf_blocks_to_bgzf_file(self, setup_vcf_gzip_file) -> None:
+        FilterOutRowsById().run(vcf_file_path='test.vcf.gz', filter_id='rs3')
+
+        self.append_vcf_file.run(
+            vcf_file_path='test.vcf.gz',
+            vcf_rows=[VcfRow(chrom='chr9', pos=9, identifier='rs9', ref='T', alt='G')],
+        )
+
+        with open('test.vcf.gz', 'rb') as file:
+            data: bytes = file.read()
+        assert data.endswith(BGZF_EOF)
+        assert gzip.decompress(data).endswith(b'chr9\t9\trs9\tT\tG\n')
+        assert len(plan_vcf_chunks('test.vcf.gz', job_id='1', chunk_size=1)) > 1
+
+    def test_run_append_zstd_frames_to_zstd_file(self, setup_vcf_zstd_file) -> None:
+        self.append_vcf_file.run(
+            vcf_file_path='test.vcf.zst',
+            vcf_rows=[VcfRow(chrom='chr9', pos=9, identifier='rs9', ref='T', alt='G')],
+        )
+
+        with open('test.vcf.zst', 'rb') as file:
+            # The frame of the file, the seek table it had, and the frame of the appended row.
+            assert [size for _, size in read_zstd_seek_table(file.fileno())] == [247, 0, 15]
+        with open_vcf_file('test.vcf.zst') as file:
+            assert file.read().endswith(b'chr4\t4\trs4\tCAG\tC\t3.3\tPASS\ttest\nchr9\t9\trs9\tT\tG\n')
+
     def test_run_append_two_rows_to_gz_file(self, setup_vcf_gzip_file) -> None:
         vcf_file_path = 'test.vcf.gz'
 
@@ -506,8 +691,19 @@ class TestFilterOutRowsById:
             after_remove_length = len([row for row in file if not row.startswith(b'##')])
 
         assert after_remove_length == before_remove_length - 2
+        # The rewritten gzip file is randomly accessible.
+        assert is_bgzf_file(vcf_file_path)
+
+    def test_run_filter_out_by_id_in_zst_file(self, setup_vcf_zstd_file) -> None:
+        assert self.filter_out_rows_by_id.run(vcf_file_path='test.vcf.zst', filter_id='rs1') == 2
 
-    @mock.patch('application.vcf_files.operations.gzip.open')
+        with open_vcf_file('test.vcf.zst') as file:
+            assert [row.split(b'\t')[2] for row in file if not row.startswith(b'#')] == [b'rs3', b'rs4']
+        # The rewritten zstd file is seekable.
+        with open('test.vcf.zst', 'rb') as file:
+            assert read_zstd_seek_table(file.fileno()) is not None
+
+    @mock.patch('application.vcf_files.storage.gzip.open')
     def test_raise_vcf_data_append_error(self, mock_gzip_open, setup_vcf_unzipped_file) -> None:
         vcf_file_path = 'test.vcf.gz'
         filter_id = 'rs1'
@@ -686,7 +882,25 @@ class TestUpdateByIdVcfFile:
         assert updated_data1 == data
         assert updated_data2 == data
 
-    @mock.patch('application.vcf_files.operations.gzip.open')
+    def test_run_update_by_id_with_same_length_data_patches_the_file_in_place(self, setup_vcf_unzipped_file) -> None:
+        data = VcfRow(chrom='chr3', pos=3, identifier='rs3', ref='C', alt='T')
+        inode: int = os.stat('test.vcf').st_ino
+
+        with mock.patch('application.vcf_files.rewriting.splice_rewrite') as mock_splice_rewrite:
+            assert self.update_by_id_vcf_file.run(
+                vcf_file_path='test.vcf',
+                filter_id='rs3',
+                data=copy.copy(data)
+            ) == 1
+            mock_splice_rewrite.assert_not_called()
+
+        with open('test.vcf', 'r') as file:
+            rows = [row for row in file if not row.startswith('#')]
+
+        assert rows[2] == 'chr3\t3\trs3\tC\tT\t2.2\tPASS\ttest\n'
+        assert os.stat('test.vcf').st_ino == inode
+
+    @mock.patch('application.vcf_files.storage.gzip.open')
     def test_raise_vcf_data_append_error(self, mock_gzip_open, setup_vcf_unzipped_file) -> None:
         vcf_file_path = 'test.vcf.gz'
         filter_id = 'rs1'
@@ -708,3 +922,501 @@ class TestUpdateByIdVcfFile:
             )
         assert ex.value.message == 'error'
         assert ex.typename == 'VcfDataUpdateError'
+
+
+class TestApplyVcfFileMutations:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.apply_vcf_file_mutations = ApplyVcfFileMutations()
+        self.mutations = [
+            VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs3'),
+            VcfMutation(
+                operation=VcfMutationOperation.update,
+                filter_id='rs1',
+                data=VcfRow(chrom='chr5', pos=100, identifier='rs1', ref='T', alt='G'),
+            ),
+            VcfMutation(
+                operation=VcfMutationOperation.append,
+                rows=[VcfRow(chrom='chr9', pos=9, identifier='rs9', ref='A', alt='C')],
+            ),
+            VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs404'),
+        ]
+        self.expected_rows = [
+            'chr5\t100\trs1\tT\tG\t1.1\tPASS\ttest\n',
+            'chr5\t100\trs1\tT\tG\t1.1\tPASS\ttest\n',
+            'chr4\t4\trs4\tCAG\tC\t3.3\tPASS\ttest\n',
+            'chr4\t5\trs4\tCAG\tC\t3.3\tPASS\ttest\n',
+            'chr4\t6\trs4\tCAG\tC\t3.3\tPASS\ttest\n',
+            'chr4\t7\trs4\tCAG\tC\t3.3\tPASS\ttest\n',
+            'chr9\t9\trs9\tA\tC\n',
+        ]
+
+    @pytest.mark.parametrize('vcf_file_path, mutations, errors', [
+        # when_vcf_file_path_and_mutations_are_none
+        (
+                None,
+                None,
+                [
+                    InvalidArgumentError('The VCF file path is required.'),
+                    InvalidArgumentError('At least one mutation is required.'),
+                ]
+        ),
+        # when_the_mutations_miss_their_arguments
+        (
+                '/a/b/c/test.vcf',
+                [
+                    VcfMutation(operation=VcfMutationOperation.delete),
+                    VcfMutation(operation=VcfMutationOperation.update, filter_id='rs1'),
+                    VcfMutation(operation=VcfMutationOperation.append, rows=[]),
+                ],
+                [
+                    InvalidArgumentError('The filter id of the delete is required.'),
+                    InvalidArgumentError('Data of the update are required.'),
+                    InvalidArgumentError('At least one row of data is required.'),
+                ]
+        ),
+    ])
+    def test_run_with_invalid_arguments(
+            self,
+            vcf_file_path: Optional[str],
+            mutations: Optional[List[VcfMutation]],
+            errors: List[VCFHandlerBaseError],
+    ) -> None:
+        with pytest.raises(MultipleVCFHandlerBaseError) as ex:
+            self.apply_vcf_file_mutations.run(vcf_file_path=vcf_file_path, mutations=mutations)
+        assert len(ex.value.errors) == len(errors)
+        for returned_error, expected_error in zip(ex.value.errors, errors):
+            assert returned_error.__dict__ == expected_error.__dict__
+
+    def test_run(self, setup_vcf_unzipped_file) -> None:
+        assert self.apply_vcf_file_mutations.run(vcf_file_path='test.vcf', mutations=self.mutations) == [1, 2, 1, 0]
+
+        with open('test.vcf', 'r') as file:
+            rows = [row for row in file if not row.startswith('#')]
+
+        assert rows == self.expected_rows
+
+        # The ID index follows the rewrite.
+        assert VcfIdIndex.load('test.vcf').rows == VcfIdIndex.build('test.vcf').rows
+
+    def test_run_gz_file(self, setup_vcf_gzip_file) -> None:
+        assert self.apply_vcf_file_mutations.run(
+            vcf_file_path='test.vcf.gz', mutations=self.mutations
+        ) == [1, 2, 1, 0]
+
+        with gzip.open('test.vcf.gz', 'rt') as file:
+            rows = [row for row in file if not row.startswith('#')]
+
+        # The gz file only has the first of the rs4 rows.
+        assert rows == self.expected_rows[:3] + self.expected_rows[-1:]
+
+    def test_run_applies_the_mutations_of_an_id_in_order(self, setup_vcf_unzipped_file) -> None:
+        assert self.apply_vcf_file_mutations.run(
+            vcf_file_path='test.vcf',
+            mutations=[
+                VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs4'),
+                VcfMutation(
+                    operation=VcfMutationOperation.update,
+                    filter_id='rs4',
+                    data=VcfRow(chrom='chr5', pos=100, identifier='rs4', ref='T', alt='G'),
+                ),
+            ]
+        ) == [4, 0]
+
+        with open('test.vcf', 'r') as file:
+            assert len([row for row in file if not row.startswith('#')]) == 3
+
+    @mock.patch('application.vcf_files.storage.gzip.open')
+    def test_raise_vcf_data_mutation_error(self, mock_gzip_open, setup_vcf_unzipped_file) -> None:
+        mock_gzip_open.side_effect = Exception('error')
+
+        with pytest.raises(VcfDataMutationError) as ex:
+            self.apply_vcf_file_mutations.run(vcf_file_path='test.vcf.gz', mutations=self.mutations)
+        assert ex.value.message == 'error'
+        assert ex.typename == 'VcfDataMutationError'
+
+
+class TestRecordVcfFileMutations:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.record_vcf_file_mutations = RecordVcfFileMutations()
+        self.filter_vcf_file = FilterVcfFile()
+        self.headers = [VCFHeader.chrom, VCFHeader.pos, VCFHeader.id, VCFHeader.ref, VCFHeader.alt]
+
+    def test_run_raise_vcf_file_not_found_error(self) -> None:
+        with pytest.raises(VcfFileNotFoundError):
+            self.record_vcf_file_mutations.run(
+                vcf_file_path='missing.vcf',
+                mutations=[VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs1')],
+            )
+
+    @pytest.mark.parametrize('vcf_file_path', ['test.vcf', 'test.vcf.gz'])
+    def test_run_records_the_mutations_without_writing_the_file(
+            self, vcf_file_path: str, setup_vcf_unzipped_file, setup_vcf_gzip_file
+    ) -> None:
+        with open(vcf_file_path, 'rb') as file:
+            contents: bytes = file.read()
+
+        assert self.record_vcf_file_mutations.run(
+            vcf_file_path=vcf_file_path,
+            mutations=[
+                VcfMutation(
+                    operation=VcfMutationOperation.update,
+                    filter_id='rs1',
+                    data=VcfRow(chrom='chr5', pos=100, identifier='rs3', ref='T', alt='G'),
+                ),
+                VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs404'),
+                VcfMutation(
+                    operation=VcfMutationOperation.append,
+                    rows=[VcfRow(chrom='chr9', pos=9, identifier='rs3', ref='A', alt='C')],
+                ),
+            ]
+        ) == [2, 0, 1]
+        # Counted after the update and the append of the previous calls.
+        assert self.record_vcf_file_mutations.run(
+            vcf_file_path=vcf_file_path,
+            mutations=[VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs3')],
+        ) == [4]
+
+        with open(vcf_file_path, 'rb') as file:
+            assert file.read() == contents
+        assert len(VcfDeltaLog.load(vcf_file_path).entries) == 3
+
+        with pytest.raises(VcfRowsByIdNotExistError):
+            self.filter_vcf_file.run(vcf_file_path=vcf_file_path, headers=self.headers, filter_id='rs3')
+
+    def test_filter_vcf_file_merges_the_delta_log(self, setup_vcf_unzipped_file) -> None:
+        self.record_vcf_file_mutations.run(
+            vcf_file_path='test.vcf',
+            mutations=[
+                VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs4'),
+                VcfMutation(
+                    operation=VcfMutationOperation.append,
+                    rows=[
+                        VcfRow(chrom='chr9', pos=9, identifier='rs4', ref='A', alt='C'),
+                        VcfRow(chrom='chr9', pos=10, identifier='rs4', ref='A', alt='C'),
+                    ],
+                ),
+            ]
+        )
+
+        assert self.filter_vcf_file.run(
+            vcf_file_path='test.vcf', headers=self.headers, filter_id='rs4', page_size=1, page_index=1
+        ) == [VcfRow(chrom='chr9', pos=10, identifier='rs4', ref='A', alt='C')]
+
+    def test_run_schedules_the_compaction_past_the_count_threshold(self, setup_vcf_unzipped_file) -> None:
+        record_vcf_file_mutations = RecordVcfFileMutations(compaction_count=2)
+        mutation = VcfMutation(
+            operation=VcfMutationOperation.append,
+            rows=[VcfRow(chrom='chr9', pos=9, identifier='rs9', ref='A', alt='C')],
+        )
+
+        with mock.patch('application.vcf_files.operations.CompactVcfFileDelta.run.delay') as mock_delay:
+            record_vcf_file_mutations.run(vcf_file_path='test.vcf', mutations=[mutation])
+            mock_delay.assert_not_called()
+            record_vcf_file_mutations.run(vcf_file_path='test.vcf', mutations=[mutation])
+            mock_delay.assert_called_once_with(vcf_file_path='test.vcf')
+
+
+class TestCompactVcfFileDelta:
+
+    @pytest.mark.parametrize('vcf_file_path', ['test.vcf', 'test.vcf.gz'])
+    def test_run(self, vcf_file_path: str, setup_vcf_unzipped_file, setup_vcf_gzip_file) -> None:
+        RecordVcfFileMutations().run(
+            vcf_file_path=vcf_file_path,
+            mutations=[
+                VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs1'),
+                VcfMutation(
+                    operation=VcfMutationOperation.update,
+                    filter_id='rs3',
+                    data=VcfRow(chrom='chr3', pos=30, identifier='rs3', ref='C', alt='T'),
+                ),
+                VcfMutation(
+                    operation=VcfMutationOperation.append,
+                    rows=[VcfRow(chrom='chr9', pos=9, identifier='rs9', ref='A', alt='C')],
+                ),
+            ]
+        )
+
+        assert CompactVcfFileDelta.run(vcf_file_path=vcf_file_path) == 3
+
+        with (gzip.open(vcf_file_path, 'rt') if vcf_file_path.endswith('.gz') else open(vcf_file_path, 'r')) as file:
+            rows = file.readlines()
+
+        assert rows[3].startswith('#CHROM')
+        assert rows[4:6] == ['chr3\t30\trs3\tC\tT\t2.2\tPASS\ttest\n', 'chr4\t4\trs4\tCAG\tC\t3.3\tPASS\ttest\n']
+        assert rows[-1] == 'chr9\t9\trs9\tA\tC\n'
+        assert VcfDeltaLog.load(vcf_file_path) is None
+
+    def test_run_discards_a_stale_delta_log(self, setup_vcf_unzipped_file) -> None:
+        RecordVcfFileMutations().run(
+            vcf_file_path='test.vcf',
+            mutations=[VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs1')],
+        )
+        FilterOutRowsById().run(vcf_file_path='test.vcf', filter_id='rs3')
+
+        assert CompactVcfFileDelta.run(vcf_file_path='test.vcf') == 0
+        assert VcfDeltaLog.load('test.vcf') is None
+
+
+class TestIngestVcfRows:
+
+    @pytest.mark.parametrize('vcf_file_path', ['test.vcf', 'test.vcf.gz'])
+    def test_run(self, vcf_file_path: str, setup_vcf_unzipped_file, setup_vcf_gzip_file) -> None:
+        chunks: List[bytes] = [
+            b'{"CHROM": "chr9", "POS": 9, "ID": "rs9", "REF": "A", "ALT": "C"}\n\n{"CHROM": "chr1',
+            b'0", "POS": 10, "ID": "rs10", "REF": "G", "ALT": "."}',
+        ]
+
+        assert IngestVcfRows().run(
+            vcf_file_path=vcf_file_path, chunks=chunks, ingest_format=VcfIngestFormat.ndjson
+        ) == 2
+
+        with (gzip.open(vcf_file_path, 'rt') if vcf_file_path.endswith('.gz') else open(vcf_file_path, 'r')) as file:
+            rows = file.readlines()
+
+        assert rows[-3].startswith('chr4')
+        assert rows[-2:] == ['chr9\t9\trs9\tA\tC\n', 'chr10\t10\trs10\tG\t.\n']
+
+    def test_run_zst_file(self, setup_vcf_zstd_file) -> None:
+        assert IngestVcfRows().run(
+            vcf_file_path='test.vcf.zst', chunks=[b'chr9\t9\trs9\tA\tC\n'], ingest_format=VcfIngestFormat.tsv
+        ) == 1
+
+        with open_vcf_file('test.vcf.zst') as file:
+            assert file.readlines()[-1] == b'chr9\t9\trs9\tA\tC\n'
+        with open('test.vcf.zst', 'rb') as file:
+            assert [size for _, size in read_zstd_seek_table(file.fileno())][-1] == 15
+
+    def test_run_folds_the_pending_delta_log_first(self, setup_vcf_unzipped_file) -> None:
+        RecordVcfFileMutations().run(
+            vcf_file_path='test.vcf',
+            mutations=[VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs4')],
+        )
+
+        IngestVcfRows().run(
+            vcf_file_path='test.vcf', chunks=[b'chr9\t9\trs9\tA\tC\t.\tPASS\t.\n'], ingest_format=VcfIngestFormat.tsv
+        )
+
+        with open('test.vcf', 'r') as file:
+            data = file.read()
+        assert '\trs4\t' not in data
+        assert data.endswith('chr9\t9\trs9\tA\tC\t.\tPASS\t.\n')
+        assert VcfDeltaLog.load('test.vcf') is None
+
+    def test_run_with_invalid_rows_appends_nothing(self, setup_vcf_unzipped_file) -> None:
+        with open('test.vcf', 'rb') as file:
+            data = file.read()
+
+        with pytest.raises(MultipleVCFHandlerBaseError) as error:
+            IngestVcfRows().run(
+                vcf_file_path='test.vcf',
+                chunks=[b'chr9\t9\trs9\tA\tC\n', b'chr9\t9\tid9\tA\tC\n', b'chr9\tnine\trs9\tA\tC\n'],
+                ingest_format=VcfIngestFormat.tsv,
+            )
+
+        assert [ex.message for ex in error.value.errors] == [
+            'Line 2: The row is not a valid tab separated VCF row.',
+            'Line 3: The row is not a valid tab separated VCF row.',
+        ]
+        with open('test.vcf', 'rb') as file:
+            assert file.read() == data
+        assert not [name for name in os.listdir('.') if name.endswith('.ingest')]
+
+    def test_run_without_rows(self, setup_vcf_unzipped_file) -> None:
+        with pytest.raises(InvalidArgumentError, match='At least one row of data is required.'):
+            IngestVcfRows().run(vcf_file_path='test.vcf', chunks=[b'\n'], ingest_format=VcfIngestFormat.ndjson)
+
+    def test_run_on_missing_file(self) -> None:
+        with pytest.raises(VcfFileNotFoundError):
+            IngestVcfRows().run(vcf_file_path='missing.vcf', chunks=[b''], ingest_format=VcfIngestFormat.ndjson)
+
+
+class TestExportVcfFile:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.export_vcf_file = ExportVcfFile()
+
+    def test_run_with_invalid_arguments(self) -> None:
+        with pytest.raises(MultipleVCFHandlerBaseError) as ex:
+            self.export_vcf_file.run(vcf_file_path=None)
+        assert [error.message for error in ex.value.errors] == [
+            'The VCF file path is required.',
+            'An id, a region or a filter status is required.',
+        ]
+
+    def test_run_raise_vcf_file_not_found_error_before_streaming(self) -> None:
+        with pytest.raises(VcfFileNotFoundError):
+            self.export_vcf_file.run(vcf_file_path='missing.vcf', filter_id='rs1')
+
+    @pytest.mark.parametrize('filter_id, region, filter_status, expected_positions', [
+        # by_id
+        ('rs1', None, None, [b'1', b'2']),
+        # by_region
+        (None, VcfRegion(chrom='chr4', start=5, end=6), None, [b'5', b'6']),
+        # by_region_and_filter_status
+        (None, VcfRegion(chrom='chr3'), 'PASS', [b'3']),
+        # by_id_without_matches
+        ('rs9', None, None, []),
+    ])
+    def test_run(
+            self,
+            filter_id: Optional[str],
+            region: Optional[VcfRegion],
+            filter_status: Optional[str],
+            expected_positions: List[bytes],
+            setup_vcf_unzipped_file,
+    ) -> None:
+        exported: bytes = b''.join(
+            self.export_vcf_file.run(
+                vcf_file_path='test.vcf',
+                filter_id=filter_id,
+                region=region,
+                filter_status=filter_status,
+            )
+        )
+
+        lines: List[bytes] = exported.splitlines(keepends=True)
+        with open('test.vcf', 'rb') as file:
+            original_lines: List[bytes] = file.readlines()
+
+        # The header is kept as it is, and the rows keep all their columns.
+        assert lines[:4] == original_lines[:4]
+        assert [line.split(b'\t')[1] for line in lines[4:]] == expected_positions
+        assert all(line in original_lines for line in lines[4:])
+
+    @pytest.mark.parametrize('compression', [VcfCompression.gzip, VcfCompression.bgzf])
+    def test_run_compressed_export_of_gz_file(self, compression: VcfCompression, setup_vcf_gzip_file) -> None:
+        exported: bytes = b''.join(
+            self.export_vcf_file.run(vcf_file_path='test.vcf.gz', filter_id='rs3', compression=compression)
+        )
+
+        assert gzip.decompress(exported).splitlines()[-1] == b'chr3\t3\trs3\tA\tG\t2.2\tPASS\ttest'
+
+
+class TestVcfJobs:
+
+    def test_every_task_has_its_own_name(self) -> None:
+        tasks = [
+            AsyncFilterOutRowsById, AsyncExportVcfFile, AsyncBuildVcfIdIndex, CompactVcfFileDelta, AsyncConvertVcfFile
+        ]
+
+        assert len({task.run.name for task in tasks}) == len(tasks)
+
+    def test_async_filter_out_rows_by_id_returns_the_job_meta(self, setup_vcf_unzipped_file) -> None:
+        meta: dict = AsyncFilterOutRowsById().run(vcf_file_path='test.vcf', filter_id='rs4')
+
+        assert meta['operation'] == 'delete'
+        assert meta['rows_processed'] == 4
+        assert meta['bytes_processed'] == meta['total_bytes'] == 424
+        assert meta['artifact'] == {'file_path': 'test.vcf', 'total_rows_deleted': 4}
+
+    def test_async_filter_out_rows_by_id_raise_vcf_no_data_deleted_error(self, setup_vcf_unzipped_file) -> None:
+        with pytest.raises(VcfNoDataDeletedError) as ex:
+            AsyncFilterOutRowsById().run(vcf_file_path='test.vcf', filter_id='rs9')
+        assert ex.value.message == 'No data found for deletion'
+
+    def test_async_export_vcf_file_writes_the_export(self, setup_vcf_gzip_file) -> None:
+        try:
+            meta: dict = AsyncExportVcfFile().run(
+                vcf_file_path='test.vcf.gz', export_path='test.1.vcf.gz', filter_id='rs1', compression='gzip'
+            )
+
+            assert meta['rows_processed'] == 4
+            assert meta['artifact'] == {'file_path': 'test.vcf.gz', 'export_path': 'test.1.vcf.gz'}
+            with gzip.open('test.1.vcf.gz', 'rb') as file:
+                assert [row.split(b'\t')[2] for row in file if not row.startswith(b'#')] == [b'rs1', b'rs1']
+        finally:
+            os.remove('test.1.vcf.gz')
+
+    def test_async_build_vcf_id_index_saves_the_index(self, setup_vcf_unzipped_file) -> None:
+        meta: dict = AsyncBuildVcfIdIndex().run(vcf_file_path='test.vcf')
+
+        assert meta['artifact'] == {'file_path': 'test.vcf', 'total_rows_indexed': 7}
+        assert VcfIdIndex.load('test.vcf').lookup('rs4')
+
+    def test_async_build_vcf_id_index_catches_up_with_appended_rows(self, setup_vcf_unzipped_file) -> None:
+        AsyncBuildVcfIdIndex().run(vcf_file_path='test.vcf')
+        with open('test.vcf', 'a') as file:
+            file.write('chr9\t9\trs9\tA\tC\t1.0\tPASS\ttest\n')
+
+        meta: dict = AsyncBuildVcfIdIndex().run(vcf_file_path='test.vcf')
+
+        assert meta['artifact'] == {'file_path': 'test.vcf', 'total_rows_indexed': 1}
+        assert VcfIdIndex.load('test.vcf').lookup('rs9')
+
+    def test_async_build_vcf_id_index_does_not_rebuild_an_up_to_date_index(self, setup_vcf_unzipped_file) -> None:
+        AsyncBuildVcfIdIndex().run(vcf_file_path='test.vcf')
+
+        with mock.patch.object(VcfIdIndex, 'build') as mock_build:
+            meta: dict = AsyncBuildVcfIdIndex().run(vcf_file_path='test.vcf')
+
+        assert meta['artifact'] == {'file_path': 'test.vcf', 'total_rows_indexed': 0}
+        mock_build.assert_not_called()
+
+    def test_async_build_vcf_id_index_raise_invalid_argument_error_for_compressed_files(self) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            AsyncBuildVcfIdIndex().run(vcf_file_path='test.vcf.gz')
+        assert ex.value.message == 'Only uncompressed VCF files have an ID index.'
+
+    def test_async_convert_vcf_file_writes_a_seekable_zstd_file(self, setup_vcf_gzip_file) -> None:
+        try:
+            meta: dict = AsyncConvertVcfFile().run(
+                vcf_file_path='test.vcf.gz', converted_path='test.vcf.zst', compression='zstd'
+            )
+
+            assert meta['operation'] == 'convert'
+            assert meta['rows_processed'] == 4
+            assert meta['artifact'] == {'file_path': 'test.vcf.gz', 'converted_path': 'test.vcf.zst'}
+            with gzip.open('test.vcf.gz', 'rb') as file, open_vcf_file('test.vcf.zst') as converted_file:
+                assert converted_file.read() == file.read()
+            with open('test.vcf.zst', 'rb') as file:
+                assert read_zstd_seek_table(file.fileno()) is not None
+        finally:
+            os.remove('test.vcf.zst')
+
+    def test_async_convert_vcf_file_folds_the_pending_delta_log_first(self, setup_vcf_unzipped_file) -> None:
+        RecordVcfFileMutations().run(
+            vcf_file_path='test.vcf',
+            mutations=[VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs4')],
+        )
+
+        AsyncConvertVcfFile().run(vcf_file_path='test.vcf', converted_path='test.vcf.gz', compression='gzip')
+
+        try:
+            assert is_bgzf_file('test.vcf.gz')
+            with gzip.open('test.vcf.gz', 'rb') as file:
+                assert b'\trs4\t' not in file.read()
+        finally:
+            os.remove('test.vcf.gz')
+
+    def test_async_convert_vcf_file_raise_invalid_argument_error_when_the_converted_file_is_another_file(
+            self,
+            setup_vcf_gzip_file,
+    ) -> None:
+        with open('other.vcf', 'wb') as file:
+            file.write(b'other')
+        try:
+            with pytest.raises(InvalidArgumentError) as ex:
+                AsyncConvertVcfFile().run(
+                    vcf_file_path='test.vcf.gz', converted_path='other.vcf', compression='none'
+                )
+            assert ex.value.message == 'The converted VCF file other.vcf already exists.'
+            with open('other.vcf', 'rb') as file:
+                assert file.read() == b'other'
+        finally:
+            for file_path in glob.glob('other.vcf*'):
+                os.remove(file_path)
+
+    def test_read_vcf_job(self) -> None:
+        with mock.patch('application.vcf_files.operations.celery_app.AsyncResult') as mock_async_result:
+            mock_async_result.return_value.state = 'FAILURE'
+            mock_async_result.return_value.info = VcfNoDataDeletedError('No data found for deletion')
+
+            assert ReadVcfJob().run(job_id='1') == VcfJob(
+                job_id='1', state=VcfJobState.failure, error='No data found for deletion'
+            )
+            mock_async_result.assert_called_once_with('1')
@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.deltas import VcfDeltaLog
+from application.vcf_files.enums import VcfAccessPath, VcfCompression
+from application.vcf_files.indexes import MappedVcfIdIndex, VcfIdIndex
+from application.vcf_files.models import VcfQueryPlan
+from application.vcf_files.planning import VcfQueryPlanner
+from application.vcf_files.utils import get_file_version
+
+
+class TestVcfQueryPlanner:
+
+    def test_plan_id_index_for_uncompressed_file_with_index(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+
+        query_plan: VcfQueryPlan = VcfQueryPlanner(index_min_size=0).plan(
+            vcf_file_path='test.vcf', filter_id='rs4', page_size=2, page_index=1
+        )
+
+        assert query_plan.access_path == VcfAccessPath.id_index
+        assert query_plan.compression == VcfCompression.none
+        assert query_plan.estimated_rows == 2
+        assert query_plan.row_ranges == VcfIdIndex.load('test.vcf').lookup('rs4')[2:4]
+        assert query_plan.estimated_bytes == sum(length for _, length in query_plan.row_ranges)
+        assert query_plan.file_version == get_file_version('test.vcf')
+
+    def test_plan_index_miss(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+
+        query_plan: VcfQueryPlan = VcfQueryPlanner(index_min_size=0).plan(
+            vcf_file_path='test.vcf', filter_id='rs9', page_size=10, page_index=0
+        )
+
+        assert query_plan.access_path == VcfAccessPath.index_miss
+        assert query_plan.estimated_rows == 0
+        assert query_plan.estimated_bytes == 0
+
+    def test_plan_stream_scan_for_small_file_without_index(self, setup_vcf_unzipped_file) -> None:
+        query_plan: VcfQueryPlan = VcfQueryPlanner().plan(
+            vcf_file_path='test.vcf', filter_id='rs1', page_size=10, page_index=0
+        )
+
+        assert query_plan.access_path == VcfAccessPath.stream_scan
+        assert query_plan.estimated_bytes == os.path.getsize('test.vcf')
+        assert not VcfIdIndex.exists('test.vcf')
+
+    def test_plan_stream_scan_for_large_file_without_index_does_not_build_it(self, setup_vcf_unzipped_file) -> None:
+        query_plan: VcfQueryPlan = VcfQueryPlanner(index_min_size=0).plan(
+            vcf_file_path='test.vcf', filter_id='rs1', page_size=10, page_index=0
+        )
+
+        assert query_plan.access_path == VcfAccessPath.stream_scan
+        assert query_plan.reason == 'The file has no fresh ID index yet, it is built by the index job.'
+        assert not os.path.exists('test.vcf' + VcfIdIndex.SUFFIX)
+        assert not os.path.exists('test.vcf' + MappedVcfIdIndex.SUFFIX)
+
+    def test_plan_stream_scan_for_file_with_stale_index_does_not_catch_it_up(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+        with open('test.vcf' + VcfIdIndex.SUFFIX, 'rb') as file:
+            index_contents: bytes = file.read()
+        with open('test.vcf', 'a') as file:
+            file.write('chr9\t9\trs9\tA\tC\t1.0\tPASS\ttest\n')
+
+        query_plan: VcfQueryPlan = VcfQueryPlanner(index_min_size=0).plan(
+            vcf_file_path='test.vcf', filter_id='rs9', page_size=10, page_index=0
+        )
+
+        assert query_plan.access_path == VcfAccessPath.stream_scan
+        with open('test.vcf' + VcfIdIndex.SUFFIX, 'rb') as file:
+            assert file.read() == index_contents
+
+    def test_plan_id_index_for_small_file_with_index(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+
+        query_plan: VcfQueryPlan = VcfQueryPlanner().plan(
+            vcf_file_path='test.vcf', filter_id='rs1', page_size=10, page_index=0
+        )
+
+        assert query_plan.access_path == VcfAccessPath.id_index
+        assert query_plan.estimated_rows == 2
+
+    def test_plan_stream_scan_for_compressed_file(self, setup_vcf_gzip_file) -> None:
+        query_plan: VcfQueryPlan = VcfQueryPlanner(index_min_size=0).plan(
+            vcf_file_path='test.vcf.gz', filter_id='rs1', page_size=10, page_index=0
+        )
+
+        assert query_plan.access_path == VcfAccessPath.stream_scan
+        assert query_plan.compression == VcfCompression.gzip
+
+    def test_plan_merge_scan_for_file_with_delta_log(self, setup_vcf_unzipped_file) -> None:
+        with open('test.vcf' + VcfDeltaLog.SUFFIX, 'wb'):
+            pass
+
+        query_plan: VcfQueryPlan = VcfQueryPlanner(index_min_size=0).plan(
+            vcf_file_path='test.vcf', filter_id='rs1', page_size=10, page_index=0
+        )
+
+        assert query_plan.access_path == VcfAccessPath.merge_scan
+
+    def test_init_raise_invalid_argument_error(self) -> None:
+        with pytest.raises(InvalidArgumentError):
+            VcfQueryPlanner(index_min_size=-1)
@@ -0,0 +1,76 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.caching import VcfPageCache
+from application.vcf_files.errors import VcfRowsByIdNotExistError
+from application.vcf_files.prefetching import NextPagePrefetcher
+
+
+class TestNextPagePrefetcher:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.page_cache = VcfPageCache(max_size=10)
+        self.prefetcher = NextPagePrefetcher(page_cache=self.page_cache, max_workers=1, max_load=1)
+
+        yield
+
+        self.prefetcher.shutdown()
+
+    @pytest.mark.parametrize('max_workers, max_load, message', [
+        # when_max_workers_is_zero
+        (0, 1, 'A prefetch max workers above 0 is required.'),
+        # when_max_load_is_none
+        (1, None, 'A prefetch max load above 0 is required.'),
+    ])
+    def test_init_with_invalid_arguments(self, max_workers: int, max_load: int, message: str) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            NextPagePrefetcher(page_cache=self.page_cache, max_workers=max_workers, max_load=max_load)
+        assert ex.value.message == message
+
+    def test_page_served_prefetches_on_sequential_access(self) -> None:
+        load_next_page = MagicMock(return_value='page 2')
+
+        assert not self.prefetcher.page_served('walk', 0, 'key 1', MagicMock())
+        assert self.prefetcher.page_served('walk', 1, 'key 2', load_next_page)
+        self.prefetcher.shutdown()
+
+        assert self.page_cache.get('key 2') == 'page 2'
+
+    def test_page_served_does_not_prefetch_on_random_access(self) -> None:
+        load_next_page = MagicMock()
+
+        self.prefetcher.page_served('walk', 3, 'key 4', load_next_page)
+
+        assert not self.prefetcher.page_served('walk', 1, 'key 2', load_next_page)
+        load_next_page.assert_not_called()
+
+    def test_page_served_does_not_prefetch_under_load(self) -> None:
+        self.prefetcher.foreground_request_started()
+        self.prefetcher.foreground_request_started()
+        self.prefetcher.page_served('walk', 0, 'key 1', MagicMock())
+
+        assert not self.prefetcher.page_served('walk', 1, 'key 2', MagicMock())
+
+        self.prefetcher.foreground_request_finished()
+        self.prefetcher.foreground_request_finished()
+
+    def test_page_served_caps_the_concurrent_prefetches(self) -> None:
+        release = threading.Event()
+        self.prefetcher.page_served('walk a', 0, 'a 1', MagicMock())
+        self.prefetcher.page_served('walk b', 0, 'b 1', MagicMock())
+
+        assert self.prefetcher.page_served('walk a', 1, 'a 2', lambda: release.wait(5))
+        assert not self.prefetcher.page_served('walk b', 1, 'b 2', MagicMock())
+
+        release.set()
+
+    def test_prefetch_of_a_page_after_the_last_one_caches_nothing(self) -> None:
+        self.prefetcher.page_served('walk', 0, 'key 1', MagicMock())
+        self.prefetcher.page_served('walk', 1, 'key 2', MagicMock(side_effect=VcfRowsByIdNotExistError()))
+        self.prefetcher.shutdown()
+
+        assert 'key 2' not in self.page_cache
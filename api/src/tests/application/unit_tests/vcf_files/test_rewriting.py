@@ -0,0 +1,81 @@
+import gzip
+from unittest.mock import patch
+
+import pytest
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.indexes import MappedVcfIdIndex, VcfIdIndex, load_mapped_id_index
+from application.vcf_files.models import VcfRewriteResult
+from application.vcf_files.rewriting import rewrite_vcf_rows
+from application.vcf_files.utils import get_file_version, replace_vcf_row_columns
+
+
+class TestRewriteVcfRows:
+
+    def test_rewrite_vcf_rows_drops_and_replaces_the_indexed_rows(self, setup_vcf_unzipped_file) -> None:
+        def transform(row: bytes):
+            return None if row.startswith(b'chr1') else replace_vcf_row_columns(row, b'chr9\t9\trs9\tA\tC')
+
+        result: VcfRewriteResult = rewrite_vcf_rows(
+            'test.vcf', transform=transform, identifiers={b'rs1'}, rows_to_add=[b'chr8\t8\trs8\tA\tC\n']
+        )
+
+        assert result == VcfRewriteResult(total_rows_matched=2, total_rows_dropped=1, total_rows_added=1)
+        with open('test.vcf', 'rb') as file:
+            rows = [row for row in file if not row.startswith(b'#')]
+        assert rows[0] == b'chr9\t9\trs9\tA\tC\t1.1\tPASS\ttest\n'
+        assert rows[-1] == b'chr8\t8\trs8\tA\tC\n'
+        assert len(rows) == 7
+        # The ID index follows the rewrite.
+        assert VcfIdIndex.load('test.vcf').lookup('rs9')
+        assert VcfIdIndex.load('test.vcf').is_fresh(get_file_version('test.vcf'))
+
+    def test_rewrite_vcf_rows_patches_the_rows_keeping_their_ids_without_parsing_the_index(
+            self,
+            setup_vcf_unzipped_file,
+    ) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+        load_mapped_id_index('test.vcf')
+
+        with patch.object(VcfIdIndex, 'load') as mock_load:
+            result: VcfRewriteResult = rewrite_vcf_rows(
+                'test.vcf', transform=lambda row: row.replace(b'PASS', b'FAIL'), identifiers={b'rs4'}
+            )
+        mock_load.assert_not_called()
+
+        assert result == VcfRewriteResult(total_rows_matched=4)
+        file_version = get_file_version('test.vcf')
+        id_index: VcfIdIndex = VcfIdIndex.load('test.vcf')
+        assert id_index.is_fresh(file_version)
+        assert id_index.rows == VcfIdIndex.build('test.vcf').rows
+        assert MappedVcfIdIndex.map('test.vcf').is_fresh(file_version)
+        with open('test.vcf', 'rb') as file:
+            assert [row for row in file if b'\trs4\t' in row and b'FAIL' not in row] == []
+
+    def test_rewrite_vcf_rows_streams_compressed_files(self, setup_vcf_gzip_file) -> None:
+        result: VcfRewriteResult = rewrite_vcf_rows('test.vcf.gz', transform=lambda row: None, identifiers={b'rs1'})
+
+        assert result == VcfRewriteResult(total_rows_matched=2, total_rows_dropped=2)
+        with gzip.open('test.vcf.gz', 'rb') as file:
+            rows = [row for row in file if not row.startswith(b'#')]
+        assert [row.split(b'\t')[2] for row in rows] == [b'rs3', b'rs4']
+
+    def test_rewrite_vcf_rows_transforms_every_row_without_ids(self, setup_vcf_unzipped_file) -> None:
+        result: VcfRewriteResult = rewrite_vcf_rows('test.vcf', transform=lambda row: row.replace(b'PASS', b'FAIL'))
+
+        assert result.total_rows_matched == 7
+        with open('test.vcf', 'rb') as file:
+            assert b'PASS' not in file.read()
+
+    def test_rewrite_vcf_rows_leaves_an_unchanged_file_untouched(self, setup_vcf_gzip_file) -> None:
+        file_version = get_file_version('test.vcf.gz')
+
+        result: VcfRewriteResult = rewrite_vcf_rows('test.vcf.gz', transform=lambda row: row)
+
+        assert result.total_rows_matched == 4
+        assert get_file_version('test.vcf.gz') == file_version
+
+    def test_rewrite_vcf_rows_raise_invalid_argument_error(self) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            rewrite_vcf_rows('test.vcf.bz2', transform=lambda row: row)
+        assert ex.value.message == 'The compression bzip2 of test.vcf.bz2 is not supported.'
@@ -3,7 +3,8 @@ from typing import Optional
 
 from marshmallow import ValidationError
 
-from application.rest_api.vcf_files.schemas import PostVcfRowSchema
+from application.rest_api.vcf_files.schemas import PostVcfRowSchema, VcfFilePaginationResponseSchema
+from application.vcf_files.models import FilteredVcfRowsPage, VcfRow
 from application.vcf_files.operations import FilterVcfFile
 
 
@@ -410,3 +411,18 @@ class TestPostVcfRowSchema:
         with pytest.raises(ValidationError) as ex:
             schema.load(data=vcf_row)
         assert ex.value.args == error.args
+
+
+class TestVcfFilePaginationResponseSchema:
+
+    def test_dumps_and_loads_a_page(self) -> None:
+        schema = VcfFilePaginationResponseSchema()
+        page = FilteredVcfRowsPage(
+            results=[VcfRow(chrom='chr1', pos=1, identifier='rs1', ref='T', alt='G')],
+            total=1,
+            filtered_id='rs1',
+            page_size=10,
+            page_index=0,
+        )
+
+        assert schema.loads(schema.dumps(page)) == page
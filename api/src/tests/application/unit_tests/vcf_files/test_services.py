@@ -1,15 +1,34 @@
+import gzip
+import os
+import threading
+
 import pytest
 from typing import Optional, List, Dict, Union
 from unittest.mock import MagicMock
 
+from application.infrastructure.concurrency.admission import AdmissionController
+from application.infrastructure.concurrency.bounded_executor import BoundedExecutor
+from application.infrastructure.concurrency.group_commit import GroupCommit
+from application.infrastructure.concurrency.single_flight import SingleFlight
 from application.infrastructure.error.errors import InvalidArgumentError, MultipleVCFHandlerBaseError, \
-    VCFHandlerBaseError
+    VCFHandlerBaseError, OverloadError
 from application.rest_api.vcf_files.enums import VCFHeader
 from application.vcf_files.errors import VcfNoDataDeletedError, VcfDataUpdateError
 from application.vcf_files.models import VcfRow, FilteredVcfRowsPage, AppendRowsExecutionArtifact, \
-    UpdatedRowsExecutionArtifact
+    UpdatedRowsExecutionArtifact, VcfRegion, VcfFileExport, VcfMutation, VcfMutationResult, \
+    BatchMutationExecutionArtifact, VcfJob
+from application.vcf_files.caching import VcfPageCache
+from application.vcf_files.deltas import VcfDeltaLog
+from application.vcf_files.enums import VcfCompression, VcfMutationOperation, VcfJobOperation, VcfJobState, \
+    VcfAccessPath
+from application.vcf_files.indexes import VcfIdIndex
+from application.vcf_files.operations import FilterVcfFile
+from application.vcf_files.planning import VcfQueryPlanner
+from application.vcf_files.prefetching import NextPagePrefetcher
 from application.vcf_files.services import VcfFilePaginationService, AppendDataToVcfFileService, \
-    FilterOutRowsByIdService, VcfFileUpdateByIdService
+    FilterOutRowsByIdService, VcfFileUpdateByIdService, VcfFileHeaderService, \
+    ExportVcfFileService, VcfFileBatchMutationService, AsyncFilterOutRowsByIdService, AsyncExportVcfFileService, \
+    VcfJobStatusService, AsyncConvertVcfFileService
 
 
 class TestGetCategoriesService:
@@ -101,7 +120,146 @@ class TestGetCategoriesService:
             filter_id=filter_id,
             page_size=page_size,
             page_index=page_index,
+            query_plan=None,
+        )
+
+    def test_apply_with_explain_returns_the_plan_without_the_page_cache(self, setup_vcf_unzipped_file) -> None:
+        VcfIdIndex.build('test.vcf').save('test.vcf')
+        page_cache = VcfPageCache()
+        vcf_file_pagination_service = VcfFilePaginationService(
+            FilterVcfFile(), page_cache=page_cache, query_planner=VcfQueryPlanner(index_min_size=0)
+        )
+
+        page: FilteredVcfRowsPage = vcf_file_pagination_service.apply(
+            vcf_file_path='test.vcf',
+            filter_id='rs1',
+            page_size=10,
+            page_index=0,
+            explain=True,
+        )
+
+        assert page.total == 2
+        assert page.plan.access_path == VcfAccessPath.id_index
+        assert page.plan.estimated_rows == page.plan.actual_rows == 2
+        assert len(page_cache) == 0
+        assert vcf_file_pagination_service.apply(vcf_file_path='test.vcf', filter_id='rs1').plan is None
+
+    def test_apply_reads_the_page_on_the_scan_executor(self) -> None:
+        scan_executor = BoundedExecutor(max_workers=1, thread_name_prefix='vcf-scan')
+        vcf_file_pagination_service = VcfFilePaginationService(self.mock_filter_vcf_file, scan_executor=scan_executor)
+        self.mock_filter_vcf_file.run.side_effect = lambda **kwargs: [
+            VcfRow(chrom='chr1', pos=1, identifier=threading.current_thread().name, ref='T', alt='G'),
+        ]
+
+        page: FilteredVcfRowsPage = vcf_file_pagination_service.apply(vcf_file_path='test.vcf', filter_id='rs1')
+        scan_executor.shutdown()
+
+        assert page.results[0].identifier.startswith('vcf-scan')
+
+    def test_apply_plans_the_page_on_the_scan_executor(self) -> None:
+        scan_executor = BoundedExecutor(max_workers=1, thread_name_prefix='vcf-scan')
+        mock_query_planner = MagicMock()
+        mock_query_planner.plan.side_effect = lambda **kwargs: threading.current_thread().name
+        vcf_file_pagination_service = VcfFilePaginationService(
+            self.mock_filter_vcf_file, query_planner=mock_query_planner, scan_executor=scan_executor
+        )
+        self.mock_filter_vcf_file.run.return_value = []
+
+        vcf_file_pagination_service.apply(vcf_file_path='test.vcf', filter_id='rs1')
+        scan_executor.shutdown()
+
+        assert self.mock_filter_vcf_file.run.call_args[1]['query_plan'].startswith('vcf-scan')
+
+    def test_apply_with_explain_plans_the_page_on_the_scan_executor(self) -> None:
+        scan_executor = BoundedExecutor(max_workers=1, thread_name_prefix='vcf-scan')
+        mock_query_planner = MagicMock()
+        mock_query_planner.plan.side_effect = lambda **kwargs: threading.current_thread().name
+        vcf_file_pagination_service = VcfFilePaginationService(
+            self.mock_filter_vcf_file, query_planner=mock_query_planner, scan_executor=scan_executor
+        )
+        self.mock_filter_vcf_file.run.return_value = []
+
+        page: FilteredVcfRowsPage = vcf_file_pagination_service.apply(
+            vcf_file_path='test.vcf', filter_id='rs1', explain=True
+        )
+        scan_executor.shutdown()
+
+        assert page.plan.startswith('vcf-scan')
+
+    def test_apply_raise_overload_error_when_the_scans_are_over_budget(self, setup_vcf_unzipped_file) -> None:
+        admission_controller = AdmissionController(max_bytes=1, max_wait=0)
+        vcf_file_pagination_service = VcfFilePaginationService(
+            self.mock_filter_vcf_file, page_cache=VcfPageCache(), admission_controller=admission_controller
+        )
+        self.mock_filter_vcf_file.run.return_value = [
+            VcfRow(chrom='chr1', pos=1, identifier='rs1', ref='T', alt='G'),
+        ]
+        vcf_file_pagination_service.apply(vcf_file_path='test.vcf', filter_id='rs1')
+
+        with admission_controller.admit(1):
+            with pytest.raises(OverloadError):
+                vcf_file_pagination_service.apply(vcf_file_path='test.vcf', filter_id='rs1', page_index=1)
+            # The cached pages bypass the admission.
+            assert vcf_file_pagination_service.apply(vcf_file_path='test.vcf', filter_id='rs1').total == 1
+
+    def test_apply_through_single_flight(self) -> None:
+        vcf_filtered_rows: List[VcfRow] = [
+            VcfRow(chrom='chr7', pos=24966446, identifier='rs123', ref='C', alt='A'),
+        ]
+        single_flight = SingleFlight()
+        vcf_file_pagination_service = VcfFilePaginationService(
+            self.mock_filter_vcf_file, single_flight=single_flight
+        )
+        self.mock_filter_vcf_file.run.return_value = vcf_filtered_rows
+
+        page: FilteredVcfRowsPage = vcf_file_pagination_service.apply(
+            vcf_file_path='/a/b/c/test.vcf',
+            filter_id='rs123',
+            page_size=10,
+            page_index=0
+        )
+
+        assert page.results == vcf_filtered_rows
+        assert page.total == 1
+        assert single_flight.in_flight() == 0
+        self.mock_filter_vcf_file.run.assert_called_once()
+
+    def test_apply_returns_the_cached_page_and_prefetches_the_next_page(self, setup_vcf_unzipped_file) -> None:
+        vcf_filtered_rows: List[VcfRow] = [
+            VcfRow(chrom='chr1', pos=1, identifier='rs1', ref='T', alt='G'),
+        ]
+        page_cache = VcfPageCache()
+        prefetcher = NextPagePrefetcher(page_cache=page_cache)
+        vcf_file_pagination_service = VcfFilePaginationService(
+            self.mock_filter_vcf_file, page_cache=page_cache, prefetcher=prefetcher
         )
+        self.mock_filter_vcf_file.run.return_value = vcf_filtered_rows
+
+        for page_index in [0, 1, 1]:
+            vcf_file_pagination_service.apply(
+                vcf_file_path='test.vcf',
+                filter_id='rs1',
+                page_size=1,
+                page_index=page_index
+            )
+        prefetcher.shutdown()
+
+        # Page 0 and page 1 are scanned, page 1 is then served from the cache and page 2 is prefetched.
+        assert [call.kwargs['page_index'] for call in self.mock_filter_vcf_file.run.call_args_list] == [0, 1, 2]
+        assert len(page_cache) == 3
+
+    def test_apply_does_not_return_a_cached_page_after_the_delta_log_changes(self, setup_vcf_unzipped_file) -> None:
+        vcf_file_pagination_service = VcfFilePaginationService(self.mock_filter_vcf_file, page_cache=VcfPageCache())
+        self.mock_filter_vcf_file.run.return_value = [
+            VcfRow(chrom='chr1', pos=1, identifier='rs1', ref='T', alt='G'),
+        ]
+
+        vcf_file_pagination_service.apply(vcf_file_path='test.vcf', filter_id='rs1')
+        with open('test.vcf' + VcfDeltaLog.SUFFIX, 'wb') as file:
+            file.write(b'0\t0\t0\n')
+        vcf_file_pagination_service.apply(vcf_file_path='test.vcf', filter_id='rs1')
+
+        assert self.mock_filter_vcf_file.run.call_count == 2
 
 
 class TestAppendDataToVcfFileService:
@@ -182,6 +340,22 @@ class TestAppendDataToVcfFileService:
             vcf_rows=vcf_filtered_rows,
         )
 
+    def test_apply_through_the_group_commit(self) -> None:
+        vcf_rows: List[VcfRow] = [VcfRow(chrom='chr7', pos=24966446, identifier='rs123', ref='C', alt='A')]
+        append_data_to_vcf_file_service = AppendDataToVcfFileService(
+            self.mock_append_to_vcf_file, group_commit=GroupCommit(max_delay=0)
+        )
+
+        assert append_data_to_vcf_file_service.apply(
+            vcf_file_path='/a/b/c/test.vcf',
+            vcf_rows=vcf_rows,
+        ) == AppendRowsExecutionArtifact(total_rows_added=1, file_path='/a/b/c/test.vcf')
+
+        self.mock_append_to_vcf_file.run.assert_called_once_with(
+            vcf_file_path='/a/b/c/test.vcf',
+            vcf_rows=vcf_rows,
+        )
+
 
 class TestFilterOutRowsByIdService:
 
@@ -256,6 +430,21 @@ class TestFilterOutRowsByIdService:
             filter_id=filter_id,
         )
 
+    def test_apply_records_a_tombstone_in_the_delta_log(self) -> None:
+        mock_record_vcf_file_mutations = MagicMock()
+        mock_record_vcf_file_mutations.run.return_value = [2]
+        filter_out_rows_by_id_service = FilterOutRowsByIdService(
+            self.mock_filter_out_rows_by_id, record_vcf_file_mutations=mock_record_vcf_file_mutations
+        )
+
+        filter_out_rows_by_id_service.apply(vcf_file_path='/a/b/c/test.vcf', filter_id='rs62635286')
+
+        mock_record_vcf_file_mutations.run.assert_called_once_with(
+            vcf_file_path='/a/b/c/test.vcf',
+            mutations=[VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs62635286')],
+        )
+        self.mock_filter_out_rows_by_id.run.assert_not_called()
+
 
 class TestVcfFileUpdateByIdService:
 
@@ -371,3 +560,314 @@ class TestVcfFileUpdateByIdService:
             data=data
         )
 
+
+class TestVcfFileBatchMutationService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_apply_vcf_file_mutations = MagicMock()
+
+        self.vcf_file_batch_mutation_service = VcfFileBatchMutationService(self.mock_apply_vcf_file_mutations)
+
+    def test_apply_with_invalid_arguments(self) -> None:
+        with pytest.raises(MultipleVCFHandlerBaseError) as ex:
+            self.vcf_file_batch_mutation_service.apply(vcf_file_path=None, mutations=[])
+
+        assert [error.message for error in ex.value.errors] == [
+            'The VCF file path is required.',
+            'At least one mutation is required.',
+        ]
+        self.mock_apply_vcf_file_mutations.run.assert_not_called()
+
+    def test_apply(self) -> None:
+        mutations: List[VcfMutation] = [
+            VcfMutation(operation=VcfMutationOperation.delete, filter_id='rs3'),
+            VcfMutation(
+                operation=VcfMutationOperation.append,
+                rows=[VcfRow(chrom="chr22", pos=1000, alt="T", ref="G", identifier='rs12')],
+            ),
+        ]
+        self.mock_apply_vcf_file_mutations.run.return_value = [2, 1]
+
+        assert self.vcf_file_batch_mutation_service.apply(
+            vcf_file_path='/a/b/c/test.vcf',
+            mutations=mutations,
+        ) == BatchMutationExecutionArtifact(
+            file_path='/a/b/c/test.vcf',
+            results=[
+                VcfMutationResult(operation=VcfMutationOperation.delete, filter_id='rs3', total_rows=2),
+                VcfMutationResult(operation=VcfMutationOperation.append, filter_id=None, total_rows=1),
+            ],
+        )
+
+        self.mock_apply_vcf_file_mutations.run.assert_called_once_with(
+            vcf_file_path='/a/b/c/test.vcf',
+            mutations=mutations,
+        )
+
+
+class TestVcfFileHeaderService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_read_vcf_file_header = MagicMock()
+
+        self.vcf_file_header_service = VcfFileHeaderService(self.mock_read_vcf_file_header)
+
+    def test_apply_with_invalid_arguments(self) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            self.vcf_file_header_service.apply(vcf_file_path=None)
+        assert ex.value.message == 'The VCF file path is required.'
+
+    def test_apply(self) -> None:
+        assert self.vcf_file_header_service.apply(
+            vcf_file_path='/a/b/c/test.vcf'
+        ) == self.mock_read_vcf_file_header.run.return_value
+
+        self.mock_read_vcf_file_header.run.assert_called_once_with(vcf_file_path='/a/b/c/test.vcf')
+
+
+class TestExportVcfFileService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_export_vcf_file = MagicMock()
+
+        self.export_vcf_file_service = ExportVcfFileService(self.mock_export_vcf_file)
+
+    @pytest.mark.parametrize('vcf_file_path, filter_id, region, compression, errors', [
+        # when_vcf_file_path_is_none
+        (None, 'rs1', None, 'none', ['The VCF file path is required.']),
+        # when_no_criteria_are_provided
+        ('/a/b/c/test.vcf', None, None, 'none', ['An id, a region or a filter status is required.']),
+        # when_compression_is_not_supported
+        ('/a/b/c/test.vcf', 'rs1', None, 'rar', ["The compression must be one of ['none', 'gzip', 'bgzf', 'zstd']."]),
+        # when_region_is_not_valid
+        ('/a/b/c/test.vcf', None, 'chr1:20-10', 'none', ['The region chr1:20-10 ends before it starts.']),
+    ])
+    def test_apply_with_invalid_arguments(
+            self,
+            vcf_file_path: Optional[str],
+            filter_id: Optional[str],
+            region: Optional[str],
+            compression: str,
+            errors: List[str],
+    ) -> None:
+        with pytest.raises(MultipleVCFHandlerBaseError) as ex:
+            self.export_vcf_file_service.apply(
+                vcf_file_path=vcf_file_path,
+                filter_id=filter_id,
+                region=region,
+                compression=compression,
+            )
+        assert [error.message for error in ex.value.errors] == errors
+
+    def test_apply(self) -> None:
+        vcf_file_export: VcfFileExport = self.export_vcf_file_service.apply(
+            vcf_file_path='/a/b/c/test.vcf.gz',
+            region='chr1:1,000-2,000',
+            compression='bgzf',
+        )
+
+        assert vcf_file_export == VcfFileExport(
+            file_name='test.vcf.gz',
+            media_type='application/gzip',
+            chunks=self.mock_export_vcf_file.run.return_value,
+        )
+        self.mock_export_vcf_file.run.assert_called_once_with(
+            vcf_file_path='/a/b/c/test.vcf.gz',
+            filter_id=None,
+            region=VcfRegion(chrom='chr1', start=1000, end=2000),
+            filter_status=None,
+            compression=VcfCompression.bgzf,
+        )
+
+    def test_apply_admits_the_export_until_it_is_streamed(self, setup_vcf_unzipped_file) -> None:
+        admission_controller = AdmissionController(max_bytes=1, max_wait=0)
+        export_vcf_file_service = ExportVcfFileService(
+            self.mock_export_vcf_file, admission_controller=admission_controller
+        )
+        self.mock_export_vcf_file.run.return_value = iter([b'chunk'])
+
+        vcf_file_export: VcfFileExport = export_vcf_file_service.apply(vcf_file_path='test.vcf', filter_id='rs1')
+
+        assert admission_controller.in_flight_bytes() == os.path.getsize('test.vcf')
+        with pytest.raises(OverloadError):
+            export_vcf_file_service.apply(vcf_file_path='test.vcf', filter_id='rs1')
+        assert list(vcf_file_export.chunks) == [b'chunk']
+        assert admission_controller.in_flight_bytes() == 0
+
+
+class TestAsyncFilterOutRowsByIdService:
+
+    @pytest.fixture(autouse=True)
+    def setup(self) -> None:
+        self.mock_filter_out_rows_by_id = MagicMock()
+        self.mock_store_vcf_job = MagicMock()
+
+        self.async_filter_out_rows_by_id_service = AsyncFilterOutRowsByIdService(
+            self.mock_filter_out_rows_by_id, store_vcf_job=self.mock_store_vcf_job
+        )
+
+    def test_apply_with_invalid_arguments(self) -> None:
+        with pytest.raises(MultipleVCFHandlerBaseError) as ex:
+            self.async_filter_out_rows_by_id_service.apply(vcf_file_path=None, filter_id='rs62635286')
+        assert ex.value.errors[0].message == 'The VCF file path is required.'
+
+    def test_apply_returns_the_pending_job(self) -> None:
+        self.mock_filter_out_rows_by_id.run.delay.return_value.id = 'job-1'
+
+        assert self.async_filter_out_rows_by_id_service.apply(
+            vcf_file_path='/a/b/c/test.vcf',
+            filter_id='rs62635286',
+        ) == VcfJob(job_id='job-1', state=VcfJobState.pending, operation=VcfJobOperation.delete)
+
+        self.mock_filter_out_rows_by_id.run.delay.assert_called_once_with(
+            vcf_file_path='/a/b/c/test.vcf',
+            filter_id='rs62635286',
+        )
+
+    def test_apply_stores_the_job_of_a_tombstone_recorded_in_the_delta_log(self) -> None:
+        mock_record_vcf_file_mutations = MagicMock()
+        mock_record_vcf_file_mutations.run.return_value = [2]
+        async_filter_out_rows_by_id_service = AsyncFilterOutRowsByIdService(
+            self.mock_filter_out_rows_by_id,
+            record_vcf_file_mutations=mock_record_vcf_file_mutations,
+            store_vcf_job=self.mock_store_vcf_job,
+        )
+
+        assert async_filter_out_rows_by_id_service.apply(
+            vcf_file_path='/a/b/c/test.vcf',
+            filter_id='rs62635286',
+        ) == self.mock_store_vcf_job.run.return_value
+
+        self.mock_store_vcf_job.run.assert_called_once_with(
+            operation=VcfJobOperation.delete,
+            artifact={'file_path': '/a/b/c/test.vcf', 'total_rows_deleted': 2},
+            rows_processed=2,
+        )
+        self.mock_filter_out_rows_by_id.run.delay.assert_not_called()
+
+    def test_apply_raise_vcf_no_data_deleted_error_when_the_delta_log_has_no_rows_to_delete(self) -> None:
+        mock_record_vcf_file_mutations = MagicMock()
+        mock_record_vcf_file_mutations.run.return_value = [0]
+        async_filter_out_rows_by_id_service = AsyncFilterOutRowsByIdService(
+            self.mock_filter_out_rows_by_id,
+            record_vcf_file_mutations=mock_record_vcf_file_mutations,
+            store_vcf_job=self.mock_store_vcf_job,
+        )
+
+        with pytest.raises(VcfNoDataDeletedError):
+            async_filter_out_rows_by_id_service.apply(vcf_file_path='/a/b/c/test.vcf', filter_id='rs62635286')
+        self.mock_store_vcf_job.run.assert_not_called()
+
+
+class TestAsyncExportVcfFileService:
+
+    def test_apply_exports_next_to_the_file(self) -> None:
+        mock_export_vcf_file = MagicMock()
+
+        vcf_job: VcfJob = AsyncExportVcfFileService(mock_export_vcf_file).apply(
+            vcf_file_path='/a/b/c/test.vcf', filter_id='rs1', compression=VcfCompression.gzip.value
+        )
+
+        assert vcf_job.state == VcfJobState.pending
+        assert vcf_job.operation == VcfJobOperation.export
+        kwargs: dict = mock_export_vcf_file.run.apply_async.call_args[1]
+        assert kwargs['task_id'] == vcf_job.job_id
+        assert kwargs['kwargs']['export_path'] == '/a/b/c/test.{}.vcf.gz'.format(vcf_job.job_id)
+
+    def test_apply_with_invalid_arguments(self) -> None:
+        mock_export_vcf_file = MagicMock()
+
+        with pytest.raises(MultipleVCFHandlerBaseError) as ex:
+            AsyncExportVcfFileService(mock_export_vcf_file).apply(vcf_file_path='/a/b/c/test.vcf')
+        assert ex.value.errors[0].message == 'An id, a region or a filter status is required.'
+        mock_export_vcf_file.run.apply_async.assert_not_called()
+
+
+class TestAsyncConvertVcfFileService:
+
+    def test_apply_converts_next_to_the_file(self) -> None:
+        mock_convert_vcf_file = MagicMock()
+
+        vcf_job: VcfJob = AsyncConvertVcfFileService(mock_convert_vcf_file).apply(
+            vcf_file_path='/a/b/c/test.vcf', compression=VcfCompression.zstd.value
+        )
+
+        assert vcf_job.operation == VcfJobOperation.convert
+        mock_convert_vcf_file.run.delay.assert_called_once_with(
+            vcf_file_path='/a/b/c/test.vcf', converted_path='/a/b/c/test.vcf.zst', compression='zstd'
+        )
+
+    def test_apply_replaces_only_the_vcf_extension(self) -> None:
+        mock_convert_vcf_file = MagicMock()
+
+        AsyncConvertVcfFileService(mock_convert_vcf_file).apply(
+            vcf_file_path='/a/b/c/sample.v2.vcf', compression=VcfCompression.zstd.value
+        )
+
+        mock_convert_vcf_file.run.delay.assert_called_once_with(
+            vcf_file_path='/a/b/c/sample.v2.vcf', converted_path='/a/b/c/sample.v2.vcf.zst', compression='zstd'
+        )
+
+    @pytest.mark.parametrize('vcf_file_path, compression, converted_path', [
+        ('test.vcf.gz', 'none', 'test.vcf'),
+        ('sample.v2.vcf', 'zstd', 'sample.v2.vcf.zst'),
+    ])
+    def test_apply_raise_error_when_the_converted_file_is_another_file(
+            self,
+            tmp_path,
+            vcf_file_path: str,
+            compression: str,
+            converted_path: str,
+    ) -> None:
+        mock_convert_vcf_file = MagicMock()
+        for file_path in (vcf_file_path, converted_path):
+            with (gzip.open if file_path.endswith('.gz') else open)(str(tmp_path / file_path), 'wb') as file:
+                file.write(file_path.encode('utf-8'))
+
+        with pytest.raises(MultipleVCFHandlerBaseError) as ex:
+            AsyncConvertVcfFileService(mock_convert_vcf_file).apply(
+                vcf_file_path=str(tmp_path / vcf_file_path), compression=compression
+            )
+        assert [error.message for error in ex.value.errors] == [
+            'The converted VCF file {} already exists.'.format(tmp_path / converted_path)
+        ]
+        mock_convert_vcf_file.run.delay.assert_not_called()
+        with open(str(tmp_path / converted_path), 'rb') as file:
+            assert file.read() == converted_path.encode('utf-8')
+
+    @pytest.mark.parametrize('vcf_file_path, compression, errors', [
+        (None, 'zstd', ['The VCF file path is required.']),
+        ('/a/b/c/test.vcf', 'rar', ["The compression must be one of ['none', 'gzip', 'bgzf', 'zstd']."]),
+        ('/a/b/c/test.vcf.zst', 'zstd', ['The VCF file is already zstd compressed.']),
+    ])
+    def test_apply_with_invalid_arguments(
+            self,
+            vcf_file_path: Optional[str],
+            compression: str,
+            errors: List[str],
+    ) -> None:
+        mock_convert_vcf_file = MagicMock()
+
+        with pytest.raises(MultipleVCFHandlerBaseError) as ex:
+            AsyncConvertVcfFileService(mock_convert_vcf_file).apply(
+                vcf_file_path=vcf_file_path, compression=compression
+            )
+        assert [error.message for error in ex.value.errors] == errors
+        mock_convert_vcf_file.run.delay.assert_not_called()
+
+
+class TestVcfJobStatusService:
+
+    def test_apply(self) -> None:
+        mock_read_vcf_job = MagicMock()
+
+        assert VcfJobStatusService(mock_read_vcf_job).apply(job_id='job-1') == mock_read_vcf_job.run.return_value
+        mock_read_vcf_job.run.assert_called_once_with(job_id='job-1')
+
+    def test_apply_with_invalid_arguments(self) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            VcfJobStatusService(MagicMock()).apply(job_id=None)
+        assert ex.value.message == 'The job id is required.'
@@ -0,0 +1,109 @@
+import errno
+import os
+from unittest import mock
+
+import pytest
+
+from application.vcf_files.indexes import VcfIdIndex
+from application.vcf_files.models import ByteRangeChange
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.splicing import copy_byte_range, splice_rewrite, patch_in_place
+from application.vcf_files.utils import get_file_version
+
+
+class TestCopyByteRange:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path) -> None:
+        self.source_path = str(tmp_path / 'source')
+        self.destination_path = str(tmp_path / 'destination')
+        with open(self.source_path, 'wb') as file:
+            file.write(b'0123456789' * 1000)
+
+    def copy(self, offset: int, count: int) -> bytes:
+        with open(self.source_path, 'rb') as source, open(self.destination_path, 'wb') as destination:
+            copy_byte_range(source.fileno(), destination.fileno(), offset, count)
+        with open(self.destination_path, 'rb') as file:
+            return file.read()
+
+    def test_copy_byte_range(self) -> None:
+        assert self.copy(5, 12) == b'567890123456'
+
+    @mock.patch('application.vcf_files.splicing.os.copy_file_range', create=True)
+    def test_copy_byte_range_falls_back_to_sendfile(self, mock_copy_file_range) -> None:
+        mock_copy_file_range.side_effect = OSError(errno.EXDEV, 'cross device')
+
+        assert self.copy(0, 9999) == (b'0123456789' * 1000)[:9999]
+
+    @mock.patch('application.vcf_files.splicing.os.sendfile', create=True)
+    @mock.patch('application.vcf_files.splicing.os.copy_file_range', create=True)
+    def test_copy_byte_range_falls_back_to_read_and_write(self, mock_copy_file_range, mock_sendfile) -> None:
+        mock_copy_file_range.side_effect = OSError(errno.ENOSYS, 'not implemented')
+        mock_sendfile.side_effect = OSError(errno.EINVAL, 'invalid')
+
+        assert self.copy(3, 4) == b'3456'
+
+    @mock.patch('application.vcf_files.splicing.os.copy_file_range', create=True)
+    def test_copy_byte_range_raise_unexpected_errors(self, mock_copy_file_range) -> None:
+        mock_copy_file_range.side_effect = OSError(errno.ENOSPC, 'no space left')
+
+        with pytest.raises(OSError):
+            self.copy(0, 10)
+
+
+class TestSpliceRewrite:
+
+    def test_splice_rewrite(self, setup_vcf_unzipped_file) -> None:
+        id_index: VcfIdIndex = VcfIdIndex.build('test.vcf')
+        rs1_rows = id_index.lookup('rs1')
+
+        splice_rewrite(
+            'test.vcf',
+            changes=[
+                ByteRangeChange(offset=rs1_rows[1][0], length=rs1_rows[1][1]),
+                ByteRangeChange(
+                    offset=rs1_rows[0][0], length=rs1_rows[0][1], replacement=b'chr1\t1\trs1\tTT\tG\t1.1\tPASS\ttest\n'
+                ),
+            ],
+            id_index=id_index,
+        )
+
+        with open('test.vcf', 'r') as file:
+            rows = [row for row in file if not row.startswith('#')]
+
+        assert rows[:2] == ['chr1\t1\trs1\tTT\tG\t1.1\tPASS\ttest\n', 'chr3\t3\trs3\tA\tG\t2.2\tPASS\ttest\n']
+        assert len(rows) == 6
+        # The index is moved to the new offsets and stored for the new version of the file.
+        assert id_index.rows == VcfIdIndex.build('test.vcf').rows
+        assert VcfIdIndex.load('test.vcf').is_fresh(get_file_version('test.vcf'))
+
+
+class TestPatchInPlace:
+
+    def test_patch_in_place_raise_invalid_argument_error_when_lengths_differ(self, setup_vcf_unzipped_file) -> None:
+        with pytest.raises(InvalidArgumentError):
+            patch_in_place('test.vcf', changes=[ByteRangeChange(offset=213, length=29, replacement=b'short\n')])
+
+    def test_patch_in_place(self, setup_vcf_unzipped_file) -> None:
+        id_index: VcfIdIndex = VcfIdIndex.build('test.vcf')
+        offset, length = id_index.lookup('rs3')[0]
+        file_version = get_file_version('test.vcf')
+
+        patch_in_place(
+            'test.vcf',
+            changes=[
+                ByteRangeChange(offset=offset, length=length, replacement=b'chr3\t3\trs3\tC\tG\t2.2\tPASS\ttest\n')
+            ],
+            id_index=id_index,
+        )
+
+        with open('test.vcf', 'rb') as file:
+            file.seek(offset)
+            assert file.readline() == b'chr3\t3\trs3\tC\tG\t2.2\tPASS\ttest\n'
+
+        patched_file_version = get_file_version('test.vcf')
+        # The same file is patched, its size stays the same but its version changes.
+        assert patched_file_version.inode == file_version.inode
+        assert patched_file_version.size == file_version.size
+        assert patched_file_version != file_version
+        assert VcfIdIndex.load('test.vcf').rows == id_index.rows
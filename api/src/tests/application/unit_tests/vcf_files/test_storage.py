@@ -0,0 +1,103 @@
+import gzip
+from typing import IO
+
+import pytest
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.compression import BGZF_EOF, StreamCompressor, compress_bgzf_block
+from application.vcf_files import storage
+from application.vcf_files.enums import VcfCompression
+from application.vcf_files.storage import VcfStorageEngine, PlainStorageEngine, open_vcf_file, \
+    register_vcf_storage_engine, storage_engine_for, vcf_file_compression, vcf_storage_engine
+
+
+class TestVcfStorageEngine:
+
+    @pytest.mark.parametrize('vcf_file_path, compression', [
+        ('test.vcf', VcfCompression.none),
+        ('missing.vcf.gz', VcfCompression.gzip),
+        ('missing.vcf.bgz', VcfCompression.bgzf),
+        ('test.vcf.zst', VcfCompression.zstd),
+    ])
+    def test_vcf_file_compression_of_missing_file_by_extension(
+            self,
+            vcf_file_path: str,
+            compression: VcfCompression,
+    ) -> None:
+        assert vcf_file_compression(vcf_file_path) == compression
+
+    @pytest.mark.parametrize('compression', [
+        VcfCompression.none, VcfCompression.gzip, VcfCompression.bgzf, VcfCompression.zstd
+    ])
+    def test_vcf_file_compression_by_magic_bytes_whatever_the_extension(
+            self,
+            tmp_path,
+            compression: VcfCompression,
+    ) -> None:
+        vcf_file_path = str(tmp_path / 'test.vcf')
+        compressor = StreamCompressor(compression=compression)
+        with open(vcf_file_path, 'wb') as file:
+            file.write(compressor.compress(b'##fileformat=VCFv4.2\nchr1\t1\trs1\tT\tG\n') + compressor.flush())
+
+        assert vcf_file_compression(vcf_file_path) == compression
+        with open_vcf_file(vcf_file_path) as file:
+            assert file.read() == b'##fileformat=VCFv4.2\nchr1\t1\trs1\tT\tG\n'
+
+    def test_vcf_file_compression_of_bgzf_file(self, tmp_path) -> None:
+        vcf_file_path = str(tmp_path / 'test.vcf.gz')
+        with open(vcf_file_path, 'wb') as file:
+            file.write(compress_bgzf_block(b'data') + BGZF_EOF)
+
+        assert vcf_file_compression(vcf_file_path) == VcfCompression.bgzf
+
+    def test_vcf_file_compression_raise_invalid_argument_error(self) -> None:
+        with pytest.raises(InvalidArgumentError) as ex:
+            vcf_file_compression('test.vcf.bz2')
+        assert ex.value.message == 'The compression bzip2 of test.vcf.bz2 is not supported.'
+
+    def test_vcf_storage_engine_raise_invalid_argument_error_for_unknown_format(self, tmp_path) -> None:
+        vcf_file_path = str(tmp_path / 'test.vcf')
+        with open(vcf_file_path, 'wb') as file:
+            file.write(b'\xfd7zXZ\x00\x00')
+
+        with pytest.raises(InvalidArgumentError) as ex:
+            vcf_storage_engine(vcf_file_path)
+        assert ex.value.message == 'The format of {} is not supported.'.format(vcf_file_path)
+
+    def test_compress_appended_rows_of_gzip_file(self, tmp_path) -> None:
+        vcf_file_path = str(tmp_path / 'test.vcf.gz')
+        with gzip.open(vcf_file_path, 'wb') as file:
+            file.write(b'chr1\t1\trs1\tT\tG\n')
+
+        engine: VcfStorageEngine = vcf_storage_engine(vcf_file_path)
+        appended: bytes = engine.compress_appended_rows(vcf_file_path, b'chr2\t2\trs2\tT\tG\n')
+        with open(vcf_file_path, 'ab') as file:
+            file.write(appended)
+
+        with open_vcf_file(vcf_file_path) as file:
+            assert file.read() == b'chr1\t1\trs1\tT\tG\nchr2\t2\trs2\tT\tG\n'
+
+    def test_register_vcf_storage_engine(self, tmp_path, monkeypatch) -> None:
+        class SkipFirstByteStorageEngine(PlainStorageEngine):
+
+            def open(self, vcf_file_path: str) -> IO[bytes]:
+                file: IO[bytes] = super().open(vcf_file_path)
+                file.read(1)
+                return file
+
+        monkeypatch.setattr(storage, '_VCF_STORAGE_ENGINES', list(storage._VCF_STORAGE_ENGINES))
+        vcf_file_path = str(tmp_path / 'test.vcf')
+        with open(vcf_file_path, 'wb') as file:
+            file.write(b'##fileformat=VCFv4.2\n')
+
+        register_vcf_storage_engine(SkipFirstByteStorageEngine())
+
+        # It replaces the engine of the same compression.
+        assert isinstance(storage_engine_for(VcfCompression.none), SkipFirstByteStorageEngine)
+        assert isinstance(vcf_storage_engine(vcf_file_path), SkipFirstByteStorageEngine)
+        with open_vcf_file(vcf_file_path) as file:
+            assert file.read() == b'#fileformat=VCFv4.2\n'
+
+    def test_register_vcf_storage_engine_raise_invalid_argument_error(self) -> None:
+        with pytest.raises(InvalidArgumentError):
+            register_vcf_storage_engine(VcfStorageEngine())
@@ -0,0 +1,78 @@
+import os
+import stat
+
+import pytest
+
+from application.infrastructure.error.errors import InvalidArgumentError
+from application.vcf_files.models import VcfRegion
+from application.vcf_files.utils import atomic_rewrite, converted_vcf_file_path, get_file_version, parse_region
+
+
+class TestGetFileVersion:
+
+    def test_get_file_version_of_missing_file(self) -> None:
+        assert get_file_version('missing.vcf') is None
+
+    def test_get_file_version_changes_on_rewrite(self, setup_vcf_unzipped_file) -> None:
+        file_version = get_file_version('test.vcf')
+
+        with atomic_rewrite('test.vcf') as file:
+            file.write(b'#CHROM\tPOS\tID\tREF\tALT\n')
+
+        assert get_file_version('test.vcf') != file_version
+
+
+class TestParseRegion:
+
+    @pytest.mark.parametrize('region, vcf_region', [
+        ('chr1', VcfRegion(chrom='chr1')),
+        ('chr1:1000', VcfRegion(chrom='chr1', start=1000, end=1000)),
+        ('chrX:1,000-2,000', VcfRegion(chrom='chrX', start=1000, end=2000)),
+    ])
+    def test_parse_region(self, region: str, vcf_region: VcfRegion) -> None:
+        assert parse_region(region) == vcf_region
+
+    @pytest.mark.parametrize('region', ['', 'chr1:', 'chr1:,', 'chr1:1-,', 'chr1:a-b', 'chr1:20-10'])
+    def test_parse_region_raise_invalid_argument_error(self, region: str) -> None:
+        with pytest.raises(InvalidArgumentError):
+            parse_region(region)
+
+
+class TestConvertedVcfFilePath:
+
+    @pytest.mark.parametrize('vcf_file_path, extension, converted_path', [
+        ('/a/test.vcf.gz', '.vcf', '/a/test.vcf'),
+        ('/a/test.vcf', '.vcf.zst', '/a/test.vcf.zst'),
+        ('/a/sample.v2.vcf', '.vcf.zst', '/a/sample.v2.vcf.zst'),
+        ('/a/sample.v2.vcf.bgz', '.vcf.gz', '/a/sample.v2.vcf.gz'),
+        ('/a/sample.v2', '.vcf.gz', '/a/sample.v2.vcf.gz'),
+    ])
+    def test_converted_vcf_file_path(self, vcf_file_path: str, extension: str, converted_path: str) -> None:
+        assert converted_vcf_file_path(vcf_file_path, extension) == converted_path
+
+
+class TestAtomicRewrite:
+
+    def test_atomic_rewrite_replaces_the_file_and_keeps_its_mode(self, setup_vcf_unzipped_file) -> None:
+        os.chmod('test.vcf', 0o640)
+
+        with atomic_rewrite('test.vcf', mode='w') as file:
+            file.write('#CHROM\tPOS\tID\tREF\tALT\n')
+
+        with open('test.vcf', 'r') as file:
+            assert file.read() == '#CHROM\tPOS\tID\tREF\tALT\n'
+        assert stat.S_IMODE(os.stat('test.vcf').st_mode) == 0o640
+        assert not [name for name in os.listdir('.') if name.startswith('.test.vcf.')]
+
+    def test_atomic_rewrite_leaves_the_file_untouched_on_error(self, setup_vcf_unzipped_file) -> None:
+        with open('test.vcf', 'rb') as file:
+            contents: bytes = file.read()
+
+        with pytest.raises(RuntimeError):
+            with atomic_rewrite('test.vcf') as file:
+                file.write(b'partial')
+                raise RuntimeError('crash in the middle of the rewrite')
+
+        with open('test.vcf', 'rb') as file:
+            assert file.read() == contents
+        assert not [name for name in os.listdir('.') if name.startswith('.test.vcf.')]
@@ -1,7 +1,11 @@
+import glob
 import gzip
 import os
 import pytest
 
+from application.vcf_files.compression import StreamCompressor
+from application.vcf_files.enums import VcfCompression
+
 
 @pytest.fixture
 def setup_vcf_unzipped_file() -> None:
@@ -27,6 +31,10 @@ def setup_vcf_unzipped_file() -> None:
     yield
 
     os.remove("test.vcf")
+    # Remove the sidecar files that the operations create next to the file.
+    for sidecar in glob.glob('test.vcf.*'):
+        if sidecar != 'test.vcf.gz':
+            os.remove(sidecar)
 
 
 @pytest.fixture
@@ -51,3 +59,31 @@ def setup_vcf_gzip_file() -> None:
     yield
 
     os.remove("test.vcf.gz")
+    for sidecar in glob.glob('test.vcf.gz.*'):
+        os.remove(sidecar)
+
+
+@pytest.fixture
+def setup_vcf_zstd_file() -> None:
+    """
+    Sets up a fake vcf zst file, a seekable zstd file, before test and removes it after.
+    """
+    byte_rows = [
+        b'##fileformat=VCFv4.2\n',
+        b'##reference=/ref/genomes/hg19/hg19.fa\n',
+        b'#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tNA12877 single 20180302\n',
+        b'chr1\t1\trs1\tT\tG\t1.1\tPASS\ttest\n',
+        b'chr2\t2\trs1\tT\tG\t1.1\tPASS\ttest\n',
+        b'chr3\t3\trs3\tA\tG\t2.2\tPASS\ttest\n',
+        b'chr4\t4\trs4\tCAG\tC\t3.3\tPASS\ttest\n'
+    ]
+
+    compressor = StreamCompressor(VcfCompression.zstd)
+    with open('test.vcf.zst', 'wb') as file:
+        file.write(compressor.compress(b''.join(byte_rows)) + compressor.flush())
+
+    yield
+
+    os.remove("test.vcf.zst")
+    for sidecar in glob.glob('test.vcf.zst.*'):
+        os.remove(sidecar)